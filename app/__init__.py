@@ -1,12 +1,28 @@
+import importlib
 import os
-from flask import Flask
+import uuid
 from dotenv import load_dotenv
-from app.extensions import db, migrate  # ✅ Extensões centralizadas
 
 load_dotenv()
 
+# Registro de módulos (blueprints): (módulo, atributo, prefixo).
+# Os módulos são importados só dentro de create_app, e cada um deles adia
+# dependências pesadas (openai, PyPDF2, python-docx) até o primeiro uso.
+BLUEPRINTS = [
+    ("app.modules.radar.blueprint", "radar_bp", "/radar"),
+    ("app.modules.reports.routes", "reports_bp", "/reports"),
+    ("app.modules.audit.routes", "audit_bp", "/audit"),
+    ("app.modules.bridge.blueprint", "bridge_bp", "/bridge"),
+    ("app.modules.admin.routes", "admin_bp", "/admin"),
+    ("app.modules.manus.routes", "manus_bp", "/manus"),
+    ("app.modules.validator.routes", "validator_bp", "/validator"),  # ✅ novo módulo IA
+]
+
+
+def create_app(config=None):
+    from flask import Flask
+    from app.extensions import db, migrate  # ✅ Extensões centralizadas
 
-def create_app():
     app = Flask(__name__)
 
     # 🔧 Garante que o banco fique na raiz do projeto (não em /instance)
@@ -14,26 +30,42 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///compliance.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Sobrescritas opcionais (ex.: banco em memória nos testes)
+    if config:
+        app.config.update(config)
+
     # Inicializa extensões
     db.init_app(app)
     migrate.init_app(app, db)
 
     # Importa e registra todos os módulos (blueprints)
-    from app.modules.radar.routes import radar_bp
-    from app.modules.reports.routes import reports_bp
-    from app.modules.audit.routes import audit_bp
-    from app.modules.bridge.routes import bridge_bp
-    from app.modules.admin.routes import admin_bp
-    from app.modules.manus.routes import manus_bp
-    from app.modules.validator.routes import validator_bp  # ✅ novo módulo IA
-
-    app.register_blueprint(radar_bp, url_prefix="/radar")
-    app.register_blueprint(reports_bp, url_prefix="/reports")
-    app.register_blueprint(audit_bp, url_prefix="/audit")
-    app.register_blueprint(bridge_bp, url_prefix="/bridge")
-    app.register_blueprint(admin_bp, url_prefix="/admin")
-    app.register_blueprint(manus_bp, url_prefix="/manus")
-    app.register_blueprint(validator_bp, url_prefix="/validator")
+    for module_path, attr, url_prefix in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_path), attr)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+    # Atribui as chamadas LLM de cada requisição no ledger de uso
+    @app.before_request
+    def open_ledger_context():
+        from flask import g, request
+        from src.ai.core.llm.ledger import ledger_context
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g.ledger_context = ledger_context(
+            request_id=request.headers.get("X-Request-ID") or uuid.uuid4().hex,
+            customer=request.headers.get("X-Customer-ID"),
+            endpoint=f"{request.method} {rule}",
+        )
+        g.ledger_context.__enter__()
+
+    @app.teardown_request
+    def close_ledger_context(exc=None):
+        from flask import g
+        context = g.pop("ledger_context", None)
+        if context is not None:
+            context.__exit__(None, None, None)
+
+    # Perfis de amostragem sob demanda (X-Profile ou QIVO_PROFILE_RATE)
+    from src.ai.core.profiling import init_flask
+    init_flask(app)
 
     # ✅ define a rota raiz **depois de criar o app**
     @app.route("/")
@@ -44,8 +76,41 @@ def create_app():
             "database": app.config["SQLALCHEMY_DATABASE_URI"]
         }
 
+    @app.route("/health")
+    def health():
+        """Health check leve: não inicializa engines nem clientes de IA"""
+        return {
+            "ok": True,
+            "status": "healthy",
+            "openai_configured": bool(os.getenv("OPENAI_API_KEY"))
+        }
+
+    @app.route("/metrics")
+    def metrics():
+        """Métricas do processo no formato do Prometheus"""
+        from src.ai.core.telemetry import CONTENT_TYPE, render_metrics
+        return render_metrics(), 200, {"Content-Type": CONTENT_TYPE}
+
     return app
 
 
-# ✅ cria a instância principal do Flask app
-app = create_app()
+_app = None
+
+
+def __getattr__(name):
+    """
+    Acesso preguiçoso a `app`, `db` e `migrate`.
+
+    `from app import app` (wsgi.py, app/main.py) cria a instância Flask na
+    primeira vez; importar qualquer submódulo de `app` (ex.: pelo FastAPI em
+    main_ai.py) não paga mais a montagem do app Flask inteiro.
+    """
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    if name in ("db", "migrate"):
+        from app import extensions
+        return getattr(extensions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,69 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request
 
 admin_bp = Blueprint("admin", __name__)
 
+USAGE_FILTERS = ("customer", "endpoint", "model", "norm_pair", "job", "site")
+
 @admin_bp.route("/status")
 def admin_status():
     return jsonify({
         "module": "Admin Core",
         "status": "ativo ✅"
     })
+
+@admin_bp.route("/llm/usage")
+def llm_usage():
+    """
+    Uso de LLM (chamadas, tokens e custo estimado) agrupado pelo ledger
+
+    Query: group_by=day,endpoint,model | since/until=AAAA-MM-DD |
+    filtros customer, endpoint, model, norm_pair, job, site
+    """
+    from src.ai.core.llm.ledger import get_ledger
+
+    group_by = [c.strip() for c in request.args.get("group_by", "day,endpoint,model").split(",") if c.strip()]
+    filters = {name: request.args[name] for name in USAGE_FILTERS if request.args.get(name)}
+    since, until = request.args.get("since"), request.args.get("until")
+    ledger = get_ledger()
+    try:
+        rows = ledger.rollup(group_by=group_by, since=since, until=until, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    totals = ledger.rollup(group_by=(), since=since, until=until, **filters)
+    return jsonify({
+        "group_by": group_by,
+        "rows": rows,
+        "totals": totals[0] if totals else {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "total_tokens": 0, "cost_usd": 0.0, "requests": 0
+        }
+    })
+
+@admin_bp.route("/profiling", methods=["GET", "POST"])
+def profiling_settings():
+    """Configuração do profiler; POST {"rate": 0.05} perfila 5% do tráfego"""
+    from src.ai.core.profiling import get_profiler
+
+    profiler = get_profiler()
+    if request.method == "POST":
+        try:
+            profiler.set_rate((request.get_json(silent=True) or {}).get("rate"))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(profiler.settings())
+
+@admin_bp.route("/profiles")
+def list_profiles():
+    """Perfis no buffer, do mais recente ao mais antigo"""
+    from src.ai.core.profiling import get_profiler
+    return jsonify({"profiles": get_profiler().store.list()})
+
+@admin_bp.route("/profiles/<profile_id>")
+def get_profile(profile_id):
+    """Perfil no formato folded (flamegraph.pl, speedscope)"""
+    from src.ai.core.profiling import get_profiler, to_folded
+
+    profile = get_profiler().store.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    return Response(to_folded(profile), mimetype="text/plain")
@@ -0,0 +1,20 @@
+"""
+QIVO Intelligence Layer - Bridge AI (Flask)
+Blueprint de compatibilidade registrado em app/__init__.py
+
+Mantido fora de routes.py para que o app Flask não importe FastAPI nem o
+engine (e o cliente OpenAI) só para expor o status do módulo.
+"""
+
+from flask import Blueprint, jsonify
+
+bridge_bp = Blueprint("bridge", __name__)
+
+@bridge_bp.route("/status")
+def bridge_status():
+    """Endpoint Flask para compatibilidade"""
+    return jsonify({
+        "module": "Bridge AI",
+        "status": "ativo ✅",
+        "api": "FastAPI em /api/bridge/*"
+    })
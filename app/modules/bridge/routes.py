@@ -3,18 +3,27 @@ QIVO Intelligence Layer - Bridge AI Routes
 Endpoints FastAPI para tradução normativa
 """
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Dict, Any
+import asyncio
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, Literal, Optional
 
 from app.modules.bridge.schemas import (
     BridgeRequest,
     BridgeResponse,
+    NormClassificationRequest,
     NormComparisonRequest,
     NormComparisonResponse,
+    NormType,
     SupportedNormsResponse
 )
 from src.ai.core.bridge import BridgeAI
+from src.ai.core.llm import STREAM_MEDIA_TYPES, encode_event
 
 
 router = APIRouter(prefix="/api/bridge", tags=["Bridge AI"])
@@ -32,7 +41,10 @@ def get_bridge():
 
 
 @router.post("/translate", response_model=BridgeResponse)
-async def translate_normative(request: BridgeRequest):
+async def translate_normative(
+    request: BridgeRequest,
+    stream: Optional[Literal['sse', 'ndjson']] = None
+):
     """
     Traduz texto técnico entre normas regulatórias
     
@@ -48,6 +60,9 @@ async def translate_normative(request: BridgeRequest):
         source_norm: Norma de origem
         target_norm: Norma de destino
         explain: Se True, retorna justificativa
+        stream: 'sse' ou 'ndjson' (query string) para receber o texto
+            traduzido à medida que é gerado; o último evento ("result")
+            traz o mesmo conteúdo da resposta sem streaming
         
     Returns:
         BridgeResponse com texto traduzido e metadados
@@ -58,6 +73,18 @@ async def translate_normative(request: BridgeRequest):
     try:
         ai = get_bridge()
         
+        if stream:
+            events = ai.translate_normative_stream(
+                text=request.text,
+                source_norm=request.source_norm,
+                target_norm=request.target_norm,
+                explain=request.explain
+            )
+            return StreamingResponse(
+                (encode_event(event, stream) async for event in events),
+                media_type=STREAM_MEDIA_TYPES[stream]
+            )
+        
         result = await ai.translate_normative(
             text=request.text,
             source_norm=request.source_norm,
@@ -83,6 +110,99 @@ async def translate_normative(request: BridgeRequest):
         raise HTTPException(status_code=500, detail=f"Erro no processamento: {str(e)}")
 
 
+@router.post("/translate/document")
+async def translate_document(
+    file: UploadFile = File(...),
+    source_norm: NormType = Form(...),
+    target_norm: NormType = Form(...),
+    concurrency: int = Form(4)
+):
+    """
+    Traduz um documento inteiro entre normas (sem o limite de 10000 caracteres)
+    
+    Formatos: TXT/MD (lidos em streaming), PDF e DOCX (texto extraído antes).
+    
+    Returns:
+        NDJSON: um evento {"event": "progress", ...} por bloco concluído e,
+        ao final, {"event": "result", ...} com o documento traduzido
+    """
+    extension = Path(file.filename or '').suffix.lower()
+    supported = {'.txt', '.md', '.pdf', '.docx', '.doc'}
+    if extension not in supported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato não suportado: {extension}. Use: {', '.join(sorted(supported))}"
+        )
+    if source_norm == target_norm:
+        raise HTTPException(status_code=400, detail="Normas de origem e destino devem ser diferentes")
+    
+    try:
+        ai = get_bridge()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro no processamento: {str(e)}")
+    
+    if extension in {'.txt', '.md'}:
+        source = io.TextIOWrapper(file.file, encoding='utf-8', errors='replace', newline='')
+    else:
+        from src.ai.core.validator.preprocessor import DocumentPreprocessor
+        
+        # Extração sem a limpeza do Validator, que apaga quebras de linha (e seções)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp_file:
+            tmp_file.write(await file.read())
+            tmp_path = tmp_file.name
+        try:
+            preprocessor = DocumentPreprocessor()
+            if extension == '.pdf':
+                source = await preprocessor._extract_pdf(tmp_path)
+            else:
+                source = await preprocessor._extract_docx(tmp_path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            os.unlink(tmp_path)
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def run() -> None:
+        result = await ai.translate_document(
+            source, source_norm, target_norm,
+            concurrency=max(1, min(concurrency, 8)),
+            on_progress=lambda progress: queue.put_nowait({'event': 'progress', **progress})
+        )
+        queue.put_nowait({'event': 'result', **result})
+    
+    async def events():
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await queue.get()
+                yield encode_event(event)
+                if event['event'] == 'result':
+                    break
+        finally:
+            task.cancel()
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES['ndjson'])
+
+
+@router.post("/classify")
+async def classify_norms(request: NormClassificationRequest):
+    """
+    Detecta a norma de cada texto com o classificador local (sem GPT)
+    
+    Returns:
+        Para cada texto: norma mais provável (None se nenhum termo
+        conhecido), probabilidades calibradas por norma e termos encontrados
+    """
+    from datetime import datetime, timezone
+    from src.ai.core.bridge.classifier import get_norm_classifier
+    
+    return {
+        'results': get_norm_classifier().classify_many(request.texts),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+
 @router.post("/compare", response_model=NormComparisonResponse)
 async def compare_norms(request: NormComparisonRequest):
     """
@@ -120,6 +240,40 @@ async def compare_norms(request: NormComparisonRequest):
         raise HTTPException(status_code=500, detail=f"Erro na comparação: {str(e)}")
 
 
+@router.get("/compare/matrix")
+async def comparison_matrix_status():
+    """
+    Estado da matriz pré-computada de comparações entre normas
+    
+    Returns:
+        Entradas por namespace, hits/misses e refreshes em andamento
+    """
+    from datetime import datetime, timezone
+    from src.ai.core.bridge.comparisons import get_comparison_matrix
+    
+    return {
+        **get_comparison_matrix().stats(),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+
+@router.get("/memory")
+async def translation_memory_status():
+    """
+    Estado da memória de tradução por segmento
+    
+    Returns:
+        Segmentos armazenados, hits exatos/fuzzy, misses e hit rate
+    """
+    from datetime import datetime, timezone
+    from src.ai.core.bridge.memory import get_translation_memory
+    
+    return {
+        **get_translation_memory().stats(),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+
 @router.get("/norms", response_model=SupportedNormsResponse)
 async def get_supported_norms():
     """
@@ -148,6 +302,7 @@ async def get_supported_norms():
 async def health_check():
     """Health check do módulo Bridge AI"""
     try:
+        # Não toca no engine: health check não deve importar o cliente OpenAI
         import os
         api_key = os.getenv('OPENAI_API_KEY')
         
@@ -179,7 +334,8 @@ async def get_capabilities():
                 'description': 'Tradução semântica entre normas',
                 'supported_norms': ['ANM', 'JORC', 'NI43-101', 'PERC', 'SAMREC'],
                 'explainability': True,
-                'confidence_scoring': True
+                'confidence_scoring': True,
+                'documents': 'Relatórios inteiros em blocos por seção, com progresso'
             },
             'comparison': {
                 'description': 'Análise comparativa entre normas',
@@ -193,8 +349,12 @@ async def get_capabilities():
             }
         },
         'endpoints': {
-            '/api/bridge/translate': 'POST - Traduz texto entre normas',
+            '/api/bridge/translate': 'POST - Traduz texto entre normas (?stream=sse|ndjson)',
+            '/api/bridge/translate/document': 'POST - Traduz documento inteiro (NDJSON com progresso)',
+            '/api/bridge/classify': 'POST - Detecta a norma de textos (local, em lote)',
             '/api/bridge/compare': 'POST - Compara duas normas',
+            '/api/bridge/compare/matrix': 'GET - Estado da matriz de comparações',
+            '/api/bridge/memory': 'GET - Hit rate da memória de tradução',
             '/api/bridge/norms': 'GET - Lista normas suportadas',
             '/api/bridge/health': 'GET - Status do módulo',
             '/api/bridge/capabilities': 'GET - Capacidades disponíveis'
@@ -206,17 +366,3 @@ async def get_capabilities():
         }
     }
 
-
-# Flask Blueprint para compatibilidade (app/__init__.py ainda usa Flask)
-from flask import Blueprint as FlaskBlueprint, jsonify as flask_jsonify
-
-bridge_bp = FlaskBlueprint("bridge", __name__)
-
-@bridge_bp.route("/status")
-def bridge_status():
-    """Endpoint Flask para compatibilidade"""
-    return flask_jsonify({
-        "module": "Bridge AI",
-        "status": "ativo ✅",
-        "api": "FastAPI em /api/bridge/*"
-    })
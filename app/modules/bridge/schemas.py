@@ -4,7 +4,7 @@ Modelos Pydantic para validação de requests/responses
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Literal, Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any, List
 
 
 # Tipos de normas suportadas
@@ -108,6 +108,43 @@ class BridgeResponse(BaseModel):
         description="Mapeamento termo_origem → termo_destino"
     )
     
+    method: Optional[Literal['glossary', 'memory', 'gpt']] = Field(
+        None,
+        description="Fonte mais cara usada: glossário, memória de tradução ou GPT"
+    )
+    
+    glossary_coverage: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Fração dos termos normativos resolvida pelo glossário"
+    )
+    
+    segments: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="Proveniência de cada segmento (glossary, memory_exact, memory_fuzzy, gpt)"
+    )
+    
+    memory: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Hits e misses da memória de tradução nesta chamada"
+    )
+    
+    usage: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Tokens de prompt e resposta consumidos (prompt_tokens, completion_tokens, total_tokens, calls)"
+    )
+    
+    coalesced: Optional[bool] = Field(
+        None,
+        description="True se aguardou uma tradução idêntica em andamento (usage zerado)"
+    )
+    
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        description="Duração de cada etapa em segundos (resolve, llm, total)"
+    )
+    
     source_metadata: Optional[NormMetadata] = Field(
         None,
         description="Metadados da norma de origem"
@@ -168,6 +205,17 @@ class NormComparisonRequest(BaseModel):
         return v
 
 
+class NormClassificationRequest(BaseModel):
+    """Schema para detecção da norma de um ou mais textos"""
+    
+    texts: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Textos a classificar (1-100)"
+    )
+
+
 class NormComparisonResponse(BaseModel):
     """Schema para resposta de comparação"""
     
@@ -198,6 +246,9 @@ class NormComparisonResponse(BaseModel):
         description="Impacto prático das diferenças"
     )
     
+    usage: Optional[Dict[str, Any]] = Field(None, description="Tokens consumidos (zero se veio do cache)")
+    coalesced: Optional[bool] = Field(None, description="True se aguardou uma comparação idêntica em andamento")
+    
     message: Optional[str] = Field(None, description="Mensagem de erro")
     timestamp: str = Field(..., description="Timestamp ISO 8601")
 
@@ -0,0 +1,57 @@
+"""
+Radar AI - Flask Blueprint
+===========================
+Endpoints Flask de compatibilidade com app/__init__.py.
+
+Mantido fora de routes.py para que o app Flask não importe FastAPI; o
+health check lê os metadados das fontes sem inicializar o RadarEngine.
+
+Author: QIVO Intelligence Platform
+Version: 5.0.0
+Date: 2025-11-01
+"""
+
+import os
+
+from flask import Blueprint, jsonify
+
+radar_bp = Blueprint("radar", __name__)
+
+
+@radar_bp.route("/status", methods=["GET"])
+def radar_status():
+    """Endpoint Flask para compatibilidade com app/__init__.py"""
+    return jsonify({
+        "module": "Radar AI",
+        "status": "ativo ✅",
+        "version": "5.0.0",
+        "features": [
+            "Monitoramento multi-fonte",
+            "Análise GPT-4o",
+            "Classificação de severidade",
+            "Resumos executivos"
+        ]
+    })
+
+
+@radar_bp.route("/health", methods=["GET"])
+def radar_health_flask():
+    """Health check para Flask"""
+    try:
+        from src.ai.core.radar.engine import REGULATORY_SOURCES
+
+        sources = len(REGULATORY_SOURCES)
+        gpt = bool(os.getenv("OPENAI_API_KEY"))
+
+        return jsonify({
+            "module": "Radar AI",
+            "status": "healthy" if (sources == 5 and gpt) else "degraded",
+            "sources_available": sources,
+            "gpt_enabled": gpt
+        })
+    except Exception as e:
+        return jsonify({
+            "module": "Radar AI",
+            "status": "unhealthy",
+            "error": str(e)
+        }), 500
@@ -8,19 +8,12 @@ Version: 5.0.0
 Date: 2025-11-01
 """
 
-import time
+import os
 from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import JSONResponse
 
-# Flask imports para compatibilidade
-try:
-    from flask import Blueprint as FlaskBlueprint, jsonify as flask_jsonify
-    FLASK_AVAILABLE = True
-except ImportError:
-    FLASK_AVAILABLE = False
-
 # Imports locais
 from app.modules.radar.schemas import (
     RadarRequest,
@@ -101,8 +94,6 @@ async def analyze_regulatory_changes(request: RadarRequest):
         HTTPException 400: Requisição inválida
         HTTPException 500: Erro interno
     """
-    start_time = time.time()
-    
     try:
         radar = get_radar()
         
@@ -113,8 +104,9 @@ async def analyze_regulatory_changes(request: RadarRequest):
             summarize=request.summarize
         )
         
-        # Calcula tempo de processamento
-        processing_time = round(time.time() - start_time, 2)
+        # Tempo de processamento: mesmo cronômetro das métricas por etapa
+        timings = result.get("timings") or {}
+        processing_time = round(timings.get("total", 0.0), 2)
         
         # Formata resposta
         response_data = {
@@ -123,7 +115,9 @@ async def analyze_regulatory_changes(request: RadarRequest):
             "sources_monitored": result["sources_monitored"],
             "alerts_count": result["alerts_count"],
             "alerts": result["alerts"],
-            "processing_time": processing_time
+            "processing_time": processing_time,
+            "usage": result.get("usage"),
+            "timings": timings or None
         }
         
         # Adiciona resumo se solicitado
@@ -326,40 +320,11 @@ async def compare_sources(request: ComparisonRequest):
             "compatibility_score": round(compatibility, 2)
         }
         
-        # Análise profunda com GPT se solicitado
+        # Análise profunda com GPT se solicitado (servida da matriz pré-computada)
         if request.deep and radar.client:
             try:
-                import json
-                context = json.dumps({
-                    "source1": {"name": request.source1, **meta1},
-                    "source2": {"name": request.source2, **meta2}
-                }, indent=2, ensure_ascii=False)
-                
-                prompt = f"""Você é um especialista em regulamentação de mineração internacional.
-
-Compare as seguintes normas regulatórias e forneça uma análise detalhada:
-{context}
-
-Inclua:
-- Principais diferenças operacionais
-- Similaridades conceituais
-- Desafios de harmonização
-- Recomendações para empresas que operam sob ambas as normas
-
-Seja técnico e objetivo (2-3 parágrafos)."""
-
-                response = await radar.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "Você é um analista de compliance regulatório."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=600
-                )
-                
-                response_data["analysis"] = response.choices[0].message.content.strip()
-                
+                comparison = await radar.explain_source_difference(request.source1, request.source2)
+                response_data["analysis"] = comparison["analysis"]
             except Exception as e:
                 response_data["analysis"] = f"Erro ao gerar análise GPT: {str(e)}"
         
@@ -389,10 +354,12 @@ async def health_check():
         HealthResponse com status, versão, componentes disponíveis
     """
     try:
-        radar = get_radar()
+        # Lê os metadados direto do módulo: o health check não inicializa o
+        # engine nem o cliente OpenAI
+        from src.ai.core.radar.engine import REGULATORY_SOURCES
         
-        sources_count = len(radar.get_supported_sources())
-        gpt_available = radar.client is not None
+        sources_count = len(REGULATORY_SOURCES)
+        gpt_available = bool(os.getenv("OPENAI_API_KEY"))
         
         # Determina status geral
         if gpt_available and sources_count == 5:
@@ -464,46 +431,3 @@ async def get_capabilities():
             detail=f"Erro ao obter capabilities: {str(e)}"
         )
 
-
-# ============================================
-# FLASK BLUEPRINT (Compatibilidade)
-# ============================================
-
-if FLASK_AVAILABLE:
-    radar_bp = FlaskBlueprint("radar", __name__)
-    
-    @radar_bp.route("/status", methods=["GET"])
-    def radar_status():
-        """Endpoint Flask para compatibilidade com app/__init__.py"""
-        return flask_jsonify({
-            "module": "Radar AI",
-            "status": "ativo ✅",
-            "version": "5.0.0",
-            "features": [
-                "Monitoramento multi-fonte",
-                "Análise GPT-4o",
-                "Classificação de severidade",
-                "Resumos executivos"
-            ]
-        })
-    
-    @radar_bp.route("/health", methods=["GET"])
-    def radar_health_flask():
-        """Health check para Flask"""
-        try:
-            radar = get_radar()
-            sources = len(radar.get_supported_sources())
-            gpt = radar.client is not None
-            
-            return flask_jsonify({
-                "module": "Radar AI",
-                "status": "healthy" if (sources == 5 and gpt) else "degraded",
-                "sources_available": sources,
-                "gpt_enabled": gpt
-            })
-        except Exception as e:
-            return flask_jsonify({
-                "module": "Radar AI",
-                "status": "unhealthy",
-                "error": str(e)
-            }), 500
@@ -129,6 +129,8 @@ class RadarResponse(BaseModel):
     alerts: List[RadarAlert] = Field(..., description="Lista de alertas detectados")
     executive_summary: Optional[str] = Field(None, description="Resumo executivo (se solicitado)")
     processing_time: Optional[float] = Field(None, description="Tempo de processamento (segundos)")
+    usage: Optional[Dict[str, Any]] = Field(None, description="Tokens consumidos pelas chamadas GPT do ciclo")
+    timings: Optional[Dict[str, float]] = Field(None, description="Duração de cada etapa do ciclo (segundos)")
     error: Optional[str] = Field(None, description="Mensagem de erro (se houver)")
     
     model_config = {
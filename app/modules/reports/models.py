@@ -5,6 +5,11 @@ from datetime import datetime
 
 class Report(db.Model):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Índices da paginação por cursor (ver migration 3f7c2a91d4e5)
+        db.Index("ix_reports_created_at_id", "created_at", "id"),
+        db.Index("ix_reports_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
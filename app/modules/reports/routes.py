@@ -1,9 +1,31 @@
+import base64
+import json
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
+from sqlalchemy import and_, or_, select
 from app import db
 from app.modules.reports.models import Report
 
 reports_bp = Blueprint("reports", __name__)
 
+# Paginação da listagem
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Campos projetáveis via ?fields=...; content/validation_result são pesados
+# e só vêm quando pedidos explicitamente.
+LISTABLE_FIELDS = {
+    "id": Report.id,
+    "title": Report.title,
+    "status": Report.status,
+    "created_at": Report.created_at,
+    "content": Report.content,
+    "validation_result": Report.validation_result,
+}
+DEFAULT_FIELDS = ("id", "title", "status", "created_at")
+
+
 @reports_bp.route("/status")
 def reports_status():
     return jsonify({
@@ -11,6 +33,73 @@ def reports_status():
         "status": "ativo ✅"
     })
 
+
+@reports_bp.route("/", methods=["GET"], strict_slashes=False)
+def list_reports():
+    """
+    Lista relatórios com paginação por cursor (keyset) sobre (created_at, id).
+
+    Query params:
+        limit: itens por página (1-200, padrão 50)
+        cursor: valor de `next_cursor` da página anterior
+        status: filtra por status (ex.: 'Pendente', 'Validado')
+        fields: campos separados por vírgula (padrão: id,title,status,created_at)
+
+    Cada página é uma busca no índice a partir do último item visto, então o
+    custo não cresce com a profundidade da paginação (ao contrário de OFFSET).
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "O parâmetro 'limit' deve ser inteiro"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    fields = _parse_fields(request.args.get("fields"))
+    if fields is None:
+        return jsonify({
+            "error": f"Campos inválidos. Disponíveis: {', '.join(LISTABLE_FIELDS)}"
+        }), 400
+
+    # created_at e id sempre são lidos: compõem o cursor
+    columns = [LISTABLE_FIELDS[name] for name in fields]
+    for name in ("created_at", "id"):
+        if name not in fields:
+            columns.append(LISTABLE_FIELDS[name])
+
+    query = select(*columns)
+
+    status = request.args.get("status")
+    if status:
+        query = query.where(Report.status == status)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        position = _decode_cursor(cursor)
+        if position is None:
+            return jsonify({"error": "Cursor inválido"}), 400
+        created_at, report_id = position
+        query = query.where(or_(
+            Report.created_at < created_at,
+            and_(Report.created_at == created_at, Report.id < report_id),
+        ))
+
+    query = query.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit + 1)
+    rows = db.session.execute(query).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [_serialize_row(row, fields) for row in rows]
+    next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+
+    return jsonify({
+        "items": items,
+        "count": len(items),
+        "limit": limit,
+        "next_cursor": next_cursor
+    })
+
+
 @reports_bp.route("/generate", methods=["POST"])
 def generate_report():
     """
@@ -40,3 +129,37 @@ def generate_report():
         "report_id": report.id,
         "content": generated_report
     })
+
+
+def _parse_fields(raw):
+    """Valida a projeção pedida; retorna None se houver campo desconhecido."""
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    if not fields or any(f not in LISTABLE_FIELDS for f in fields):
+        return None
+    return list(dict.fromkeys(fields))
+
+
+def _serialize_row(row, fields):
+    item = {}
+    for name in fields:
+        value = getattr(row, name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        item[name] = value
+    return item
+
+
+def _encode_cursor(created_at, report_id):
+    payload = json.dumps({"c": created_at.isoformat(), "i": report_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        return None
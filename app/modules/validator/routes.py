@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from app.services.ai_validator import analyze_text, analyze_batch
+from app.services.ai_validator import analyze_text, analyze_batch, analyze_report
 from app.modules.reports.models import Report  # ⚙️ ajuste se o modelo estiver em outro lugar
 from app.extensions import db
 
@@ -35,12 +35,16 @@ def analyze_report_batch():
 def analyze_report_id(report_id):
     """
     Analisa o texto de um relatório existente e salva o resultado.
+
+    Numa revalidação, só as seções alteradas desde a última validação vão
+    ao GPT (ver analyze_report); `?full=1` reanalisa o relatório inteiro.
     """
     report = Report.query.get(report_id)
     if not report:
         return jsonify({"ok": False, "error": "Relatório não encontrado"}), 404
 
-    result = analyze_text(report.content)
+    previous = None if request.args.get("full") else report.validation_result
+    result = analyze_report(report.content, previous)
     if result["ok"]:
         report.validation_result = result  # precisa ter campo JSON na model
         report.status = "Validado"
@@ -1,13 +1,23 @@
+import contextvars
 import os
 import re
 import random
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_KEY) if OPENAI_KEY else None
+_client = None
+
+
+def _get_client():
+    """Cria o cliente OpenAI no primeiro uso (o import de `openai` é pesado)."""
+    global _client
+    if _client is None and OPENAI_KEY:
+        from openai import OpenAI
+        _client = OpenAI(api_key=OPENAI_KEY)
+    return _client
 
 
 def analyze_text(content: str):
@@ -17,30 +27,18 @@ def analyze_text(content: str):
     if not content or not content.strip():
         return {"ok": False, "error": "Texto vazio"}
 
-    indicators = {
-        "has_reserves": bool(re.search(r"\b(reserva|tonelada|Mt|milhão|t)\b", content, re.I)),
-        "has_grade": bool(re.search(r"\b(%|teor|g\/t|ppm|Cu|Fe|Au|Zn|Pb)\b", content, re.I)),
-        "has_production": bool(re.search(r"\b(produzid[ao]|produção|kt|t\/ano)\b", content, re.I)),
-        "length": len(content),
-    }
-
-    # pontuação de confiança (simulada)
-    confidence = 0.3
-    if indicators["has_reserves"]:
-        confidence += 0.3
-    if indicators["has_grade"]:
-        confidence += 0.3
-    if indicators["has_production"]:
-        confidence += 0.2
-    confidence = min(confidence, 1.0)
+    indicators = _indicators(content)
+    confidence = _confidence(indicators)
 
     try:
-        if client and OPENAI_KEY:
+        client = _get_client()
+        if client:
             response = client.responses.create(
                 model="gpt-4o-mini",
                 input=f"Analise o texto e descreva brevemente os indicadores minerais:\n\n{content}"
             )
             summary = response.output[0].content[0].text.strip()
+            _record_usage("report.analyze_text", response)
         else:
             summary = _simulate_summary(indicators)
     except Exception:
@@ -55,6 +53,240 @@ def analyze_text(content: str):
     }
 
 
+def analyze_report(content: str, previous: dict | None = None):
+    """
+    Valida um relatório seção a seção, reaproveitando a versão anterior.
+
+    Cada seção (ver src.ai.core.validator.sections) tem uma impressão digital;
+    só as seções novas ou alteradas desde `previous` (o validation_result da
+    versão anterior) vão ao GPT, todas na mesma chamada, junto com as análises
+    reaproveitadas das demais. A mesma chamada devolve a análise consolidada
+    do relatório, que é a pontuada pelo ComplianceScorer (a pontuação não
+    cresce com o número de seções). Sem seções novas nem removidas, a
+    consolidada anterior é reaproveitada e não há chamada.
+    """
+    if not content or not content.strip():
+        return {"ok": False, "error": "Texto vazio"}
+
+    from src.ai.core.telemetry import cache_lookup, stage, track_stages
+    from src.ai.core.validator.scoring import ComplianceScorer
+    from src.ai.core.validator.sections import diff_sections, split_sections
+
+    with track_stages("report") as timings:
+        with stage("report", "sections"):
+            sections = split_sections(content)
+            previous_sections = (previous or {}).get("sections") if isinstance(previous, dict) else None
+            diff = diff_sections(sections, previous_sections)
+        for section in sections:
+            cache_lookup("report_sections", "hit" if section["fingerprint"] in diff["cached"] else "miss")
+
+        prior = (previous or {}).get("consolidated") if isinstance(previous, dict) else None
+        if not diff["changed"] and not diff["removed"] and prior and prior.get("source") == "gpt":
+            fresh, consolidated, calls = {}, prior, 0
+        else:
+            with stage("report", "llm"):
+                fresh, consolidated, calls = _analyze_sections(sections, diff["cached"], content)
+
+        analyzed = []
+        for section in sections:
+            reused = section["fingerprint"] in diff["cached"]
+            analysis, source = (diff["cached"][section["fingerprint"]], "gpt") if reused else fresh[section["index"]]
+            analyzed.append({
+                "index": section["index"],
+                "title": section["title"],
+                "fingerprint": section["fingerprint"],
+                "chars": len(section["text"]),
+                "analysis": analysis,
+                "source": source,
+                "reused": reused,
+            })
+
+        summary = consolidated["analysis"]
+        with stage("report", "scoring"):
+            indicators = _indicators(content)
+            compliance = ComplianceScorer().evaluate(summary)
+
+    return {
+        "ok": True,
+        "summary": summary[:500] + "..." if len(summary) > 500 else summary,
+        "confidence": round(_confidence(indicators), 2),
+        "indicators": indicators,
+        "compliance": compliance,
+        "consolidated": consolidated,
+        "sections": analyzed,
+        "incremental": {
+            "sections": len(analyzed),
+            "reanalyzed": sum(1 for s in analyzed if not s["reused"]),
+            "reused": sum(1 for s in analyzed if s["reused"]),
+            "removed": diff["removed"],
+            "chars_reanalyzed": sum(s["chars"] for s in analyzed if not s["reused"]),
+            "chars_total": sum(s["chars"] for s in analyzed),
+            "llm_calls": calls,
+        },
+        "timings": timings,
+        "text": content,
+    }
+
+
+# Tamanho máximo das seções enviadas numa chamada; acima disso, lotes em
+# paralelo e uma chamada final só para a consolidada
+REPORT_BATCH_CHARS = int(os.getenv("QIVO_REPORT_BATCH_CHARS", "48000"))
+REPORT_BATCH_WORKERS = 4
+
+_BLOCK = re.compile(r"^###\s*(\[\d+\]|CONSOLIDADO)\s*$", re.M)
+
+
+def _analyze_sections(sections: list, cached: dict, content: str):
+    """
+    Análises das seções sem análise reaproveitável e a consolidada do relatório.
+
+    Returns:
+        ({índice: (análise, 'gpt' | 'local')}, {'analysis', 'source'}, chamadas ao GPT)
+    """
+    known = {s["index"]: cached[s["fingerprint"]] for s in sections if s["fingerprint"] in cached}
+    pending = [s for s in sections if s["index"] not in known]
+    client = _get_client()
+    blocks, calls = {}, 0
+
+    if client:
+        batches = _batches(pending, REPORT_BATCH_CHARS)
+        if len(batches) > 1:
+            contexts = [contextvars.copy_context() for _ in batches]
+            with ThreadPoolExecutor(max_workers=min(len(batches), REPORT_BATCH_WORKERS)) as pool:
+                for result in pool.map(lambda job: job[0].run(_request_blocks, client, job[1], {}, False),
+                                       zip(contexts, batches)):
+                    blocks.update(result)
+            calls += len(batches)
+            known = {**known, **{int(k): v for k, v in blocks.items() if k.isdigit()}}
+        blocks.update(_request_blocks(client, sections, known, True))
+        calls += 1
+
+    fresh = {
+        s["index"]: (blocks[str(s["index"])], "gpt") if blocks.get(str(s["index"]))
+        else (_local_section_analysis(s["text"]), "local")
+        for s in pending
+    }
+    if blocks.get("CONSOLIDADO"):
+        consolidated = {"analysis": blocks["CONSOLIDADO"], "source": "gpt"}
+    else:
+        consolidated = {"analysis": _local_section_analysis(content), "source": "local"}
+    return fresh, consolidated, calls
+
+
+def _batches(sections: list, max_chars: int):
+    """Seções agrupadas em lotes de até `max_chars` (ao menos uma por lote)"""
+    batches, current, size = [], [], 0
+    for section in sections:
+        if current and size + len(section["text"]) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(section)
+        size += len(section["text"])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _report_prompt(sections: list, known: dict, consolidate: bool):
+    """Seções numeradas (texto ou análise anterior) e o formato da resposta em blocos"""
+    parts = []
+    for section in sections:
+        title = f" \"{section['title']}\"" if section["title"] else ""
+        if section["index"] in known:
+            parts.append(f"[{section['index']}]{title} — ANÁLISE ANTERIOR:\n{known[section['index']]}")
+        else:
+            parts.append(f"[{section['index']}]{title} — TEXTO:\n{section['text']}")
+
+    instructions = []
+    if any(section["index"] not in known for section in sections):
+        instructions.append(
+            'Para cada seção com TEXTO, escreva um bloco iniciado pela linha "### [n]" (n = número '
+            "da seção) com uma análise breve e técnica: classificação de recursos/reservas, QA/QC, "
+            "pessoa competente e lacunas."
+        )
+    if consolidate:
+        instructions.append(
+            'Por fim, escreva um bloco iniciado pela linha "### CONSOLIDADO" com a análise de '
+            "conformidade do relatório inteiro com JORC, NI 43-101 e PRMS, a partir de todas as seções."
+        )
+    return (
+        "Seções de um relatório técnico de mineração:\n\n"
+        + "\n\n".join(parts)
+        + "\n\n" + " ".join(instructions)
+    )
+
+
+def _request_blocks(client, sections: list, known: dict, consolidate: bool):
+    """Uma chamada ao GPT; blocos da resposta por rótulo ('3', 'CONSOLIDADO'), vazio em erro."""
+    try:
+        response = client.responses.create(
+            model="gpt-4o-mini",
+            input=_report_prompt(sections, known, consolidate)
+        )
+        _record_usage("report.sections", response)
+        return _parse_blocks(response.output[0].content[0].text)
+    except Exception:
+        return {}
+
+
+def _parse_blocks(text: str):
+    pieces = _BLOCK.split(text or "")
+    return {label.strip("[]"): body.strip() for label, body in zip(pieces[1::2], pieces[2::2])}
+
+
+def _record_usage(site: str, response):
+    """Lança no ledger de uso os tokens de uma chamada à Responses API"""
+    from src.ai.core.llm.ledger import record_call
+
+    usage = getattr(response, "usage", None)
+    prompt = getattr(usage, "input_tokens", None)
+    completion = getattr(usage, "output_tokens", None)
+    if isinstance(prompt, int) and isinstance(completion, int):
+        model = getattr(response, "model", None)
+        cached = getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", None)
+        record_call(
+            site, model if isinstance(model, str) else "gpt-4o-mini", prompt, completion,
+            cached_tokens=cached if isinstance(cached, int) else 0
+        )
+
+
+def _local_section_analysis(text: str):
+    """Termos de conformidade presentes na seção (modo offline)."""
+    from src.ai.core.validator.scoring import ComplianceScorer
+
+    lowered = text.lower()
+    scorer = ComplianceScorer()
+    found = [
+        keyword
+        for keywords in (scorer.JORC_KEYWORDS, scorer.NI_43_101_KEYWORDS, scorer.PRMS_KEYWORDS,
+                         scorer.QA_QC_KEYWORDS, scorer.COMPLIANCE_KEYWORDS)
+        for keyword in keywords
+        if keyword in lowered
+    ]
+    return "Simulação local: " + (", ".join(dict.fromkeys(found)) or "sem termos de conformidade")
+
+
+def _indicators(content: str):
+    return {
+        "has_reserves": bool(re.search(r"\b(reserva|tonelada|Mt|milhão|t)\b", content, re.I)),
+        "has_grade": bool(re.search(r"\b(%|teor|g\/t|ppm|Cu|Fe|Au|Zn|Pb)\b", content, re.I)),
+        "has_production": bool(re.search(r"\b(produzid[ao]|produção|kt|t\/ano)\b", content, re.I)),
+        "length": len(content),
+    }
+
+
+def _confidence(indicators: dict):
+    """Pontuação de confiança (simulada)."""
+    confidence = 0.3
+    if indicators["has_reserves"]:
+        confidence += 0.3
+    if indicators["has_grade"]:
+        confidence += 0.3
+    if indicators["has_production"]:
+        confidence += 0.2
+    return min(confidence, 1.0)
+
+
 def analyze_batch(texts: list[str]):
     """
     Analisa vários textos e gera um resumo consolidado.
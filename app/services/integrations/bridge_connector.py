@@ -4,11 +4,15 @@ Integração do Bridge AI com Validator e Report Generator
 """
 
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timezone
 
 from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.classifier import get_norm_classifier
 from src.ai.core.validator import ValidatorAI
+from src.ai.core.llm import Priority, ledger_context, llm_priority
+from src.ai.core.telemetry import stage
+from src.ai.core.tracing import set_attribute, span
 
 
 class BridgeConnector:
@@ -21,15 +25,17 @@ class BridgeConnector:
     - Enriquecer análises do Validator com traduções
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client: Optional[Any] = None):
         """
         Inicializa BridgeConnector
         
         Args:
             api_key: OpenAI API key (usa variável de ambiente se não fornecida)
+            client: cliente compatível com AsyncOpenAI repassado aos engines
+                (padrão: cliente compartilhado do processo)
         """
-        self.bridge = BridgeAI(api_key=api_key)
-        self.validator = ValidatorAI(api_key=api_key)
+        self.bridge = BridgeAI(api_key=api_key, client=client)
+        self.validator = ValidatorAI(api_key=api_key, client=client)
     
     async def sync_bridge_with_validator(
         self,
@@ -46,9 +52,14 @@ class BridgeConnector:
         Returns:
             Dict com status da sincronização
         """
+        with span('connector.bridge.sync', **{'report.id': report_id, 'norm.target': target_norm}):
+            return await self._sync_bridge_with_validator(report_id, target_norm)
+    
+    async def _sync_bridge_with_validator(self, report_id: str, target_norm: str) -> Dict[str, Any]:
         try:
             # 1. Buscar relatório (mock - substituir por query real)
-            report_data = await self._fetch_report(report_id)
+            with stage('connector.bridge', 'fetch'):
+                report_data = await self._fetch_report(report_id)
             
             if not report_data:
                 return {
@@ -57,24 +68,28 @@ class BridgeConnector:
                     'timestamp': self._get_timestamp()
                 }
             
-            # 2. Detectar norma de origem
-            source_norm = await self._detect_source_norm(report_data['content'])
+            # 2. Detectar norma de origem (classificador local, sem GPT)
+            with stage('connector.bridge', 'detect_norm'):
+                source_norm, norm_confidence = await self._detect_source_norm(report_data['content'])
+            set_attribute('norm.source', source_norm)
             
             # 3. Traduzir conteúdo
-            translation_result = await self.bridge.translate_normative(
-                text=report_data['content'],
-                source_norm=source_norm,
-                target_norm=target_norm,
-                explain=True
-            )
+            with stage('connector.bridge', 'translate', **{'norm.source': source_norm, 'norm.target': target_norm}):
+                translation_result = await self.bridge.translate_normative(
+                    text=report_data['content'],
+                    source_norm=source_norm,
+                    target_norm=target_norm,
+                    explain=True
+                )
             
             if translation_result['status'] == 'error':
                 return translation_result
             
             # 4. Validar tradução
-            validation_result = await self.validator.validate_text(
-                translation_result['translated_text']
-            )
+            with stage('connector.bridge', 'validate'):
+                validation_result = await self.validator.validate_text(
+                    translation_result['translated_text']
+                )
             
             # 5. Compilar resultado
             result = {
@@ -82,6 +97,7 @@ class BridgeConnector:
                 'report_id': report_id,
                 'translation': {
                     'source_norm': source_norm,
+                    'source_norm_confidence': norm_confidence,
                     'target_norm': target_norm,
                     'translated_text': translation_result['translated_text'],
                     'confidence': translation_result['confidence']
@@ -94,7 +110,8 @@ class BridgeConnector:
             }
             
             # 6. Salvar resultado (mock - substituir por persistência real)
-            await self._save_translation(report_id, result)
+            with stage('connector.bridge', 'save'):
+                await self._save_translation(report_id, result)
             
             return result
         
@@ -122,9 +139,11 @@ class BridgeConnector:
         """
         results = []
         
-        for report_id in report_ids:
-            result = await self.sync_bridge_with_validator(report_id, target_norm)
-            results.append(result)
+        # Lote: cede a vez às chamadas interativas na fila do governor
+        with llm_priority(Priority.BATCH), ledger_context(job='bridge.batch_translate'):
+            for report_id in report_ids:
+                result = await self.sync_bridge_with_validator(report_id, target_norm)
+                results.append(result)
         
         # Estatísticas
         successes = sum(1 for r in results if r['status'] == 'success')
@@ -158,18 +177,20 @@ class BridgeConnector:
         """
         try:
             # 1. Validação original
-            validation = await self.validator.validate_text(text)
+            with stage('connector.bridge', 'validate'):
+                validation = await self.validator.validate_text(text)
             
             # 2. Traduções paralelas
             translations = {}
             for target in target_norms:
                 if target != source_norm:
-                    trans_result = await self.bridge.translate_normative(
-                        text=text,
-                        source_norm=source_norm,
-                        target_norm=target,
-                        explain=False
-                    )
+                    with stage('connector.bridge', 'translate', **{'norm.source': source_norm, 'norm.target': target}):
+                        trans_result = await self.bridge.translate_normative(
+                            text=text,
+                            source_norm=source_norm,
+                            target_norm=target,
+                            explain=False
+                        )
                     if trans_result['status'] == 'success':
                         translations[target] = {
                             'text': trans_result['translated_text'][:200] + '...',  # Preview
@@ -215,25 +236,28 @@ class BridgeConnector:
             all_norms = ['ANM', 'JORC', 'NI43-101', 'PERC', 'SAMREC']
             target_norms = [n for n in all_norms if n != base_norm]
             
-            # Análise enriquecida
-            enriched = await self.enrich_validator_analysis(
-                text=text,
-                source_norm=base_norm,
-                target_norms=target_norms
-            )
-            
-            # Comparações entre normas
-            comparisons = {}
-            for target in target_norms:
-                comparison = await self.bridge.explain_norm_difference(
-                    norm1=base_norm,
-                    norm2=target
+            # Relatório de várias chamadas: prioridade de lote no governor
+            with llm_priority(Priority.BATCH), ledger_context(job='bridge.multi_norm_report'):
+                # Análise enriquecida
+                enriched = await self.enrich_validator_analysis(
+                    text=text,
+                    source_norm=base_norm,
+                    target_norms=target_norms
                 )
-                if comparison.get('status') == 'success':
-                    comparisons[f"{base_norm}_vs_{target}"] = {
-                        'main_differences': comparison.get('main_differences', [])[:3],
-                        'key_equivalences': comparison.get('key_equivalences', {})
-                    }
+                
+                # Comparações entre normas
+                comparisons = {}
+                for target in target_norms:
+                    with stage('connector.bridge', 'compare'):
+                        comparison = await self.bridge.explain_norm_difference(
+                            norm1=base_norm,
+                            norm2=target
+                        )
+                    if comparison.get('status') == 'success':
+                        comparisons[f"{base_norm}_vs_{target}"] = {
+                            'main_differences': comparison.get('main_differences', [])[:3],
+                            'key_equivalences': comparison.get('key_equivalences', {})
+                        }
             
             return {
                 'status': 'success',
@@ -266,23 +290,16 @@ class BridgeConnector:
             'created_at': datetime.now(timezone.utc)
         }
     
-    async def _detect_source_norm(self, text: str) -> str:
-        """Mock: detectar norma de origem do texto"""
-        # Em produção, usar NLP ou keywords para detectar
-        text_lower = text.lower()
+    async def _detect_source_norm(self, text: str) -> Tuple[str, float]:
+        """
+        Detecta a norma de origem com o classificador local
+        (src.ai.core.bridge.classifier); JORC se nenhum termo for reconhecido
         
-        if 'anm' in text_lower or 'dnpm' in text_lower:
-            return 'ANM'
-        elif 'jorc' in text_lower:
-            return 'JORC'
-        elif 'ni 43-101' in text_lower or 'ni43-101' in text_lower:
-            return 'NI43-101'
-        elif 'perc' in text_lower or 'gkz' in text_lower:
-            return 'PERC'
-        elif 'samrec' in text_lower:
-            return 'SAMREC'
-        else:
-            return 'JORC'  # Default
+        Returns:
+            (norma, probabilidade calibrada)
+        """
+        detection = get_norm_classifier().classify(text)
+        return detection['norm'] or 'JORC', detection['confidence']
     
     async def _save_translation(self, report_id: str, result: Dict[str, Any]) -> None:
         """Mock: salvar tradução no banco de dados"""
@@ -12,6 +12,10 @@ import asyncio
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 
+from src.ai.core.llm import Priority, ledger_context, llm_priority
+from src.ai.core.telemetry import stage
+from src.ai.core.tracing import span
+
 # Lazy imports para evitar circular dependencies
 _radar_engine = None
 _bridge_engine = None
@@ -45,7 +49,7 @@ def get_validator():
     global _validator_engine
     if _validator_engine is None:
         try:
-            from src.ai.core.validator.engine import ValidatorAI
+            from src.ai.core.validator import ValidatorAI
             _validator_engine = ValidatorAI()
         except Exception as e:
             print(f"Validator AI não disponível: {e}")
@@ -58,11 +62,26 @@ class RadarConnector:
     Classe de integração entre Radar AI e outros módulos.
     """
     
-    def __init__(self):
-        """Inicializa o connector com engines."""
-        self.radar = get_radar()
-        self.bridge = get_bridge()
-        self.validator = get_validator()
+    def __init__(self, client: Optional[Any] = None):
+        """
+        Inicializa o connector com engines.
+        
+        Args:
+            client: cliente compatível com AsyncOpenAI para todos os engines
+                (padrão: singletons do módulo, que já usam o cliente
+                compartilhado do processo)
+        """
+        if client is None:
+            self.radar = get_radar()
+            self.bridge = get_bridge()
+            self.validator = get_validator()
+        else:
+            from src.ai.core.radar.engine import RadarEngine
+            from src.ai.core.bridge.engine import BridgeAI
+            from src.ai.core.validator import ValidatorAI
+            self.radar = RadarEngine(client=client)
+            self.bridge = BridgeAI(client=client)
+            self.validator = ValidatorAI(client=client)
     
     async def sync_radar_with_bridge(
         self,
@@ -87,12 +106,13 @@ class RadarConnector:
             text = alert.get("summary", "")
             
             # Traduz alerta para norma alvo
-            translation = await self.bridge.translate_normative(
-                text=text,
-                source_norm=source_norm,
-                target_norm=target_norm,
-                explain=True
-            )
+            with stage('connector.radar', 'translate', **{'norm.source': source_norm, 'norm.target': target_norm}):
+                translation = await self.bridge.translate_normative(
+                    text=text,
+                    source_norm=source_norm,
+                    target_norm=target_norm,
+                    explain=True
+                )
             
             return {
                 "original_alert": alert,
@@ -199,7 +219,8 @@ class RadarConnector:
         
         for alert in alerts:
             for channel in channels:
-                notification = await self._send_notification(alert, channel)
+                with stage('connector.radar', 'notify'):
+                    notification = await self._send_notification(alert, channel)
                 notifications.append(notification)
         
         return {
@@ -244,25 +265,27 @@ class RadarConnector:
         """
         enriched = []
         
-        for alert in alerts:
-            source_norm = alert.get("source", "ANM")
-            
-            # Define normas alvo (todas exceto a source)
-            all_norms = ["ANM", "JORC", "NI43-101", "PERC", "SAMREC"]
-            targets = target_norms or [n for n in all_norms if n != source_norm]
-            
-            alert_enriched = alert.copy()
-            alert_enriched["translations"] = {}
-            
-            for target in targets:
-                try:
-                    translation = await self.sync_radar_with_bridge(alert, target)
-                    if "error" not in translation:
-                        alert_enriched["translations"][target] = translation
-                except Exception as e:
-                    alert_enriched["translations"][target] = {"error": str(e)}
-            
-            enriched.append(alert_enriched)
+        # Fan-out de traduções: prioridade de lote no governor
+        with llm_priority(Priority.BATCH), ledger_context(job='radar.enrich_alerts'):
+            for alert in alerts:
+                source_norm = alert.get("source", "ANM")
+                
+                # Define normas alvo (todas exceto a source)
+                all_norms = ["ANM", "JORC", "NI43-101", "PERC", "SAMREC"]
+                targets = target_norms or [n for n in all_norms if n != source_norm]
+                
+                alert_enriched = alert.copy()
+                alert_enriched["translations"] = {}
+                
+                for target in targets:
+                    try:
+                        translation = await self.sync_radar_with_bridge(alert, target)
+                        if "error" not in translation:
+                            alert_enriched["translations"][target] = translation
+                    except Exception as e:
+                        alert_enriched["translations"][target] = {"error": str(e)}
+                
+                enriched.append(alert_enriched)
         
         return enriched
     
@@ -285,44 +308,56 @@ class RadarConnector:
             "integrated_analysis": []
         }
         
-        for alert in alerts:
-            analysis = {
-                "alert": alert,
-                "bridge_analysis": None,
-                "validator_impact": None
-            }
-            
-            # Integra com Bridge (traduz para todas as normas)
-            if self.bridge:
-                try:
-                    source = alert.get("source", "ANM")
-                    all_norms = ["ANM", "JORC", "NI43-101", "PERC", "SAMREC"]
-                    targets = [n for n in all_norms if n != source]
-                    
-                    translations = {}
-                    for target in targets[:2]:  # Limita a 2 para performance
-                        trans = await self.sync_radar_with_bridge(alert, target)
-                        if "error" not in trans:
-                            translations[target] = trans["translation"]
-                    
-                    analysis["bridge_analysis"] = {
-                        "translations_available": len(translations),
-                        "translations": translations
-                    }
-                except Exception as e:
-                    analysis["bridge_analysis"] = {"error": str(e)}
-            
-            # Integra com Validator (impacto na conformidade)
-            if self.validator:
-                try:
-                    impact = await self.sync_radar_with_validator(alert)
-                    analysis["validator_impact"] = impact.get("compliance_impact", {})
-                except Exception as e:
-                    analysis["validator_impact"] = {"error": str(e)}
-            
-            report["integrated_analysis"].append(analysis)
+        # Várias chamadas por alerta: prioridade de lote no governor
+        with span('connector.radar.cross_module_report', **{'radar.alerts': len(alerts)}), \
+                llm_priority(Priority.BATCH), ledger_context(job='radar.cross_module_report'):
+            for alert in alerts:
+                with span('connector.radar.alert', **{
+                    'norm.source': alert.get("source", "ANM"),
+                    'radar.severity': alert.get("severity", "Low")
+                }):
+                    report["integrated_analysis"].append(await self._analyze_alert(alert))
         
         return report
+    
+    async def _analyze_alert(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """Análise integrada de um alerta (traduções do Bridge + impacto no Validator)."""
+        analysis = {
+            "alert": alert,
+            "bridge_analysis": None,
+            "validator_impact": None
+        }
+        
+        # Integra com Bridge (traduz para todas as normas)
+        if self.bridge:
+            try:
+                source = alert.get("source", "ANM")
+                all_norms = ["ANM", "JORC", "NI43-101", "PERC", "SAMREC"]
+                targets = [n for n in all_norms if n != source]
+                
+                translations = {}
+                for target in targets[:2]:  # Limita a 2 para performance
+                    trans = await self.sync_radar_with_bridge(alert, target)
+                    if "error" not in trans:
+                        translations[target] = trans["translation"]
+                
+                analysis["bridge_analysis"] = {
+                    "translations_available": len(translations),
+                    "translations": translations
+                }
+            except Exception as e:
+                analysis["bridge_analysis"] = {"error": str(e)}
+        
+        # Integra com Validator (impacto na conformidade)
+        if self.validator:
+            try:
+                with stage('connector.radar', 'validator_impact'):
+                    impact = await self.sync_radar_with_validator(alert)
+                analysis["validator_impact"] = impact.get("compliance_impact", {})
+            except Exception as e:
+                analysis["validator_impact"] = {"error": str(e)}
+        
+        return analysis
 
 
 # Singleton para uso global
@@ -3,14 +3,41 @@ QIVO Intelligence Layer - FastAPI Application
 API principal para módulos de inteligência artificial
 """
 
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
+from src.ai.core.llm.ledger import LedgerMiddleware
+from src.ai.core.profiling import ProfileMiddleware
+from src.ai.core.tracing import TraceMiddleware
 from src.api.routes import ai
 from app.modules.bridge.routes import router as bridge_router
 from app.modules.radar.routes import router as radar_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Com QIVO_WARM_COMPARISONS=1, pré-computa em segundo plano a matriz de
+    comparações entre normas (pares ausentes ou com metadados alterados)
+    """
+    warm_task = None
+    if os.getenv("QIVO_WARM_COMPARISONS", "0").lower() in ("1", "true") and os.getenv("OPENAI_API_KEY"):
+        from src.ai.core.bridge.comparisons import warm_all
+        warm_task = asyncio.create_task(warm_all())
+    
+    yield
+    
+    if warm_task is not None and not warm_task.done():
+        warm_task.cancel()
+
+
 # Inicializar FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title="QIVO Intelligence API",
     description="API de Inteligência Artificial para análise de conformidade regulatória em mineração",
     version="5.0.0",
@@ -27,6 +54,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Atribuição das chamadas LLM à requisição (ledger de uso)
+app.add_middleware(LedgerMiddleware)
+
+# Perfil de amostragem sob demanda (X-Profile ou QIVO_PROFILE_RATE)
+app.add_middleware(ProfileMiddleware)
+
+# Span por requisição (continua o traceparent recebido)
+app.add_middleware(TraceMiddleware)
+
 # Registrar rotas
 app.include_router(ai.router)
 app.include_router(bridge_router)
@@ -60,6 +96,49 @@ async def health():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas do processo no formato do Prometheus (etapas, LLM, caches, fila)"""
+    from src.ai.core.telemetry import CONTENT_TYPE, render_metrics
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+
+
+@app.get("/admin/profiling", include_in_schema=False)
+async def profiling_settings():
+    """Configuração do profiler de amostragem"""
+    from src.ai.core.profiling import get_profiler
+    return get_profiler().settings()
+
+
+@app.post("/admin/profiling", include_in_schema=False)
+async def update_profiling(settings: dict):
+    """Troca a fração do tráfego perfilada: {"rate": 0.05}"""
+    from src.ai.core.profiling import get_profiler
+    profiler = get_profiler()
+    try:
+        profiler.set_rate(settings.get("rate"))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return profiler.settings()
+
+
+@app.get("/admin/profiles", include_in_schema=False)
+async def list_profiles():
+    """Perfis no buffer, do mais recente ao mais antigo"""
+    from src.ai.core.profiling import get_profiler
+    return {"profiles": get_profiler().store.list()}
+
+
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False)
+async def get_profile(profile_id: str):
+    """Perfil no formato folded (flamegraph.pl, speedscope)"""
+    from src.ai.core.profiling import get_profiler, to_folded
+    profile = get_profiler().store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return PlainTextResponse(to_folded(profile))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
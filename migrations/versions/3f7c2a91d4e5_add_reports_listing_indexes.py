@@ -0,0 +1,35 @@
+"""add reports listing indexes
+
+Revision ID: 3f7c2a91d4e5
+Revises: 0a9d83488b13
+Create Date: 2026-10-19 09:12:04.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7c2a91d4e5'
+down_revision = '0a9d83488b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Paginação por cursor usa (created_at, id): linhas sem created_at
+    # ficariam fora da ordenação, então preenchemos antes de indexar.
+    op.execute(
+        sa.text("UPDATE reports SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    )
+
+    # Listagem geral ordenada por created_at DESC, id DESC
+    op.create_index('ix_reports_created_at_id', 'reports', ['created_at', 'id'], unique=False)
+
+    # Filtro por status ('Pendente', 'Validado') + mesma ordenação
+    op.create_index('ix_reports_status_created_at_id', 'reports', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reports_status_created_at_id', table_name='reports')
+    op.drop_index('ix_reports_created_at_id', table_name='reports')
@@ -0,0 +1,5 @@
+"""
+QIVO Intelligence Layer - Benchmarks
+Medições de ponta a ponta da API de IA contra o servidor OpenAI fake e do
+cache de prompt do provedor sobre uma carga gravada
+"""
@@ -0,0 +1,413 @@
+"""
+QIVO Intelligence Layer - End-to-End Benchmark
+Carga em concorrência fixa sobre os endpoints de main_ai:app (Validator,
+Bridge e Radar) com o servidor OpenAI fake no lugar da API real
+
+Cada cenário mede latência (p50/p95/p99) e vazão (req/s) pelo caminho HTTP
+completo: roteamento FastAPI, engines, governor, resiliência e pool do SDK.
+O resultado é gravado em JSON e comparado com um baseline, então regressões
+aparecem offline:
+
+    python -m src.ai.benchmarks.e2e --requests 200 --concurrency 16 \\
+        --latency lognormal:0.05,0.5 --output resultado.json
+
+    python -m src.ai.benchmarks.e2e --save-baseline   # atualiza o baseline
+
+Com --target, mede uma instância já em execução (o servidor fake e o
+ambiente ficam por conta de quem a iniciou).
+
+O Radar só chama o LLM no primeiro ciclo: as versões ficam em cache no
+engine e ciclos seguintes sem mudanças não geram alertas nem resumo. O
+campo 'llm_calls' de cada cenário deixa isso explícito.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "e2e.json"
+
+# Versão do formato do resultado (baselines de outra versão não são comparados)
+RESULT_VERSION = 1
+
+VOCABULARY = (
+    "resource reserve measured indicated inferred drilling assay sampling grade tonnage "
+    "deposit ore gold copper competent person jorc code estimate cut-off density "
+    "metallurgical recovery mining method pit underground geology structure vein "
+    "alteration mineralisation core hole metre interval composite variogram block model"
+).split()
+
+
+def make_text(seed: int, sentences: int) -> str:
+    """
+    Texto técnico sintético e único por semente
+
+    Textos distintos evitam que memória de tradução e índice de relatórios
+    respondam sem chamar o LLM, o que mascararia o caminho medido.
+    """
+    rng = random.Random(seed)
+    return " ".join(
+        f"{' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 16))).capitalize()} {seed}-{i}."
+        for i in range(sentences)
+    )
+
+
+def validator_request(i: int) -> Dict[str, Any]:
+    text = f"Technical Report {i}\n\n" + make_text(i, 60)
+    return {
+        "method": "POST",
+        "url": "/ai/analyze",
+        "files": {"file": (f"report-{i}.txt", text.encode("utf-8"), "text/plain")},
+    }
+
+
+def bridge_request(i: int) -> Dict[str, Any]:
+    return {
+        "method": "POST",
+        "url": "/api/bridge/translate",
+        "json": {"text": make_text(100000 + i, 6), "source_norm": "JORC", "target_norm": "NI43-101"},
+    }
+
+
+def radar_request(i: int) -> Dict[str, Any]:
+    return {
+        "method": "POST",
+        "url": "/api/radar/analyze",
+        "json": {"deep": True, "summarize": True},
+    }
+
+
+SCENARIOS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "validator": validator_request,
+    "bridge": bridge_request,
+    "radar": radar_request,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por posição mais próxima (q entre 0 e 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+async def _llm_stats(llm_url: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not llm_url:
+        return None
+    import httpx
+
+    async with httpx.AsyncClient(base_url=llm_url) as client:
+        return (await client.get("/stats")).json()
+
+
+async def run_scenario(
+    client: Any,
+    build: Callable[[int], Dict[str, Any]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 2,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Executa `requests` requisições com `concurrency` trabalhadores fixos
+
+    Args:
+        client: httpx.AsyncClient apontado para a API
+        build: Gera os parâmetros da i-ésima requisição
+        requests: Requisições medidas
+        concurrency: Requisições simultâneas
+        warmup: Requisições iniciais não medidas (engines, pools, caches)
+        offset: Deslocamento dos índices (payloads únicos entre execuções)
+
+    Returns:
+        Dict com contagens, latências em ms e vazão
+    """
+    for i in range(warmup):
+        await client.request(**build(offset + i))
+
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    counter = iter(range(offset + warmup, offset + warmup + requests))
+
+    async def worker() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.request(**build(i))
+                code = str(response.status_code)
+            except Exception as e:
+                code = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for code, count in status_codes.items() if not code.startswith("2"))
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "status_codes": status_codes,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+        "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def run_benchmark(
+    base_url: str,
+    requests: int = 100,
+    concurrency: int = 8,
+    scenarios: Optional[List[str]] = None,
+    warmup: int = 2,
+    llm_url: Optional[str] = None,
+    timeout: float = 120.0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa os cenários em sequência contra a API em `base_url`
+
+    Args:
+        llm_url: URL do servidor fake; quando informada, cada cenário
+            registra quantas chamadas ao LLM gerou ('llm_calls')
+    """
+    import httpx
+
+    results: Dict[str, Dict[str, Any]] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        for name in scenarios or list(SCENARIOS):
+            before = await _llm_stats(llm_url)
+            results[name] = await run_scenario(client, SCENARIOS[name], requests, concurrency, warmup)
+            after = await _llm_stats(llm_url)
+            if before is not None and after is not None:
+                results[name]["llm_calls"] = after["requests"] - before["requests"]
+    return results
+
+
+def _reset_process_state() -> None:
+    """Descarta clientes, governor, resiliência e engines criados com outro ambiente"""
+    from app.modules.bridge import routes as bridge_routes
+    from app.modules.radar import routes as radar_routes
+    from src.ai.core.bridge.comparisons import set_comparison_matrix
+    from src.ai.core.bridge.memory import set_translation_memory
+    from src.ai.core.llm import reset_llm_client, set_governor, set_ledger, set_resilience
+    from src.ai.core.radar import engine as radar_engine
+    from src.ai.core.validator.dedup import set_report_index
+    from src.api.routes import ai as ai_routes
+
+    reset_llm_client()
+    set_governor(None)
+    set_resilience(None)
+    set_ledger(None)
+    set_comparison_matrix(None)
+    set_translation_memory(None)
+    set_report_index(None)
+    ai_routes.validator = None
+    bridge_routes.bridge = None
+    radar_routes._radar_engine = None
+    radar_engine._radar_instance = None
+
+
+@contextmanager
+def local_stack(config: Any = None, data_dir: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """
+    Sobe o servidor OpenAI fake e main_ai:app, cada um numa thread
+
+    O ambiente (OPENAI_API_KEY, OPENAI_BASE_URL, QIVO_DATA_DIR) é trocado
+    só durante o bloco e o estado global dos engines é recriado na entrada
+    e na saída. Sem QIVO_LLM_RPM/QIVO_LLM_TPM definidos, os limites do
+    governor sobem para não virar o gargalo: com 500 RPM a vazão medida
+    seria só o limite configurado.
+
+    Yields:
+        {'api': URL de main_ai, 'llm': URL do servidor fake}
+    """
+    from main_ai import app
+    from src.ai.core.llm.fake_server import ServerThread, create_app
+
+    with tempfile.TemporaryDirectory() as tmp, ServerThread(create_app(config)) as llm:
+        overrides = {
+            "OPENAI_API_KEY": "fake-benchmark-key",
+            "OPENAI_BASE_URL": f"{llm.url}/v1",
+            "QIVO_DATA_DIR": data_dir or tmp,
+            "QIVO_LLM_RPM": os.getenv("QIVO_LLM_RPM", "1000000"),
+            "QIVO_LLM_TPM": os.getenv("QIVO_LLM_TPM", "1000000000"),
+        }
+        saved = {name: os.environ.get(name) for name in overrides}
+        os.environ.update(overrides)
+        _reset_process_state()
+        try:
+            with ServerThread(app) as api:
+                yield {"api": api.url, "llm": llm.url}
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            _reset_process_state()
+
+
+def build_result(scenarios: Dict[str, Dict[str, Any]], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado completo (formato do baseline)"""
+    return {
+        "version": RESULT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": settings,
+        "scenarios": scenarios,
+    }
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_result(result: Dict[str, Any], path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def compare_to_baseline(
+    result: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    error_tolerance: float = 0.01
+) -> List[str]:
+    """
+    Lista as regressões de `result` em relação ao baseline
+
+    Uma regressão é p95/p99 acima de (1 + tolerance) vezes o baseline, vazão
+    abaixo de (1 - tolerance) vezes, ou taxa de erro acima do baseline mais
+    `error_tolerance`. Só faz sentido comparar execuções com as mesmas
+    configurações (latência do fake, concorrência) na mesma máquina.
+
+    Returns:
+        Mensagens legíveis; lista vazia quando não há regressão
+    """
+    if baseline.get("version") != result.get("version"):
+        return [f"baseline na versão {baseline.get('version')}, resultado na {result.get('version')}"]
+
+    regressions = []
+    for name, expected in baseline.get("scenarios", {}).items():
+        current = result.get("scenarios", {}).get(name)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            limit = expected[metric] * (1 + tolerance)
+            if current[metric] > limit:
+                regressions.append(f"{name}: {metric} {current[metric]:.1f} > {limit:.1f} (baseline {expected[metric]:.1f})")
+        limit = expected["rps"] * (1 - tolerance)
+        if current["rps"] < limit:
+            regressions.append(f"{name}: rps {current['rps']:.1f} < {limit:.1f} (baseline {expected['rps']:.1f})")
+        limit = expected["error_rate"] + error_tolerance
+        if current["error_rate"] > limit:
+            regressions.append(f"{name}: error_rate {current['error_rate']:.3f} > {limit:.3f}")
+    return regressions
+
+
+def format_table(scenarios: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"{'cenário':<10} {'req':>6} {'erros':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'llm':>6}"]
+    for name, data in scenarios.items():
+        lines.append(
+            f"{name:<10} {data['requests']:>6} {data['errors']:>6} {data['p50_ms']:>9.1f} "
+            f"{data['p95_ms']:>9.1f} {data['p99_ms']:>9.1f} {data['rps']:>8.1f} {data.get('llm_calls', '-'):>6}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta da API de IA (main_ai:app)")
+    parser.add_argument("--requests", type=int, default=100, help="requisições medidas por cenário")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repetível; padrão: todos")
+    parser.add_argument("--latency", default="lognormal:0.05,0.5", help="latência do servidor fake (ver fake_server.parse_latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", help="URL de uma instância já em execução (não sobe o stack local)")
+    parser.add_argument("--output", type=Path, help="grava o resultado em JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="grava o resultado como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    settings = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "target": args.target or "local",
+    }
+    options = dict(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        scenarios=args.scenario,
+        warmup=args.warmup,
+    )
+
+    if args.target:
+        scenarios = asyncio.run(run_benchmark(args.target, **options))
+    else:
+        from src.ai.core.llm.fake_server import FakeLLMConfig
+
+        config = FakeLLMConfig(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            seed=args.seed,
+        )
+        with local_stack(config) as urls:
+            scenarios = asyncio.run(run_benchmark(urls["api"], llm_url=urls["llm"], **options))
+
+    result = build_result(scenarios, settings)
+    print(format_table(scenarios))
+    if args.output:
+        save_result(result, args.output)
+    if args.save_baseline:
+        save_result(result, args.baseline)
+        print(f"baseline gravado em {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        return 0
+    if baseline.get("settings") != settings:
+        print("aviso: configurações diferentes das do baseline; comparação indicativa", file=sys.stderr)
+    regressions = compare_to_baseline(result, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSÃO {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+QIVO Intelligence Layer - Prompt Cache Benchmark
+Custo e latência de uma carga repetida, com e sem o cache de prompt do
+provedor
+
+A carga (traduções do Bridge entre pares de normas, análises do Validator e
+lotes da análise profunda do Radar, repetidos por --rounds) é gravada uma
+vez contra o servidor OpenAI fake (RecordingClient) e repetida do arquivo
+duas vezes: sem cache e com ProviderPromptCache, que segue a regra do
+provedor (maior prefixo já visto, a partir de 1024 tokens, em blocos de
+128) e devolve os acertos em usage.prompt_tokens_details.cached_tokens, como
+a API. Tokens em cache e custo saem do ledger, pelo mesmo caminho das
+chamadas reais (record_usage).
+
+A latência gravada é a do servidor fake, que não depende do prompt. Por isso
+a latência de cada chamada é modelada a partir do seu uso (tokens em cache
+não passam pelo prefill):
+
+    latência = overhead + prompt fora do cache / prefill + resposta / decode
+
+    python -m src.ai.benchmarks.prompt_cache --rounds 5 --output cache.json
+    python -m src.ai.benchmarks.prompt_cache --archive data/cache.jsonl.gz   # grava ou reaproveita
+
+O roteamento barato-primeiro fica desligado durante a medição: cada call
+site usa um só modelo e o cache (que é por modelo) mede só o layout dos
+prompts.
+"""
+
+import argparse
+import asyncio
+import bisect
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.ai.core.llm.prompts import CACHE_BLOCK_TOKENS, CACHE_MIN_TOKENS, prefix_for, prompt_prefixes
+from src.ai.core.llm.tokens import count_message_tokens, count_tokens
+from .e2e import build_result, make_text, percentile, save_result
+
+
+BRIDGE_PAIRS = (
+    ("JORC", "NI43-101"),
+    ("ANM", "JORC"),
+    ("PERC", "SAMREC"),
+    ("NI43-101", "PERC"),
+)
+
+SCENARIOS = ("no_cache", "prompt_cache")
+
+
+class ProviderPromptCache:
+    """
+    Cache de prefixo do provedor, simulado
+
+    Cada prompt (mensagens serializadas) acerta o maior prefixo em comum com
+    os prompts já vistos do mesmo modelo; abaixo de `min_tokens` não há
+    acerto, e acima dele o acerto é arredondado para baixo em blocos de
+    `block` tokens. Sem expiração: a carga medida é contínua.
+    """
+
+    def __init__(self, min_tokens: int = CACHE_MIN_TOKENS, block: int = CACHE_BLOCK_TOKENS):
+        self.min_tokens = min_tokens
+        self.block = block
+        self._seen: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def serialize(messages: List[Dict[str, Any]]) -> str:
+        return "".join(f"<|{m.get('role')}|>{m.get('content') or ''}" for m in messages)
+
+    def lookup(self, model: str, messages: List[Dict[str, Any]]) -> int:
+        """Tokens do prompt servidos do cache (e registra o prompt)"""
+        text = self.serialize(messages)
+        seen = self._seen.setdefault(model, [])
+        position = bisect.bisect_left(seen, text)
+        # Em ordem lexicográfica, o maior prefixo em comum é com um vizinho
+        common = max(
+            (len(os.path.commonprefix([text, seen[i]])) for i in (position - 1, position) if 0 <= i < len(seen)),
+            default=0
+        )
+        if position == len(seen) or seen[position] != text:
+            seen.insert(position, text)
+
+        tokens = count_tokens(text[:common], model)
+        if tokens < self.min_tokens:
+            return 0
+        return min(tokens // self.block * self.block, count_message_tokens(messages, model))
+
+
+class LatencyModel:
+    """
+    Latência de uma chamada a partir do uso
+
+    Args:
+        overhead: segundos fixos por chamada (rede, fila do provedor)
+        prefill_tokens_per_second: processamento do prompt fora do cache
+        decode_tokens_per_second: geração da resposta
+    """
+
+    def __init__(
+        self,
+        overhead: float = 0.25,
+        prefill_tokens_per_second: float = 2500.0,
+        decode_tokens_per_second: float = 60.0
+    ):
+        self.overhead = overhead
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.decode_tokens_per_second = decode_tokens_per_second
+
+    def seconds(self, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+        return (
+            self.overhead
+            + (prompt_tokens - cached_tokens) / self.prefill_tokens_per_second
+            + completion_tokens / self.decode_tokens_per_second
+        )
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "overhead": self.overhead,
+            "prefill_tokens_per_second": self.prefill_tokens_per_second,
+            "decode_tokens_per_second": self.decode_tokens_per_second,
+        }
+
+
+class PromptCacheClient:
+    """
+    Envolve um cliente compatível com AsyncOpenAI (aqui, o ReplayClient):
+    acrescenta os acertos do cache ao `usage` de cada resposta e anota
+    tokens e latência modelada por prefixo
+    """
+
+    def __init__(self, client: Any, cache: Optional[ProviderPromptCache], latency: LatencyModel):
+        self._client = client
+        self.cache = cache
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **params: Any) -> Any:
+        from openai.types.chat import ChatCompletion
+
+        response = await self._client.chat.completions.create(**params)
+        messages = params.get("messages") or []
+        cached = self.cache.lookup(params.get("model"), messages) if self.cache else 0
+        if cached:
+            data = response.model_dump(mode="json", exclude_unset=True)
+            data["usage"]["prompt_tokens_details"] = {"cached_tokens": cached}
+            response = ChatCompletion.model_validate(data)
+
+        try:
+            label = prefix_for(messages).label
+        except KeyError:
+            label = "sem prefixo"
+        usage = response.usage
+        self.calls.append({
+            "prefix": label,
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": cached,
+            "completion_tokens": usage.completion_tokens,
+            "latency": self.latency.seconds(usage.prompt_tokens, cached, usage.completion_tokens),
+        })
+        return response
+
+    async def close(self) -> None:
+        return None
+
+
+def radar_changes(round_index: int) -> List[Dict[str, Any]]:
+    """Mudanças sintéticas de um ciclo do Radar"""
+    return [
+        {
+            "source": source,
+            "change_type": "update",
+            "title": f"Atualização {round_index}-{i} de {source}",
+            "date": f"2026-01-{i + 1:02d}",
+            "impact_level": "medium",
+            "summary": make_text(900000 + round_index * 10 + i, 2),
+            "version_change": f"v{round_index} → v{round_index + 1}",
+        }
+        for i, source in enumerate(("ANM", "JORC", "CVM"))
+    ]
+
+
+async def run_workload(client: Any, rounds: int, seed: int = 0) -> None:
+    """Chamadas dos engines, em sequência (a ordem define os acertos do cache)"""
+    from src.ai.core.bridge import BridgeAI
+    from src.ai.core.radar.engine import RadarEngine
+    from src.ai.core.validator import ValidatorAI
+
+    bridge = BridgeAI(client=client)
+    validator = ValidatorAI(client=client)
+    radar = RadarEngine(client=client)
+    for r in range(rounds):
+        for i, (source, target) in enumerate(BRIDGE_PAIRS):
+            await bridge.translate_normative(make_text(seed + 1000 * r + i, 6), source, target, use_memory=False)
+        await validator.validate_text(f"Technical Report {r}\n\n" + make_text(seed + 500000 + r, 60))
+        await radar._deep_analyze_changes(radar_changes(seed + r))
+
+
+@contextmanager
+def benchmark_state() -> Iterator[None]:
+    """
+    Governor sem limites efetivos e roteamento desligado durante o bloco
+
+    O estado do processo (governor, roteador, ledger) é recriado na saída.
+    """
+    from src.ai.core.llm import LLMGovernor, ModelRouter, set_governor, set_ledger, set_router
+
+    set_governor(LLMGovernor(rpm=1_000_000, tpm=1_000_000_000))
+    set_router(ModelRouter(enabled=False))
+    try:
+        yield
+    finally:
+        set_governor(None)
+        set_router(None)
+        set_ledger(None)
+
+
+async def record_workload(path: Path, rounds: int, seed: int = 0) -> Path:
+    """Grava a carga contra o servidor OpenAI fake"""
+    from openai import AsyncOpenAI
+
+    from src.ai.core.llm import RecordingClient
+    from src.ai.core.llm.fake_server import FakeLLMConfig, ServerThread, create_app
+
+    with ServerThread(create_app(FakeLLMConfig(seed=seed))) as server:
+        client = RecordingClient(
+            AsyncOpenAI(base_url=f"{server.url}/v1", api_key="fake-benchmark-key", max_retries=0),
+            path
+        )
+        await run_workload(client, rounds, seed)
+        await client.close()
+    return Path(path)
+
+
+async def replay_workload(
+    path: Path,
+    rounds: int,
+    cache: Optional[ProviderPromptCache],
+    latency: LatencyModel,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Repete a carga gravada e resume tokens, custo (ledger) e latência modelada"""
+    from src.ai.core.llm import ReplayClient, UsageLedger, set_ledger
+
+    ledger = UsageLedger()
+    set_ledger(ledger)
+    client = PromptCacheClient(ReplayClient(path, latency_scale=0), cache, latency)
+    await run_workload(client, rounds, seed)
+
+    totals = ledger.rollup(group_by=())[0]
+    latencies = [call["latency"] * 1000 for call in client.calls]
+    prefixes: Dict[str, Dict[str, int]] = {}
+    for call in client.calls:
+        stats = prefixes.setdefault(call["prefix"], {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += call["prompt_tokens"]
+        stats["cached_tokens"] += call["cached_tokens"]
+
+    prompt_tokens = totals["prompt_tokens"] or 0
+    cached_tokens = totals["cached_tokens"] or 0
+    return {
+        "calls": len(client.calls),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cached_share": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+        "cost_usd": round(totals["cost_usd"] or 0.0, 6),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "total_latency_s": round(sum(latencies) / 1000, 3),
+        "prefixes": prefixes,
+    }
+
+
+def reduction(before: float, after: float) -> float:
+    """Redução relativa (0.25 = 25% menor)"""
+    return round(1 - after / before, 4) if before else 0.0
+
+
+async def run_benchmark(
+    rounds: int = 3,
+    archive: Optional[Path] = None,
+    latency: Optional[LatencyModel] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Grava a carga (se `archive` ainda não existe) e a repete sem e com cache
+
+    Returns:
+        {'scenarios': {no_cache, prompt_cache}, 'reduction': {cost, p50, p95, latency_total}}
+    """
+    latency = latency or LatencyModel()
+    with benchmark_state(), tempfile.TemporaryDirectory() as tmp:
+        path = Path(archive) if archive else Path(tmp) / "prompt-cache.jsonl.gz"
+        if not path.exists():
+            await record_workload(path, rounds, seed)
+        scenarios = {
+            "no_cache": await replay_workload(path, rounds, None, latency, seed),
+            "prompt_cache": await replay_workload(path, rounds, ProviderPromptCache(), latency, seed),
+        }
+
+    before, after = scenarios["no_cache"], scenarios["prompt_cache"]
+    return {
+        "scenarios": scenarios,
+        "reduction": {
+            "cost": reduction(before["cost_usd"], after["cost_usd"]),
+            "p50": reduction(before["p50_ms"], after["p50_ms"]),
+            "p95": reduction(before["p95_ms"], after["p95_ms"]),
+            "latency_total": reduction(before["total_latency_s"], after["total_latency_s"]),
+        },
+    }
+
+
+def format_table(result: Dict[str, Any]) -> str:
+    lines = [f"{'cenário':<13} {'calls':>6} {'prompt':>9} {'cache':>9} {'%cache':>7} {'custo US$':>10} {'p50':>8} {'p95':>8}"]
+    for name, data in result["scenarios"].items():
+        lines.append(
+            f"{name:<13} {data['calls']:>6} {data['prompt_tokens']:>9} {data['cached_tokens']:>9} "
+            f"{data['cached_share']:>7.1%} {data['cost_usd']:>10.4f} {data['p50_ms']:>8.1f} {data['p95_ms']:>8.1f}"
+        )
+    lines.append("redução: " + ", ".join(f"{name} {value:.1%}" for name, value in result["reduction"].items()))
+    lines.append("")
+    lines.append(f"{'prefixo':<28} {'tokens':>7} {'cacheável':>10} {'%cache':>7}")
+    cached_prefixes = result["scenarios"]["prompt_cache"]["prefixes"]
+    for prefix in result["prefixes"]:
+        stats = cached_prefixes.get(prefix["label"], {})
+        share = stats["cached_tokens"] / stats["prompt_tokens"] if stats.get("prompt_tokens") else 0.0
+        lines.append(
+            f"{prefix['label']:<28} {prefix['tokens']:>7} {'sim' if prefix['cacheable'] else 'não':>10} {share:>7.1%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Custo e latência com o cache de prompt do provedor")
+    parser.add_argument("--rounds", type=int, default=5, help="repetições da carga (Bridge, Validator, Radar)")
+    parser.add_argument("--archive", type=Path, help="arquivo de replay (gravado se ainda não existir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--overhead", type=float, default=0.25, help="segundos fixos por chamada")
+    parser.add_argument("--prefill-tps", type=float, default=2500.0, help="tokens de prompt por segundo")
+    parser.add_argument("--decode-tps", type=float, default=60.0, help="tokens de resposta por segundo")
+    parser.add_argument("--output", type=Path, help="grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel(args.overhead, args.prefill_tps, args.decode_tps)
+    result = asyncio.run(run_benchmark(args.rounds, args.archive, latency, args.seed))
+    result["prefixes"] = [prefix.describe() for prefix in prompt_prefixes()]
+
+    print(format_table(result))
+    if args.output:
+        settings = {"rounds": args.rounds, "seed": args.seed, "latency_model": latency.as_dict()}
+        full = build_result(result["scenarios"], settings)
+        full.update(reduction=result["reduction"], prefixes=result["prefixes"])
+        save_result(full, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
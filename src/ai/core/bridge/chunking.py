@@ -0,0 +1,98 @@
+"""
+QIVO Intelligence Layer - Bridge Document Chunking
+Divisão de documentos longos em blocos por fronteira de seção
+"""
+
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+from .memory import segment_text
+
+
+# Títulos: markdown, numeração de seção ("3.2 Estimativa"), palavras-chave de
+# capítulo/seção ou linha curta toda em maiúsculas
+_MARKDOWN_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+\S")
+_NUMBERED_HEADING = re.compile(r"^\s*\d{1,2}(?:\.\d{1,2}){0,3}\.?\s+[A-ZÀ-Ý]")
+_KEYWORD_HEADING = re.compile(
+    r"^\s*(?:SE[ÇC][ÃA]O|SECTION|CAP[ÍI]TULO|CHAPTER|PARTE|PART|ANEXO|APPENDIX)\s+[\dIVXA-Z]",
+    re.IGNORECASE
+)
+_MAX_HEADING_CHARS = 120
+
+
+def is_heading(line: str) -> bool:
+    """Indica se a linha parece título de seção"""
+    stripped = line.strip()
+    if not stripped or len(stripped) > _MAX_HEADING_CHARS:
+        return False
+    if _MARKDOWN_HEADING.match(stripped) or _KEYWORD_HEADING.match(stripped):
+        return True
+    if _NUMBERED_HEADING.match(stripped) and not stripped.endswith(('.', ';', ',')):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters)
+
+
+def _split_long(line: str, max_chars: int) -> List[str]:
+    """Quebra uma linha maior que o bloco em frases; corte bruto só em último caso"""
+    parts: List[str] = []
+    current = ""
+    for segment, separator in segment_text(line):
+        piece = segment + separator
+        while len(piece) > max_chars:
+            cut = piece.rfind(" ", 0, max_chars) + 1 or max_chars
+            piece_head, piece = piece[:cut], piece[cut:]
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(piece_head)
+        if len(current) + len(piece) > max_chars:
+            parts.append(current)
+            current = ""
+        current += piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def iter_chunks(lines: Iterable[str], max_chars: int = 6000) -> Iterator[str]:
+    """
+    Agrupa as linhas (com quebras preservadas) em blocos de até `max_chars`
+
+    O corte preferido é antes do último título de seção do bloco; depois,
+    após a última linha em branco; por fim, na última linha. Lê as linhas sob
+    demanda (memória limitada a um bloco) e concatenar os blocos reconstrói
+    o texto original exatamente.
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars deve ser positivo")
+
+    # (texto, tipo) com tipo em 'heading', 'blank' ou 'text'
+    buffer: List[Tuple[str, str]] = []
+    size = 0
+
+    for line in lines:
+        units = [line] if len(line) <= max_chars else _split_long(line, max_chars)
+        for unit in units:
+            kind = 'blank' if not unit.strip() else 'heading' if is_heading(unit) else 'text'
+            while buffer and size + len(unit) > max_chars:
+                cut = _cut_point(buffer)
+                yield ''.join(text for text, _ in buffer[:cut])
+                buffer = buffer[cut:]
+                size = sum(len(text) for text, _ in buffer)
+            buffer.append((unit, kind))
+            size += len(unit)
+
+    if buffer:
+        yield ''.join(text for text, _ in buffer)
+
+
+def _cut_point(buffer: List[Tuple[str, str]]) -> int:
+    """Índice do primeiro item do próximo bloco"""
+    for i in range(len(buffer) - 1, 0, -1):
+        if buffer[i][1] == 'heading':
+            return i
+    for i in range(len(buffer) - 1, 0, -1):
+        if buffer[i][1] == 'blank':
+            return i + 1
+    return len(buffer)
@@ -0,0 +1,361 @@
+"""
+QIVO Intelligence Layer - Bridge Norm Classifier
+Classificador local (CPU) da norma de um texto, com probabilidades calibradas
+"""
+
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .glossary import TERMINOLOGY
+
+
+NORMS = ('ANM', 'JORC', 'NI43-101', 'PERC', 'SAMREC')
+
+# Marcadores próprios de cada norma e seu peso no vocabulário de treino
+# (os termos do glossário entram com peso 1). Termos em português de
+# códigos estrangeiros cobrem relatórios traduzidos.
+NORM_SIGNALS: Dict[str, Dict[str, float]] = {
+    'ANM': {
+        'anm': 6, 'dnpm': 6, 'agência nacional de mineração': 6, 'código de mineração': 5,
+        'cfem': 5, 'relatório anual de lavra': 5, 'ral': 3, 'plano de aproveitamento econômico': 5,
+        'pae': 3, 'portaria de lavra': 5, 'concessão de lavra': 5, 'alvará de pesquisa': 5,
+        'relatório final de pesquisa': 4, 'resolução anm': 6, 'processo anm': 6, 'lavra': 2,
+        'jazida': 2, 'pesquisa mineral': 2, 'lang:pt': 3,
+    },
+    'JORC': {
+        'jorc': 8, 'jorc code': 8, 'código jorc': 8, 'ausimm': 6, 'aig': 4, 'asx': 5,
+        'australasian': 5, 'table 1': 3, 'ore reserves': 4, 'ore reserve': 4,
+        'competent person': 2, 'pessoa competente': 3, 'reservas de minério': 3,
+    },
+    'NI43-101': {
+        'ni 43-101': 8, '43-101': 8, 'ni43-101': 8, 'national instrument 43-101': 8,
+        'qualified person': 6, 'cim': 5, 'cim definition standards': 6, 'sedar': 6,
+        'tsx': 4, 'tsx-v': 4, 'form 43-101f1': 8, '43-101f1': 8, 'preliminary economic assessment': 4,
+        'pea': 3, 'proven mineral reserves': 4, 'proven': 3, 'canadian securities administrators': 6,
+    },
+    'PERC': {
+        'gkz': 8, 'russian classification': 7, 'russian': 4, 'russia': 4, 'rosnedra': 7,
+        'state commission on mineral reserves': 8, 'c1': 5, 'c2': 5, 'category a': 4,
+        'category b': 4, 'a+b': 4, 'a b c1': 5, 'tkz': 6, 'mineral extraction tax': 5, 'lang:ru': 8,
+    },
+    'SAMREC': {
+        'samrec': 8, 'samrec code': 8, 'samval': 6, 'samcodes': 7, 'saimm': 6, 'sacnasp': 6,
+        'jse': 6, 'johannesburg stock exchange': 6, 'south african': 5, 'south africa': 5,
+        'ecsa': 5, 'section 12': 3,
+    },
+}
+
+# Textos rotulados curtos: calibram a temperatura das probabilidades e
+# complementam o vocabulário (novos exemplos entram via NormClassifier.fit)
+SEED_SAMPLES: List[Tuple[str, str]] = [
+    ('ANM', "Relatório Anual de Lavra (RAL) apresentado à ANM referente à concessão de lavra; "
+            "a CFEM foi recolhida sobre o faturamento da mina."),
+    ('ANM', "O relatório final de pesquisa descreve a jazida delimitada no alvará de pesquisa, "
+            "com reservas medidas e indicadas conforme o Código de Mineração."),
+    ('ANM', "Plano de Aproveitamento Econômico (PAE) protocolado no processo ANM para a lavra de "
+            "minério de ferro, com recursos medidos e reserva provada."),
+    ('JORC', "Mineral Resources and Ore Reserves are reported in accordance with the JORC Code (2012); "
+             "the Competent Person is a Member of the AusIMM."),
+    ('JORC', "ASX announcement: Indicated and Inferred Mineral Resources, JORC Table 1 sections 1 to 3 "
+             "attached, Probable Ore Reserve based on the pre-feasibility study."),
+    ('JORC', "Os Recursos Minerais foram classificados segundo o Código JORC, sob responsabilidade da "
+             "Pessoa Competente, membro do AusIMM."),
+    ('NI43-101', "This Technical Report was prepared in accordance with NI 43-101 and Form 43-101F1 by "
+                 "an independent Qualified Person, using the CIM Definition Standards."),
+    ('NI43-101', "The preliminary economic assessment (PEA) filed on SEDAR includes Measured and "
+                 "Indicated Mineral Resources and Proven Mineral Reserves."),
+    ('NI43-101', "Relatório Técnico NI 43-101 elaborado por Pessoa Qualificada independente, conforme "
+                 "as definições do CIM, arquivado no SEDAR."),
+    ('PERC', "Reserves of categories A+B and C1 were approved by the GKZ (State Commission on Mineral "
+             "Reserves); C2 resources remain subject to further exploration."),
+    ('PERC', "Under the Russian Classification, the deposit holds C1 and C2 reserves registered with "
+             "Rosnedra, and mineral extraction tax applies to production."),
+    ('PERC', "Запасы категорий C1 и C2 утверждены ГКЗ; the Russian Classification was reconciled "
+             "with proved reserves and probable reserves."),
+    ('SAMREC', "Mineral Resources are reported in terms of the SAMREC Code (2016) and the JSE Listings "
+               "Requirements; the Competent Person is registered with SACNASP."),
+    ('SAMREC', "South African operations: Measured and Indicated Mineral Resources signed off per "
+               "SAMREC Table 1, with valuation under SAMVAL."),
+    ('SAMREC', "Os Recursos Minerais da mina na África do Sul seguem o Código SAMREC e as regras da "
+               "JSE, com Pessoa Competente registrada no SACNASP."),
+]
+
+# Fração da probabilidade reservada às outras normas no alvo da calibração
+CALIBRATION_SMOOTHING = 0.05
+
+_TOKEN = re.compile(r"[^\W_]+(?:[-+][^\W_]+)*")
+_CYRILLIC = re.compile(r"[а-яё]")
+_PT_STOPWORDS = frozenset({
+    'de', 'da', 'do', 'das', 'dos', 'que', 'com', 'para', 'em', 'na', 'no', 'nas', 'nos',
+    'não', 'são', 'uma', 'pelo', 'pela', 'foram', 'foi', 'sobre', 'conforme', 'e', 'os', 'as',
+})
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class NormClassifier:
+    """
+    Classificador linear de norma (Naive Bayes multinomial sobre termos-chave)
+
+    - Features: n-gramas de palavras do vocabulário das normas (glossário +
+      marcadores de NORM_SIGNALS) e o idioma do texto (pt / cirílico)
+    - Treino: vocabulário ponderado + exemplos rotulados (`fit`)
+    - Probabilidades calibradas por temperatura (log loss mínima, com alvo
+      suavizado, em leave-one-out sobre os exemplos rotulados)
+    - Texto sem nenhum termo conhecido: `norm` None e probabilidades uniformes
+    """
+
+    def __init__(
+        self,
+        signals: Optional[Dict[str, Dict[str, float]]] = None,
+        terminology: Optional[Dict[str, Dict[str, Any]]] = None,
+        alpha: float = 0.5
+    ):
+        self.alpha = alpha
+        self.temperature = 1.0
+        self.samples = 0
+        self._vocab_counts: Dict[str, Counter] = {norm: Counter() for norm in NORMS}
+        self._sample_counts: Dict[str, Counter] = {norm: Counter() for norm in NORMS}
+
+        for concept in (terminology if terminology is not None else TERMINOLOGY).values():
+            for norm, terms in concept['terms'].items():
+                for term in terms:
+                    self._vocab_counts[norm][' '.join(tokenize(term))] += 1
+        for norm, weighted in (signals if signals is not None else NORM_SIGNALS).items():
+            for term, weight in weighted.items():
+                key = term if term.startswith('lang:') else ' '.join(tokenize(term))
+                self._vocab_counts[norm][key] += weight
+
+        self.vocabulary = sorted({f for counts in self._vocab_counts.values() for f in counts})
+        self._features = set(self.vocabulary)
+        # Primeira palavra de cada termo -> maior n-grama que começa por ela
+        self._starts: Dict[str, int] = {}
+        for feature in self.vocabulary:
+            words = feature.split(' ')
+            self._starts[words[0]] = max(self._starts.get(words[0], 0), len(words))
+        self._weights = self._log_probs(self._vocab_counts)
+
+    # --- Features ---
+
+    def features(self, text: str) -> Counter:
+        """Contagem dos termos do vocabulário presentes no texto"""
+        tokens = tokenize(text)
+        found: Counter = Counter()
+        starts, known = self._starts, self._features
+        for i, token in enumerate(tokens):
+            longest = starts.get(token)
+            if longest is None:
+                continue
+            if token in known:
+                found[token] += 1
+            for n in range(2, longest + 1):
+                gram = ' '.join(tokens[i:i + n])
+                if gram in known:
+                    found[gram] += 1
+
+        if tokens and len(_PT_STOPWORDS.intersection(tokens)) >= 3:
+            portuguese = sum(1 for t in tokens if t in _PT_STOPWORDS)
+            if portuguese / len(tokens) >= 0.08:
+                found['lang:pt'] = 1
+        if _CYRILLIC.search(text.lower()):
+            found['lang:ru'] = 1
+        return found
+
+    # --- Treino ---
+
+    def fit(self, samples: Iterable[Tuple[str, str]]) -> "NormClassifier":
+        """
+        Acrescenta exemplos rotulados (norma, texto) ao treino e recalibra
+        a temperatura
+
+        Raises:
+            ValueError: norma desconhecida
+        """
+        extracted = []
+        for norm, text in samples:
+            if norm not in self._sample_counts:
+                raise ValueError(f"Norma desconhecida: {norm}")
+            extracted.append((norm, self.features(text)))
+
+        for norm, found in extracted:
+            self._sample_counts[norm].update(found)
+        self.samples += len(extracted)
+        self._weights = self._log_probs(self._combined())
+        self.temperature = self._calibrate(extracted) if extracted else self.temperature
+        return self
+
+    def _combined(self, exclude: Optional[Tuple[str, Counter]] = None) -> Dict[str, Counter]:
+        combined = {norm: self._vocab_counts[norm] + self._sample_counts[norm] for norm in NORMS}
+        if exclude is not None:
+            norm, found = exclude
+            combined[norm] = combined[norm] - found
+        return combined
+
+    def _log_probs(self, counts: Dict[str, Counter]) -> Dict[str, Dict[str, float]]:
+        size = len(self.vocabulary)
+        weights = {}
+        for norm in NORMS:
+            total = sum(counts[norm].values()) + self.alpha * size
+            weights[norm] = {f: math.log((counts[norm].get(f, 0) + self.alpha) / total) for f in self.vocabulary}
+        return weights
+
+    def _calibrate(self, extracted: List[Tuple[str, Counter]]) -> float:
+        """Temperatura com menor log loss em leave-one-out"""
+        held_out = []
+        for norm, found in extracted:
+            if not found:
+                continue
+            weights = self._log_probs(self._combined(exclude=(norm, found)))
+            held_out.append((norm, self._scores(found, weights)))
+        if not held_out:
+            return self.temperature
+
+        # Alvo suavizado: exemplos separáveis não levam a temperatura a zero
+        # (probabilidade 1.0 em tudo), e sim a ~1 - CALIBRATION_SMOOTHING
+        off = CALIBRATION_SMOOTHING / (len(NORMS) - 1)
+
+        def loss(t: float) -> float:
+            total = 0.0
+            for norm, scores in held_out:
+                probabilities = self._softmax(scores, t)
+                total -= sum(
+                    (1 - CALIBRATION_SMOOTHING if n == norm else off) * math.log(max(p, 1e-12))
+                    for n, p in probabilities.items()
+                )
+            return total
+
+        candidates = [0.05 * (1.25 ** k) for k in range(40)]
+        return min(candidates, key=loss)
+
+    # --- Classificação ---
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Classifica um texto
+
+        Returns:
+            {'norm': str | None, 'confidence': float,
+             'probabilities': {norma: p}, 'matched_terms': int}
+        """
+        found = self.features(text)
+        if not found:
+            uniform = round(1 / len(NORMS), 4)
+            return {
+                'norm': None,
+                'confidence': uniform,
+                'probabilities': {norm: uniform for norm in NORMS},
+                'matched_terms': 0
+            }
+
+        probabilities = self._softmax(self._scores(found, self._weights), self.temperature)
+        norm = max(probabilities, key=probabilities.get)
+        return {
+            'norm': norm,
+            'confidence': round(probabilities[norm], 4),
+            'probabilities': {n: round(p, 4) for n, p in probabilities.items()},
+            'matched_terms': sum(v for f, v in found.items() if not f.startswith('lang:'))
+        }
+
+    def classify_many(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Classificação em lote (mesma ordem dos textos)"""
+        return [self.classify(text) for text in texts]
+
+    @staticmethod
+    def _scores(found: Counter, weights: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+        # Frequência sublinear: repetir um termo genérico pesa pouco
+        return {
+            norm: sum((1 + math.log(count)) * weights[norm][f] for f, count in found.items())
+            for norm in NORMS
+        }
+
+    @staticmethod
+    def _softmax(scores: Dict[str, float], temperature: float) -> Dict[str, float]:
+        top = max(scores.values())
+        exp = {norm: math.exp((s - top) / temperature) for norm, s in scores.items()}
+        total = sum(exp.values())
+        return {norm: e / total for norm, e in exp.items()}
+
+    # --- Avaliação ---
+
+    def evaluate(self, samples: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Relatório de acurácia e desempenho sobre exemplos rotulados
+
+        Returns:
+            accuracy, log_loss, ece (erro de calibração, 5 faixas), matriz
+            de confusão, recall por norma e latência média por página
+            (3000 caracteres)
+        """
+        confusion = {norm: Counter() for norm in NORMS}
+        log_loss = 0.0
+        bins: List[List[Tuple[float, bool]]] = [[] for _ in range(5)]
+        chars = 0
+        started = time.perf_counter()
+        predictions = self.classify_many([text for _, text in samples])
+        elapsed = time.perf_counter() - started
+
+        for (norm, text), prediction in zip(samples, predictions):
+            chars += len(text)
+            predicted = prediction['norm'] or 'none'
+            confusion[norm][predicted] += 1
+            log_loss -= math.log(max(prediction['probabilities'][norm], 1e-12))
+            confidence = prediction['confidence']
+            bins[min(int(confidence * 5), 4)].append((confidence, predicted == norm))
+
+        total = len(samples)
+        correct = sum(confusion[norm][norm] for norm in NORMS)
+        ece = sum(
+            len(b) / total * abs(sum(c for c, _ in b) / len(b) - sum(ok for _, ok in b) / len(b))
+            for b in bins if b
+        ) if total else 0.0
+        pages = max(chars / 3000, 1e-9)
+        return {
+            'samples': total,
+            'accuracy': round(correct / total, 4) if total else 0.0,
+            'log_loss': round(log_loss / total, 4) if total else 0.0,
+            'ece': round(ece, 4),
+            'recall': {
+                norm: round(confusion[norm][norm] / sum(confusion[norm].values()), 4)
+                for norm in NORMS if confusion[norm]
+            },
+            'confusion': {norm: dict(confusion[norm]) for norm in NORMS if confusion[norm]},
+            'ms_per_page': round(elapsed * 1000 / pages, 4),
+            'temperature': round(self.temperature, 4),
+        }
+
+
+_classifier: Optional[NormClassifier] = None
+
+
+def get_norm_classifier() -> NormClassifier:
+    """Classificador do processo (vocabulário + SEED_SAMPLES, treinado uma vez)"""
+    global _classifier
+    if _classifier is None:
+        _classifier = NormClassifier().fit(SEED_SAMPLES)
+    return _classifier
+
+
+def load_labeled_samples(directory: str) -> List[Tuple[str, str]]:
+    """Lê exemplos rotulados de arquivos `<NORMA>_<nome>.txt` de um diretório"""
+    from pathlib import Path
+
+    samples = []
+    for path in sorted(Path(directory).glob('*.txt')):
+        norm = path.stem.split('_', 1)[0]
+        if norm in NORMS:
+            samples.append((norm, path.read_text(encoding='utf-8')))
+    return samples
+
+
+if __name__ == "__main__":
+    # Relatório de acurácia: python -m src.ai.core.bridge.classifier <diretório>
+    import json
+    import sys
+
+    report = get_norm_classifier().evaluate(load_labeled_samples(sys.argv[1]))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,296 @@
+"""
+QIVO Intelligence Layer - Norm Comparison Matrix
+Comparações pré-computadas entre pares de normas, persistidas e versionadas
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from src.ai.core.llm import Priority, ledger_context, llm_priority
+from src.ai.core.singleflight import count_coalesced
+from src.ai.core.storage import data_path, write_json_atomic
+from src.ai.core.telemetry import cache_lookup
+
+
+ComputeFn = Callable[[], Awaitable[Dict[str, Any]]]
+
+# Formato do arquivo persistido (mudanças incompatíveis descartam o cache)
+STORE_FORMAT = 1
+
+
+def comparison_fingerprint(meta1: Dict[str, Any], meta2: Dict[str, Any], salt: str = "") -> str:
+    """
+    Versão de uma entrada: hash dos metadados das duas normas + salt
+    (ex.: versão do prompt e modelo). Metadados alterados => entrada obsoleta.
+    """
+    payload = json.dumps([meta1, meta2, salt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ComparisonMatrix:
+    """
+    Matriz de comparações norma x norma (20 pares ordenados por namespace)
+
+    - Leitura em memória: entradas válidas respondem sem chamar o GPT
+    - Entrada obsoleta (metadados mudaram): serve a versão anterior marcada
+      como `stale` e recalcula em segundo plano
+    - Ausente: calcula na hora; chamadas simultâneas ao mesmo par
+      compartilham o mesmo cálculo
+    - Persistência em JSON (escrita atômica) para sobreviver a restarts
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "computed": 0,
+            "background_refreshes": 0,
+            "errors": 0,
+        }
+
+    # --- Leitura / escrita ---
+
+    @staticmethod
+    def key(namespace: str, norm1: str, norm2: str) -> str:
+        return f"{namespace}:{norm1}->{norm2}"
+
+    def lookup(
+        self,
+        namespace: str,
+        norm1: str,
+        norm2: str,
+        fingerprint: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Entrada armazenada para o par, com `fresh` indicando se a versão
+        bate com os metadados atuais (None se nunca calculada)
+        """
+        self._ensure_loaded()
+        entry = self._entries.get(self.key(namespace, norm1, norm2))
+        if entry is None:
+            return None
+        return {**entry, "fresh": entry["fingerprint"] == fingerprint}
+
+    def put(
+        self,
+        namespace: str,
+        norm1: str,
+        norm2: str,
+        fingerprint: str,
+        result: Dict[str, Any],
+        persist: bool = True
+    ) -> Dict[str, Any]:
+        self._ensure_loaded()
+        entry = {
+            "namespace": namespace,
+            "norm1": norm1,
+            "norm2": norm2,
+            "fingerprint": fingerprint,
+            "result": result,
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._entries[self.key(namespace, norm1, norm2)] = entry
+        if persist:
+            self.save()
+        return entry
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        write_json_atomic(self.path, {"format": STORE_FORMAT, "entries": self._entries})
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return  # arquivo corrompido: reconstrói sob demanda
+        if payload.get("format") == STORE_FORMAT:
+            self._entries = payload.get("entries", {})
+
+    # --- Acesso com cálculo ---
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        norm1: str,
+        norm2: str,
+        fingerprint: str,
+        compute: ComputeFn
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Retorna (resultado, info) para o par
+
+        info: {'cached': bool, 'stale': bool, 'computed_at': str}
+
+        Raises:
+            Exception: erros de `compute` quando não há versão armazenada
+        """
+        entry = self.lookup(namespace, norm1, norm2, fingerprint)
+
+        if entry is not None:
+            if entry["fresh"]:
+                self.counters["hits"] += 1
+                cache_lookup("comparison_matrix", "hit")
+            else:
+                self.counters["stale_hits"] += 1
+                cache_lookup("comparison_matrix", "stale_hit")
+                self.refresh_in_background(namespace, norm1, norm2, fingerprint, compute)
+            return entry["result"], {
+                "cached": True,
+                "stale": not entry["fresh"],
+                "computed_at": entry["computed_at"],
+            }
+
+        self.counters["misses"] += 1
+        cache_lookup("comparison_matrix", "miss")
+        entry = await self._compute_once(namespace, norm1, norm2, fingerprint, compute)
+        return entry["result"], {
+            "cached": False,
+            "stale": False,
+            "computed_at": entry["computed_at"],
+        }
+
+    def refresh_in_background(
+        self,
+        namespace: str,
+        norm1: str,
+        norm2: str,
+        fingerprint: str,
+        compute: ComputeFn
+    ) -> Optional[asyncio.Task]:
+        """Agenda o recálculo do par (no máximo um por par em andamento)"""
+        key = self.key(namespace, norm1, norm2)
+        if key in self._inflight:
+            return self._inflight[key]
+
+        self.counters["background_refreshes"] += 1
+        with llm_priority(Priority.BATCH), ledger_context(job=f"{namespace}.compare_refresh"):
+            task = self._start(namespace, norm1, norm2, fingerprint, compute)
+        # Erros do refresh já foram contados; a versão anterior continua servindo
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def warm(
+        self,
+        namespace: str,
+        pairs: Iterable[Tuple[str, str, str, ComputeFn]],
+        concurrency: int = 4,
+        force: bool = False
+    ) -> Dict[str, int]:
+        """
+        Pré-computa os pares (norm1, norm2, fingerprint, compute) ausentes ou
+        obsoletos, com prioridade de lote no governor
+
+        Returns:
+            Contagem de pares calculados, já válidos e com erro
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        summary = {"computed": 0, "up_to_date": 0, "errors": 0}
+
+        async def warm_pair(norm1: str, norm2: str, fingerprint: str, compute: ComputeFn):
+            entry = self.lookup(namespace, norm1, norm2, fingerprint)
+            if entry is not None and entry["fresh"] and not force:
+                summary["up_to_date"] += 1
+                return
+            async with semaphore:
+                try:
+                    await self._compute_once(namespace, norm1, norm2, fingerprint, compute)
+                    summary["computed"] += 1
+                except Exception:
+                    summary["errors"] += 1
+
+        with llm_priority(Priority.BATCH), ledger_context(job=f"{namespace}.compare_warm"):
+            await asyncio.gather(*(warm_pair(*pair) for pair in pairs))
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        by_namespace: Dict[str, int] = {}
+        for entry in self._entries.values():
+            by_namespace[entry["namespace"]] = by_namespace.get(entry["namespace"], 0) + 1
+        return {
+            **self.counters,
+            "entries": by_namespace,
+            "refreshing": len(self._inflight),
+            "path": str(self.path) if self.path else None,
+        }
+
+    # --- Internos ---
+
+    def _start(self, namespace, norm1, norm2, fingerprint, compute) -> asyncio.Task:
+        key = self.key(namespace, norm1, norm2)
+
+        async def run() -> Dict[str, Any]:
+            try:
+                result = await compute()
+            except Exception:
+                self.counters["errors"] += 1
+                raise
+            self.counters["computed"] += 1
+            return self.put(namespace, norm1, norm2, fingerprint, result)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _compute_once(self, namespace, norm1, norm2, fingerprint, compute) -> Dict[str, Any]:
+        key = self.key(namespace, norm1, norm2)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(namespace, norm1, norm2, fingerprint, compute)
+        else:
+            count_coalesced(f"{namespace}.compare")
+        # shield: cancelar um chamador não cancela o cálculo compartilhado
+        return await asyncio.shield(task)
+
+
+_matrix: Optional[ComparisonMatrix] = None
+
+
+def get_comparison_matrix() -> ComparisonMatrix:
+    """Matriz de comparações do processo (arquivo data/norm_comparisons.json)"""
+    global _matrix
+    if _matrix is None:
+        _matrix = ComparisonMatrix(data_path("norm_comparisons.json"))
+    return _matrix
+
+
+def set_comparison_matrix(matrix: Optional[ComparisonMatrix]) -> None:
+    """Substitui a matriz do processo (testes; None recria a padrão)"""
+    global _matrix
+    _matrix = matrix
+
+
+async def warm_all(force: bool = False) -> Dict[str, Dict[str, int]]:
+    """Pré-computa as matrizes do Bridge e do Radar"""
+    from src.ai.core.bridge.engine import BridgeAI
+    from src.ai.core.radar.engine import get_radar_engine
+
+    summary = {"bridge": await BridgeAI().warm_comparisons(force=force)}
+    radar = get_radar_engine()
+    if radar.client is not None:
+        summary["radar"] = await radar.warm_comparisons(force=force)
+    return summary
+
+
+if __name__ == "__main__":
+    # Build offline: python -m src.ai.core.bridge.comparisons [--force]
+    import sys
+
+    print(json.dumps(asyncio.run(warm_all(force="--force" in sys.argv)), indent=2))
@@ -4,11 +4,41 @@ Tradução semântica entre normas regulatórias globais
 """
 
 import os
+import io
 import json
-from typing import Dict, Any, Optional, Literal
-from openai import AsyncOpenAI
+import asyncio
+from collections import deque
+from itertools import permutations
+from typing import Dict, Any, AsyncIterator, Callable, Deque, Iterable, Iterator, List, Optional, Literal, TextIO, Tuple, Union
 from datetime import datetime, timezone
 
+from src.ai.core.llm import (
+    JSONFieldStream,
+    LLMUnavailable,
+    Priority,
+    PromptBudget,
+    TokenUsage,
+    count_tokens,
+    create_chat_completion,
+    delta_events,
+    get_llm_client,
+    get_model,
+    llm_priority,
+    split_tokens,
+    stream_chat_completion,
+    track_usage,
+    truncate_tokens,
+)
+from src.ai.core.llm.ledger import ledger_context, norm_pair
+from src.ai.core.llm.prompts import PromptPrefix, register_prefix
+from src.ai.core.llm.routing import get_router, routed_completion
+from src.ai.core.singleflight import coalesce
+from src.ai.core.telemetry import stage, track_stages
+from .chunking import iter_chunks
+from .comparisons import comparison_fingerprint, get_comparison_matrix
+from .glossary import GLOSSARY_VERSION, TERMINOLOGY, get_glossary
+from .memory import get_translation_memory, segment_text
+
 
 # Tipos de normas suportadas
 NormType = Literal['ANM', 'JORC', 'NI43-101', 'PERC', 'SAMREC']
@@ -60,40 +90,69 @@ class BridgeAI:
         }
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Versão do prompt de comparação (incrementar invalida a matriz persistida)
+    COMPARISON_PROMPT_VERSION = 1
+    
+    # Versão do prefixo estático do prompt de tradução (ver TRANSLATE_PREFIX)
+    TRANSLATE_PROMPT_VERSION = 2
+    
+    # Confiança atribuída às traduções feitas só pelo glossário curado
+    GLOSSARY_CONFIDENCE = 95
+    
+    def __init__(self, api_key: Optional[str] = None, client: Optional[Any] = None):
         """
         Inicializa Bridge AI
         
         Args:
             api_key: OpenAI API key (usa variável de ambiente se não fornecida)
+            client: cliente compatível com AsyncOpenAI (padrão: cliente
+                compartilhado do processo, ver src.ai.core.llm)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY não configurada")
+        if client is None:
+            # Sem API key, só há cliente injetado ou de replay (QIVO_LLM_REPLAY)
+            client = get_llm_client(self.api_key)
+            if client is None:
+                raise ValueError("OPENAI_API_KEY não configurada")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = client
         
-        # Configurações do modelo
-        self.model = "gpt-4o"  # GPT-4 Turbo para melhor raciocínio
+        # Configurações do modelo (sobrescrevíveis por QIVO_MODEL_BRIDGE_*)
+        self.model = get_model('bridge.translate', "gpt-4o")  # GPT-4 Turbo para melhor raciocínio
+        self.compare_model = get_model('bridge.compare', self.model)
         self.max_tokens = 3000
+        # Teto de tokens do texto por chamada (acima dele, use translate_document)
+        self.max_input_tokens = int(os.getenv('QIVO_BRIDGE_INPUT_TOKENS', '2000'))
         self.temperature = 0.2  # Baixa para consistência em traduções técnicas
+        
+        # Glossário terminológico: traduz sem GPT trechos curtos só de terminologia
+        self.glossary = get_glossary()
+        self.glossary_max_chars = int(os.getenv('QIVO_BRIDGE_GLOSSARY_MAX_CHARS', '600'))
     
     async def translate_normative(
         self,
         text: str,
         source_norm: NormType,
         target_norm: NormType,
-        explain: bool = False
+        explain: bool = False,
+        use_memory: bool = True
     ) -> Dict[str, Any]:
         """
         Traduz texto entre normas regulatórias
         
+        O texto é dividido em segmentos (frases/parágrafos). Cada segmento vem,
+        nesta ordem, do glossário terminológico, da memória de tradução ou do
+        GPT; só os segmentos inéditos vão ao GPT, numa única chamada.
+        Textos acima de `max_input_tokens` tokens (QIVO_BRIDGE_INPUT_TOKENS)
+        são truncados: para relatórios inteiros, use translate_document.
+        
         Args:
             text: Texto técnico a traduzir
             source_norm: Norma de origem (ANM, JORC, NI43-101, PERC, SAMREC)
             target_norm: Norma de destino
             explain: Se True, inclui justificativa semântica
+            use_memory: Se False, ignora a memória de tradução (texto inteiro ao GPT)
             
         Returns:
             Dict com:
@@ -102,6 +161,90 @@ class BridgeAI:
                 - explanation: Justificativa (se explain=True)
                 - source_metadata: Metadados da norma origem
                 - target_metadata: Metadados da norma destino
+                - method: 'glossary', 'memory' ou 'gpt' (o mais caro usado)
+                - glossary_coverage: Fração dos termos resolvida pelo glossário
+                - segments: Proveniência de cada segmento, na ordem do texto
+                - memory: Hits/misses da memória de tradução nesta chamada
+                - usage: Tokens de prompt/resposta consumidos pela chamada
+                - timings: Segundos por etapa (resolve, llm) e total
+            
+        Chamadas idênticas e simultâneas (mesmo texto, normas, opções e
+        configuração do engine) compartilham uma única execução (ver
+        src.ai.core.singleflight); quem só aguardou recebe `coalesced: True`
+        e `usage` zerado.
+        """
+        return await coalesce(
+            'bridge.translate',
+            (id(self.client), self._translate_settings(), text, source_norm, target_norm, explain, use_memory),
+            lambda: self._translate_normative(text, source_norm, target_norm, explain, use_memory),
+            waiter=self._as_coalesced
+        )
+    
+    async def _translate_normative(
+        self,
+        text: str,
+        source_norm: NormType,
+        target_norm: NormType,
+        explain: bool,
+        use_memory: bool
+    ) -> Dict[str, Any]:
+        with track_stages('bridge', **self._span_attributes(source_norm, target_norm)) as timings, \
+                track_usage() as usage, ledger_context(norm_pair=norm_pair(source_norm, target_norm)):
+            result = await self._translate(text, source_norm, target_norm, explain, use_memory)
+        result['usage'] = usage.as_dict()
+        result['timings'] = timings
+        if not explain:
+            result.pop('semantic_mapping', None)
+        return result
+    
+    async def translate_normative_stream(
+        self,
+        text: str,
+        source_norm: NormType,
+        target_norm: NormType,
+        explain: bool = False,
+        use_memory: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão em streaming de translate_normative
+        
+        Produz {'event': 'delta', 'text': ...} com o texto traduzido à medida
+        que o GPT o gera e, ao final, {'event': 'result', ...} com o mesmo
+        dicionário de translate_normative (o texto final prevalece sobre a
+        concatenação dos deltas).
+        """
+        async def run(on_delta):
+            with track_stages('bridge', **self._span_attributes(source_norm, target_norm, stream=True)) as timings, \
+                    track_usage() as usage, ledger_context(norm_pair=norm_pair(source_norm, target_norm)):
+                result = await self._translate(
+                    text, source_norm, target_norm, explain, use_memory, on_delta=on_delta
+                )
+            result['usage'] = usage.as_dict()
+            result['timings'] = timings
+            if not explain:
+                result.pop('semantic_mapping', None)
+            return result
+        
+        async for event in delta_events(run):
+            yield event
+    
+    async def _translate(
+        self,
+        text: str,
+        source_norm: NormType,
+        target_norm: NormType,
+        explain: bool,
+        use_memory: bool,
+        extra_hints: Optional[Dict[str, str]] = None,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Núcleo de translate_normative; sempre devolve `semantic_mapping`
+        
+        `extra_hints` são equivalências adicionais fixadas no prompt (ex.: o
+        glossário acumulado de um documento); o glossário curado prevalece.
+        Com `on_delta`, o texto traduzido é entregue em trechos durante a
+        geração.
         """
         try:
             # Validar normas
@@ -111,47 +254,186 @@ class BridgeAI:
                 raise ValueError(f"Norma de destino inválida: {target_norm}")
             if source_norm == target_norm:
                 raise ValueError("Normas de origem e destino devem ser diferentes")
+            if not text or not text.strip():
+                raise ValueError("Texto vazio")
             
-            # Limitar tamanho do texto
-            max_chars = 8000
-            if len(text) > max_chars:
-                text = text[:max_chars] + "\n\n[... texto truncado ...]"
+            original_text = text
             
-            # Construir prompt especializado
-            system_prompt = self._build_system_prompt(source_norm, target_norm)
-            user_prompt = self._build_user_prompt(text, source_norm, target_norm, explain)
+            # Limitar tamanho do texto (em tokens: português e russo rendem
+            # bem mais tokens por caractere que inglês)
+            truncated = count_tokens(text, self.model) > self.max_input_tokens
+            cut_mid_sentence = False
+            if truncated:
+                # Corta no fim do último parágrafo/frase completo (a tradução
+                # não deve terminar numa frase pela metade); sem fronteira
+                # na segunda metade do limite, corta no limite
+                head = truncate_tokens(text, self.max_input_tokens, self.model)
+                boundary = max(head.rfind('\n\n'), *(head.rfind(p) + 1 for p in ('. ', '! ', '? ', '.\n')))
+                cut_mid_sentence = boundary < len(head) // 2
+                text = head if cut_mid_sentence else head[:boundary]
             
-            # Chamar GPT-4
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                response_format={"type": "json_object"}  # Forçar JSON
+            glossary = self.glossary.translate(text, source_norm, target_norm)
+            memory = get_translation_memory() if use_memory else None
+            memory_version = self._memory_version()
+            pieces = segment_text(text) if use_memory else [(text, "")]
+            
+            # 1. Resolver cada segmento: glossário -> memória -> pendente (GPT)
+            segments: List[Dict[str, Any]] = []
+            pending: List[Dict[str, Any]] = []
+            mapping: Dict[str, str] = {}
+            with stage('bridge', 'resolve'):
+                for index, (source, separator) in enumerate(pieces):
+                    segment = {'index': index, 'source': source, 'separator': separator}
+                    segments.append(segment)
+                    if not source.strip():
+                        segment.update(translated=source, provenance='passthrough', confidence=None)
+                        continue
+                
+                    terms = self.glossary.translate(source, source_norm, target_norm)
+                    if terms['complete'] and len(source) <= self.glossary_max_chars:
+                        segment.update(
+                            translated=terms['translated_text'],
+                            provenance='glossary',
+                            confidence=self.GLOSSARY_CONFIDENCE
+                        )
+                        mapping.update(terms['semantic_mapping'])
+                        continue
+                
+                    hit = memory.lookup(source, source_norm, target_norm, version=memory_version) if memory else None
+                    if hit is not None:
+                        segment.update(
+                            translated=hit['target_text'],
+                            provenance=f"memory_{hit['match']}",
+                            similarity=hit['similarity'],
+                            confidence=hit['confidence']
+                        )
+                        continue
+                
+                    pending.append(segment)
+            
+            # Streaming com parte do texto já resolvida: os deltas do GPT
+            # cobririam só os pendentes, então o texto inteiro vai ao GPT
+            resolved = [s for s in segments if s.get('provenance') not in (None, 'passthrough')]
+            if on_delta is not None and pending and resolved:
+                return await self._translate(
+                    original_text, source_norm, target_norm, explain,
+                    use_memory=False, extra_hints=extra_hints, on_delta=on_delta
+                )
+            
+            # 2. Segmentos inéditos: uma chamada ao GPT
+            result_json: Dict[str, Any] = {}
+            route: Optional[Dict[str, Any]] = None
+            if pending:
+                # Termos já resolvidos vão como dicas fixas no prompt
+                hints = {**(extra_hints or {}), **glossary['semantic_mapping']}
+                # Confiança local: cobertura do glossário, se o texto tem termos reconhecidos
+                recognized = glossary['semantic_mapping'] or glossary['approximate_mapping'] or glossary['unmapped_terms']
+                with stage('bridge', 'llm', **{'bridge.segments': len(pending)}):
+                    result_json, route = await self._translate_segments(
+                        [segment['source'] for segment in pending],
+                        source_norm, target_norm, explain, hints, on_delta,
+                        local_confidence=glossary['coverage'] if recognized else None
+                    )
+                translations = result_json.get('segments')
+                aligned = isinstance(translations, list) and len(translations) == len(pending)
+                
+                if len(pending) == 1:
+                    translations, aligned = [result_json.get('translated_text', '')], True
+                
+                if not aligned:
+                    if len(pending) < len(segments) and use_memory and on_delta is None:
+                        # Resposta sem alinhamento por segmento: refaz com o texto inteiro
+                        return await self._translate(
+                            original_text, source_norm, target_norm, explain,
+                            use_memory=False, extra_hints=extra_hints
+                        )
+                    translations = [result_json.get('translated_text', '')] + [''] * (len(pending) - 1)
+                
+                confidence = result_json.get('confidence', 0)
+                for position, segment in enumerate(pending):
+                    segment.update(
+                        translated=str(translations[position]),
+                        provenance='gpt',
+                        confidence=confidence
+                    )
+                    # O último segmento de um texto cortado no meio da frase não é memorizado
+                    is_cut = cut_mid_sentence and segment is segments[-1]
+                    if memory and aligned and not is_cut:
+                        memory.store(
+                            segment['source'], segment['translated'],
+                            source_norm, target_norm, confidence=confidence,
+                            version=memory_version, model=route['model'] if route else self.model
+                        )
+                mapping.update(hints)
+                mapping.update(result_json.get('semantic_mapping', {}))
+            
+            # 3. Remontar na ordem original
+            translated_text = ''.join(
+                segment['translated'] + (segment['separator'] if segment['translated'] else '')
+                for segment in segments
             )
+            if truncated:
+                translated_text = translated_text.rstrip() + "\n\n[... texto truncado ...]"
+            if on_delta is not None and not pending:
+                on_delta(translated_text)
             
-            # Parsear resposta
-            result_json = json.loads(response.choices[0].message.content)
+            provenances = {segment['provenance'] for segment in segments}
+            if 'gpt' in provenances:
+                method = 'gpt'
+            elif any(p.startswith('memory') for p in provenances):
+                method = 'memory'
+            else:
+                method = 'glossary'
             
             # Compilar resultado final
             result = {
                 'status': 'success',
-                'translated_text': result_json.get('translated_text', ''),
-                'confidence': result_json.get('confidence', 0),
+                'translated_text': translated_text,
+                'confidence': self._weighted_confidence(
+                    (len(segment['source']), segment['confidence']) for segment in segments
+                ),
                 'source_metadata': self.NORMS_METADATA[source_norm],
                 'target_metadata': self.NORMS_METADATA[target_norm],
+                'method': method,
+                'glossary_coverage': glossary['coverage'],
+                'segments': [
+                    {
+                        'index': segment['index'],
+                        'provenance': segment['provenance'],
+                        'chars': len(segment['source']),
+                        **({'similarity': segment['similarity']} if 'similarity' in segment else {})
+                    }
+                    for segment in segments
+                ],
+                'memory': self._memory_summary(segments),
                 'timestamp': self._get_timestamp()
             }
+            if method == 'glossary':
+                result['glossary_version'] = glossary['glossary_version']
+            if route is not None:
+                result['route'] = route
             
             if explain:
-                result['explanation'] = result_json.get('explanation', '')
-                result['semantic_mapping'] = result_json.get('semantic_mapping', {})
+                if pending:
+                    result['explanation'] = result_json.get('explanation', '')
+                else:
+                    pairs = '; '.join(f"{src} → {dst}" for src, dst in mapping.items())
+                    result['explanation'] = (
+                        f"Tradução sem GPT: glossário curado v{glossary['glossary_version']} "
+                        f"e memória de tradução ({source_norm} → {target_norm}). {pairs}"
+                    ).strip()
+            result['semantic_mapping'] = mapping
             
             return result
         
+        except LLMUnavailable as e:
+            # Falha rápida: breaker aberto ou retries/fallback esgotados
+            return {
+                'status': 'error',
+                'message': f'Serviço de IA indisponível no momento: {str(e)}',
+                'degraded': True,
+                'timestamp': self._get_timestamp()
+            }
         except json.JSONDecodeError as e:
             return {
                 'status': 'error',
@@ -165,27 +447,366 @@ class BridgeAI:
                 'timestamp': self._get_timestamp()
             }
     
-    def _build_system_prompt(self, source_norm: NormType, target_norm: NormType) -> str:
-        """Constrói prompt de sistema especializado"""
-        source_meta = self.NORMS_METADATA[source_norm]
-        target_meta = self.NORMS_METADATA[target_norm]
+    async def translate_document(
+        self,
+        source: Union[str, os.PathLike, TextIO],
+        source_norm: NormType,
+        target_norm: NormType,
+        *,
+        concurrency: int = 4,
+        chunk_chars: int = 6000,
+        use_memory: bool = True,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        output: Optional[TextIO] = None
+    ) -> Dict[str, Any]:
+        """
+        Traduz um documento inteiro, sem o limite de tokens por chamada
+        
+        O documento é lido sob demanda e dividido em blocos nas fronteiras de
+        seção (ver chunking.py). Os blocos são traduzidos em paralelo e
+        escritos na ordem original; no máximo `2 * concurrency` blocos ficam
+        em memória. As equivalências dos blocos já concluídos formam o
+        glossário do documento, fixado no prompt dos blocos seguintes para
+        manter a terminologia consistente.
+        
+        Args:
+            source: Texto, caminho de arquivo UTF-8 ou arquivo texto aberto
+            source_norm: Norma de origem
+            target_norm: Norma de destino
+            concurrency: Blocos traduzidos simultaneamente
+            chunk_chars: Tamanho máximo de cada bloco (até 8000); blocos
+                acima de `max_input_tokens` são subdivididos por tokens
+            use_memory: Se False, ignora a memória de tradução
+            on_progress: Chamado a cada bloco concluído com chunks_done,
+                chunks_started, chars_done, chars_total e percent
+            output: Destino do texto traduzido (objeto com `write`); sem ele,
+                o texto completo vem em `translated_text`
+            
+        Returns:
+            Dict com:
+                - status: 'success', 'partial' (blocos com erro mantidos no
+                  original) ou 'error' (todos falharam)
+                - confidence: Média ponderada pelo tamanho dos blocos
+                - semantic_mapping: Glossário do documento (blocos mesclados)
+                - mapping_conflicts: Termos traduzidos de forma divergente
+                - chunks: Resumo por bloco (tamanho, status, confiança, método)
+                - translated_text: Texto traduzido (se `output` não for dado)
+                - usage: Tokens consumidos por todos os blocos
+        """
+        reader, owned = None, False
+        try:
+            if source_norm not in self.NORMS_METADATA:
+                raise ValueError(f"Norma de origem inválida: {source_norm}")
+            if target_norm not in self.NORMS_METADATA:
+                raise ValueError(f"Norma de destino inválida: {target_norm}")
+            if source_norm == target_norm:
+                raise ValueError("Normas de origem e destino devem ser diferentes")
+            if not 0 < chunk_chars <= 8000:
+                raise ValueError("chunk_chars deve estar entre 1 e 8000")
+            
+            reader, owned = self._open_document(source)
+            chars_total = self._document_size(reader)
+            document_mapping: Dict[str, str] = {}
+            conflicts: List[str] = []
+            progress = {'chunks_started': 0, 'chunks_done': 0, 'chars_done': 0}
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            
+            async def translate_chunk(index: int, chunk: str) -> Dict[str, Any]:
+                async with semaphore:
+                    progress['chunks_started'] += 1
+                    if not chunk.strip():
+                        result = {'status': 'success', 'translated_text': '', 'confidence': None,
+                                  'method': 'passthrough', 'semantic_mapping': {}}
+                    else:
+                        # Só as equivalências de termos presentes no bloco
+                        lowered = chunk.lower()
+                        hints = {src: dst for src, dst in document_mapping.items() if src.lower() in lowered}
+                        result = await self._translate(
+                            chunk, source_norm, target_norm, False, use_memory, extra_hints=hints
+                        )
+                
+                for src, dst in result.get('semantic_mapping', {}).items():
+                    known = document_mapping.setdefault(src, str(dst))
+                    if known.lower() != str(dst).lower() and src not in conflicts:
+                        conflicts.append(src)
+                
+                progress['chunks_done'] += 1
+                progress['chars_done'] += len(chunk)
+                if on_progress is not None:
+                    on_progress({
+                        **progress,
+                        'chars_total': chars_total,
+                        'percent': round(100 * progress['chars_done'] / chars_total, 1) if chars_total else None
+                    })
+                return {'index': index, 'chunk': chunk, 'result': result}
+            
+            parts: List[str] = []
+            chunks: List[Dict[str, Any]] = []
+            
+            def emit(record: Dict[str, Any]) -> None:
+                chunk, result = record['chunk'], record['result']
+                ok = result.get('status') == 'success'
+                # Blocos com erro ficam no original; bordas em branco preservadas
+                body = result.get('translated_text', '').strip() if ok else chunk.strip()
+                leading = chunk[:len(chunk) - len(chunk.lstrip())]
+                trailing = chunk[len(chunk.rstrip()):] if chunk.strip() else ''
+                text = leading + body + trailing
+                if output is not None:
+                    output.write(text)
+                else:
+                    parts.append(text)
+                summary = {
+                    'index': record['index'],
+                    'chars': len(chunk),
+                    'status': 'success' if ok else 'error',
+                    'confidence': result.get('confidence') if ok else None,
+                    'method': result.get('method'),
+                }
+                if not ok:
+                    summary['message'] = result.get('message', '')
+                    summary['degraded'] = bool(result.get('degraded'))
+                chunks.append(summary)
+            
+            window: Deque[asyncio.Task] = deque()
+            limit = max(1, concurrency) * 2
+            try:
+                # Documentos inteiros entram como lote no governor
+                with llm_priority(Priority.BATCH), track_usage() as usage, \
+                        ledger_context(job='bridge.translate_document'):
+                    for index, chunk in enumerate(self._document_chunks(reader, chunk_chars)):
+                        while window and (len(window) >= limit or window[0].done()):
+                            emit(await window.popleft())
+                        window.append(asyncio.ensure_future(translate_chunk(index, chunk)))
+                    while window:
+                        emit(await window.popleft())
+            finally:
+                for task in window:
+                    task.cancel()
+            
+            translated = [c for c in chunks if c['method'] != 'passthrough']
+            if not translated:
+                raise ValueError("Texto vazio")
+            failed = [c for c in translated if c['status'] == 'error']
+            if not failed:
+                status = 'success'
+            elif len(failed) == len(translated):
+                status = 'error'
+            else:
+                status = 'partial'
+            
+            result = {
+                'status': status,
+                'confidence': self._weighted_confidence(
+                    (c['chars'], c['confidence']) for c in translated
+                ),
+                'source_metadata': self.NORMS_METADATA[source_norm],
+                'target_metadata': self.NORMS_METADATA[target_norm],
+                'semantic_mapping': document_mapping,
+                'mapping_conflicts': conflicts,
+                'chunks': chunks,
+                'chars': progress['chars_done'],
+                'usage': usage.as_dict(),
+                'timestamp': self._get_timestamp()
+            }
+            if failed:
+                result['message'] = f"{len(failed)} de {len(translated)} blocos sem tradução: {failed[0]['message']}"
+                if any(c['degraded'] for c in failed):
+                    result['degraded'] = True
+            if output is None:
+                result['translated_text'] = ''.join(parts)
+            return result
+        
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': self._get_timestamp()
+            }
+        finally:
+            if owned:
+                reader.close()
+    
+    def _document_chunks(self, reader: TextIO, chunk_chars: int) -> Iterator[str]:
+        """Blocos de seção; os que excedem o teto de tokens são subdivididos"""
+        for chunk in iter_chunks(reader, chunk_chars):
+            if count_tokens(chunk, self.model) <= self.max_input_tokens:
+                yield chunk
+            else:
+                yield from split_tokens(chunk, self.max_input_tokens, self.model)
+    
+    @staticmethod
+    def _open_document(source: Union[str, os.PathLike, TextIO]) -> Tuple[TextIO, bool]:
+        """Leitor de linhas do documento e se ele deve ser fechado aqui"""
+        if isinstance(source, str):
+            return io.StringIO(source, newline=''), True
+        if isinstance(source, os.PathLike):
+            return open(source, encoding='utf-8', errors='replace', newline=''), True
+        return source, False
+    
+    @staticmethod
+    def _document_size(reader: TextIO) -> Optional[int]:
+        """Total de caracteres (None se o arquivo não permitir reposicionar)"""
+        try:
+            if not reader.seekable():
+                return None
+            position = reader.tell()
+            total = sum(len(line) for line in iter(reader.readline, ''))
+            reader.seek(position)
+            return total
+        except (AttributeError, OSError, ValueError):
+            return None
+    
+    async def _translate_segments(
+        self,
+        sources: List[str],
+        source_norm: NormType,
+        target_norm: NormType,
+        explain: bool,
+        hints: Dict[str, str],
+        on_delta: Optional[Callable[[str], None]] = None,
+        local_confidence: Optional[float] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Chama o GPT para os segmentos pendentes
+        
+        Sem streaming, a chamada passa pelo roteador de modelos (ver
+        src.ai.core.llm.routing): o modelo barato primeiro, escalando para
+        self.model se a resposta vier desalinhada ou com confiança baixa.
+        Com `on_delta`, a resposta vem em streaming (sempre self.model, já
+        que deltas entregues não podem ser refeitos) e o campo
+        "translated_text" é entregue à medida que é gerado.
+        
+        Returns:
+            (JSON da resposta, rota do modelo)
+        """
+        # Prefixo igual em toda tradução (cache de prompt do provedor); o
+        # que é da requisição vai só na mensagem do usuário
+        messages = TRANSLATE_PREFIX.messages(self._build_user_prompt(
+            sources[0] if len(sources) == 1 else '',
+            source_norm, target_norm, explain,
+            segments=sources if len(sources) > 1 else None,
+            hints=hints
+        ))
+        params = dict(
+            site='bridge.translate',
+            model=self.model,
+            messages=messages,
+            max_tokens=PromptBudget(self.model, self.max_tokens).completion_tokens(messages),
+            temperature=self.temperature,
+            response_format={"type": "json_object"}  # Forçar JSON
+        )
+        
+        if on_delta is not None:
+            parser = JSONFieldStream('translated_text')
+            async for delta in stream_chat_completion(self.client, **params):
+                text = parser.feed(delta)
+                if text:
+                    on_delta(text)
+            return parser.finish(), {'model': self.model, 'tier': 'large', 'reason': 'stream', 'escalated': False}
+        
+        response, route = await routed_completion(
+            self.client,
+            accept=lambda r: self._check_cheap_translation(r, len(sources)),
+            local_confidence=local_confidence,
+            **params
+        )
+        
+        # Parsear resposta
+        return json.loads(response.choices[0].message.content), route
+    
+    @staticmethod
+    def _check_cheap_translation(response: Any, segments: int) -> Optional[str]:
+        """Validação da resposta do modelo barato; motivo da escalada ou None"""
+        data = json.loads(response.choices[0].message.content)
+        if segments > 1:
+            translations = data.get('segments')
+            if not isinstance(translations, list) or len(translations) != segments:
+                return 'misaligned_segments'
+        elif not str(data.get('translated_text') or '').strip():
+            return 'empty_translation'
+        try:
+            confidence = float(data.get('confidence', 0))
+        except (TypeError, ValueError):
+            return 'invalid_confidence'
+        if confidence < get_router().min_output_confidence:
+            return 'low_confidence'
+        return None
+    
+    @staticmethod
+    def _weighted_confidence(sizes: Iterable[Tuple[int, Optional[int]]]) -> int:
+        """Confiança média ponderada pelo tamanho (pares tamanho, confiança)"""
+        weighted = [(size, conf) for size, conf in sizes if conf is not None]
+        total = sum(size for size, _ in weighted)
+        if not total:
+            return 0
+        return int(round(sum(size * conf for size, conf in weighted) / total))
+    
+    @staticmethod
+    def _span_attributes(source_norm: str, target_norm: str, **extra: Any) -> Dict[str, Any]:
+        """Atributos do span 'bridge' (par de normas)"""
+        return {'norm.source': source_norm, 'norm.target': target_norm, **{f'bridge.{k}': v for k, v in extra.items()}}
+    
+    def _translate_settings(self) -> Tuple[Any, ...]:
+        """Configuração do engine que muda o resultado de uma tradução"""
+        return (
+            self.model, self.max_tokens, self.temperature, self.max_input_tokens,
+            self.glossary_max_chars, self._memory_version()
+        )
+    
+    @staticmethod
+    def _as_coalesced(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Resultado de quem aguardou a execução de outro chamador: sem o consumo dela"""
+        result['coalesced'] = True
+        if 'usage' in result:
+            result['usage'] = TokenUsage().as_dict()
+        return result
+    
+    @staticmethod
+    def _memory_summary(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Hits da memória de tradução nesta chamada"""
+        counted = [s for s in segments if s['provenance'] not in ('passthrough', 'glossary')]
+        exact = sum(1 for s in counted if s['provenance'] == 'memory_exact')
+        fuzzy = sum(1 for s in counted if s['provenance'] == 'memory_fuzzy')
+        return {
+            'exact_hits': exact,
+            'fuzzy_hits': fuzzy,
+            'misses': len(counted) - exact - fuzzy,
+            'hit_rate': round((exact + fuzzy) / len(counted), 4) if counted else 0.0
+        }
+    
+    @classmethod
+    def _build_system_prompt(cls) -> str:
+        """
+        Prompt de sistema da tradução, o mesmo para todo par de normas
+        
+        Traz as definições de todas as normas, a terminologia oficial do
+        glossário, as regras e o formato de resposta; nada da requisição
+        entra aqui (ver _build_user_prompt), para o prefixo ser reaproveitado
+        pelo cache de prompt do provedor.
+        """
+        norms = '\n'.join(
+            f"- {code} ({meta['country']}): {meta['full_name']}\n"
+            f"  Foco: {meta['focus']}\n"
+            f"  Termos-chave: {', '.join(meta['keywords'])}"
+            for code, meta in cls.NORMS_METADATA.items()
+        )
+        terminology = '\n'.join(
+            f"- {concept}: " + ' | '.join(
+                f"{code}: {concept_data['terms'][code][0]}"
+                for code in cls.NORMS_METADATA if concept_data['terms'].get(code)
+            )
+            for concept, concept_data in TERMINOLOGY.items()
+        )
         
         return f"""Você é um especialista internacional em normas regulatórias de mineração.
 Sua tarefa é traduzir semanticamente textos técnicos entre diferentes códigos regulatórios.
+A norma de origem e a de destino de cada tradução vêm na mensagem do usuário.
 
-NORMA DE ORIGEM:
-- Código: {source_norm}
-- País: {source_meta['country']}
-- Nome: {source_meta['full_name']}
-- Foco: {source_meta['focus']}
-- Termos-chave: {', '.join(source_meta['keywords'])}
+NORMAS SUPORTADAS:
+{norms}
 
-NORMA DE DESTINO:
-- Código: {target_norm}
-- País: {target_meta['country']}
-- Nome: {target_meta['full_name']}
-- Foco: {target_meta['focus']}
-- Termos-chave: {', '.join(target_meta['keywords'])}
+TERMINOLOGIA OFICIAL POR NORMA (glossário {GLOSSARY_VERSION}; conceito: termo oficial em cada norma):
+{terminology}
 
 REGRAS DE TRADUÇÃO:
 1. Mantenha equivalência técnica e legal
@@ -193,6 +814,7 @@ REGRAS DE TRADUÇÃO:
 3. Preserve classificações de recursos/reservas
 4. Adapte unidades de medida se necessário
 5. Mantenha rigor técnico e compliance
+6. Use exatamente as EQUIVALÊNCIAS DO GLOSSÁRIO informadas na mensagem, sem repeti-las em semantic_mapping
 
 FORMATO DE RESPOSTA (JSON):
 {{
@@ -204,6 +826,16 @@ FORMATO DE RESPOSTA (JSON):
     }}
 }}
 
+Se o texto vier dividido em segmentos numerados ([1], [2], ...), "translated_text" traz a
+tradução completa, sem a numeração, e "segments" traz a lista com a tradução de cada
+segmento, na mesma ordem e com o mesmo número de itens.
+
+Quando a mensagem pedir explicação detalhada, o campo "explanation" deve destacar:
+- Termos que mudaram e por quê
+- Equivalências regulatórias aplicadas
+- Adaptações necessárias ao contexto da norma de destino
+- Possíveis diferenças de interpretação
+
 O campo "confidence" deve ser um score de 0 a 100 baseado em:
 - Clareza do texto original (30%)
 - Equivalência direta de termos (40%)
@@ -214,29 +846,48 @@ O campo "confidence" deve ser um score de 0 a 100 baseado em:
         text: str,
         source_norm: NormType,
         target_norm: NormType,
-        explain: bool
+        explain: bool,
+        segments: Optional[List[str]] = None,
+        hints: Optional[Dict[str, str]] = None
     ) -> str:
-        """Constrói prompt do usuário"""
+        """
+        Constrói prompt do usuário: tudo o que é da requisição
+        
+        Com `segments`, o texto vai numerado e a resposta deve trazer também
+        a tradução de cada segmento (campo "segments"), para a memória de
+        tradução. `hints` são as equivalências já resolvidas pelo glossário.
+        """
+        if segments:
+            text = '\n'.join(f"[{i}] {segment}" for i, segment in enumerate(segments, 1))
+        glossary_block = ""
+        if hints:
+            mapped = '\n'.join(f'- "{src}" → "{dst}"' for src, dst in hints.items())
+            glossary_block = f"""
+EQUIVALÊNCIAS DO GLOSSÁRIO (use exatamente; não repita em semantic_mapping):
+{mapped}
+"""
         explain_instruction = ""
         if explain:
             explain_instruction = """
-ATENÇÃO: Inclua uma explicação detalhada das escolhas de tradução, destacando:
-- Termos que mudaram e por quê
-- Equivalências regulatórias aplicadas
-- Adaptações necessárias ao contexto da norma de destino
-- Possíveis diferenças de interpretação
+ATENÇÃO: Inclua uma explicação detalhada das escolhas de tradução.
+"""
+        
+        segments_instruction = ""
+        if segments:
+            segments_instruction = f"""
+O texto está dividido em {len(segments)} segmentos numerados: "segments" deve ter exatamente {len(segments)} itens.
 """
         
         return f"""Traduza o seguinte texto técnico de mineração:
 
-NORMA DE ORIGEM: {source_norm}
-NORMA DE DESTINO: {target_norm}
-
+NORMA DE ORIGEM: {source_norm} - {self.NORMS_METADATA[source_norm]['full_name']}
+NORMA DE DESTINO: {target_norm} - {self.NORMS_METADATA[target_norm]['full_name']}
+{glossary_block}
 TEXTO ORIGINAL:
 ---
 {text}
 ---
-{explain_instruction}
+{explain_instruction}{segments_instruction}
 Retorne APENAS JSON válido no formato especificado."""
     
     def _get_timestamp(self) -> str:
@@ -250,14 +901,19 @@ Retorne APENAS JSON válido no formato especificado."""
     async def explain_norm_difference(
         self,
         norm1: NormType,
-        norm2: NormType
+        norm2: NormType,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Explica diferenças conceituais entre duas normas
         
+        Lê da matriz pré-computada de comparações (ver comparisons.py); só
+        chama o GPT se o par ainda não tiver sido calculado.
+        
         Args:
             norm1: Primeira norma
             norm2: Segunda norma
+            use_cache: Se False, força nova análise pelo GPT
             
         Returns:
             Dict com análise comparativa
@@ -266,10 +922,45 @@ Retorne APENAS JSON válido no formato especificado."""
             if norm1 not in self.NORMS_METADATA or norm2 not in self.NORMS_METADATA:
                 raise ValueError("Normas inválidas")
             
-            system_prompt = """Você é um especialista em normas regulatórias de mineração.
-Compare e contraste as diferenças fundamentais entre dois códigos regulatórios."""
+            with track_usage() as usage:
+                if use_cache:
+                    comparison, info = await get_comparison_matrix().get_or_compute(
+                        'bridge', norm1, norm2,
+                        self._comparison_fingerprint(norm1, norm2),
+                        lambda: self._compute_norm_difference(norm1, norm2)
+                    )
+                else:
+                    comparison = await coalesce(
+                        'bridge.compare',
+                        (id(self.client), self.compare_model, self.COMPARISON_PROMPT_VERSION, norm1, norm2),
+                        lambda: self._compute_norm_difference(norm1, norm2),
+                        waiter=self._as_coalesced
+                    )
+                    info = {'cached': False, 'stale': False}
             
-            user_prompt = f"""Compare as seguintes normas de mineração:
+            result = dict(comparison)
+            result['status'] = 'success'
+            result['cached'] = info['cached']
+            result['usage'] = usage.as_dict()
+            if info['stale']:
+                result['stale'] = True
+            result['timestamp'] = self._get_timestamp()
+            
+            return result
+        
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': self._get_timestamp()
+            }
+    
+    async def _compute_norm_difference(self, norm1: NormType, norm2: NormType) -> Dict[str, Any]:
+        """Análise comparativa de um par de normas pelo GPT (sem cache)"""
+        system_prompt = """Você é um especialista em normas regulatórias de mineração.
+Compare e contraste as diferenças fundamentais entre dois códigos regulatórios."""
+        
+        user_prompt = f"""Compare as seguintes normas de mineração:
 
 NORMA 1: {norm1} - {self.NORMS_METADATA[norm1]['full_name']}
 NORMA 2: {norm2} - {self.NORMS_METADATA[norm2]['full_name']}
@@ -282,9 +973,12 @@ Forneça uma análise comparativa em JSON:
     "key_equivalences": {{"termo_norm1": "termo_norm2"}},
     "practical_impact": "Impacto prático das diferenças"
 }}"""
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
+        
+        with ledger_context(norm_pair=norm_pair(norm1, norm2)):
+            response = await create_chat_completion(
+                self.client,
+                site='bridge.compare',
+                model=self.compare_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -293,16 +987,43 @@ Forneça uma análise comparativa em JSON:
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            result['status'] = 'success'
-            result['timestamp'] = self._get_timestamp()
-            
-            return result
         
-        except Exception as e:
-            return {
-                'status': 'error',
-                'message': str(e),
-                'timestamp': self._get_timestamp()
-            }
+        return json.loads(response.choices[0].message.content)
+    
+    def _memory_version(self) -> str:
+        """Versão das traduções memorizadas: glossário + prompt de tradução"""
+        return f"glossary:{self.glossary.version}:bridge.translate:v{self.TRANSLATE_PROMPT_VERSION}"
+    
+    def _comparison_fingerprint(self, norm1: NormType, norm2: NormType) -> str:
+        """Versão da comparação: metadados do par + prompt + modelo"""
+        return comparison_fingerprint(
+            self.NORMS_METADATA[norm1],
+            self.NORMS_METADATA[norm2],
+            f"bridge.compare:v{self.COMPARISON_PROMPT_VERSION}:{self.compare_model}"
+        )
+    
+    async def warm_comparisons(self, force: bool = False) -> Dict[str, int]:
+        """
+        Pré-computa as comparações de todos os pares ordenados de normas
+        
+        Args:
+            force: Recalcula também os pares já válidos
+            
+        Returns:
+            Contagem de pares calculados / já válidos / com erro
+        """
+        pairs = [
+            (
+                norm1, norm2,
+                self._comparison_fingerprint(norm1, norm2),
+                lambda n1=norm1, n2=norm2: self._compute_norm_difference(n1, n2)
+            )
+            for norm1, norm2 in permutations(self.NORMS_METADATA, 2)
+        ]
+        return await get_comparison_matrix().warm('bridge', pairs, force=force)
+
+
+# Prefixo estático do prompt de tradução (ver src.ai.core.llm.prompts)
+TRANSLATE_PREFIX = register_prefix(PromptPrefix(
+    'bridge.translate', BridgeAI.TRANSLATE_PROMPT_VERSION, BridgeAI._build_system_prompt()
+))
@@ -0,0 +1,374 @@
+"""
+QIVO Intelligence Layer - Bridge Terminology Glossary
+Grafo terminológico versionado entre ANM, JORC, NI 43-101, PERC e SAMREC
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Incrementar a cada revisão curada dos termos
+GLOSSARY_VERSION = "2025.11.2"
+
+# Conceito -> termos por norma. O primeiro termo de cada lista é o oficial,
+# usado como destino da tradução; os demais são variantes reconhecidas.
+# `broader` liga o conceito a um mais geral (usado quando a norma de destino
+# não tem termo próprio). `qualifiers` são palavras soltas que identificam o
+# conceito (concept_of) mas só são traduzidas dentro dos termos compostos:
+# "measured" sozinho é prosa comum ("the measured density").
+# Cobre todos os `keywords` de BridgeAI.NORMS_METADATA.
+TERMINOLOGY: Dict[str, Dict[str, Any]] = {
+    'measured_resource': {
+        'broader': 'mineral_resource',
+        'qualifiers': {'JORC': ['measured']},
+        'terms': {
+            'ANM': ['recursos medidos', 'recurso medido', 'recursos minerais medidos', 'recurso mineral medido'],
+            'JORC': ['Measured Mineral Resources', 'Measured Mineral Resource', 'Measured Resources', 'Measured Resource'],
+            'NI43-101': ['Measured Mineral Resource', 'Measured Mineral Resources', 'Measured Resources'],
+            'PERC': ['A+B category resources', 'category A+B'],
+            'SAMREC': ['Measured Mineral Resources', 'Measured Mineral Resource', 'Measured Resources']
+        }
+    },
+    'indicated_resource': {
+        'broader': 'mineral_resource',
+        'qualifiers': {'JORC': ['indicated']},
+        'terms': {
+            'ANM': ['recursos indicados', 'recurso indicado', 'recursos minerais indicados', 'recurso mineral indicado'],
+            'JORC': ['Indicated Mineral Resources', 'Indicated Mineral Resource', 'Indicated Resources', 'Indicated Resource'],
+            'NI43-101': ['Indicated Mineral Resource', 'Indicated Mineral Resources', 'Indicated Resources'],
+            'PERC': ['C1 category resources', 'category C1'],
+            'SAMREC': ['Indicated Mineral Resources', 'Indicated Mineral Resource', 'Indicated Resources']
+        }
+    },
+    'inferred_resource': {
+        'broader': 'mineral_resource',
+        'qualifiers': {'JORC': ['inferred']},
+        'terms': {
+            'ANM': ['recursos inferidos', 'recurso inferido', 'recursos minerais inferidos', 'recurso mineral inferido'],
+            'JORC': ['Inferred Mineral Resources', 'Inferred Mineral Resource', 'Inferred Resources', 'Inferred Resource'],
+            'NI43-101': ['Inferred Mineral Resource', 'Inferred Mineral Resources', 'Inferred Resources'],
+            'PERC': ['C2 category resources', 'category C2'],
+            'SAMREC': ['Inferred Mineral Resources', 'Inferred Mineral Resource', 'Inferred Resources']
+        }
+    },
+    'mineral_resource': {
+        'terms': {
+            'ANM': ['recursos minerais', 'recurso mineral'],
+            'JORC': ['Mineral Resources', 'Mineral Resource'],
+            'NI43-101': ['Mineral Resource', 'Mineral Resources'],
+            'PERC': ['Mineral Resources', 'Mineral Resource'],
+            'SAMREC': ['Mineral Resources', 'Mineral Resource']
+        }
+    },
+    'proved_reserve': {
+        'broader': 'mineral_reserve',
+        'terms': {
+            'ANM': ['reservas provadas', 'reserva provada', 'reservas minerais provadas', 'reserva mineral provada'],
+            'JORC': ['Proved Ore Reserves', 'Proved Ore Reserve', 'Proved Reserves'],
+            'NI43-101': ['Proven Mineral Reserve', 'Proven Mineral Reserves', 'Proven Reserves'],
+            'PERC': ['proved reserves', 'proved reserve'],
+            'SAMREC': ['Proved Mineral Reserves', 'Proved Mineral Reserve', 'Proved Reserves']
+        }
+    },
+    'probable_reserve': {
+        'broader': 'mineral_reserve',
+        'terms': {
+            'ANM': ['reservas prováveis', 'reserva provável', 'reservas minerais prováveis', 'reserva mineral provável'],
+            'JORC': ['Probable Ore Reserves', 'Probable Ore Reserve', 'Probable Reserves'],
+            'NI43-101': ['Probable Mineral Reserve', 'Probable Mineral Reserves', 'Probable Reserves'],
+            'PERC': ['probable reserves', 'probable reserve'],
+            'SAMREC': ['Probable Mineral Reserves', 'Probable Mineral Reserve', 'Probable Reserves']
+        }
+    },
+    'mineral_reserve': {
+        'terms': {
+            'ANM': ['reservas minerais', 'reserva mineral', 'reservas lavráveis'],
+            'JORC': ['Ore Reserves', 'Ore Reserve'],
+            'NI43-101': ['Mineral Reserve', 'Mineral Reserves'],
+            'PERC': ['Mineral Reserves', 'Mineral Reserve'],
+            'SAMREC': ['Mineral Reserves', 'Mineral Reserve']
+        }
+    },
+    'competent_person': {
+        'terms': {
+            'ANM': ['pessoa qualificada', 'profissional qualificado', 'responsável técnico'],
+            'JORC': ['Competent Person', 'Competent Persons'],
+            'NI43-101': ['Qualified Person', 'Qualified Persons'],
+            'PERC': ['Competent Person', 'Competent Persons'],
+            'SAMREC': ['Competent Person', 'Competent Persons']
+        }
+    },
+    'public_report': {
+        'terms': {
+            'ANM': ['relatório final de pesquisa', 'relatório técnico'],
+            'JORC': ['Public Report', 'Public Reports'],
+            'NI43-101': ['Technical Report', 'Technical Reports'],
+            'PERC': ['Public Report', 'Public Reports'],
+            'SAMREC': ['Public Report', 'Public Reports']
+        }
+    },
+    'reporting_code': {
+        'terms': {
+            'ANM': ['Código de Mineração'],
+            'JORC': ['JORC Code', 'JORC'],
+            'NI43-101': ['NI 43-101', 'National Instrument 43-101'],
+            'PERC': ['Russian Classification', 'A, B, C1, C2'],
+            'SAMREC': ['SAMREC Code', 'SAMREC']
+        }
+    },
+    'definition_standards': {
+        'broader': 'reporting_code',
+        'terms': {
+            'NI43-101': ['CIM Definition Standards', 'CIM']
+        }
+    },
+    'regulator': {
+        'terms': {
+            'ANM': ['ANM', 'DNPM', 'Agência Nacional de Mineração'],
+            'JORC': ['ASX'],
+            'NI43-101': ['CSA', 'Canadian Securities Administrators'],
+            'PERC': ['GKZ'],
+            'SAMREC': ['JSE']
+        }
+    },
+    'deposit': {
+        'terms': {
+            'ANM': ['jazida', 'jazidas', 'depósito mineral'],
+            'JORC': ['deposit', 'deposits', 'mineral deposit'],
+            'NI43-101': ['deposit', 'deposits', 'mineral deposit'],
+            'PERC': ['deposit', 'deposits', 'mineral deposit'],
+            'SAMREC': ['deposit', 'deposits', 'mineral deposit']
+        }
+    },
+    'mining': {
+        'terms': {
+            'ANM': ['lavra'],
+            'JORC': ['mining'],
+            'NI43-101': ['mining'],
+            'PERC': ['mining'],
+            'SAMREC': ['mining']
+        }
+    },
+    'exploration': {
+        'terms': {
+            'ANM': ['pesquisa mineral'],
+            'JORC': ['exploration', 'mineral exploration'],
+            'NI43-101': ['exploration', 'mineral exploration'],
+            'PERC': ['exploration', 'mineral exploration'],
+            'SAMREC': ['exploration', 'mineral exploration']
+        }
+    },
+    'annual_mining_report': {
+        'broader': 'public_report',
+        'terms': {
+            'ANM': ['RAL', 'Relatório Anual de Lavra']
+        }
+    },
+    'royalty': {
+        'terms': {
+            'ANM': ['CFEM', 'Compensação Financeira pela Exploração de Recursos Minerais'],
+            'JORC': ['royalty', 'royalties'],
+            'NI43-101': ['royalty', 'royalties'],
+            'PERC': ['mineral extraction tax'],
+            'SAMREC': ['royalty', 'royalties']
+        }
+    },
+    'modifying_factors': {
+        'terms': {
+            'ANM': ['fatores modificadores'],
+            'JORC': ['Modifying Factors'],
+            'NI43-101': ['Modifying Factors'],
+            'PERC': ['Modifying Factors'],
+            'SAMREC': ['Modifying Factors']
+        }
+    }
+}
+
+# Palavras que não precisam de tradução: unidades e símbolos químicos
+NEUTRAL_WORDS = {
+    't', 'kt', 'mt', 'g', 'kg', 'oz', 'koz', 'moz', 'lb', 'mlb', 'ppm', 'ppb',
+    'm', 'km', 'ha', 'au', 'ag', 'cu', 'fe', 'zn', 'ni', 'pb', 'mn', 'li', 'co',
+    'mo', 'sn', 'u3o8', 'p2o5', 'k2o', 'nb', 'ta'
+}
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+class TerminologyGraph:
+    """
+    Grafo de conceitos regulatórios com os termos de cada norma
+
+    Traduz terminologia de forma determinística (conceito de origem ->
+    termo oficial da norma de destino) e mede a cobertura do texto.
+    """
+
+    def __init__(
+        self,
+        terminology: Optional[Dict[str, Dict[str, Any]]] = None,
+        version: str = GLOSSARY_VERSION
+    ):
+        self.terminology = terminology or TERMINOLOGY
+        self.version = version
+        self._index: Dict[str, Dict[str, str]] = {}
+        self._forms: Dict[str, Dict[str, str]] = {}
+        self._patterns: Dict[str, re.Pattern] = {}
+        self._build()
+
+    def _build(self) -> None:
+        matchable: Dict[str, List[str]] = {}
+        for concept, entry in self.terminology.items():
+            broader = entry.get('broader')
+            if broader is not None and broader not in self.terminology:
+                raise ValueError(f"Conceito '{concept}' aponta para conceito inexistente: {broader}")
+            qualifiers = entry.get('qualifiers', {})
+            for norm in set(entry['terms']) | set(qualifiers):
+                index = self._index.setdefault(norm, {})
+                forms = self._forms.setdefault(norm, {})
+                terms = entry['terms'].get(norm, [])
+                for term in terms + qualifiers.get(norm, []):
+                    key = term.lower()
+                    if index.get(key, concept) != concept:
+                        raise ValueError(
+                            f"Termo '{term}' ({norm}) ambíguo: {index[key]} e {concept}"
+                        )
+                    index[key] = concept
+                    forms.setdefault(key, term)
+                matchable.setdefault(norm, []).extend(t.lower() for t in terms)
+
+        for norm, terms in matchable.items():
+            # Termos mais longos primeiro: "Measured Mineral Resources" antes de "Mineral Resources"
+            alternatives = sorted(set(terms), key=len, reverse=True)
+            self._patterns[norm] = re.compile(
+                r"(?<!\w)(" + "|".join(re.escape(t) for t in alternatives) + r")(?!\w)",
+                re.IGNORECASE
+            )
+
+    def _match_case(self, found: str, norm: str, target: str) -> str:
+        """Aplica ao termo de destino a caixa usada no texto de origem"""
+        form = self._forms[norm][found.lower()]
+        if found == form:
+            return target
+        if found.isupper() and len(found) > 1:
+            return target.upper()
+        if found.islower():
+            return target.lower()
+        if found[:1].isupper() and form[:1].islower():
+            return target[:1].upper() + target[1:]
+        return target
+
+    # --- Consultas ---
+
+    def concept_of(self, term: str, norm: str) -> Optional[str]:
+        """Conceito associado a um termo na norma (None se desconhecido)"""
+        return self._index.get(norm, {}).get(term.lower())
+
+    def resolve(self, concept: str, target_norm: str) -> Optional[Tuple[str, bool]]:
+        """
+        Termo oficial do conceito na norma de destino
+
+        Returns:
+            (termo, exato) — exato=False quando veio de um conceito mais geral;
+            None se nem a cadeia `broader` tiver termo na norma
+        """
+        exact = True
+        while concept is not None:
+            terms = self.terminology[concept]['terms'].get(target_norm)
+            if terms:
+                return terms[0], exact
+            concept = self.terminology[concept].get('broader')
+            exact = False
+        return None
+
+    def terms(self, norm: str) -> List[str]:
+        """Todos os termos reconhecidos para a norma"""
+        return list(self._index.get(norm, {}))
+
+    # --- Tradução ---
+
+    def translate(self, text: str, source_norm: str, target_norm: str) -> Dict[str, Any]:
+        """
+        Aplica o glossário ao texto
+
+        Returns:
+            Dict com:
+                - translated_text: texto com os termos substituídos
+                - semantic_mapping: termo_origem -> termo_destino (equivalência exata)
+                - approximate_mapping: mapeamentos via conceito mais geral
+                - unmapped_terms: termos reconhecidos sem equivalente no destino
+                - residual_words: palavras fora dos termos reconhecidos
+                - coverage: fração dos termos reconhecidos com equivalência exata
+                - complete: True se o texto é formado só por termos com equivalência exata
+                - glossary_version
+        """
+        pattern = self._patterns.get(source_norm)
+        mapping: Dict[str, str] = {}
+        approximate: Dict[str, str] = {}
+        unmapped: List[str] = []
+        counts = {'found': 0, 'exact': 0}
+
+        def replace(match: re.Match) -> str:
+            term = match.group(0)
+            counts['found'] += 1
+            concept = self.concept_of(term, source_norm)
+            resolved = self.resolve(concept, target_norm)
+            if resolved is None:
+                unmapped.append(term)
+                return term
+            target_term, exact = resolved
+            target_term = self._match_case(term, source_norm, target_term)
+            if exact:
+                counts['exact'] += 1
+                mapping[term] = target_term
+            else:
+                approximate[term] = target_term
+            return target_term
+
+        translated = pattern.sub(replace, text) if pattern and text else text
+
+        # Palavras fora dos termos reconhecidos
+        remainder = pattern.sub(" ", text) if pattern and text else (text or "")
+        residual = [
+            w for w in _WORD.findall(remainder)
+            if w.lower() not in NEUTRAL_WORDS
+        ]
+
+        found = counts['found']
+        coverage = counts['exact'] / found if found else 0.0
+
+        # Só segmentos formados apenas por termos: mesmo entre normas do mesmo
+        # idioma, a prosa ao redor pode usar os termos em outro sentido
+        complete = (
+            found > 0
+            and not unmapped
+            and not approximate
+            and not residual
+        )
+
+        return {
+            'translated_text': translated,
+            'semantic_mapping': mapping,
+            'approximate_mapping': approximate,
+            'unmapped_terms': unmapped,
+            'residual_words': residual,
+            'coverage': round(coverage, 4),
+            'complete': complete,
+            'glossary_version': self.version
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'concepts': len(self.terminology),
+            'terms_by_norm': {norm: len(index) for norm, index in self._index.items()}
+        }
+
+
+_glossary: Optional[TerminologyGraph] = None
+
+
+def get_glossary() -> TerminologyGraph:
+    """Grafo terminológico do processo (compilado uma vez)"""
+    global _glossary
+    if _glossary is None:
+        _glossary = TerminologyGraph()
+    return _glossary
@@ -0,0 +1,329 @@
+"""
+QIVO Intelligence Layer - Bridge Translation Memory
+Memória de tradução por segmento (frases/parágrafos) com busca exata e fuzzy
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.ai.core.storage import data_path
+from src.ai.core.telemetry import cache_lookup
+
+
+# Quebra de parágrafo, ou fim de frase seguido de espaço e início de nova frase
+_BREAK = re.compile(r"(\n\s*\n|(?<=[.!?;])\s+(?=[\"'(\[A-ZÀ-Ý0-9•\-]))")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_TOKEN = re.compile(r"[^\W_]{4,}")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key TEXT PRIMARY KEY,
+    source_norm TEXT NOT NULL,
+    target_norm TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    target_text TEXT NOT NULL,
+    confidence INTEGER,
+    origin TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    model TEXT,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT
+);
+CREATE TABLE IF NOT EXISTS segment_tokens (
+    source_norm TEXT NOT NULL,
+    target_norm TEXT NOT NULL,
+    token TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (source_norm, target_norm, token, key)
+);
+"""
+
+
+def segment_text(text: str) -> List[Tuple[str, str]]:
+    """
+    Divide o texto em parágrafos e frases
+
+    Returns:
+        Lista de (segmento, separador_seguinte). Concatenar todos os pares
+        reconstrói o texto original exatamente.
+    """
+    body = text.lstrip()
+    prefix = text[:len(text) - len(body)]
+    stripped = body.rstrip()
+    suffix = body[len(stripped):]
+
+    pieces: List[Tuple[str, str]] = [("", prefix)] if prefix else []
+    # split com grupo alterna [segmento, separador, segmento, ...]
+    parts = _BREAK.split(stripped)
+    for i in range(0, len(parts), 2):
+        separator = parts[i + 1] if i + 1 < len(parts) else suffix
+        pieces.append((parts[i], separator))
+
+    return [(segment, sep) for segment, sep in pieces if segment or sep]
+
+
+def normalize_segment(text: str) -> str:
+    """Forma canônica do segmento: caixa baixa, espaços e aspas unificados"""
+    text = text.replace("“", '"').replace("”", '"').replace("’", "'")
+    return " ".join(text.lower().split())
+
+
+def segment_key(normalized: str, source_norm: str, target_norm: str) -> str:
+    payload = f"{source_norm}|{target_norm}|{normalized}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Memória de tradução persistente (SQLite)
+
+    - Chave: (texto normalizado, norma de origem, norma de destino)
+    - Cada tradução guarda a versão de quem a produziu (glossário + prompt)
+      e o modelo; versões diferentes da consultada não são servidas
+    - Busca exata pela chave; fuzzy por índice invertido de palavras +
+      similaridade de sequência, só entre segmentos com os mesmos números
+      (evita reaproveitar "10 Mt" para "12 Mt")
+    - Contadores de hit rate e caracteres poupados do GPT
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        fuzzy_threshold: float = 0.92,
+        min_confidence: int = 70,
+        max_candidates: int = 20
+    ):
+        self.path = str(path) if path else ":memory:"
+        self.fuzzy_threshold = fuzzy_threshold
+        self.min_confidence = min_confidence
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self.counters = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "fuzzy_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "chars_served": 0,
+        }
+
+    def _migrate(self) -> None:
+        """Colunas acrescentadas depois da criação do arquivo"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(segments)")}
+        if "version" not in columns:
+            # Traduções antigas ficam com versão vazia: o BridgeAI não as consulta mais
+            self._conn.execute("ALTER TABLE segments ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+        if "model" not in columns:
+            self._conn.execute("ALTER TABLE segments ADD COLUMN model TEXT")
+        self._conn.commit()
+
+    # --- Consulta ---
+
+    def lookup(
+        self,
+        text: str,
+        source_norm: str,
+        target_norm: str,
+        version: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Procura a tradução de um segmento
+
+        Args:
+            version: versão de glossário/prompt esperada; traduções gravadas
+                com outra versão são ignoradas
+
+        Returns:
+            {'target_text', 'confidence', 'match': 'exact'|'fuzzy', 'similarity'}
+            ou None
+        """
+        normalized = normalize_segment(text)
+        if not normalized:
+            return None
+
+        self.counters["lookups"] += 1
+        key = segment_key(normalized, source_norm, target_norm)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target_text, confidence FROM segments WHERE key = ? AND version = ?",
+                (key, version)
+            ).fetchone()
+            if row is not None:
+                self._touch(key)
+                self.counters["exact_hits"] += 1
+                self.counters["chars_served"] += len(text)
+                cache_lookup("translation_memory", "exact_hit")
+                return {"target_text": row[0], "confidence": row[1], "match": "exact", "similarity": 1.0}
+
+            match = self._fuzzy(normalized, source_norm, target_norm, version)
+            if match is not None:
+                self._touch(match["key"])
+                self.counters["fuzzy_hits"] += 1
+                self.counters["chars_served"] += len(text)
+                cache_lookup("translation_memory", "fuzzy_hit")
+                return match
+
+        self.counters["misses"] += 1
+        cache_lookup("translation_memory", "miss")
+        return None
+
+    def _fuzzy(
+        self,
+        normalized: str,
+        source_norm: str,
+        target_norm: str,
+        version: str
+    ) -> Optional[Dict[str, Any]]:
+        tokens = set(_TOKEN.findall(normalized))
+        if not tokens:
+            return None
+
+        placeholders = ",".join("?" * len(tokens))
+        candidates = self._conn.execute(
+            f"""
+            SELECT s.key, s.normalized, s.target_text, s.confidence, COUNT(*) AS shared
+            FROM segment_tokens t JOIN segments s ON s.key = t.key
+            WHERE t.source_norm = ? AND t.target_norm = ? AND t.token IN ({placeholders})
+              AND s.version = ?
+            GROUP BY s.key
+            ORDER BY shared DESC
+            LIMIT ?
+            """,
+            (source_norm, target_norm, *tokens, version, self.max_candidates)
+        ).fetchall()
+
+        numbers = _NUMBER.findall(normalized)
+        best = None
+        for key, candidate, target_text, confidence, _shared in candidates:
+            if _NUMBER.findall(candidate) != numbers:
+                continue
+            similarity = SequenceMatcher(None, normalized, candidate).ratio()
+            if similarity >= self.fuzzy_threshold and (best is None or similarity > best["similarity"]):
+                best = {
+                    "key": key,
+                    "target_text": target_text,
+                    "confidence": confidence,
+                    "match": "fuzzy",
+                    "similarity": round(similarity, 4),
+                }
+        return best
+
+    def _touch(self, key: str) -> None:
+        self._conn.execute(
+            "UPDATE segments SET hits = hits + 1, last_used_at = ? WHERE key = ?",
+            (datetime.now(timezone.utc).isoformat(), key)
+        )
+        self._conn.commit()
+
+    # --- Escrita ---
+
+    def store(
+        self,
+        text: str,
+        translation: str,
+        source_norm: str,
+        target_norm: str,
+        confidence: Optional[int] = None,
+        origin: str = "gpt",
+        version: str = "",
+        model: Optional[str] = None
+    ) -> bool:
+        """
+        Grava a tradução de um segmento (ignora traduções vazias ou com
+        confiança abaixo do mínimo)
+
+        Args:
+            version: versão de glossário/prompt que produziu a tradução
+            model: modelo que respondeu (registro; não entra na busca)
+
+        Returns:
+            True se gravou
+        """
+        normalized = normalize_segment(text)
+        if not normalized or not translation.strip():
+            return False
+        if confidence is not None and confidence < self.min_confidence:
+            return False
+
+        key = segment_key(normalized, source_norm, target_norm)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO segments
+                    (key, source_norm, target_norm, normalized, source_text, target_text,
+                     confidence, origin, version, model, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    target_text = excluded.target_text,
+                    confidence = excluded.confidence,
+                    origin = excluded.origin,
+                    version = excluded.version,
+                    model = excluded.model
+                """,
+                (key, source_norm, target_norm, normalized, text, translation,
+                 confidence, origin, version, model, datetime.now(timezone.utc).isoformat())
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO segment_tokens (source_norm, target_norm, token, key) VALUES (?, ?, ?, ?)",
+                [(source_norm, target_norm, token, key) for token in set(_TOKEN.findall(normalized))]
+            )
+            self._conn.commit()
+        self.counters["stored"] += 1
+        return True
+
+    # --- Métricas ---
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["lookups"]
+        hits = self.counters["exact_hits"] + self.counters["fuzzy_hits"]
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "segments": size,
+            "fuzzy_threshold": self.fuzzy_threshold,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_memory: Optional[TranslationMemory] = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    """
+    Memória de tradução do processo (data/translation_memory.db)
+
+    Variáveis de ambiente:
+        QIVO_TM_FUZZY_THRESHOLD: similaridade mínima do match fuzzy (padrão 0.92)
+        QIVO_TM_MIN_CONFIDENCE: confiança mínima para gravar (padrão 70)
+    """
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory(
+            data_path("translation_memory.db"),
+            fuzzy_threshold=float(os.getenv("QIVO_TM_FUZZY_THRESHOLD", "0.92")),
+            min_confidence=int(os.getenv("QIVO_TM_MIN_CONFIDENCE", "70")),
+        )
+    return _memory
+
+
+def set_translation_memory(memory: Optional[TranslationMemory]) -> None:
+    """Substitui a memória do processo (testes; None recria a padrão)"""
+    global _memory
+    _memory = memory
@@ -0,0 +1,98 @@
+"""
+QIVO Intelligence Layer - LLM Module
+Infraestrutura compartilhada de chamadas a modelos de linguagem
+"""
+
+from .client import (
+    DEFAULT_MODEL,
+    get_llm_client,
+    set_llm_client,
+    reset_llm_client,
+    close_llm_clients,
+    get_model,
+    get_pool_settings
+)
+from .governor import (
+    Priority,
+    GovernorTimeout,
+    LLMGovernor,
+    get_governor,
+    set_governor,
+    llm_priority
+)
+from .resilience import (
+    LLMUnavailable,
+    CircuitOpen,
+    ResilientCaller,
+    get_resilience,
+    set_resilience
+)
+from .completions import create_chat_completion, stream_chat_completion
+from .replay import RecordingClient, ReplayArchive, ReplayClient, ReplayMiss
+from .ledger import UsageLedger, get_ledger, set_ledger, ledger_context
+from .routing import ModelRouter, get_router, set_router, routed_completion, track_routes
+from .prompts import PromptPrefix, register_prefix, prompt_prefixes, prefix_for
+from .streaming import JSONFieldStream, delta_events, encode_event, STREAM_MEDIA_TYPES
+from .tokens import count_tokens, count_message_tokens
+from .budget import (
+    PromptBudget,
+    TokenUsage,
+    batch_by_tokens,
+    context_window,
+    split_tokens,
+    track_usage,
+    truncate_tokens
+)
+
+__all__ = [
+    'DEFAULT_MODEL',
+    'get_llm_client',
+    'set_llm_client',
+    'reset_llm_client',
+    'close_llm_clients',
+    'get_model',
+    'get_pool_settings',
+    'Priority',
+    'GovernorTimeout',
+    'LLMGovernor',
+    'get_governor',
+    'set_governor',
+    'llm_priority',
+    'LLMUnavailable',
+    'CircuitOpen',
+    'ResilientCaller',
+    'get_resilience',
+    'set_resilience',
+    'create_chat_completion',
+    'stream_chat_completion',
+    'RecordingClient',
+    'ReplayArchive',
+    'ReplayClient',
+    'ReplayMiss',
+    'UsageLedger',
+    'get_ledger',
+    'set_ledger',
+    'ledger_context',
+    'ModelRouter',
+    'get_router',
+    'set_router',
+    'routed_completion',
+    'track_routes',
+    'PromptPrefix',
+    'register_prefix',
+    'prompt_prefixes',
+    'prefix_for',
+    'JSONFieldStream',
+    'delta_events',
+    'encode_event',
+    'STREAM_MEDIA_TYPES',
+    'count_tokens',
+    'count_message_tokens',
+    'PromptBudget',
+    'TokenUsage',
+    'batch_by_tokens',
+    'context_window',
+    'split_tokens',
+    'track_usage',
+    'truncate_tokens'
+]
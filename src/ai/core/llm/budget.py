@@ -0,0 +1,254 @@
+"""
+QIVO Intelligence Layer - Token Budgeting
+Orçamento de tokens por modelo para os prompts e uso real por requisição
+"""
+
+import contextvars
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..telemetry import LLM_TOKENS
+from .ledger import record_call
+from .tokens import CHARS_PER_TOKEN, count_message_tokens, count_tokens, get_encoding
+
+
+# Janela de contexto (prompt + resposta) por família de modelo
+CONTEXT_WINDOWS = {
+    'gpt-4o-mini': 128000,
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4.1': 1047576,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+def context_window(model: str) -> int:
+    """Janela de contexto do modelo (prefixo mais longo da tabela)"""
+    for prefix in sorted(CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Maior prefixo de `text` com no máximo `max_tokens` tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    _, offsets = encoding.decode_with_offsets(tokens[:max_tokens + 1])
+    return text[:offsets[max_tokens]]
+
+
+def split_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> List[str]:
+    """
+    Divide `text` em pedaços de no máximo `max_tokens` tokens
+
+    A concatenação dos pedaços é o texto original; os cortes caem em
+    fronteiras de token (e nunca no meio de um caractere).
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens deve ser positivo")
+    if not text:
+        return []
+    encoding = get_encoding(model)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    _, offsets = encoding.decode_with_offsets(tokens)
+    starts = [offsets[i] for i in range(0, len(tokens), max_tokens)] + [len(text)]
+    pieces = [text[a:b] for a, b in zip(starts, starts[1:]) if b > a]
+    # Recodificar um pedaço isolado pode mudar a fusão BPE nas bordas
+    result: List[str] = []
+    for piece in pieces:
+        while count_tokens(piece, model) > max_tokens:
+            head = truncate_tokens(piece, max_tokens - 1, model) or piece[:1]
+            result.append(head)
+            piece = piece[len(head):]
+        if piece:
+            result.append(piece)
+    return result
+
+
+def batch_by_tokens(
+    items: Iterable[Any],
+    max_tokens: int,
+    model: str = "gpt-4o",
+    render: Callable[[Any], str] = lambda item: json.dumps(item, ensure_ascii=False, indent=2)
+) -> Iterator[List[Any]]:
+    """
+    Agrupa itens em lotes cuja renderização cabe em `max_tokens`
+
+    Um item maior que o orçamento sozinho forma um lote de um item.
+    """
+    batch: List[Any] = []
+    used = 0
+    for item in items:
+        cost = count_tokens(render(item), model)
+        if batch and used + cost > max_tokens:
+            yield batch
+            batch, used = [], 0
+        batch.append(item)
+        used += cost
+    if batch:
+        yield batch
+
+
+class PromptBudget:
+    """
+    Orçamento de uma chamada: quanto do prompt sobra para o conteúdo
+    variável (documento, lista de itens) e qual teto usar na resposta
+
+    Args:
+        model: Modelo da chamada (define encoder e janela de contexto)
+        max_completion_tokens: Teto desejado para a resposta
+        max_prompt_tokens: Teto opcional do prompt (abaixo da janela)
+    """
+
+    def __init__(self, model: str, max_completion_tokens: int, max_prompt_tokens: Optional[int] = None):
+        self.model = model
+        self.window = context_window(model)
+        self.max_completion_tokens = max_completion_tokens
+        limit = self.window - max_completion_tokens
+        self.max_prompt_tokens = min(max_prompt_tokens, limit) if max_prompt_tokens else limit
+
+    def measure(self, messages: List[Dict[str, Any]]) -> int:
+        """Tokens de prompt das mensagens"""
+        return count_message_tokens(messages, self.model)
+
+    def available(self, messages: List[Dict[str, Any]]) -> int:
+        """Tokens livres para o conteúdo variável, dadas as partes fixas do prompt"""
+        return max(0, self.max_prompt_tokens - self.measure(messages))
+
+    def fit(self, text: str, messages: List[Dict[str, Any]]) -> str:
+        """Corta `text` no que sobra do prompt depois de `messages`"""
+        return truncate_tokens(text, self.available(messages), self.model)
+
+    def completion_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Teto da resposta que ainda cabe na janela junto com o prompt"""
+        return max(1, min(self.max_completion_tokens, self.window - self.measure(messages)))
+
+
+class TokenUsage:
+    """Tokens consumidos pelas chamadas LLM de uma requisição"""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.calls = 0
+        self.estimated = False
+
+    def add(self, prompt_tokens: int, completion_tokens: int, estimated: bool = False, cached_tokens: int = 0) -> None:
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.calls += 1
+        self.estimated = self.estimated or estimated
+
+    def merge(self, other: "TokenUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.calls += other.calls
+        self.estimated = self.estimated or other.estimated
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Totais da requisição; cached_tokens (parte de prompt_tokens servida
+        do cache de prompt do provedor) só aparece quando houve acerto
+        """
+        usage = {
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.prompt_tokens + self.completion_tokens,
+            'calls': self.calls,
+        }
+        if self.cached_tokens:
+            usage['cached_tokens'] = self.cached_tokens
+        if self.estimated:
+            usage['estimated'] = True
+        return usage
+
+
+_current_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar(
+    'qivo_llm_usage', default=None
+)
+
+
+@contextmanager
+def track_usage():
+    """
+    Acumula o uso de tokens das chamadas feitas dentro do bloco
+
+    Tarefas criadas dentro do bloco herdam o acumulador. Blocos aninhados
+    repassam o próprio total ao bloco externo ao sair.
+
+        with track_usage() as usage:
+            ...
+        result['usage'] = usage.as_dict()
+    """
+    usage = TokenUsage()
+    parent = _current_usage.get()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+        if parent is not None:
+            parent.merge(usage)
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Tokens do prompt servidos do cache do provedor (usage.prompt_tokens_details.cached_tokens)"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = details.get('cached_tokens') if isinstance(details, dict) else getattr(details, 'cached_tokens', None)
+    return cached if isinstance(cached, int) else 0
+
+
+def record_usage(
+    usage: Any,
+    messages: Optional[List[Dict[str, Any]]] = None,
+    model: str = "gpt-4o",
+    completion_text: Optional[str] = None,
+    site: Optional[str] = None
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Registra no acumulador atual o uso de uma chamada
+
+    Usa o `usage` do provedor; se ele não vier (provedores compatíveis sem
+    contagem), estima localmente a partir do prompt e da resposta. Com
+    `site`, os tokens também entram na métrica qivo_llm_tokens_total e no
+    ledger de uso (ver ledger).
+
+    Returns:
+        (prompt, completion, cached) registrados, ou None se não havia onde registrar
+    """
+    tracker = _current_usage.get()
+    if tracker is None and site is None:
+        return None
+    prompt = getattr(usage, 'prompt_tokens', None)
+    completion = getattr(usage, 'completion_tokens', None)
+    estimated = not (isinstance(prompt, int) and isinstance(completion, int))
+    cached = 0 if estimated else min(cached_prompt_tokens(usage), prompt)
+    if estimated:
+        prompt = count_message_tokens(messages or [], model)
+        completion = count_tokens(completion_text if isinstance(completion_text, str) else '', model)
+    if site is not None:
+        LLM_TOKENS.inc(prompt, site=site, model=model, kind='prompt')
+        LLM_TOKENS.inc(completion, site=site, model=model, kind='completion')
+        if cached:
+            LLM_TOKENS.inc(cached, site=site, model=model, kind='cached')
+        record_call(site, model, prompt, completion, estimated, cached_tokens=cached)
+    if tracker is not None:
+        tracker.add(prompt, completion, estimated=estimated, cached_tokens=cached)
+    return prompt, completion, cached
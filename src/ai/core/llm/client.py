@@ -0,0 +1,177 @@
+"""
+QIVO Intelligence Layer - LLM Client Provider
+Cliente AsyncOpenAI compartilhado por todos os engines do processo
+"""
+
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+# Modelo padrão quando nem o call site nem o ambiente definem outro
+DEFAULT_MODEL = "gpt-4o"
+
+# Clientes por API key (normalmente só existe um)
+_clients: Dict[str, Any] = {}
+_override: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def get_pool_settings() -> Dict[str, Any]:
+    """
+    Configuração do pool HTTP compartilhado
+
+    Variáveis de ambiente:
+        QIVO_LLM_MAX_CONNECTIONS: conexões simultâneas (padrão 100)
+        QIVO_LLM_MAX_KEEPALIVE: conexões ociosas mantidas abertas (padrão 20)
+        QIVO_LLM_KEEPALIVE_EXPIRY: segundos até fechar conexão ociosa (padrão 30)
+        QIVO_LLM_TIMEOUT: timeout total por requisição em segundos (padrão 60)
+        QIVO_LLM_CONNECT_TIMEOUT: timeout de conexão em segundos (padrão 5)
+        QIVO_LLM_HTTP2: '0' desativa HTTP/2 (padrão ativo se `h2` instalado)
+    """
+    http2_requested = os.getenv("QIVO_LLM_HTTP2", "1").lower() not in ("0", "false", "no")
+
+    return {
+        "max_connections": _env_int("QIVO_LLM_MAX_CONNECTIONS", 100),
+        "max_keepalive_connections": _env_int("QIVO_LLM_MAX_KEEPALIVE", 20),
+        "keepalive_expiry": _env_float("QIVO_LLM_KEEPALIVE_EXPIRY", 30.0),
+        "timeout": _env_float("QIVO_LLM_TIMEOUT", 60.0),
+        "connect_timeout": _env_float("QIVO_LLM_CONNECT_TIMEOUT", 5.0),
+        # HTTP/2 depende do pacote `h2`; sem ele, HTTP/1.1 com keep-alive
+        "http2": http2_requested and importlib.util.find_spec("h2") is not None,
+    }
+
+
+def _build_http_client(settings: Dict[str, Any]):
+    """Cria o pool httpx usado por baixo do AsyncOpenAI"""
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(
+        http2=settings["http2"],
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+    )
+
+
+def _build_client(api_key: str):
+    from openai import AsyncOpenAI
+
+    settings = get_pool_settings()
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=_build_http_client(settings),
+        timeout=settings["timeout"],
+        # Retries ficam na camada de resiliência (jitter, breaker, fallback)
+        max_retries=0,
+    )
+
+
+def get_llm_client(api_key: Optional[str] = None):
+    """
+    Retorna o cliente AsyncOpenAI do processo
+
+    Todos os engines (Validator, Bridge, Radar) e conectores recebem esta
+    mesma instância, então reaproveitam conexões TLS e o pool keep-alive.
+    O pool é ligado ao event loop que o usa primeiro: cada worker
+    (uvicorn/gunicorn) tem o seu.
+
+    Args:
+        api_key: OpenAI API key (usa variável de ambiente se não fornecida)
+
+    Com QIVO_LLM_REPLAY, responde com as interações gravadas (sem API key);
+    com QIVO_LLM_RECORD, grava as chamadas do cliente real (ver replay).
+
+    Returns:
+        AsyncOpenAI compartilhado, o cliente injetado via set_llm_client,
+        ou None se não houver API key
+    """
+    if _override is not None:
+        return _override
+
+    replay_path = os.getenv("QIVO_LLM_REPLAY")
+    if replay_path:
+        with _lock:
+            client = _clients.get(f"replay:{replay_path}")
+            if client is None:
+                from .replay import ReplayClient, replay_latency_scale
+                client = ReplayClient(replay_path, replay_latency_scale())
+                _clients[f"replay:{replay_path}"] = client
+        return client
+
+    key = api_key or os.getenv("OPENAI_API_KEY")
+    if not key:
+        return None
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _build_client(key)
+            record_path = os.getenv("QIVO_LLM_RECORD")
+            if record_path:
+                from .replay import RecordingClient
+                client = RecordingClient(client, record_path)
+            _clients[key] = client
+    return client
+
+
+def set_llm_client(client: Any) -> None:
+    """
+    Injeta um cliente para todo o processo (testes, fake local, benchmarks)
+
+    Args:
+        client: objeto compatível com AsyncOpenAI (ou None para remover)
+    """
+    global _override
+    _override = client
+
+
+def reset_llm_client() -> None:
+    """Remove cliente injetado e descarta os clientes criados"""
+    global _override
+    with _lock:
+        _override = None
+        _clients.clear()
+
+
+async def close_llm_clients() -> None:
+    """Fecha os pools HTTP (usar no shutdown da aplicação)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        await client.close()
+
+
+def get_model(site: str, default: str = DEFAULT_MODEL) -> str:
+    """
+    Resolve o modelo de um call site
+
+    Ordem: QIVO_MODEL_<SITE> → QIVO_MODEL_DEFAULT → `default`.
+    O site 'bridge.translate' lê QIVO_MODEL_BRIDGE_TRANSLATE, por exemplo.
+
+    Args:
+        site: identificador do call site (ex.: 'validator.analyze')
+        default: modelo usado quando nada está configurado
+    """
+    env_name = "QIVO_MODEL_" + site.upper().replace(".", "_").replace("-", "_")
+    return os.getenv(env_name) or os.getenv("QIVO_MODEL_DEFAULT") or default
@@ -0,0 +1,198 @@
+"""
+QIVO Intelligence Layer - Chat Completions
+Ponto único de chamada a chat.completions para todos os engines
+"""
+
+import asyncio
+import time
+from contextlib import AsyncExitStack, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from ..telemetry import LLM_REQUEST_SECONDS
+from ..tracing import Span, get_tracer, use_span
+from .budget import record_usage
+from .governor import Priority, get_governor
+from .resilience import get_resilience
+
+
+async def create_chat_completion(
+    client: Any,
+    *,
+    site: str,
+    priority: Optional[Priority] = None,
+    deadline: Optional[float] = None,
+    **params: Any
+) -> Any:
+    """
+    Executa `client.chat.completions.create(**params)` sob o governor global
+    e a camada de resiliência (retries, hedge, circuit breaker, fallback)
+
+    Args:
+        client: cliente compatível com AsyncOpenAI
+        site: call site de origem (ex.: 'bridge.translate'), usado em métricas
+        priority: classe de prioridade (padrão: a do contexto, ver llm_priority)
+        deadline: segundos máximos de espera na fila
+        **params: argumentos repassados a chat.completions.create
+
+    Returns:
+        Resposta do provedor (ChatCompletion); `response.model` indica se
+        quem respondeu foi o modelo de fallback
+
+    Raises:
+        GovernorTimeout: se não houver vaga antes do prazo
+        LLMUnavailable: se o modelo e seus fallbacks falharem
+    """
+    governor = get_governor()
+    tracer = get_tracer()
+
+    async def attempt(attempt_params: Dict[str, Any]) -> Any:
+        # Cada tentativa (retry, hedge ou fallback) ocupa sua própria vaga
+        with tracer.start_span("llm.attempt", {"llm.model": attempt_params.get("model", "gpt-4o")}) as span:
+            async with governor.slot(
+                messages=attempt_params.get("messages", []),
+                model=attempt_params.get("model", "gpt-4o"),
+                max_tokens=attempt_params.get("max_tokens"),
+                priority=priority,
+                deadline=deadline
+            ) as permit:
+                span.set_attribute("llm.queue_wait_ms", round(permit.waited * 1000, 3))
+                with _timed(site, attempt_params):
+                    response = await client.chat.completions.create(**attempt_params)
+                permit.record_usage(getattr(response, "usage", None))
+        tokens = record_usage(
+            getattr(response, "usage", None),
+            attempt_params.get("messages"),
+            attempt_params.get("model", "gpt-4o"),
+            _response_text(response),
+            site=site
+        )
+        _add_tokens(chat_span, tokens)
+        return response
+
+    with tracer.start_span("llm.chat", _span_attributes(site, params)) as chat_span:
+        response = await get_resilience().call(params, attempt)
+        chat_span.set_attribute("llm.response_model", getattr(response, "model", None) or params.get("model", "gpt-4o"))
+        return response
+
+
+async def stream_chat_completion(
+    client: Any,
+    *,
+    site: str,
+    priority: Optional[Priority] = None,
+    deadline: Optional[float] = None,
+    **params: Any
+) -> AsyncIterator[str]:
+    """
+    Versão em streaming de create_chat_completion: produz os trechos de
+    texto do modelo à medida que chegam
+
+    Retries e fallback valem até o primeiro trecho (depois dele, repetir
+    duplicaria o texto já entregue); o hedge fica desligado. A vaga do
+    governor é mantida até o fim do stream.
+
+    Raises:
+        GovernorTimeout: se não houver vaga antes do prazo
+        LLMUnavailable: se o modelo e seus fallbacks falharem antes do primeiro trecho
+    """
+    governor = get_governor()
+    tracer = get_tracer()
+    # O gerador pode ser retomado em outros contextos: o span não vira o
+    # atual, só durante a espera pela primeira resposta
+    chat_span = tracer.begin("llm.chat", {**_span_attributes(site, params), "llm.stream": True})
+
+    async def attempt(attempt_params: Dict[str, Any]) -> Any:
+        stack = AsyncExitStack()
+        try:
+            with tracer.start_span("llm.attempt", {"llm.model": attempt_params.get("model", "gpt-4o")}) as span:
+                permit = await stack.enter_async_context(governor.slot(
+                    messages=attempt_params.get("messages", []),
+                    model=attempt_params.get("model", "gpt-4o"),
+                    max_tokens=attempt_params.get("max_tokens"),
+                    priority=priority,
+                    deadline=deadline
+                ))
+                span.set_attribute("llm.queue_wait_ms", round(permit.waited * 1000, 3))
+                # Mede até o primeiro trecho (o resto depende do tamanho da resposta)
+                with _timed(site, attempt_params):
+                    stream = await client.chat.completions.create(
+                        **attempt_params,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    if hasattr(stream, "close"):
+                        stack.push_async_callback(stream.close)
+                    chunks = stream.__aiter__()
+                    # O primeiro trecho ainda conta como tentativa (erros de conexão/429)
+                    first = await anext(chunks, None)
+        except BaseException:
+            await stack.aclose()
+            raise
+        return stack, permit, chunks, first
+
+    try:
+        with use_span(chat_span):
+            stack, permit, chunks, chunk = await get_resilience().call(params, attempt, hedge=False)
+    except BaseException as e:
+        tracer.end(chat_span, e)
+        raise
+    error: Optional[BaseException] = None
+    usage, parts = None, []
+    try:
+        async with stack:
+            while chunk is not None:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                    permit.record_usage(usage)
+                for choice in getattr(chunk, "choices", None) or []:
+                    content = getattr(choice.delta, "content", None)
+                    if content:
+                        parts.append(content)
+                        yield content
+                chunk = await anext(chunks, None)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        tokens = record_usage(usage, params.get("messages"), params.get("model", "gpt-4o"), "".join(parts), site=site)
+        _add_tokens(chat_span, tokens)
+        tracer.end(chat_span, None if isinstance(error, GeneratorExit) else error)
+
+
+def _span_attributes(site: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"llm.site": site, "llm.model": params.get("model", "gpt-4o")}
+
+
+def _add_tokens(span: Span, tokens: Optional[Tuple[int, int, int]]) -> None:
+    """Soma os tokens da tentativa ao span da chamada (hedges somam os dois)"""
+    if tokens is not None:
+        span.increment("llm.tokens.prompt", tokens[0])
+        span.increment("llm.tokens.completion", tokens[1])
+        span.increment("llm.tokens.cached", tokens[2])
+
+
+@contextmanager
+def _timed(site: str, params: Dict[str, Any]) -> Iterator[None]:
+    """Observa a duração de uma tentativa em qivo_llm_request_duration_seconds"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        # Hedge perdedor ou cliente desconectado
+        outcome = "cancelled"
+        raise
+    finally:
+        LLM_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            site=site, model=params.get("model", "gpt-4o"), outcome=outcome
+        )
+
+
+def _response_text(response: Any) -> Optional[str]:
+    """Texto da primeira escolha (para estimar o uso quando o provedor não o informa)"""
+    try:
+        return response.choices[0].message.content
+    except (AttributeError, IndexError, TypeError):
+        return None
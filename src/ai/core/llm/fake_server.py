@@ -0,0 +1,311 @@
+"""
+QIVO Intelligence Layer - Fake OpenAI Server
+Servidor HTTP local compatível com /v1/chat/completions para testes de
+carga e desenvolvimento sem chave da OpenAI
+
+Latência, taxa de erros 5xx, respostas 429 e velocidade do streaming são
+configuráveis. Os engines usam o servidor sem alteração de código: basta
+apontar o SDK para ele.
+
+    python -m src.ai.core.llm.fake_server --port 8089 --latency lognormal:0.8,0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake uvicorn main_ai:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from .tokens import count_message_tokens, count_tokens
+
+
+def parse_latency(spec: str, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """
+    Distribuição de latência (segundos) a partir de uma especificação
+
+    Formatos:
+        fixed:S             sempre S
+        uniform:A,B         uniforme entre A e B
+        lognormal:M,SIGMA   log-normal com mediana M
+        exponential:MEDIA   exponencial com média MEDIA
+    """
+    rng = rng or random.Random()
+    kind, _, raw = spec.partition(":")
+    try:
+        args = [float(value) for value in raw.split(",") if value]
+    except ValueError:
+        raise ValueError(f"Latência inválida: {spec}")
+
+    if kind == "fixed" and len(args) == 1:
+        return lambda: args[0]
+    if kind == "uniform" and len(args) == 2:
+        return lambda: rng.uniform(args[0], args[1])
+    if kind == "lognormal" and len(args) == 2:
+        mu = math.log(args[0]) if args[0] > 0 else 0.0
+        return lambda: rng.lognormvariate(mu, args[1]) if args[0] > 0 else 0.0
+    if kind == "exponential" and len(args) == 1:
+        return lambda: rng.expovariate(1 / args[0]) if args[0] > 0 else 0.0
+    raise ValueError(f"Latência inválida: {spec}")
+
+
+class FakeLLMConfig:
+    """
+    Comportamento do servidor fake
+
+    Args:
+        latency: Especificação da latência até o primeiro token (parse_latency)
+        error_rate: Fração de respostas 500
+        rate_limit_rate: Fração de respostas 429 (com Retry-After)
+        retry_after: Valor do cabeçalho Retry-After (segundos)
+        tokens_per_second: Velocidade do streaming (0 = sem espera entre trechos)
+        seed: Semente do gerador (execuções reprodutíveis)
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.0,
+        tokens_per_second: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.rng = random.Random(seed)
+        self.latency_spec = latency
+        self.latency = parse_latency(latency, self.rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency_spec,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+            "retry_after": self.retry_after,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+
+_DELIMITED = re.compile(r"\n---\n(.*?)\n---\n", re.DOTALL)
+_NUMBERED = re.compile(r"^\[(\d+)\] (.*)$", re.MULTILINE)
+
+
+def default_responder(params: Dict[str, Any]) -> str:
+    """
+    Conteúdo da resposta a partir da requisição
+
+    Em modo JSON, devolve um objeto com os campos esperados pelos engines
+    (tradução ecoando o texto entre '---', segmentos numerados, análise do
+    Radar e comparação de normas); em texto livre, uma análise curta com
+    termos de conformidade.
+    """
+    messages = params.get("messages") or []
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    if (params.get("response_format") or {}).get("type") != "json_object":
+        return (
+            "Análise simulada: o documento cita JORC, mineral resource e competent person; "
+            "QA/QC com sampling e assay descritos; sem gaps críticos de compliance."
+        )
+
+    match = _DELIMITED.search(user)
+    source = match.group(1) if match else user[:200]
+    segments = [text for _, text in _NUMBERED.findall(source)]
+    return json.dumps({
+        "translated_text": " ".join(segments) if segments else source,
+        "segments": segments,
+        "confidence": 85,
+        "semantic_mapping": {},
+        "explanation": "Resposta simulada",
+        "analysis": [],
+        "main_differences": ["Resposta simulada"],
+        "practical_impact": "Resposta simulada",
+    }, ensure_ascii=False)
+
+
+def create_app(config: Optional[FakeLLMConfig] = None, responder: Callable[[Dict[str, Any]], str] = default_responder):
+    """Aplicação FastAPI do servidor fake (estatísticas em GET /stats)"""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    config = config or FakeLLMConfig()
+    app = FastAPI(title="QIVO Fake OpenAI")
+    stats = {"requests": 0, "completed": 0, "errors": 0, "rate_limited": 0, "streams": 0,
+             "prompt_tokens": 0, "completion_tokens": 0}
+    app.state.config = config
+    app.state.stats = stats
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model"}, {"id": "gpt-4o-mini", "object": "model"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "config": config.as_dict()}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for key in stats:
+            stats[key] = 0
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        params = await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(config.latency())
+
+        draw = config.rng.random()
+        if draw < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(config.retry_after)},
+                content={"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}}
+            )
+        if draw < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal error (fake)", "type": "server_error", "code": None}}
+            )
+
+        model = params.get("model", "gpt-4o")
+        content = responder(params)
+        prompt_tokens = count_message_tokens(params.get("messages") or [], model)
+        completion_tokens = count_tokens(content, model)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not params.get("stream"):
+            stats["completed"] += 1
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        stats["streams"] += 1
+        include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, with_usage: bool = False) -> str:
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if with_usage:
+                body["usage"] = usage
+            return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+        async def events():
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+            delay = (completion_tokens / config.tokens_per_second / max(1, len(pieces))) if config.tokens_per_second else 0
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in pieces:
+                if delay:
+                    await asyncio.sleep(delay)
+                yield chunk({"content": piece})
+            yield chunk({}, finish="stop")
+            if include_usage:
+                yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+            stats["completed"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """
+    Executa uma aplicação ASGI com uvicorn numa thread própria
+
+        with ServerThread(create_app()) as server:
+            client = AsyncOpenAI(base_url=server.url + "/v1", api_key="fake")
+    """
+
+    def __init__(self, app: Any, host: str = "127.0.0.1", port: Optional[int] = None):
+        import uvicorn
+
+        self.host = host
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host=host, port=self.port, log_level="warning", lifespan="on"
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Servidor não iniciou em {self.url}")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+    def __enter__(self) -> "ServerThread":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor fake compatível com a API da OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S | uniform:A,B | lognormal:M,SIGMA | exponential:MEDIA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+QIVO Intelligence Layer - LLM Governor
+Limite global de requisições/tokens por minuto e de concorrência para chamadas LLM
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+from ..telemetry import LLM_QUEUE_WAIT_SECONDS, add_collector
+from .tokens import estimate_request_tokens
+
+
+class Priority(IntEnum):
+    """Classes de prioridade (menor valor = atendido primeiro)"""
+    INTERACTIVE = 0  # requisições de API com usuário esperando
+    BATCH = 1        # lotes e relatórios cross-module
+
+
+class GovernorTimeout(Exception):
+    """A chamada não conseguiu vaga antes do prazo (deadline) na fila"""
+
+
+# Prioridade da chamada corrente (propaga por await dentro da mesma task)
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "llm_priority", default=Priority.INTERACTIVE
+)
+
+# Faixas do histograma de espera na fila (segundos)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """
+    Define a prioridade das chamadas LLM feitas dentro do bloco
+
+    Exemplo:
+        with llm_priority(Priority.BATCH):
+            await connector.generate_cross_module_report(alerts)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Prioridade em vigor no contexto atual"""
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """Balde de tokens com reposição contínua (capacidade = limite por minuto)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver `amount` disponível (0 se já houver)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Corrige a reserva após a resposta (positivo = consumiu mais)"""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class Permit:
+    """Vaga concedida pelo governor para uma chamada"""
+
+    def __init__(self, governor: "LLMGovernor", tokens: int, priority: Priority, waited: float):
+        self.governor = governor
+        self.tokens = tokens
+        self.priority = priority
+        self.waited = waited
+        self.used_tokens: Optional[int] = None
+
+    def record_usage(self, usage: Any) -> None:
+        """Registra tokens reais (objeto `usage` da resposta OpenAI)"""
+        total = getattr(usage, "total_tokens", None)
+        if isinstance(total, int):
+            self.used_tokens = total
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "future", "enqueued", "active")
+
+    def __init__(self, priority: Priority, seq: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.active = True
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMGovernor:
+    """
+    Governa todas as chamadas chat.completions do processo
+
+    - Orçamento de requisições/minuto (RPM) e tokens/minuto (TPM)
+    - Teto de chamadas simultâneas
+    - Fila por prioridade: interativas passam à frente de lotes
+    - Prazo máximo de espera na fila (GovernorTimeout ao estourar)
+    - Métricas de espera por classe de prioridade
+    """
+
+    def __init__(
+        self,
+        rpm: int = 500,
+        tpm: int = 150_000,
+        max_concurrency: int = 16,
+        deadlines: Optional[Dict[Priority, float]] = None
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.deadlines = deadlines or {
+            Priority.INTERACTIVE: 30.0,
+            Priority.BATCH: 300.0,
+        }
+
+        self.in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._metrics = {
+            p: {
+                "granted": 0,
+                "queued": 0,
+                "timeouts": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0,
+                "wait_buckets": [0] * (len(WAIT_BUCKETS) + 1),
+            }
+            for p in Priority
+        }
+
+    # --- API pública ---
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = "gpt-4o",
+        max_tokens: Optional[int] = None,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Reserva vaga para uma chamada e libera ao sair do bloco
+
+        Args:
+            messages: mensagens do prompt (usadas na estimativa de tokens)
+            model: modelo (define o encoder do tiktoken)
+            max_tokens: teto da resposta
+            priority: classe de prioridade (padrão: a do contexto)
+            deadline: segundos máximos na fila (padrão: por prioridade)
+        """
+        estimate = estimate_request_tokens(messages, model, max_tokens)
+        permit = await self.acquire(estimate, priority, deadline)
+        try:
+            yield permit
+        finally:
+            self.release(permit)
+
+    async def acquire(
+        self,
+        tokens: int,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None
+    ) -> Permit:
+        priority = current_priority() if priority is None else priority
+        timeout = self.deadlines.get(priority, 30.0) if deadline is None else deadline
+        metrics = self._metrics[priority]
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), tokens, loop.create_future())
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+
+        if not waiter.future.done():
+            metrics["queued"] += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Concedido no mesmo instante do timeout: aproveita a vaga
+                pass
+            else:
+                waiter.active = False
+                waiter.future.cancel()
+                metrics["timeouts"] += 1
+                self._observe_wait(priority, time.monotonic() - waiter.enqueued)
+                self._dispatch()
+                raise GovernorTimeout(
+                    f"Fila de chamadas LLM excedeu o prazo de {timeout:.1f}s "
+                    f"(prioridade {priority.name.lower()})"
+                )
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release_slot()
+            waiter.active = False
+            self._dispatch()
+            raise
+
+        waited = time.monotonic() - waiter.enqueued
+        metrics["granted"] += 1
+        self._observe_wait(priority, waited)
+        return Permit(self, tokens, priority, waited)
+
+    def release(self, permit: Permit) -> None:
+        if permit.used_tokens is not None:
+            self.tokens.adjust(permit.used_tokens - permit.tokens)
+        self._release_slot()
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas atuais (fila, vagas, espera por prioridade)"""
+        now = time.monotonic()
+        by_priority = {}
+        for priority, m in self._metrics.items():
+            waits = m["granted"] + m["timeouts"]
+            by_priority[priority.name.lower()] = {
+                "granted": m["granted"],
+                "queued": m["queued"],
+                "timeouts": m["timeouts"],
+                "wait_seconds_total": round(m["wait_seconds_total"], 4),
+                "wait_seconds_avg": round(m["wait_seconds_total"] / waits, 4) if waits else 0.0,
+                "wait_seconds_max": round(m["wait_seconds_max"], 4),
+                "wait_histogram": dict(zip(
+                    [f"le_{b}" for b in WAIT_BUCKETS] + ["le_inf"],
+                    m["wait_buckets"]
+                )),
+            }
+
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": sum(1 for w in self._queue if w.active),
+            "rpm_limit": int(self.requests.capacity),
+            "rpm_available": int(self.requests.tokens),
+            "tpm_limit": int(self.tokens.capacity),
+            "tpm_available": int(self.tokens.tokens),
+            "priorities": by_priority,
+        }
+
+    # --- Internos ---
+
+    def _release_slot(self) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def _observe_wait(self, priority: Priority, waited: float) -> None:
+        LLM_QUEUE_WAIT_SECONDS.observe(waited, priority=priority.name.lower())
+        m = self._metrics[priority]
+        m["wait_seconds_total"] += waited
+        m["wait_seconds_max"] = max(m["wait_seconds_max"], waited)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if waited <= bound:
+                m["wait_buckets"][i] += 1
+                break
+        else:
+            m["wait_buckets"][-1] += 1
+
+    def _dispatch(self) -> None:
+        """Concede vagas na ordem da fila enquanto houver orçamento"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue:
+            head = self._queue[0]
+            if not head.active or head.future.done():
+                heapq.heappop(self._queue)
+                continue
+
+            if self.in_flight >= self.max_concurrency:
+                return  # release() chama _dispatch de novo
+
+            now = time.monotonic()
+            wait = max(
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(head.tokens, now)
+            )
+            if wait > 0:
+                # Reavalia quando o orçamento tiver sido reposto
+                loop = head.future.get_loop()
+                self._timer = loop.call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            self.requests.take(1, now)
+            self.tokens.take(head.tokens, now)
+            self.in_flight += 1
+            head.future.set_result(True)
+
+
+_governor: Optional[LLMGovernor] = None
+
+
+def get_governor() -> LLMGovernor:
+    """
+    Retorna o governor do processo
+
+    Variáveis de ambiente:
+        QIVO_LLM_RPM: requisições por minuto (padrão 500)
+        QIVO_LLM_TPM: tokens por minuto (padrão 150000)
+        QIVO_LLM_MAX_CONCURRENCY: chamadas simultâneas (padrão 16)
+        QIVO_LLM_DEADLINE_INTERACTIVE: segundos na fila, API (padrão 30)
+        QIVO_LLM_DEADLINE_BATCH: segundos na fila, lotes (padrão 300)
+    """
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor(
+            rpm=int(os.getenv("QIVO_LLM_RPM", "500")),
+            tpm=int(os.getenv("QIVO_LLM_TPM", "150000")),
+            max_concurrency=int(os.getenv("QIVO_LLM_MAX_CONCURRENCY", "16")),
+            deadlines={
+                Priority.INTERACTIVE: float(os.getenv("QIVO_LLM_DEADLINE_INTERACTIVE", "30")),
+                Priority.BATCH: float(os.getenv("QIVO_LLM_DEADLINE_BATCH", "300")),
+            }
+        )
+    return _governor
+
+
+def set_governor(governor: Optional[LLMGovernor]) -> None:
+    """Substitui o governor do processo (testes; None recria pelo ambiente)"""
+    global _governor
+    _governor = governor
+
+
+def _collect_metrics():
+    """Ocupação do governor para /metrics"""
+    if _governor is None:
+        return []
+    stats = _governor.stats()
+    return [
+        ("qivo_llm_in_flight", "gauge", "Chamadas LLM em andamento", [({}, stats["in_flight"])]),
+        ("qivo_llm_queue_depth", "gauge", "Chamadas LLM aguardando vaga no governor", [({}, stats["queue_depth"])]),
+        ("qivo_llm_rpm_available", "gauge", "Requisições por minuto ainda disponíveis", [({}, stats["rpm_available"])]),
+        ("qivo_llm_tpm_available", "gauge", "Tokens por minuto ainda disponíveis", [({}, stats["tpm_available"])]),
+    ]
+
+
+add_collector(_collect_metrics)
@@ -0,0 +1,379 @@
+"""
+QIVO Intelligence Layer - LLM Usage Ledger
+Livro-razão de tokens e custo de cada chamada LLM, atribuídos à requisição
+ou job de origem (endpoint, cliente, par de normas)
+
+A atribuição vem do contexto: os middlewares HTTP (FastAPI e Flask) abrem
+um ledger_context por requisição e os jobs em lote e engines acrescentam
+os seus campos:
+
+    with ledger_context(job='bridge.batch_translate', norm_pair='ANM->JORC'):
+        ...  # toda chamada LLM aqui dentro é lançada com esses campos
+
+Os lançamentos ficam num buffer e vão para o SQLite (data/llm_ledger.db)
+em lotes, só com INSERT (append-only). rollup() agrega por dia, endpoint,
+modelo, cliente, par de normas, call site ou job.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# USD por 1M de tokens (prompt, resposta); QIVO_LLM_PRICES sobrescreve/acrescenta
+PRICES_PER_MILLION: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# Fração do preço do prompt cobrada pelos tokens servidos do cache do provedor
+CACHED_PROMPT_FACTOR = 0.5
+
+# Colunas aceitas em rollup(group_by=...) e como filtro
+GROUP_COLUMNS = ("day", "endpoint", "model", "customer", "norm_pair", "site", "job")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    request_id TEXT,
+    trace_id TEXT,
+    endpoint TEXT,
+    customer TEXT,
+    job TEXT,
+    norm_pair TEXT,
+    site TEXT,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    estimated INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_usage_day ON llm_usage (day);
+"""
+
+_COLUMNS = ("batch", "ts", "day", "request_id", "trace_id", "endpoint", "customer", "job",
+            "norm_pair", "site", "model", "prompt_tokens", "completion_tokens", "cached_tokens", "estimated", "cost_usd")
+
+
+def model_prices() -> Dict[str, Tuple[float, float]]:
+    """Tabela de preços com as sobrescritas de QIVO_LLM_PRICES ({"modelo": [prompt, resposta]})"""
+    prices = dict(PRICES_PER_MILLION)
+    raw = os.getenv("QIVO_LLM_PRICES")
+    if raw:
+        try:
+            prices.update({model: (float(p[0]), float(p[1])) for model, p in json.loads(raw).items()})
+        except (ValueError, TypeError, IndexError, AttributeError):
+            pass
+    return prices
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    cached_tokens: int = 0
+) -> float:
+    """
+    Custo em USD de uma chamada
+
+    Versões datadas (gpt-4o-2024-08-06) usam o preço do prefixo mais longo;
+    modelos sem preço custam 0. Os `cached_tokens` (parte de prompt_tokens)
+    custam CACHED_PROMPT_FACTOR do preço do prompt.
+    """
+    prices = prices if prices is not None else model_prices()
+    matches = [name for name in prices if model == name or model.startswith(name + "-")]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = prices[max(matches, key=len)]
+    billed_prompt = prompt_tokens - cached_tokens * (1 - CACHED_PROMPT_FACTOR)
+    return (billed_prompt * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+# --- Atribuição ---
+
+_attribution: ContextVar[Optional[Dict[str, Any]]] = ContextVar("qivo_ledger_attribution", default=None)
+
+
+@contextmanager
+def ledger_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Atribui as chamadas LLM do bloco (request_id, endpoint, customer, job,
+    norm_pair); blocos aninhados herdam e sobrescrevem os campos do externo
+    """
+    parent = _attribution.get() or {}
+    current = {**parent, **{k: v for k, v in fields.items() if v is not None}}
+    token = _attribution.set(current)
+    try:
+        yield current
+    finally:
+        _attribution.reset(token)
+
+
+def current_attribution() -> Dict[str, Any]:
+    return dict(_attribution.get() or {})
+
+
+def norm_pair(source: str, target: str) -> str:
+    return f"{source}->{target}"
+
+
+class UsageLedger:
+    """
+    Lançamentos de uso por chamada LLM, gravados em lotes append-only
+
+    Args:
+        path: arquivo SQLite (None = em memória)
+        batch_size: lançamentos no buffer antes de gravar
+        flush_interval: segundos máximos de um lançamento no buffer
+    """
+
+    def __init__(self, path: Optional[Path] = None, batch_size: int = 50, flush_interval: float = 5.0):
+        self.path = str(path) if path else ":memory:"
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.prices = model_prices()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._batch = self._conn.execute("SELECT COALESCE(MAX(batch), 0) FROM llm_usage").fetchone()[0]
+        self._buffer: List[Tuple[Any, ...]] = []
+        self._oldest: Optional[float] = None
+
+    def _migrate(self) -> None:
+        """Colunas acrescentadas depois da criação do arquivo"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_usage)")}
+        if "cached_tokens" not in columns:
+            self._conn.execute("ALTER TABLE llm_usage ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0")
+            self._conn.commit()
+
+    def record(
+        self,
+        site: Optional[str],
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        estimated: bool = False,
+        cached_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """Lança uma chamada com a atribuição do contexto atual"""
+        from src.ai.core.tracing import current_span
+
+        now = time.time()
+        attribution = current_attribution()
+        span = current_span()
+        entry = {
+            "ts": now,
+            "day": datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d"),
+            "request_id": attribution.get("request_id"),
+            "trace_id": span.trace_id if span is not None else None,
+            "endpoint": _endpoint(attribution),
+            "customer": attribution.get("customer"),
+            "job": attribution.get("job"),
+            "norm_pair": attribution.get("norm_pair"),
+            "site": site,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "estimated": int(estimated),
+            "cost_usd": round(estimate_cost(model, prompt_tokens, completion_tokens, self.prices, cached_tokens), 8),
+        }
+        with self._lock:
+            self._buffer.append(tuple(entry[c] for c in _COLUMNS[1:]))
+            self._oldest = self._oldest or now
+            due = len(self._buffer) >= self.batch_size or now - self._oldest >= self.flush_interval
+        if due:
+            self.flush()
+        return entry
+
+    def flush(self) -> int:
+        """Grava o buffer como um novo lote; devolve o número de lançamentos"""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer, self._oldest = self._buffer, [], None
+            self._batch += 1
+            self._conn.executemany(
+                f"INSERT INTO llm_usage ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [(self._batch, *row) for row in rows]
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def rollup(
+        self,
+        group_by: Iterable[str] = ("day", "endpoint", "model"),
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Totais de chamadas, tokens e custo agrupados pelas colunas pedidas
+
+        Args:
+            group_by: subconjunto de GROUP_COLUMNS (vazio = total geral)
+            since/until: dias 'AAAA-MM-DD' inclusivos
+            **filters: igualdade em colunas de GROUP_COLUMNS (ex.: customer='acme')
+
+        Raises:
+            ValueError: coluna fora de GROUP_COLUMNS
+        """
+        group_by = list(group_by)
+        invalid = [c for c in [*group_by, *filters] if c not in GROUP_COLUMNS]
+        if invalid:
+            raise ValueError(f"Colunas inválidas: {', '.join(invalid)}. Disponíveis: {', '.join(GROUP_COLUMNS)}")
+
+        where, params = [], []
+        if since:
+            where.append("day >= ?")
+            params.append(since)
+        if until:
+            where.append("day <= ?")
+            params.append(until)
+        for column, value in filters.items():
+            where.append(f"{column} IS ?")
+            params.append(value)
+
+        select = ", ".join(group_by + [
+            "COUNT(*) AS calls",
+            "SUM(prompt_tokens) AS prompt_tokens",
+            "SUM(completion_tokens) AS completion_tokens",
+            "SUM(cached_tokens) AS cached_tokens",
+            "SUM(cost_usd) AS cost_usd",
+            "COUNT(DISTINCT request_id) AS requests",
+        ])
+        sql = f"SELECT {select} FROM llm_usage"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)} ORDER BY cost_usd DESC, {', '.join(group_by)}"
+
+        self.flush()
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        result = []
+        for row in rows:
+            if not row["calls"]:
+                continue
+            row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+            row["cost_usd"] = round(row["cost_usd"], 6)
+            result.append(row)
+        return result
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+def _endpoint(attribution: Dict[str, Any]) -> Optional[str]:
+    """Endpoint da requisição; com o scope ASGI, o template da rota (sem IDs)"""
+    scope = attribution.get("scope")
+    route = getattr(scope.get("route"), "path", None) if scope else None
+    if route:
+        return f"{scope.get('method', '')} {route}".strip()
+    return attribution.get("endpoint")
+
+
+class LedgerMiddleware:
+    """
+    Middleware ASGI: atribui as chamadas LLM de cada requisição HTTP
+
+    request_id vem de X-Request-ID (ou é gerado) e customer de X-Customer-ID.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        with ledger_context(
+            request_id=headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex,
+            customer=headers.get(b"x-customer-id", b"").decode("latin-1") or None,
+            endpoint=f"{scope.get('method', '')} {scope.get('path', '')}",
+            scope=scope,
+        ):
+            await self.app(scope, receive, send)
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def ledger_enabled() -> bool:
+    return os.getenv("QIVO_LEDGER", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_ledger() -> UsageLedger:
+    """
+    Ledger do processo (data/llm_ledger.db)
+
+    Variáveis de ambiente:
+        QIVO_LEDGER: '0' desliga os lançamentos
+        QIVO_LEDGER_BATCH: lançamentos por lote gravado (padrão 50)
+        QIVO_LEDGER_FLUSH_SECONDS: idade máxima do buffer (padrão 5)
+        QIVO_LLM_PRICES: preços por 1M tokens, JSON {"modelo": [prompt, resposta]}
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            from src.ai.core.storage import data_path
+            _ledger = UsageLedger(
+                data_path("llm_ledger.db"),
+                batch_size=int(os.getenv("QIVO_LEDGER_BATCH", "50")),
+                flush_interval=float(os.getenv("QIVO_LEDGER_FLUSH_SECONDS", "5")),
+            )
+        return _ledger
+
+
+def set_ledger(ledger: Optional[UsageLedger]) -> None:
+    """Substitui o ledger do processo (testes; None recria o padrão); o anterior é gravado e fechado"""
+    global _ledger
+    with _ledger_lock:
+        previous, _ledger = _ledger, ledger
+    if previous is not None and previous is not ledger:
+        previous.close()
+
+
+def record_call(
+    site: Optional[str],
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    estimated: bool = False,
+    cached_tokens: int = 0
+) -> None:
+    """Lança uma chamada no ledger do processo (sem efeito com QIVO_LEDGER=0)"""
+    if ledger_enabled():
+        get_ledger().record(site, model, prompt_tokens, completion_tokens, estimated, cached_tokens)
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if _ledger is not None:
+        try:
+            _ledger.flush()
+        except sqlite3.Error:
+            pass
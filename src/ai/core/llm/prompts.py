@@ -0,0 +1,105 @@
+"""
+QIVO Intelligence Layer - Prompt Prefixes
+Prefixos estáticos e versionados dos prompts dos engines, para o cache de
+prompt do provedor
+
+O provedor reaproveita o processamento do maior prefixo já visto de um
+prompt (na OpenAI, a partir de 1024 tokens e em blocos de 128). Os tokens
+em cache custam menos e encurtam o tempo até o primeiro token. Só que o
+prefixo precisa ser idêntico entre requisições. Por isso cada call site
+monta a mensagem de sistema com um PromptPrefix, que traz definições das
+normas, regras e formato de resposta e nada da requisição. O que varia
+(par de normas, equivalências do glossário, texto) vai na mensagem do
+usuário, depois do prefixo:
+
+    DEEP_ANALYSIS_PREFIX = register_prefix(PromptPrefix('radar.deep_analysis', 2, texto))
+    messages = DEEP_ANALYSIS_PREFIX.messages(sufixo)
+
+Mudou o texto do prefixo, incremente a versão: o label (site@vN) aparece no
+benchmark de cache (src.ai.benchmarks.prompt_cache) e nos testes, que
+conferem que o prefixo não depende da requisição.
+"""
+
+import hashlib
+from typing import Any, Dict, List
+
+from .tokens import count_message_tokens
+
+
+# Menor prefixo reaproveitado pelo provedor e granularidade dos acertos
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+class PromptPrefix:
+    """
+    Mensagem de sistema estável de um call site
+
+    Args:
+        site: call site (ex.: 'bridge.translate')
+        version: versão do texto (incrementar a cada mudança)
+        text: conteúdo da mensagem de sistema
+    """
+
+    def __init__(self, site: str, version: int, text: str):
+        self.site = site
+        self.version = version
+        self.text = text
+
+    @property
+    def label(self) -> str:
+        return f"{self.site}@v{self.version}"
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:12]
+
+    def tokens(self, model: str = "gpt-4o") -> int:
+        return count_message_tokens([{"role": "system", "content": self.text}], model)
+
+    def cacheable(self, model: str = "gpt-4o") -> bool:
+        """Se o prefixo sozinho já alcança o mínimo do cache do provedor"""
+        return self.tokens(model) >= CACHE_MIN_TOKENS
+
+    def messages(self, suffix: str) -> List[Dict[str, str]]:
+        """Prefixo (sistema) + parte variável (usuário)"""
+        return [
+            {"role": "system", "content": self.text},
+            {"role": "user", "content": suffix}
+        ]
+
+    def describe(self, model: str = "gpt-4o") -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "fingerprint": self.fingerprint,
+            "tokens": self.tokens(model),
+            "cacheable": self.cacheable(model),
+        }
+
+
+_prefixes: Dict[str, PromptPrefix] = {}
+
+
+def register_prefix(prefix: PromptPrefix) -> PromptPrefix:
+    """Registra o prefixo do call site (o último registrado vale)"""
+    _prefixes[prefix.site] = prefix
+    return prefix
+
+
+def prompt_prefixes() -> List[PromptPrefix]:
+    """Prefixos registrados pelos engines importados"""
+    return list(_prefixes.values())
+
+
+def prefix_for(messages: List[Dict[str, Any]]) -> PromptPrefix:
+    """
+    Prefixo registrado que abre as mensagens
+
+    Raises:
+        KeyError: mensagens que não começam por um prefixo registrado
+    """
+    first = (messages or [{}])[0]
+    for prefix in _prefixes.values():
+        if first.get("role") == "system" and first.get("content") == prefix.text:
+            return prefix
+    raise KeyError("Mensagens sem prefixo registrado")
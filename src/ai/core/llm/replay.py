@@ -0,0 +1,316 @@
+"""
+QIVO Intelligence Layer - LLM Record & Replay
+Grava as interações com chat.completions num arquivo compacto e as repete
+depois, sem chamar a OpenAI
+
+Com os clientes do processo (get_llm_client), basta o ambiente:
+
+    QIVO_LLM_RECORD=data/run.jsonl.gz     grava as chamadas (cliente real por baixo)
+    QIVO_LLM_REPLAY=data/run.jsonl.gz     responde com o gravado (sem API key)
+    QIVO_LLM_REPLAY_LATENCY=recorded      latência original (padrão), 'zero' ou
+                                          um fator (0.5 = metade)
+
+A chave de cada interação é o hash dos parâmetros da requisição (modelo,
+mensagens, response_format...). Requisições idênticas gravadas várias vezes
+são servidas na ordem da gravação, recomeçando ao fim. Só respostas bem
+sucedidas são gravadas; erros e retries do provedor não se repetem.
+
+    python -m src.ai.core.llm.replay data/run.jsonl.gz   # resumo do arquivo
+"""
+
+import argparse
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+FORMAT = "qivo-llm-replay"
+VERSION = 1
+
+# Parâmetros que não mudam a resposta
+_IGNORED_PARAMS = ("stream_options", "timeout", "extra_headers")
+
+
+class ReplayMiss(Exception):
+    """Requisição sem interação gravada no arquivo de replay"""
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Hash estável dos parâmetros que determinam a resposta"""
+    relevant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+    canonical = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _dump(obj: Any) -> Dict[str, Any]:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_unset=True)
+    return dict(obj)
+
+
+class ReplayArchive:
+    """Interações gravadas, agrupadas pela chave da requisição"""
+
+    def __init__(self, path: Optional[Union[str, os.PathLike]] = None):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "ReplayArchive":
+        archive = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("format") != FORMAT or header.get("version") != VERSION:
+                raise ValueError(f"{path} não é um arquivo de replay v{VERSION}")
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    archive.entries.setdefault(entry["key"], []).append(entry)
+        return archive
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.entries.values())
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries.setdefault(entry["key"], []).append(entry)
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        """Próxima interação gravada para a chave (em ciclo), ou None"""
+        with self._lock:
+            items = self.entries.get(key)
+            if not items:
+                self.misses += 1
+                return None
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            self.hits += 1
+            return items[position % len(items)]
+
+    def save(self, path: Optional[Union[str, os.PathLike]] = None) -> Path:
+        """Grava o arquivo (gzip, JSONL: cabeçalho + uma interação por linha)"""
+        target = Path(path or self.path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with self._lock:
+            entries = [entry for items in self.entries.values() for entry in items]
+        entries.sort(key=lambda entry: entry.get("seq", 0))
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"format": FORMAT, "version": VERSION}) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, target)
+        return target
+
+    def summary(self) -> Dict[str, Any]:
+        """Interações, chaves distintas e latência gravada por modelo"""
+        models: Dict[str, Dict[str, Any]] = {}
+        for items in self.entries.values():
+            for entry in items:
+                stats = models.setdefault(entry.get("model") or "?", {"calls": 0, "streams": 0, "latency_seconds": 0.0})
+                stats["calls"] += 1
+                stats["streams"] += 1 if entry.get("stream") else 0
+                stats["latency_seconds"] = round(stats["latency_seconds"] + entry.get("latency", 0.0), 4)
+        return {"interactions": len(self), "distinct_requests": len(self.entries), "models": models}
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class RecordingClient:
+    """
+    Envolve um cliente compatível com AsyncOpenAI e grava cada chamada a
+    chat.completions.create (requisição, resposta e latência)
+
+    O arquivo é gravado em close() (close_llm_clients), save() ou ao fim
+    do processo.
+    """
+
+    def __init__(self, client: Any, path: Union[str, os.PathLike]):
+        self._client = client
+        self.archive = ReplayArchive(path)
+        self.chat = _Chat(self._create)
+        self._seq = 0
+        self._saved = 0
+        # Clientes descartados sem close() (reset_llm_client) gravam na saída
+        atexit.register(self._save_pending)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def _entry(self, params: Dict[str, Any], started: float) -> Dict[str, Any]:
+        self._seq += 1
+        return {
+            "key": request_key(params),
+            "seq": self._seq,
+            "model": params.get("model"),
+            "stream": bool(params.get("stream")),
+            "latency": round(time.monotonic() - started, 6),
+        }
+
+    async def _create(self, **params: Any) -> Any:
+        started = time.monotonic()
+        response = await self._client.chat.completions.create(**params)
+        if params.get("stream"):
+            return _RecordingStream(self, params, started, response)
+        self.archive.add({**self._entry(params, started), "response": _dump(response)})
+        return response
+
+    def save(self) -> Path:
+        self._saved = len(self.archive)
+        return self.archive.save()
+
+    def _save_pending(self) -> None:
+        if len(self.archive) != self._saved:
+            self.save()
+
+    async def close(self) -> None:
+        self.save()
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            await close()
+
+
+class _RecordingStream:
+    """Repassa os trechos do stream e grava cada um com seu instante relativo"""
+
+    def __init__(self, recorder: RecordingClient, params: Dict[str, Any], started: float, stream: Any):
+        self._recorder = recorder
+        self._params = params
+        self._started = started
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._chunks: List[List[Any]] = []
+        self._done = False
+
+    def __aiter__(self) -> "_RecordingStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+            raise
+        self._chunks.append([round(time.monotonic() - self._started, 6), _dump(chunk)])
+        return chunk
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            self._recorder.archive.add({**self._recorder._entry(self._params, self._started), "chunks": self._chunks})
+
+    async def close(self) -> None:
+        # Stream interrompido antes do fim não é gravado (resposta incompleta)
+        self._done = True
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            await close()
+
+
+class ReplayClient:
+    """
+    Cliente compatível com AsyncOpenAI que responde com as interações de um
+    ReplayArchive, sem rede
+
+    Args:
+        archive: interações gravadas (ou caminho do arquivo)
+        latency_scale: fator sobre a latência gravada (0 = sem espera)
+
+    Raises:
+        ReplayMiss: (em create) requisição que não está no arquivo
+    """
+
+    def __init__(self, archive: Union[ReplayArchive, str, os.PathLike], latency_scale: float = 1.0):
+        self.archive = archive if isinstance(archive, ReplayArchive) else ReplayArchive.load(archive)
+        self.latency_scale = max(latency_scale, 0.0)
+        self.chat = _Chat(self._create)
+
+    async def _create(self, **params: Any) -> Any:
+        from openai.types.chat import ChatCompletion
+
+        entry = self.archive.next(request_key(params))
+        if entry is None:
+            messages = params.get("messages") or [{}]
+            preview = str(messages[-1].get("content", ""))[:80]
+            raise ReplayMiss(f"Sem gravação para {params.get('model')}: {preview!r}")
+        if params.get("stream"):
+            return _ReplayStream(entry.get("chunks") or [], self.latency_scale)
+        if self.latency_scale:
+            await asyncio.sleep(entry.get("latency", 0.0) * self.latency_scale)
+        return ChatCompletion.model_validate(entry["response"])
+
+    async def close(self) -> None:
+        return None
+
+
+class _ReplayStream:
+    """Reproduz os trechos gravados respeitando os instantes originais"""
+
+    def __init__(self, chunks: List[List[Any]], latency_scale: float):
+        self._chunks = chunks
+        self._scale = latency_scale
+        self._position = 0
+        self._started = time.monotonic()
+
+    def __aiter__(self) -> "_ReplayStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        from openai.types.chat import ChatCompletionChunk
+
+        if self._position >= len(self._chunks):
+            raise StopAsyncIteration
+        offset, data = self._chunks[self._position]
+        self._position += 1
+        if self._scale:
+            delay = offset * self._scale - (time.monotonic() - self._started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return ChatCompletionChunk.model_validate(data)
+
+    async def close(self) -> None:
+        self._position = len(self._chunks)
+
+
+def replay_latency_scale(value: Optional[str] = None) -> float:
+    """QIVO_LLM_REPLAY_LATENCY: 'recorded' (1.0), 'zero' (0.0) ou um fator"""
+    value = (value if value is not None else os.getenv("QIVO_LLM_REPLAY_LATENCY", "recorded")).strip().lower()
+    if value in ("", "recorded"):
+        return 1.0
+    if value == "zero":
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return 1.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Resumo de um arquivo de replay de chamadas LLM")
+    parser.add_argument("path", help="Arquivo gravado com QIVO_LLM_RECORD")
+    args = parser.parse_args(argv)
+    print(json.dumps(ReplayArchive.load(args.path).summary(), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,390 @@
+"""
+QIVO Intelligence Layer - LLM Resilience
+Retries com jitter, requisições hedged e circuit breaker por modelo
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from ..telemetry import LLM_FALLBACKS, LLM_RETRIES, add_collector
+from ..tracing import increment_attribute, set_attribute
+from .governor import GovernorTimeout
+
+
+class LLMUnavailable(Exception):
+    """Nenhum modelo da cadeia (primário + fallbacks) respondeu"""
+
+    def __init__(self, message: str, models: Optional[List[str]] = None):
+        super().__init__(message)
+        self.models = models or []
+
+
+class CircuitOpen(Exception):
+    """Circuit breaker do modelo aberto: chamada recusada sem ir à rede"""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Erros que valem retry / fallback: timeout, conexão, 429 e 5xx
+
+    Erros 4xx (prompt inválido, autenticação) não melhoram com nova tentativa.
+    """
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(exc, (CircuitOpen, GovernorTimeout)):
+        return False
+
+    try:
+        import openai
+    except ImportError:  # pragma: no cover - openai é dependência do módulo
+        return False
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um modelo
+
+    closed    -> chamadas normais; `failure_threshold` falhas seguidas abrem
+    open      -> recusa imediata durante `recovery_time` segundos
+    half_open -> uma chamada de teste; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at >= self.recovery_time:
+                self.state = "half_open"
+                self._probing = False
+            else:
+                self.rejected += 1
+                return False
+        # half_open: só uma chamada de teste por vez
+        if self._probing:
+            self.rejected += 1
+            return False
+        self._probing = True
+        return True
+
+    def release_probe(self) -> None:
+        """Libera o teste half-open sem julgar o modelo (ex.: erro 400)"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, self.recovery_time - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(retry_in, 2) if retry_in is not None else None,
+        }
+
+
+class LatencyTracker:
+    """Janela deslizante de latências bem-sucedidas (para o limiar de hedge)"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+
+CallFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class ResilientCaller:
+    """
+    Executa chamadas LLM com:
+
+    - Retries com backoff exponencial e full jitter em erros transitórios
+    - Hedge opcional: segunda requisição idêntica após o p95 de latência
+      do modelo; vence a primeira que responder, a outra é cancelada
+    - Circuit breaker por modelo; com o primário degradado, a chamada cai
+      direto para o modelo de fallback (ex.: gpt-4o-mini)
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        fallback_models: Optional[Dict[str, List[str]]] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.fallback_models = fallback_models or {}
+        self._sleep = sleep
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.counters = {
+            "calls": 0,
+            "retries": 0,
+            "fallbacks": 0,
+            "unavailable": 0,
+            "hedges_launched": 0,
+            "hedges_won": 0,
+        }
+
+    # --- API pública ---
+
+    async def call(self, params: Dict[str, Any], call: CallFn, hedge: bool = True) -> Any:
+        """
+        Executa `call(params)` com a cadeia modelo primário -> fallbacks
+
+        `hedge=False` desliga o hedge nesta chamada (ex.: streams, cujo
+        resultado perdedor precisaria ser fechado)
+
+        Raises:
+            LLMUnavailable: todos os modelos falharam ou estão com breaker aberto
+            Exception: erros não transitórios (ex.: 400) sobem sem fallback
+        """
+        self.counters["calls"] += 1
+        primary = params.get("model", "gpt-4o")
+        chain = [primary] + [m for m in self.fallback_models.get(primary, []) if m != primary]
+
+        last_error: Optional[BaseException] = None
+        for position, model in enumerate(chain):
+            if position > 0:
+                self.counters["fallbacks"] += 1
+                LLM_FALLBACKS.inc(model=model)
+                set_attribute("llm.fallback_model", model)
+            try:
+                return await self._call_model({**params, "model": model}, call, hedge)
+            except CircuitOpen as e:
+                last_error = e
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                last_error = e
+
+        self.counters["unavailable"] += 1
+        raise LLMUnavailable(
+            f"Modelos indisponíveis ({', '.join(chain)}): {last_error}",
+            models=chain
+        ) from last_error
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.failure_threshold, self.recovery_time)
+        return self.breakers[model]
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado dos breakers, latências e taxa de vitória dos hedges"""
+        launched = self.counters["hedges_launched"]
+        models = {}
+        for model in sorted(set(self.breakers) | set(self.latency)):
+            tracker = self.latency.get(model)
+            p50 = tracker.percentile(0.5) if tracker else None
+            p95 = tracker.percentile(0.95) if tracker else None
+            models[model] = {
+                "breaker": self.breaker(model).snapshot(),
+                "latency_p50_seconds": round(p50, 4) if p50 is not None else None,
+                "latency_p95_seconds": round(p95, 4) if p95 is not None else None,
+                "samples": len(tracker.samples) if tracker else 0,
+            }
+        return {
+            **self.counters,
+            "hedging_enabled": self.hedge,
+            "hedge_win_rate": round(self.counters["hedges_won"] / launched, 4) if launched else 0.0,
+            "fallback_models": self.fallback_models,
+            "models": models,
+        }
+
+    # --- Internos ---
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniforme em [0, min(max_delay, base * 2^attempt)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _call_model(self, params: Dict[str, Any], call: CallFn, hedge: bool = True) -> Any:
+        model = params["model"]
+        breaker = self.breaker(model)
+        tracker = self.latency.setdefault(model, LatencyTracker())
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpen(f"Circuit breaker aberto para {model}")
+
+            started = time.monotonic()
+            judged = False
+            try:
+                response = await self._attempt(params, call, tracker, hedge)
+            except Exception as e:
+                if not is_transient(e):
+                    # Falha do pedido, não do modelo: o finally libera o teste half-open
+                    raise
+                breaker.record_failure()
+                judged = True
+                if attempt == self.max_retries:
+                    raise
+                self.counters["retries"] += 1
+                LLM_RETRIES.inc(model=model)
+                increment_attribute("llm.retries")
+                await self._sleep(self._backoff(attempt))
+                continue
+            else:
+                breaker.record_success()
+                judged = True
+            finally:
+                # Cancelamento (cliente desconectou, timeout, hedge) ou erro
+                # não transitório: sem veredito, o teste half-open não pode
+                # ficar preso
+                if not judged:
+                    breaker.release_probe()
+
+            if hedge:
+                # Streams medem só o primeiro token: ficam fora da base do hedge
+                tracker.record(time.monotonic() - started)
+            return response
+
+    async def _attempt(
+        self,
+        params: Dict[str, Any],
+        call: CallFn,
+        tracker: LatencyTracker,
+        hedge: bool = True
+    ) -> Any:
+        if not (self.hedge and hedge) or len(tracker.samples) < self.hedge_min_samples:
+            return await call(params)
+
+        threshold = tracker.percentile(self.hedge_quantile)
+        primary = asyncio.ensure_future(call(params))
+        pending = {primary}
+        first_error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+
+            self.counters["hedges_launched"] += 1
+            increment_attribute("llm.hedges")
+            hedge = asyncio.ensure_future(call(params))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedges_won"] += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+_resilience: Optional[ResilientCaller] = None
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_resilience() -> ResilientCaller:
+    """
+    Retorna a camada de resiliência do processo
+
+    Variáveis de ambiente:
+        QIVO_LLM_MAX_RETRIES: retries em erros transitórios (padrão 2)
+        QIVO_LLM_RETRY_BASE_DELAY: base do backoff em segundos (padrão 0.5)
+        QIVO_LLM_HEDGE: liga requisições hedged (padrão desligado)
+        QIVO_LLM_HEDGE_MIN_SAMPLES: amostras antes de hedgear (padrão 20)
+        QIVO_LLM_BREAKER_THRESHOLD: falhas seguidas que abrem o breaker (padrão 5)
+        QIVO_LLM_BREAKER_RECOVERY: segundos com breaker aberto (padrão 30)
+        QIVO_LLM_FALLBACK_MODEL: modelo de fallback do gpt-4o (padrão gpt-4o-mini,
+            vazio desliga)
+    """
+    global _resilience
+    if _resilience is None:
+        fallback = os.getenv("QIVO_LLM_FALLBACK_MODEL", "gpt-4o-mini").strip()
+        _resilience = ResilientCaller(
+            max_retries=int(os.getenv("QIVO_LLM_MAX_RETRIES", "2")),
+            base_delay=float(os.getenv("QIVO_LLM_RETRY_BASE_DELAY", "0.5")),
+            hedge=_env_flag("QIVO_LLM_HEDGE"),
+            hedge_min_samples=int(os.getenv("QIVO_LLM_HEDGE_MIN_SAMPLES", "20")),
+            failure_threshold=int(os.getenv("QIVO_LLM_BREAKER_THRESHOLD", "5")),
+            recovery_time=float(os.getenv("QIVO_LLM_BREAKER_RECOVERY", "30")),
+            fallback_models={"gpt-4o": [fallback]} if fallback else {},
+        )
+    return _resilience
+
+
+def set_resilience(caller: Optional[ResilientCaller]) -> None:
+    """Substitui a camada de resiliência (testes; None recria pelo ambiente)"""
+    global _resilience
+    _resilience = caller
+
+
+def _collect_metrics():
+    """Estado dos circuit breakers para /metrics (0 fechado, 1 half-open, 2 aberto)"""
+    if _resilience is None:
+        return []
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    samples = [
+        ({"model": model}, states.get(breaker.state, 0))
+        for model, breaker in sorted(_resilience.breakers.items())
+    ]
+    return [("qivo_llm_circuit_state", "gauge", "Estado do circuit breaker por modelo (0 fechado, 1 half-open, 2 aberto)", samples)]
+
+
+add_collector(_collect_metrics)
@@ -0,0 +1,221 @@
+"""
+QIVO Intelligence Layer - Model Routing
+Escolha do modelo por chamada: o modelo barato primeiro, o maior só quando
+a entrada ou a resposta pedem
+
+Para cada chamada roteada o roteador olha:
+
+    - o tamanho do prompt, sem o prefixo estático do call site (ver
+      prompts): acima de QIVO_ROUTE_MAX_CHEAP_TOKENS (padrão 1500) vai
+      direto ao modelo do call site
+    - a estimativa local de confiança do engine (cobertura do glossário,
+      palavras-chave do scorer): abaixo de QIVO_ROUTE_MIN_LOCAL_CONFIDENCE
+      (padrão 0.5) vai direto ao modelo do call site
+    - entradas marcadas como críticas pelo engine (ex.: mudança de alto
+      impacto no Radar), que nunca usam o modelo barato
+
+Nos demais casos a chamada vai ao modelo barato (QIVO_MODEL_CHEAP, padrão
+gpt-4o-mini; por site, QIVO_MODEL_<SITE>_CHEAP) e a resposta passa pela
+validação do engine. Resposta inválida ou com confiança abaixo de
+QIVO_ROUTE_MIN_OUTPUT_CONFIDENCE (padrão 75, escala 0-100 dos engines)
+escala para o modelo do call site. QIVO_LLM_ROUTING=0 desliga o roteamento.
+
+A rota de cada chamada ({'model', 'tier', 'reason', 'escalated'}) vai no
+resultado do engine (coletada com track_routes), nos atributos do span e em
+qivo_llm_routes.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.ai.core.telemetry import counter
+from src.ai.core.tracing import set_attribute
+
+from .client import get_model
+from .completions import create_chat_completion
+from .prompts import prefix_for
+from .tokens import count_message_tokens
+
+
+CHEAP_MODEL = "gpt-4o-mini"
+
+LLM_ROUTES = counter(
+    "qivo_llm_routes",
+    "Chamadas LLM roteadas por camada de modelo e escalada",
+    ("site", "tier", "escalated")
+)
+
+# Valida a resposta do modelo barato: None aceita; texto = motivo da escalada
+Acceptor = Callable[[Any], Optional[str]]
+
+
+class ModelRouter:
+    """
+    Decide o modelo de cada chamada (camada 'cheap' ou 'large')
+
+    Args:
+        cheap_model: modelo barato padrão
+        enabled: False envia tudo ao modelo do call site
+        max_cheap_tokens: maior prompt (tokens) enviado ao modelo barato
+        min_local_confidence: confiança local mínima (0-1) para o modelo barato
+        min_output_confidence: confiança mínima (0-100) informada pelo modelo
+            barato para aceitar a resposta sem escalar
+    """
+
+    def __init__(
+        self,
+        cheap_model: str = CHEAP_MODEL,
+        enabled: bool = True,
+        max_cheap_tokens: int = 1500,
+        min_local_confidence: float = 0.5,
+        min_output_confidence: float = 75.0
+    ):
+        self.cheap_model = cheap_model
+        self.enabled = enabled
+        self.max_cheap_tokens = max_cheap_tokens
+        self.min_local_confidence = min_local_confidence
+        self.min_output_confidence = min_output_confidence
+
+    def cheap_model_for(self, site: str) -> str:
+        return get_model(f"{site}.cheap", self.cheap_model)
+
+    def choose(
+        self,
+        site: str,
+        model: str,
+        input_tokens: int,
+        local_confidence: Optional[float] = None,
+        critical: bool = False
+    ) -> Dict[str, Any]:
+        """Modelo, camada e motivo da escolha para uma chamada"""
+        cheap = self.cheap_model_for(site)
+        if not self.enabled:
+            reason = "disabled"
+        elif cheap == model:
+            reason = "single_tier"
+        elif critical:
+            reason = "critical_input"
+        elif input_tokens > self.max_cheap_tokens:
+            reason = "input_size"
+        elif local_confidence is not None and local_confidence < self.min_local_confidence:
+            reason = "low_local_confidence"
+        else:
+            return {"model": cheap, "tier": "cheap", "reason": "cheap_first"}
+        return {"model": model, "tier": "large", "reason": reason}
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_router() -> ModelRouter:
+    """
+    Roteador do processo
+
+    Variáveis de ambiente:
+        QIVO_LLM_ROUTING: '0' desliga o roteamento
+        QIVO_MODEL_CHEAP: modelo barato (padrão gpt-4o-mini)
+        QIVO_ROUTE_MAX_CHEAP_TOKENS: maior prompt no modelo barato (padrão 1500)
+        QIVO_ROUTE_MIN_LOCAL_CONFIDENCE: confiança local mínima (padrão 0.5)
+        QIVO_ROUTE_MIN_OUTPUT_CONFIDENCE: confiança mínima da resposta barata (padrão 75)
+    """
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            cheap_model=os.getenv("QIVO_MODEL_CHEAP") or CHEAP_MODEL,
+            enabled=os.getenv("QIVO_LLM_ROUTING", "1").strip().lower() not in ("0", "false", "no", "off"),
+            max_cheap_tokens=int(os.getenv("QIVO_ROUTE_MAX_CHEAP_TOKENS", "1500")),
+            min_local_confidence=float(os.getenv("QIVO_ROUTE_MIN_LOCAL_CONFIDENCE", "0.5")),
+            min_output_confidence=float(os.getenv("QIVO_ROUTE_MIN_OUTPUT_CONFIDENCE", "75")),
+        )
+    return _router
+
+
+def set_router(router: Optional[ModelRouter]) -> None:
+    """Substitui o roteador do processo (None recria a partir do ambiente)"""
+    global _router
+    _router = router
+
+
+_current_routes: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("qivo_llm_routes", default=None)
+
+
+@contextmanager
+def track_routes() -> Iterator[List[Dict[str, Any]]]:
+    """Coleta as rotas das chamadas roteadas dentro do bloco (inclui tarefas filhas)"""
+    routes: List[Dict[str, Any]] = []
+    token = _current_routes.set(routes)
+    try:
+        yield routes
+    finally:
+        _current_routes.reset(token)
+
+
+def _input_tokens(messages: Any, model: str) -> int:
+    """Tokens da parte variável do prompt (o prefixo estático registrado não conta)"""
+    try:
+        prefix_for(messages)
+    except KeyError:
+        return count_message_tokens(messages, model)
+    return count_message_tokens(messages[1:], model)
+
+
+def _record_route(site: str, route: Dict[str, Any]) -> None:
+    routes = _current_routes.get()
+    if routes is not None:
+        routes.append(route)
+    LLM_ROUTES.inc(site=site, tier=route["tier"], escalated=str(route["escalated"]).lower())
+    set_attribute("llm.route.model", route["model"])
+    set_attribute("llm.route.tier", route["tier"])
+    set_attribute("llm.route.reason", route["reason"])
+    set_attribute("llm.route.escalated", route["escalated"])
+
+
+async def routed_completion(
+    client: Any,
+    *,
+    site: str,
+    model: str,
+    messages: Any,
+    accept: Acceptor,
+    local_confidence: Optional[float] = None,
+    critical: bool = False,
+    **params: Any
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    create_chat_completion com o modelo escolhido pelo roteador
+
+    Args:
+        model: modelo do call site (camada 'large')
+        accept: validação da resposta do modelo barato; exceções contam
+            como resposta inválida
+        local_confidence: estimativa local do engine (0-1), se houver
+        critical: entrada que sempre vai ao modelo do call site
+
+    Returns:
+        (resposta, rota) — rota com model, tier, reason, escalated e, se
+        houve escalada, escalation_reason
+    """
+    decision = get_router().choose(
+        site, model, _input_tokens(messages, model), local_confidence, critical
+    )
+    route = {**decision, "escalated": False}
+
+    if decision["tier"] == "cheap":
+        try:
+            response = await create_chat_completion(
+                client, site=site, model=decision["model"], messages=messages, **params
+            )
+            problem = accept(response)
+        except Exception as e:
+            problem = f"cheap_error: {type(e).__name__}"
+        if problem is None:
+            _record_route(site, route)
+            return response, route
+        route = {"model": model, "tier": "large", "reason": decision["reason"],
+                 "escalated": True, "escalation_reason": problem}
+
+    response = await create_chat_completion(client, site=site, model=model, messages=messages, **params)
+    _record_route(site, route)
+    return response, route
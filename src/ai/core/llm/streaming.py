@@ -0,0 +1,149 @@
+"""
+QIVO Intelligence Layer - LLM Streaming
+Parser incremental de JSON e eventos de streaming (SSE / NDJSON)
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+DeltaFn = Callable[[str], None]
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JSONFieldStream:
+    """
+    Extrai, à medida que o JSON chega em pedaços, o valor de um campo string
+    do objeto de nível superior (ex.: "translated_text")
+
+    `feed` devolve só os caracteres novos do campo, já decodificados
+    (escapes e \\uXXXX); `finish` faz o parse do documento completo.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.text = ""
+        self._raw: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._role = "other"          # 'key', 'target' ou 'other'
+        self._expect_key = False
+        self._key: List[str] = []
+        self._last_key: Optional[str] = None
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+    def feed(self, delta: str) -> str:
+        """Consome um trecho do JSON e devolve o texto novo do campo"""
+        self._raw.append(delta)
+        out: List[str] = []
+        for ch in delta:
+            if self._in_string:
+                self._string_char(ch, out)
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._role, self._key = "key", []
+                elif self._depth == 1 and self._last_key == self.field:
+                    self._role = "target"
+                else:
+                    self._role = "other"
+                self._expect_key = False
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and ch == "{"
+            elif ch in "}]":
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._expect_key, self._last_key = True, None
+        new = "".join(out)
+        self.text += new
+        return new
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Parse do JSON completo
+
+        Raises:
+            json.JSONDecodeError: se o documento estiver incompleto ou inválido
+        """
+        return json.loads("".join(self._raw))
+
+    def _string_char(self, ch: str, out: List[str]) -> None:
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[0] == "u":
+                if len(self._escape) < 5:
+                    return
+                code = int(self._escape[1:], 16)
+                self._escape = None
+                if 0xD800 <= code < 0xDC00:
+                    self._high_surrogate = code
+                    return
+                if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                    code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                self._high_surrogate = None
+                self._emit(chr(code), out)
+            else:
+                self._emit(_ESCAPES.get(self._escape, self._escape), out)
+                self._escape = None
+        elif ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            self._in_string = False
+            if self._role == "key":
+                self._last_key = "".join(self._key)
+        else:
+            self._emit(ch, out)
+
+    def _emit(self, text: str, out: List[str]) -> None:
+        if self._role == "key":
+            self._key.append(text)
+        elif self._role == "target":
+            out.append(text)
+
+
+async def delta_events(
+    run: Callable[[DeltaFn], Awaitable[Dict[str, Any]]]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Executa `run(on_delta)` e produz {'event': 'delta', 'text': ...} para
+    cada trecho entregue a `on_delta`, seguido de {'event': 'result', ...}
+    com o dicionário devolvido por `run`
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            result = await run(lambda text: queue.put_nowait({'event': 'delta', 'text': text}))
+        except Exception as e:
+            result = {'status': 'error', 'message': str(e)}
+        queue.put_nowait({'event': 'result', **result})
+
+    task = asyncio.ensure_future(worker())
+    try:
+        while True:
+            event = await queue.get()
+            yield event
+            if event['event'] == 'result':
+                break
+    finally:
+        # Cliente desconectado: interrompe a chamada em andamento
+        task.cancel()
+
+
+def encode_event(event: Dict[str, Any], fmt: str = "ndjson") -> str:
+    """Serializa um evento como linha NDJSON ou mensagem SSE"""
+    data = json.dumps(event, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event.get('event', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
@@ -0,0 +1,78 @@
+"""
+QIVO Intelligence Layer - Token Counting
+Estimativas de tokens com tiktoken (encoder em cache por modelo)
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+
+# Tokens extras por mensagem no formato chat (papel + delimitadores)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Fallback quando o tiktoken (ou o arquivo BPE) não está disponível
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=16)
+def get_encoding(model: str):
+    """
+    Retorna o encoder tiktoken do modelo (ou None se indisponível)
+
+    O resultado, inclusive a falha, fica em cache: o tiktoken baixa o BPE
+    na primeira chamada e não queremos repetir essa tentativa por requisição.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Modelo desconhecido pelo tiktoken: usa o encoder da família gpt-4o
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return None
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Conta tokens de um texto para o modelo"""
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: str = "gpt-4o") -> int:
+    """Conta tokens de prompt de uma lista de mensagens chat"""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            total += count_tokens(content, model)
+    return total
+
+
+def estimate_request_tokens(
+    messages: List[Dict[str, Any]],
+    model: str = "gpt-4o",
+    max_tokens: Optional[int] = None
+) -> int:
+    """
+    Estima o consumo de uma chamada (prompt + teto da resposta)
+
+    É o valor reservado no orçamento de tokens/minuto antes da chamada;
+    sem max_tokens, reserva uma resposta do tamanho de 1/4 do prompt.
+    """
+    prompt = count_message_tokens(messages, model)
+    completion = max_tokens if max_tokens is not None else max(256, prompt // 4)
+    return prompt + completion
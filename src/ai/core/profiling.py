@@ -0,0 +1,325 @@
+"""
+QIVO Intelligence Layer - Sampling Profiler
+Amostragem da pilha de chamadas de requisições escolhidas, para achar o que
+as métricas por etapa não explicam (regex em _clean_text, serialização de
+respostas grandes)
+
+Uma requisição é perfilada quando:
+
+    - traz o cabeçalho X-Profile com o valor de QIVO_PROFILE_TOKEN. Sem
+      token configurado o cabeçalho é ignorado: qualquer cliente poderia
+      pôr uma thread de amostragem na própria requisição
+    - cai na amostra de tráfego: QIVO_PROFILE_RATE (0 a 1, padrão 0), que
+      também pode ser trocada em execução pelo endpoint admin
+
+Uma thread amostra a pilha da thread da requisição a cada
+QIVO_PROFILE_INTERVAL_MS (padrão 5). Cada amostra pesa os milissegundos
+decorridos desde a anterior, então uma chamada em C que segura o GIL (um
+re.sub com backtracking) aparece com o tempo que realmente levou. Os perfis
+ficam num buffer circular de QIVO_PROFILE_BUFFER entradas (padrão 50) no
+formato "folded" (flamegraph.pl, speedscope, inferno):
+
+    curl -H "X-Profile: $QIVO_PROFILE_TOKEN" .../api/radar/analyze   # X-Profile-ID na resposta
+    curl .../admin/profiles/<id> > radar.folded
+
+Desligado, o custo por requisição é a busca de um cabeçalho e uma
+comparação. No FastAPI a thread amostrada é a do event loop: requisições
+simultâneas aparecem misturadas no perfil.
+"""
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-ID"
+
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def fold_stack(frame: Any) -> str:
+    """Pilha da raiz até `frame`, separada por ';' (formato folded)"""
+    names: List[str] = []
+    while frame is not None:
+        names.append(_frame_name(frame).replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Amostra em segundo plano a pilha de uma thread até stop()
+
+    Args:
+        thread_id: thread amostrada (threading.get_ident())
+        interval: segundos entre amostras
+        max_duration: segundos máximos de amostragem
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_duration: float = 60.0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_duration = max_duration
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="qivo-profiler", daemon=True)
+        self._started = time.perf_counter()
+        self.duration = 0.0
+
+    def start(self) -> "StackSampler":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        last = self._started
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += max(1, round((now - last) * 1000))
+                self.samples += 1
+            last = now
+            if now - self._started >= self.max_duration:
+                break
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        return self.stacks
+
+
+class ProfileStore:
+    """Buffer circular dos perfis mais recentes"""
+
+    def __init__(self, capacity: int = 50):
+        self._profiles: deque = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((p for p in self._profiles if p["id"] == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Resumos (sem as pilhas), do mais recente ao mais antigo"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in reversed(profiles)]
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+def to_folded(profile: Dict[str, Any]) -> str:
+    """Linhas 'raiz;...;folha <ms>' (entrada de flamegraph.pl e speedscope)"""
+    stacks = sorted(profile["stacks"].items(), key=lambda item: -item[1])
+    return "".join(f"{stack} {weight}\n" for stack, weight in stacks)
+
+
+class Profiler:
+    """
+    Decide quais requisições perfilar e guarda os perfis
+
+    Args:
+        rate: fração do tráfego perfilada sem cabeçalho (0 desliga)
+        token: valor exigido no cabeçalho X-Profile (None desliga o cabeçalho)
+        interval: segundos entre amostras
+        capacity: perfis mantidos no buffer
+        max_active: perfis simultâneos; acima disso a requisição segue sem perfil
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        token: Optional[str] = None,
+        interval: float = 0.005,
+        capacity: int = 50,
+        max_active: int = 4
+    ):
+        self.rate = rate
+        self.token = token
+        self.interval = interval
+        self.max_active = max_active
+        self.store = ProfileStore(capacity)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def trigger(self, header: Optional[str]) -> Optional[str]:
+        """'header', 'sample' ou None (requisição não perfilada)"""
+        if header and self.token is not None and hmac.compare_digest(header.encode(), self.token.encode()):
+            return "header"
+        if self.rate > 0 and random.random() < self.rate:
+            return "sample"
+        return None
+
+    def start(self, name: str, trigger: str) -> Optional[Dict[str, Any]]:
+        """Começa a amostrar a thread atual; None se o limite de perfis ativos foi atingido"""
+        with self._lock:
+            if self._active >= self.max_active:
+                return None
+            self._active += 1
+        return {
+            "id": uuid.uuid4().hex[:16],
+            "name": name,
+            "trigger": trigger,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "sampler": StackSampler(threading.get_ident(), self.interval).start(),
+        }
+
+    def finish(self, active: Dict[str, Any], **attributes: Any) -> Dict[str, Any]:
+        """Encerra a amostragem e guarda o perfil no buffer"""
+        sampler = active.pop("sampler")
+        stacks = sampler.stop()
+        with self._lock:
+            self._active -= 1
+        profile = {
+            **active,
+            **attributes,
+            "duration_ms": round(sampler.duration * 1000, 2),
+            "samples": sampler.samples,
+            "interval_ms": round(self.interval * 1000, 2),
+            "stacks": dict(stacks),
+        }
+        self.store.add(profile)
+        return profile
+
+    def set_rate(self, rate: Any) -> None:
+        """
+        Troca a fração do tráfego perfilada (toggle do admin)
+
+        Raises:
+            ValueError: valor fora de 0 a 1
+        """
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("rate deve estar entre 0 e 1")
+        self.rate = rate
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "header_enabled": self.token is not None,
+            "interval_ms": round(self.interval * 1000, 2),
+            "profiles": len(self.store),
+        }
+
+
+class ProfileMiddleware:
+    """
+    Middleware ASGI: perfila as requisições escolhidas pelo Profiler e
+    devolve X-Profile-ID na resposta
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profiler = get_profiler()
+        header = None
+        for name, value in scope.get("headers") or ():
+            if name == b"x-profile":
+                header = value.decode("latin-1")
+                break
+        trigger = profiler.trigger(header)
+        active = profiler.start(f"{scope.get('method', '')} {scope.get('path', '')}", trigger) if trigger else None
+        if active is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = {}
+
+        async def send_with_profile(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), active["id"].encode())]
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.finish(active, status_code=status.get("code"))
+
+
+def init_flask(app: Any) -> None:
+    """Perfila as requisições escolhidas de um app Flask (hooks de requisição)"""
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        profiler = get_profiler()
+        trigger = profiler.trigger(request.headers.get(PROFILE_HEADER))
+        if trigger:
+            rule = request.url_rule.rule if request.url_rule else request.path
+            g.profile = profiler.start(f"{request.method} {rule}", trigger)
+
+    @app.after_request
+    def add_profile_header(response):
+        active = g.get("profile")
+        if active is not None:
+            response.headers[PROFILE_ID_HEADER] = active["id"]
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc=None):
+        active = g.pop("profile", None)
+        if active is not None:
+            get_profiler().finish(active, status_code=g.pop("profile_status", None))
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """
+    Profiler do processo
+
+    Variáveis de ambiente:
+        QIVO_PROFILE_RATE: fração do tráfego perfilada (padrão 0)
+        QIVO_PROFILE_TOKEN: valor exigido no cabeçalho X-Profile (sem ele, o
+            cabeçalho não perfila)
+        QIVO_PROFILE_INTERVAL_MS: intervalo entre amostras (padrão 5)
+        QIVO_PROFILE_BUFFER: perfis mantidos (padrão 50)
+    """
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler(
+                    rate=float(os.getenv("QIVO_PROFILE_RATE", "0")),
+                    token=os.getenv("QIVO_PROFILE_TOKEN") or None,
+                    interval=float(os.getenv("QIVO_PROFILE_INTERVAL_MS", "5")) / 1000,
+                    capacity=int(os.getenv("QIVO_PROFILE_BUFFER", "50")),
+                )
+    return _profiler
+
+
+def set_profiler(profiler: Optional[Profiler]) -> None:
+    """Substitui o profiler do processo (None recria a partir do ambiente)"""
+    global _profiler
+    _profiler = profiler
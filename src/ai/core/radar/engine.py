@@ -12,10 +12,24 @@ Date: 2025-11-01
 import asyncio
 import json
 from datetime import datetime, timezone
+from itertools import permutations
 from typing import Dict, List, Optional, Any
-from openai import AsyncOpenAI
 import os
 
+from src.ai.core.llm import (
+    PromptBudget,
+    batch_by_tokens,
+    create_chat_completion,
+    get_llm_client,
+    get_model,
+    track_usage,
+)
+from src.ai.core.bridge.comparisons import comparison_fingerprint, get_comparison_matrix
+from src.ai.core.llm.prompts import PromptPrefix, register_prefix
+from src.ai.core.llm.routing import routed_completion
+from src.ai.core.telemetry import stage, track_stages
+from src.ai.core.tracing import set_attribute
+
 # Metadados das fontes regulatórias
 REGULATORY_SOURCES = {
     "ANM": {
@@ -69,21 +83,68 @@ SEVERITY_LEVELS = {
 }
 
 
+# Prompt de sistema da análise profunda: igual em todo lote (prefixo estável
+# para o cache de prompt do provedor); as mudanças vão na mensagem do usuário
+DEEP_ANALYSIS_PROMPT = """Você é um analista de compliance regulatório especializado em mineração internacional.
+
+Fontes monitoradas: """ + "; ".join(
+    f"{code} ({meta['country']}, {meta['full_name']})" for code, meta in REGULATORY_SOURCES.items()
+) + """.
+
+Para cada mudança regulatória recebida na mensagem do usuário (lista JSON), forneça:
+1. Avaliação de impacto operacional (0-100)
+2. Nível de urgência (Low, Medium, High, Critical)
+3. Recomendações de ação
+4. Palavras-chave de risco
+
+Responda em JSON com este formato, um item por mudança e na mesma ordem:
+{
+  "analysis": [
+    {
+      "source": "fonte",
+      "impact_score": 85,
+      "severity": "High",
+      "urgency": "30 dias",
+      "recommendations": ["ação 1", "ação 2"],
+      "risk_keywords": ["palavra1", "palavra2"],
+      "explanation": "análise detalhada"
+    }
+  ]
+}"""
+
+DEEP_ANALYSIS_PREFIX = register_prefix(PromptPrefix("radar.deep_analysis", 2, DEEP_ANALYSIS_PROMPT))
+
+
 class RadarEngine:
     """
     Engine de monitoramento regulatório que detecta, analisa e alerta
     sobre mudanças em normas globais de mineração.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Versão do prompt de comparação (incrementar invalida a matriz persistida)
+    COMPARISON_PROMPT_VERSION = 1
+    
+    def __init__(self, api_key: Optional[str] = None, client: Optional[Any] = None):
         """
         Inicializa o Radar Engine.
         
         Args:
             api_key: OpenAI API key (opcional, usa env var se não fornecida)
+            client: cliente compatível com AsyncOpenAI (padrão: cliente
+                compartilhado do processo; None sem API key)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.client = AsyncOpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = client if client is not None else get_llm_client(self.api_key)
+        
+        # Modelos por call site (sobrescrevíveis por QIVO_MODEL_RADAR_*)
+        self.deep_model = get_model("radar.deep_analysis", "gpt-4o")
+        self.summary_model = get_model("radar.summary", "gpt-4o")
+        self.compare_model = get_model("radar.compare", "gpt-4o")
+        
+        # Orçamento de tokens: teto da resposta e do prompt por lote de mudanças
+        self.deep_max_tokens = 2000
+        self.deep_prompt_tokens = int(os.getenv("QIVO_RADAR_DEEP_PROMPT_TOKENS", "3000"))
+        
         self.sources = REGULATORY_SOURCES
         self.cache: Dict[str, Any] = {}  # Cache de versões anteriores
         
@@ -267,47 +328,38 @@ class RadarEngine:
     ) -> List[Dict[str, Any]]:
         """
         Realiza análise semântica profunda das mudanças usando GPT-4o.
+        
+        As mudanças vão ao GPT em lotes que cabem no orçamento de tokens
+        do prompt (QIVO_RADAR_DEEP_PROMPT_TOKENS).
         """
         if not self.client:
             return changes
         
-        # Prepara contexto para análise
-        context = json.dumps(changes, indent=2, ensure_ascii=False)
+        budget = PromptBudget(self.deep_model, self.deep_max_tokens, self.deep_prompt_tokens)
+        available = budget.available(self._deep_analysis_messages("[]"))
+        for batch in batch_by_tokens(changes, available, self.deep_model):
+            await self._deep_analyze_batch(batch, budget)
         
-        prompt = f"""Você é um especialista em regulamentação de mineração internacional.
-
-Analise as seguintes mudanças regulatórias detectadas e forneça:
-1. Avaliação de impacto operacional (0-100)
-2. Nível de urgência (Low, Medium, High, Critical)
-3. Recomendações de ação
-4. Palavras-chave de risco
-
-Mudanças detectadas:
-{context}
-
-Responda em JSON com este formato:
-{{
-  "analysis": [
-    {{
-      "source": "fonte",
-      "impact_score": 85,
-      "severity": "High",
-      "urgency": "30 dias",
-      "recommendations": ["ação 1", "ação 2"],
-      "risk_keywords": ["palavra1", "palavra2"],
-      "explanation": "análise detalhada"
-    }}
-  ]
-}}"""
-
+        return changes
+    
+    def _deep_analysis_messages(self, context: str) -> List[Dict[str, str]]:
+        """Mensagens da análise profunda para as mudanças em `context` (JSON)."""
+        return DEEP_ANALYSIS_PREFIX.messages(f"Mudanças detectadas:\n{context}")
+    
+    async def _deep_analyze_batch(self, changes: List[Dict[str, Any]], budget: PromptBudget) -> None:
+        """Enriquece um lote de mudanças com a análise do GPT (in-place)."""
+        messages = self._deep_analysis_messages(json.dumps(changes, indent=2, ensure_ascii=False))
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "Você é um analista de compliance regulatório especializado em mineração."},
-                    {"role": "user", "content": prompt}
-                ],
+            # Lotes sem mudança de alto impacto vão primeiro ao modelo barato
+            response, route = await routed_completion(
+                self.client,
+                site="radar.deep_analysis",
+                model=self.deep_model,
+                messages=messages,
+                accept=lambda r: self._check_cheap_analysis(r, len(changes)),
+                critical=any(str(c.get("impact_level", "")).lower() in ("high", "critical") for c in changes),
                 temperature=0.2,
+                max_tokens=budget.completion_tokens(messages),
                 response_format={"type": "json_object"}
             )
             
@@ -325,13 +377,26 @@ Responda em JSON com este formato:
                         "gpt_risk_keywords": gpt_analysis.get("risk_keywords", []),
                         "gpt_explanation": gpt_analysis.get("explanation", "")
                     })
+                change["gpt_route"] = route
             
         except Exception as e:
             # Fallback se GPT falhar
             for change in changes:
                 change["gpt_error"] = str(e)
-        
-        return changes
+    
+    @staticmethod
+    def _check_cheap_analysis(response: Any, expected: int) -> Optional[str]:
+        """Validação da análise do modelo barato; motivo da escalada ou None"""
+        items = json.loads(response.choices[0].message.content).get("analysis")
+        if not isinstance(items, list) or len(items) != expected:
+            return "misaligned_analysis"
+        for item in items:
+            if item.get("severity") not in ("Low", "Medium", "High", "Critical"):
+                return "invalid_severity"
+            score = item.get("impact_score")
+            if not isinstance(score, (int, float)) or not 0 <= score <= 100:
+                return "invalid_impact_score"
+        return None
     
     def generate_alerts(
         self,
@@ -442,9 +507,8 @@ Responda em JSON com este formato:
         if not alerts:
             return "Nenhuma mudança regulatória detectada no período."
         
-        context = json.dumps(alerts, indent=2, ensure_ascii=False)
-        
-        prompt = f"""Você é um consultor de compliance regulatório na mineração.
+        def build_messages(context: str) -> List[Dict[str, str]]:
+            prompt = f"""Você é um consultor de compliance regulatório na mineração.
 
 Gere um resumo executivo profissional (3-5 parágrafos) sobre as mudanças regulatórias detectadas.
 
@@ -458,16 +522,27 @@ Dados:
 {context}
 
 Seja objetivo, técnico e focado em decisões estratégicas."""
+            return [
+                {"role": "system", "content": "Você é um especialista em regulação de mineração global."},
+                {"role": "user", "content": prompt}
+            ]
+        
+        # Só os alertas (na ordem recebida) que cabem no orçamento do prompt
+        budget = PromptBudget(self.summary_model, 800, self.deep_prompt_tokens)
+        included = next(batch_by_tokens(alerts, budget.available(build_messages("[]")), self.summary_model))
+        context = json.dumps(included, indent=2, ensure_ascii=False)
+        if len(included) < len(alerts):
+            context += f"\n\n(+{len(alerts) - len(included)} alertas omitidos por limite de tamanho)"
+        messages = build_messages(context)
 
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "Você é um especialista em regulação de mineração global."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = await create_chat_completion(
+                self.client,
+                site="radar.summary",
+                model=self.summary_model,
+                messages=messages,
                 temperature=0.3,
-                max_tokens=800
+                max_tokens=budget.completion_tokens(messages)
             )
             
             return response.choices[0].message.content.strip()
@@ -496,6 +571,89 @@ Seja objetivo, técnico e focado em decisões estratégicas."""
         
         return summary.strip()
     
+    async def explain_source_difference(self, source1: str, source2: str) -> Dict[str, Any]:
+        """
+        Análise detalhada (GPT) das diferenças entre duas fontes regulatórias.
+        
+        Lê da matriz pré-computada de comparações; só chama o GPT se o par
+        ainda não tiver sido calculado.
+        
+        Args:
+            source1: Primeira fonte
+            source2: Segunda fonte
+            
+        Returns:
+            Dict com analysis, cached e stale
+        """
+        comparison, info = await get_comparison_matrix().get_or_compute(
+            "radar", source1, source2,
+            self._comparison_fingerprint(source1, source2),
+            lambda: self._compute_source_difference(source1, source2)
+        )
+        return {**comparison, "cached": info["cached"], "stale": info["stale"]}
+    
+    async def _compute_source_difference(self, source1: str, source2: str) -> Dict[str, Any]:
+        """Análise comparativa de um par de fontes pelo GPT (sem cache)."""
+        context = json.dumps({
+            "source1": {"name": source1, **self.sources[source1]},
+            "source2": {"name": source2, **self.sources[source2]}
+        }, indent=2, ensure_ascii=False)
+        
+        prompt = f"""Você é um especialista em regulamentação de mineração internacional.
+
+Compare as seguintes normas regulatórias e forneça uma análise detalhada:
+{context}
+
+Inclua:
+- Principais diferenças operacionais
+- Similaridades conceituais
+- Desafios de harmonização
+- Recomendações para empresas que operam sob ambas as normas
+
+Seja técnico e objetivo (2-3 parágrafos)."""
+
+        response = await create_chat_completion(
+            self.client,
+            site="radar.compare",
+            model=self.compare_model,
+            messages=[
+                {"role": "system", "content": "Você é um analista de compliance regulatório."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=600
+        )
+        
+        return {"analysis": response.choices[0].message.content.strip()}
+    
+    def _comparison_fingerprint(self, source1: str, source2: str) -> str:
+        """Versão da comparação: metadados do par + prompt + modelo."""
+        return comparison_fingerprint(
+            self.sources[source1],
+            self.sources[source2],
+            f"radar.compare:v{self.COMPARISON_PROMPT_VERSION}:{self.compare_model}"
+        )
+    
+    async def warm_comparisons(self, force: bool = False) -> Dict[str, int]:
+        """
+        Pré-computa as análises de todos os pares ordenados de fontes.
+        
+        Args:
+            force: Recalcula também os pares já válidos
+            
+        Returns:
+            Contagem de pares calculados / já válidos / com erro
+        """
+        pairs = [
+            (
+                source1, source2,
+                self._comparison_fingerprint(source1, source2),
+                lambda s1=source1, s2=source2: self._compute_source_difference(s1, s2)
+            )
+            for source1, source2 in permutations(self.sources, 2)
+        ]
+        return await get_comparison_matrix().warm("radar", pairs, force=force)
+    
     async def run_cycle(
         self,
         sources: Optional[List[str]] = None,
@@ -511,29 +669,39 @@ Seja objetivo, técnico e focado em decisões estratégicas."""
             summarize: Gera resumo executivo
             
         Returns:
-            Dict com timestamp, alerts e summary (se solicitado)
+            Dict com timestamp, alerts, summary (se solicitado), usage
+            (tokens consumidos pelas chamadas GPT do ciclo) e timings
+            (segundos por etapa: fetch, analyze, alerts, summarize e total)
         """
-        # 1. Busca dados das fontes
-        current_data = await self.fetch_sources(sources)
-        
-        # 2. Analisa mudanças
-        changes = await self.analyze_changes(current_data, deep=deep)
-        
-        # 3. Gera alertas
-        alerts = self.generate_alerts(changes)
-        
-        # 4. Monta resultado
-        result = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "sources_monitored": list(current_data.keys()),
-            "alerts_count": len(alerts),
-            "alerts": alerts
-        }
-        
-        # 5. Gera resumo se solicitado
-        if summarize and alerts:
-            result["executive_summary"] = await self.summarize(result)
+        with track_stages('radar', **{'radar.deep': deep}) as timings, track_usage() as usage:
+            # 1. Busca dados das fontes
+            with stage('radar', 'fetch'):
+                current_data = await self.fetch_sources(sources)
+            
+            # 2. Analisa mudanças
+            with stage('radar', 'analyze'):
+                changes = await self.analyze_changes(current_data, deep=deep)
+            
+            # 3. Gera alertas
+            with stage('radar', 'alerts'):
+                alerts = self.generate_alerts(changes)
+            set_attribute('radar.alerts', len(alerts))
+            
+            # 4. Monta resultado
+            result = {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "sources_monitored": list(current_data.keys()),
+                "alerts_count": len(alerts),
+                "alerts": alerts
+            }
+            
+            # 5. Gera resumo se solicitado
+            if summarize and alerts:
+                with stage('radar', 'summarize'):
+                    result["executive_summary"] = await self.summarize(result)
         
+        result["usage"] = usage.as_dict()
+        result["timings"] = timings
         return result
 
 
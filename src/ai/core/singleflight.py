@@ -0,0 +1,109 @@
+"""
+QIVO Intelligence Layer - Single-flight
+Junta chamadas idênticas e simultâneas dos engines numa só execução
+
+Quando um alerta do Radar se espalha, vários usuários pedem a mesma
+tradução ou comparação no mesmo segundo. Com coalesce(), a primeira chamada
+executa e as que chegam enquanto ela está em andamento aguardam o mesmo
+resultado (ou a mesma exceção):
+
+    result = await coalesce('bridge.translate', (model, text, source, target), run)
+
+A execução compartilhada é uma tarefa própria: cancelar um dos chamadores
+não a cancela. Ela roda no contexto do primeiro chamador (span, prioridade
+no governor e atribuição no ledger). Cada chamador recebe uma cópia do
+resultado; `waiter` ajusta a cópia de quem só aguardou (ex.: zerar o consumo
+de tokens, que foi do primeiro). Chamadas juntadas contam em
+qivo_singleflight_calls{role="coalesced"}.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .telemetry import counter
+from .tracing import increment_attribute
+
+
+SINGLEFLIGHT_CALLS = counter(
+    "qivo_singleflight_calls",
+    "Chamadas de engine por papel no single-flight (leader executa, coalesced aguarda)",
+    ("operation", "role")
+)
+
+
+def flight_key(*parts: Any) -> str:
+    """Hash estável dos argumentos que determinam o resultado"""
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def count_coalesced(operation: str) -> None:
+    """Conta uma chamada que aguardou uma execução já em andamento"""
+    SINGLEFLIGHT_CALLS.inc(operation=operation, role="coalesced")
+    increment_attribute("singleflight.coalesced")
+
+
+class SingleFlight:
+    """Execuções em andamento por chave, no event loop atual"""
+
+    def __init__(self):
+        self._calls: Dict[Tuple[int, str], asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self,
+        operation: str,
+        key: str,
+        run: Callable[[], Awaitable[Any]],
+        waiter: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Executa run() ou aguarda a execução idêntica em andamento
+
+        Args:
+            operation: nome da operação (label das métricas)
+            key: chave dos argumentos (flight_key)
+            run: fábrica da corrotina que produz o resultado
+            waiter: aplicado à cópia do resultado entregue a quem aguardou
+        """
+        # Tarefas só valem no loop em que foram criadas
+        slot = (id(asyncio.get_running_loop()), f"{operation}:{key}")
+        task = self._calls.get(slot)
+        leader = task is None
+        if leader:
+            SINGLEFLIGHT_CALLS.inc(operation=operation, role="leader")
+            task = asyncio.ensure_future(run())
+            self._calls[slot] = task
+            task.add_done_callback(lambda done: self._release(slot, done))
+        else:
+            count_coalesced(operation)
+        # shield: cancelar um chamador não cancela a execução compartilhada
+        result = copy.deepcopy(await asyncio.shield(task))
+        if not leader and waiter is not None:
+            result = waiter(result)
+        return result
+
+    def _release(self, slot: Tuple[int, str], task: asyncio.Task) -> None:
+        if self._calls.get(slot) is task:
+            del self._calls[slot]
+        # Sem chamadores restantes, a exceção não fica "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+
+_flights = SingleFlight()
+
+
+async def coalesce(
+    operation: str,
+    parts: Any,
+    run: Callable[[], Awaitable[Any]],
+    waiter: Optional[Callable[[Any], Any]] = None
+) -> Any:
+    """Atalho: single-flight do processo com a chave flight_key(parts)"""
+    return await _flights.do(operation, flight_key(parts), run, waiter)
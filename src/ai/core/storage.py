@@ -0,0 +1,35 @@
+"""
+QIVO Intelligence Layer - Local Storage
+Diretório de dados persistidos pelos engines (caches, matrizes, memórias)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+def get_data_dir() -> Path:
+    """
+    Diretório de dados locais (variável QIVO_DATA_DIR, padrão ./data)
+
+    Criado sob demanda.
+    """
+    path = Path(os.getenv("QIVO_DATA_DIR", "data"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_path(name: str) -> Path:
+    """Caminho de um arquivo dentro do diretório de dados"""
+    return get_data_dir() / name
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    """Grava JSON via arquivo temporário + rename (leitores nunca veem arquivo parcial)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
@@ -0,0 +1,340 @@
+"""
+QIVO Intelligence Layer - Telemetry
+Contadores e histogramas do processo no formato de texto do Prometheus e
+cronômetros por etapa dos pipelines (Validator, Bridge, Radar, conectores)
+
+As métricas ficam num registro em memória por processo (cada worker
+uvicorn/gunicorn expõe as suas em /metrics). Uso típico:
+
+    with track_stages('radar') as timings:
+        with stage('radar', 'fetch'):
+            data = await fetch()
+    timings  # {'fetch': 0.12, 'total': 0.13}
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .tracing import get_tracer, increment_attribute
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Faixas padrão dos histogramas de duração (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (nome, tipo, ajuda, [(labels, valor)]) produzido por coletores na leitura
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @property
+    def exposed_name(self) -> str:
+        return self.name
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """Contador monotônico por combinação de labels"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    @property
+    def exposed_name(self) -> str:
+        return f"{self.name}_total"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Contadores só aumentam")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.exposed_name}{_format_labels(self._labels(key))} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo (faixas `le`, soma e contagem) por combinação de labels"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            else:
+                series["counts"][-1] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        """{'count', 'sum', 'buckets': {le: acumulado}} da série"""
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return {"count": 0, "sum": 0.0, "buckets": {}}
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + (math.inf,), series["counts"]):
+            total += count
+            cumulative[bound] = total
+        return {"count": series["count"], "sum": series["sum"], "buckets": cumulative}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            keys = sorted(self._series)
+        lines = []
+        for key in keys:
+            labels = self._labels(key)
+            snap = self.snapshot(**labels)
+            for bound, count in snap["buckets"].items():
+                le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(snap['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {snap['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas e coletores do processo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Métrica {metric.name} já registrada com outro tipo ou labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Coletor chamado a cada leitura (gauges do estado atual: fila, breakers)"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """Zera os valores (testes); métricas e coletores continuam registrados"""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição em texto do Prometheus"""
+        lines: List[str] = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.append(f"# HELP {metric.exposed_name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.exposed_name} {metric.type_name}")
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            for name, type_name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    """Contador no registro do processo (mesmo nome devolve a mesma métrica)"""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Iterable[str] = (),
+    buckets: Iterable[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Histograma no registro do processo (mesmo nome devolve a mesma métrica)"""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def add_collector(collector: Callable[[], Iterable[Family]]) -> None:
+    REGISTRY.add_collector(collector)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+# --- Métricas compartilhadas ---
+
+STAGE_SECONDS = histogram(
+    "qivo_stage_duration_seconds",
+    "Duração de cada etapa dos pipelines de IA",
+    ("pipeline", "stage")
+)
+LLM_REQUEST_SECONDS = histogram(
+    "qivo_llm_request_duration_seconds",
+    "Duração de cada tentativa de chamada ao LLM (sem a espera na fila)",
+    ("site", "model", "outcome")
+)
+LLM_TOKENS = counter(
+    "qivo_llm_tokens",
+    "Tokens consumidos nas chamadas ao LLM",
+    ("site", "model", "kind")
+)
+LLM_RETRIES = counter(
+    "qivo_llm_retries",
+    "Retries de chamadas LLM após erros transitórios",
+    ("model",)
+)
+LLM_FALLBACKS = counter(
+    "qivo_llm_fallbacks",
+    "Chamadas LLM desviadas para o modelo de fallback",
+    ("model",)
+)
+LLM_QUEUE_WAIT_SECONDS = histogram(
+    "qivo_llm_queue_wait_seconds",
+    "Espera na fila do governor até obter vaga",
+    ("priority",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+CACHE_LOOKUPS = counter(
+    "qivo_cache_lookups",
+    "Consultas aos caches de IA (memória de tradução, matriz de comparações, índice de relatórios)",
+    ("cache", "result")
+)
+
+
+def cache_lookup(cache: str, result: str) -> None:
+    """Conta a consulta em qivo_cache_lookups e no span atual (cache.<cache>.<result>)"""
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
+    increment_attribute(f"cache.{cache}.{result}")
+
+
+# --- Cronômetros por etapa ---
+
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("qivo_stage_timings", default=None)
+
+
+@contextmanager
+def track_stages(pipeline: str, **attributes: Any) -> Iterator[Dict[str, float]]:
+    """
+    Coleta as durações das etapas (stage) executadas dentro do bloco
+
+    O dicionário devolvido recebe {etapa: segundos} e, ao sair, 'total'; o
+    total também alimenta o histograma com stage='total'. Tarefas criadas
+    dentro do bloco (asyncio.gather) registram no mesmo dicionário. O bloco
+    é também um span `pipeline` (ver tracing), com os `attributes` dados.
+    """
+    timings: Dict[str, float] = {}
+    token = _current_timings.set(timings)
+    started = time.perf_counter()
+    try:
+        with get_tracer().start_span(pipeline, attributes):
+            yield timings
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_timings.reset(token)
+        timings["total"] = round(elapsed, 6)
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage="total")
+
+
+@contextmanager
+def stage(pipeline: str, name: str, **attributes: Any) -> Iterator[None]:
+    """
+    Mede uma etapa: histograma do processo, timings do track_stages atual e
+    um span `pipeline.name` com os `attributes` dados
+    """
+    started = time.perf_counter()
+    try:
+        with get_tracer().start_span(f"{pipeline}.{name}", attributes):
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + elapsed, 6)
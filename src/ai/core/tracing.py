@@ -0,0 +1,434 @@
+"""
+QIVO Intelligence Layer - Tracing
+Spans no estilo OpenTelemetry para seguir uma requisição pelos conectores,
+engines e chamadas ao LLM (Radar -> Bridge -> Validator)
+
+O span atual propaga por await e pelas tarefas filhas (ContextVar), então
+cada etapa medida com telemetry.stage vira um filho do pipeline que a
+chamou. Spans encerrados vão para os exportadores configurados:
+
+    QIVO_TRACE_EXPORTER=console       uma linha JSON por span em stderr
+    QIVO_TRACE_EXPORTER=file          JSONL em QIVO_TRACE_FILE (padrão data/traces.jsonl)
+    QIVO_TRACE_EXPORTER=console,file  os dois
+
+Sem exportador, os spans são criados e descartados. Para inspecionar um
+trace gravado e o caminho crítico de cada hop:
+
+    python -m src.ai.core.tracing data/traces.jsonl --last
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+
+class Span:
+    """Operação com início, fim, atributos e status, dentro de um trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_time", "end_time", "_started", "status", "error")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self.status = "unset"
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        """Cabeçalho W3C traceparent para propagar o trace a outro serviço"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @property
+    def duration(self) -> float:
+        if self.end_time is None:
+            return time.perf_counter() - self._started
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def increment(self, key: str, amount: Union[int, float] = 1) -> None:
+        """Soma `amount` ao atributo (tokens, retries, hits de cache)"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = self.start_time + (time.perf_counter() - self._started)
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        elif self.status == "unset":
+            self.status = "ok"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start_time, 6),
+            "end": round(self.end_time if self.end_time is not None else time.time(), 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+# --- Exportadores ---
+
+class ConsoleExporter:
+    """Uma linha JSON por span encerrado (padrão: stderr)"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def export(self, span: Span) -> None:
+        stream = self.stream or sys.stderr
+        stream.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        stream.flush()
+
+
+class FileExporter:
+    """Acrescenta cada span encerrado a um arquivo JSONL"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class InMemoryExporter:
+    """Guarda os spans encerrados em memória (testes e diagnóstico)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def by_name(self, name: str) -> List[Span]:
+        return [s for s in self.spans if s.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+# --- Tracer ---
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("qivo_current_span", default=None)
+
+
+class Tracer:
+    """Cria spans e entrega os encerrados aos exportadores"""
+
+    def __init__(self, exporters: Optional[Iterable[Any]] = None):
+        self.exporters = list(exporters or [])
+
+    def begin(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        traceparent: Optional[str] = None
+    ) -> Span:
+        """
+        Abre um span sem torná-lo o atual (use start_span no caso comum)
+
+        O pai é, nesta ordem: `parent`, o cabeçalho `traceparent` recebido de
+        outro serviço ou o span atual do contexto.
+        """
+        remote = parse_traceparent(traceparent) if traceparent else None
+        if parent is None and remote is None:
+            parent = _current_span.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+        if remote is not None:
+            return Span(name, remote[0], remote[1], attributes)
+        return Span(name, secrets.token_hex(16), None, attributes)
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.end(error)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                # Exportar nunca derruba a requisição
+                print(f"Falha ao exportar span {span.name}: {e}", file=sys.stderr)
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        traceparent: Optional[str] = None
+    ) -> Iterator[Span]:
+        """Abre um span filho do atual e o torna o span atual dentro do bloco"""
+        span = self.begin(name, attributes, parent, traceparent)
+        token = _current_span.set(span)
+        error: Optional[BaseException] = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span, error)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def _exporters_from_env() -> List[Any]:
+    exporters: List[Any] = []
+    for name in os.getenv("QIVO_TRACE_EXPORTER", "").lower().split(","):
+        name = name.strip()
+        if name == "console":
+            exporters.append(ConsoleExporter())
+        elif name == "file":
+            from src.ai.core.storage import data_path
+            exporters.append(FileExporter(os.getenv("QIVO_TRACE_FILE") or data_path("traces.jsonl")))
+    return exporters
+
+
+def get_tracer() -> Tracer:
+    """Tracer do processo (exportadores de QIVO_TRACE_EXPORTER)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(_exporters_from_env())
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Substitui o tracer do processo (None recria a partir do ambiente)"""
+    global _tracer
+    _tracer = tracer
+
+
+def span(
+    name: str,
+    traceparent: Optional[str] = None,
+    **attributes: Any
+):
+    """Atalho: get_tracer().start_span(name, attributes)"""
+    return get_tracer().start_span(name, attributes, traceparent=traceparent)
+
+
+@contextmanager
+def use_span(current: Span) -> Iterator[Span]:
+    """Torna `current` o span atual no bloco, sem encerrá-lo ao sair"""
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Define um atributo no span atual (sem span, não faz nada)"""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+def increment_attribute(key: str, amount: Union[int, float] = 1) -> None:
+    """Soma ao atributo do span atual (sem span, não faz nada)"""
+    current = _current_span.get()
+    if current is not None:
+        current.increment(key, amount)
+
+
+def parse_traceparent(header: str) -> Optional[Tuple[str, str]]:
+    """(trace_id, span_id) de um cabeçalho W3C traceparent válido"""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return parts[1], parts[2]
+
+
+class TraceMiddleware:
+    """
+    Middleware ASGI: um span por requisição HTTP
+
+    Continua o trace do cabeçalho `traceparent` recebido (se houver) e
+    devolve o traceparent do span na resposta, para correlacionar com os
+    spans exportados.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        method, path = scope.get("method", ""), scope.get("path", "")
+        attributes = {"http.method": method, "http.target": path}
+        with get_tracer().start_span(f"{method} {path}", attributes, traceparent=traceparent) as current:
+            async def send_with_trace(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.status_code", message["status"])
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"traceparent", current.traceparent.encode())]
+                    }
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+# --- Análise offline ---
+
+def load_spans(path: Union[str, os.PathLike]) -> List[Dict[str, Any]]:
+    """Spans de um arquivo JSONL gravado pelo FileExporter"""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def _children(spans: List[Dict[str, Any]]) -> Dict[Optional[str], List[Dict[str, Any]]]:
+    ids = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        # Pai fora do arquivo (trace recebido de outro serviço) conta como raiz
+        parent = s.get("parent_id") if s.get("parent_id") in ids else None
+        children.setdefault(parent, []).append(s)
+    for kids in children.values():
+        kids.sort(key=lambda s: s["start"])
+    return children
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Caminho crítico do trace: a cadeia de spans que determinou a duração
+
+    Partindo da raiz, escolhe o filho que terminou por último, depois o que
+    terminou por último antes do início dele, e assim por diante, descendo
+    recursivamente. Cada item traz `self_ms`: o tempo do span no caminho que
+    não está coberto pelos filhos escolhidos (onde o hop de fato gastou).
+    """
+    children = _children(spans)
+    roots = children.get(None, [])
+    if not roots:
+        return []
+    root = max(roots, key=lambda s: s["end"] - s["start"])
+    path: List[Dict[str, Any]] = []
+
+    def walk(node: Dict[str, Any], depth: int) -> None:
+        chosen, cursor = [], node["end"]
+        for kid in sorted(children.get(node["span_id"], []), key=lambda s: s["end"], reverse=True):
+            if kid["end"] <= cursor + 1e-6:
+                chosen.append(kid)
+                cursor = kid["start"]
+        covered = sum(k["duration_ms"] for k in chosen)
+        path.append({
+            "name": node["name"],
+            "span_id": node["span_id"],
+            "depth": depth,
+            "duration_ms": node["duration_ms"],
+            "self_ms": round(max(node["duration_ms"] - covered, 0.0), 3),
+            "attributes": node.get("attributes", {}),
+        })
+        for kid in reversed(chosen):
+            walk(kid, depth + 1)
+
+    walk(root, 0)
+    return path
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    """Árvore do trace com durações; '*' marca os spans do caminho crítico"""
+    children = _children(spans)
+    critical = {item["span_id"] for item in critical_path(spans)}
+    lines: List[str] = []
+
+    def walk(node: Dict[str, Any], depth: int) -> None:
+        marker = "*" if node["span_id"] in critical else " "
+        attributes = " ".join(f"{k}={v}" for k, v in sorted(node.get("attributes", {}).items()))
+        status = " ERROR" if node.get("status") == "error" else ""
+        lines.append(f"{marker} {'  ' * depth}{node['name']} {node['duration_ms']:.1f}ms{status} {attributes}".rstrip())
+        for kid in children.get(node["span_id"], []):
+            walk(kid, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mostra traces gravados e o caminho crítico de cada hop")
+    parser.add_argument("path", help="Arquivo JSONL do FileExporter")
+    parser.add_argument("--trace", help="trace_id a mostrar (padrão: todos)")
+    parser.add_argument("--last", action="store_true", help="Mostra só o trace mais recente")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.path)
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        traces.setdefault(s["trace_id"], []).append(s)
+    selected = list(traces.items())
+    if args.trace:
+        selected = [(t, s) for t, s in selected if t == args.trace]
+    elif args.last and selected:
+        selected = [max(selected, key=lambda item: max(s["end"] for s in item[1]))]
+
+    for trace_id, trace_spans in selected:
+        print(f"trace {trace_id} ({len(trace_spans)} spans)")
+        print(format_trace(trace_spans))
+        print("caminho crítico:")
+        for item in critical_path(trace_spans):
+            print(f"  {'  ' * item['depth']}{item['name']} {item['duration_ms']:.1f}ms (próprio {item['self_ms']:.1f}ms)")
+        print()
+    return 0 if selected else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,5 +5,9 @@ QIVO Intelligence Layer - Validator Module
 from .validator import ValidatorAI
 from .preprocessor import DocumentPreprocessor
 from .scoring import ComplianceScorer, RiskLevel
+from .context import select_context
+from .dedup import ReportIndex, get_report_index, set_report_index
+from .gate import PreScoringGate, get_gate
 
-__all__ = ['ValidatorAI', 'DocumentPreprocessor', 'ComplianceScorer', 'RiskLevel']
+__all__ = ['ValidatorAI', 'DocumentPreprocessor', 'ComplianceScorer', 'RiskLevel', 'select_context',
+           'ReportIndex', 'get_report_index', 'set_report_index', 'PreScoringGate', 'get_gate']
@@ -0,0 +1,208 @@
+"""
+QIVO Intelligence Layer - Context Selection
+Seleção dos trechos mais relevantes de um documento para caber no orçamento de tokens
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.ai.core.llm import count_tokens
+from .scoring import ComplianceScorer
+
+
+# Marcador entre trechos não contíguos do documento
+GAP_MARKER = "\n\n[... trechos omitidos ...]\n\n"
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+")
+_WORD = re.compile(r"[^\W_]+")
+# Linha de sumário: pontilhado ou título seguido de número de página
+_TOC_LINE = re.compile(r"(\.{4,}|…{2,}|\s\d{1,3}\s*$)", re.MULTILINE)
+
+
+def split_passages(text: str, target_chars: int = 800) -> List[Dict[str, Any]]:
+    """
+    Divide o documento em trechos de ~`target_chars` (parágrafos; frases
+    quando o parágrafo é longo ou o texto não tem quebras)
+
+    Returns:
+        Lista de {'index', 'start', 'end', 'text'} na ordem do documento
+    """
+    spans: List[Tuple[int, int]] = []
+    position = 0
+    for block in _PARAGRAPH.split(text):
+        start = text.find(block, position)
+        position = start + len(block)
+        if not block.strip():
+            continue
+        if len(block) <= target_chars:
+            spans.append((start, position))
+            continue
+        sentence_start = start
+        for sentence in _SENTENCE.split(block):
+            s = text.find(sentence, sentence_start)
+            sentence_start = s + len(sentence)
+            spans.append((s, sentence_start))
+
+    # Junta pedaços pequenos vizinhos até o tamanho alvo
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and end - merged[-1][0] <= target_chars:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return [
+        {'index': i, 'start': start, 'end': end, 'text': text[start:end]}
+        for i, (start, end) in enumerate(merged)
+    ]
+
+
+def compliance_query(scorer: Optional[ComplianceScorer] = None) -> Dict[str, float]:
+    """Termos de consulta: palavras-chave do ComplianceScorer com o peso da categoria"""
+    scorer = scorer or ComplianceScorer()
+    categories = {
+        'jorc': scorer.JORC_KEYWORDS,
+        'ni_43_101': scorer.NI_43_101_KEYWORDS,
+        'prms': scorer.PRMS_KEYWORDS,
+        'qa_qc': scorer.QA_QC_KEYWORDS,
+        'compliance': scorer.COMPLIANCE_KEYWORDS,
+    }
+    query: Dict[str, float] = {}
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            query[keyword] = max(query.get(keyword, 0.0), scorer.scoring_weights[category])
+    return query
+
+
+class PassageRanker:
+    """
+    BM25 sobre os trechos do documento, com os termos (ou expressões) da
+    consulta ponderados por categoria
+
+    Trechos com cara de sumário/índice (pontilhados, números de página)
+    são rebaixados: concentram títulos de seção, mas não conteúdo.
+    """
+
+    def __init__(self, query: Dict[str, float], k1: float = 1.2, b: float = 0.75, toc_penalty: float = 0.2):
+        self.query = query
+        self.k1 = k1
+        self.b = b
+        self.toc_penalty = toc_penalty
+        terms = sorted(query, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<![\w/])(" + "|".join(re.escape(t) for t in terms) + r")(?![\w/])",
+            re.IGNORECASE
+        ) if terms else None
+
+    def score(self, passages: List[Dict[str, Any]]) -> List[float]:
+        if not passages or self._pattern is None:
+            return [0.0] * len(passages)
+
+        frequencies = [Counter(m.lower() for m in self._pattern.findall(p['text'])) for p in passages]
+        lengths = [len(_WORD.findall(p['text'])) or 1 for p in passages]
+        average = sum(lengths) / len(lengths)
+        documents = Counter(term for tf in frequencies for term in tf)
+        n = len(passages)
+
+        scores = []
+        for passage, tf, length in zip(passages, frequencies, lengths):
+            score = 0.0
+            for term, count in tf.items():
+                idf = math.log(1 + (n - documents[term] + 0.5) / (documents[term] + 0.5))
+                saturation = count * (self.k1 + 1) / (count + self.k1 * (1 - self.b + self.b * length / average))
+                score += self.query[term] * idf * saturation
+            if self._looks_like_toc(passage['text']):
+                score *= self.toc_penalty
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _looks_like_toc(text: str) -> bool:
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) < 3:
+            return len(_TOC_LINE.findall(text)) >= 3
+        return sum(1 for line in lines if _TOC_LINE.search(line)) / len(lines) >= 0.5
+
+
+def select_context(
+    text: str,
+    budget_tokens: int,
+    model: str = "gpt-4o",
+    query: Optional[Dict[str, float]] = None,
+    target_chars: int = 800,
+    lead_share: float = 0.1
+) -> Dict[str, Any]:
+    """
+    Seleciona os trechos de maior relevância que cabem em `budget_tokens`
+
+    O primeiro trecho (identificação do documento) entra se couber em
+    `lead_share` do orçamento; os demais entram por ordem de relevância e
+    são remontados na ordem original, separados por GAP_MARKER quando não
+    contíguos. Documentos que já cabem no orçamento voltam inteiros.
+
+    Returns:
+        {'text', 'tokens', 'total_tokens', 'selected': [índices],
+         'passages': int, 'strategy': 'full' | 'ranked'}
+    """
+    total_tokens = count_tokens(text, model)
+    if total_tokens <= budget_tokens:
+        return {
+            'text': text,
+            'tokens': total_tokens,
+            'total_tokens': total_tokens,
+            'selected': None,
+            'passages': None,
+            'strategy': 'full',
+        }
+
+    passages = split_passages(text, target_chars)
+    scores = PassageRanker(query if query is not None else compliance_query()).score(passages)
+    gap_tokens = count_tokens(GAP_MARKER, model)
+    costs = [count_tokens(p['text'], model) + gap_tokens for p in passages]
+
+    chosen: List[int] = []
+    used = 0
+    if passages and costs[0] <= budget_tokens * lead_share:
+        chosen.append(0)
+        used += costs[0]
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    for i in ranked:
+        if i in chosen or scores[i] <= 0:
+            continue
+        if used + costs[i] <= budget_tokens:
+            chosen.append(i)
+            used += costs[i]
+
+    selected = sorted(chosen)
+    selected_text = _assemble(text, passages, selected)
+    return {
+        'text': selected_text,
+        'tokens': count_tokens(selected_text, model),
+        'total_tokens': total_tokens,
+        'selected': selected,
+        'passages': len(passages),
+        'strategy': 'ranked',
+    }
+
+
+def _assemble(text: str, passages: List[Dict[str, Any]], selected: Iterable[int]) -> str:
+    parts: List[str] = []
+    previous: Optional[int] = None
+    for i in selected:
+        passage = passages[i]
+        if previous is None:
+            if i > 0:
+                parts.append(GAP_MARKER.lstrip())
+        elif i == previous + 1:
+            # Contíguos: preserva o separador original
+            parts.append(text[passages[previous]['end']:passage['start']])
+        else:
+            parts.append(GAP_MARKER)
+        parts.append(passage['text'])
+        previous = i
+    if previous is not None and previous < len(passages) - 1:
+        parts.append(GAP_MARKER.rstrip())
+    return "".join(parts)
@@ -0,0 +1,419 @@
+"""
+QIVO Intelligence Layer - Near-Duplicate Report Index
+Índice MinHash/LSH de relatórios já validados, para reaproveitar análises
+de revisões quase idênticas
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import zlib
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.ai.core.storage import data_path
+
+
+_WORD = re.compile(r"[^\W_]+")
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+|\n\s*\n")
+_EMPTY = 0xFFFFFFFF
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    signature BLOB NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- Um bucket por faixa da assinatura (o hash já inclui o número da faixa)
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    document INTEGER NOT NULL,
+    PRIMARY KEY (bucket, document)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS analyses (
+    doc_id TEXT PRIMARY KEY,
+    sentences BLOB NOT NULL,
+    result TEXT NOT NULL,
+    passages BLOB
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Forma canônica do texto: palavras em caixa baixa separadas por espaço"""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def document_id(text: str) -> str:
+    """Identificador por conteúdo (texto normalizado)"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Frases/parágrafos não vazios, na ordem do texto"""
+    return [s for s in _SENTENCE.split(text) if s and s.strip()]
+
+
+def sentence_hash(sentence: str) -> int:
+    digest = hashlib.blake2b(normalize_text(sentence).encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _hash64(value: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """
+    MinHash de uma permutação com densificação (one permutation hashing)
+
+    Cada shingle (n-grama de palavras) é hasheado uma única vez e cai num de
+    `num_perm` compartimentos, que guardam o menor valor visto; compartimentos
+    vazios copiam o valor de outro, escolhido de forma determinística. O custo
+    é O(shingles), e a fração de compartimentos iguais estima a similaridade
+    de Jaccard como no MinHash clássico com `num_perm` permutações.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def shingles(self, text: str) -> Iterable[bytes]:
+        words = normalize_text(text).split()
+        n = self.shingle_size
+        if len(words) < n:
+            if words:
+                yield " ".join(words).encode("utf-8")
+            return
+        for i in range(len(words) - n + 1):
+            yield " ".join(words[i:i + n]).encode("utf-8")
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        k = self.num_perm
+        bins = [_EMPTY] * k
+        for shingle in set(self.shingles(text)):
+            h = _hash64(shingle)
+            slot = h % k
+            value = (h >> 32) & 0xFFFFFFFF
+            if value < bins[slot]:
+                bins[slot] = value
+        return self._densify(bins)
+
+    def _densify(self, bins: List[int]) -> Tuple[int, ...]:
+        k = self.num_perm
+        if all(value == _EMPTY for value in bins):
+            return tuple(bins)
+        result = list(bins)
+        for i, value in enumerate(bins):
+            attempt = 1
+            while value == _EMPTY:
+                j = (i * 0x9E3779B1 + attempt * 0x85EBCA77) % k
+                value = bins[j]
+                attempt += 1
+            result[i] = value
+        return tuple(result)
+
+    @staticmethod
+    def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+        """Jaccard estimado entre duas assinaturas"""
+        if not a or len(a) != len(b):
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class ReportIndex:
+    """
+    Índice persistente (SQLite) de relatórios validados
+
+    - Assinatura MinHash por documento, dividida em `bands` faixas; cada
+      faixa vira um bucket de LSH (tabela sem rowid, chave bucket+documento).
+      Documentos com Jaccard acima de ~(1/bands)^(1/rows) colidem em ao
+      menos uma faixa com alta probabilidade
+    - A consulta lê só os buckets das faixas do documento e confirma os
+      candidatos pela similaridade estimada
+    - Para documentos com análise, guarda o resultado, os hashes das frases
+      e as frases comprimidas (para descobrir o que entrou e o que saiu numa
+      revisão)
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        threshold: float = 0.8
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.path = str(path) if path else ":memory:"
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Colunas acrescentadas depois da criação do arquivo"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+        if "passages" not in columns:
+            self._conn.execute("ALTER TABLE analyses ADD COLUMN passages BLOB")
+            self._conn.commit()
+
+    # --- Assinaturas ---
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        return self.hasher.signature(text)
+
+    def _buckets(self, signature: Sequence[int]) -> List[int]:
+        buckets = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f"<H{self.rows}I", band, *rows), digest_size=8).digest()
+            buckets.append(int.from_bytes(digest, "little", signed=True))
+        return buckets
+
+    # --- Escrita ---
+
+    def add(
+        self,
+        doc_id: str,
+        text: Optional[str] = None,
+        *,
+        signature: Optional[Sequence[int]] = None,
+        result: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, ...]:
+        """
+        Indexa um documento (texto ou assinatura já calculada)
+
+        Com `result`, guarda também a análise para reaproveitamento; nesse
+        caso o texto é obrigatório (hashes das frases).
+        """
+        if signature is None:
+            if text is None:
+                raise ValueError("Informe o texto ou a assinatura")
+            signature = self.signature(text)
+        signature = tuple(signature)
+        self.add_many([(doc_id, signature)])
+        if result is not None:
+            if text is None:
+                raise ValueError("O texto é obrigatório para guardar a análise")
+            sentences = split_sentences(text)
+            hashes = array("I", (sentence_hash(s) for s in sentences)).tobytes()
+            passages = zlib.compress(json.dumps([s.strip() for s in sentences], ensure_ascii=False).encode("utf-8"))
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analyses (doc_id, sentences, result, passages) VALUES (?, ?, ?, ?)",
+                    (doc_id, hashes, json.dumps(result, ensure_ascii=False), passages)
+                )
+                self._conn.commit()
+        return signature
+
+    def add_many(self, records: Iterable[Tuple[str, Sequence[int]]]) -> int:
+        """Indexa em lote pares (doc_id, assinatura); ignora ids já indexados"""
+        now = datetime.now(timezone.utc).isoformat()
+        added = 0
+        with self._lock:
+            for doc_id, signature in records:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO documents (doc_id, signature, created_at) VALUES (?, ?, ?)",
+                    (doc_id, array("I", signature).tobytes(), now)
+                )
+                if cursor.rowcount:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO buckets (bucket, document) VALUES (?, ?)",
+                        [(bucket, cursor.lastrowid) for bucket in self._buckets(signature)]
+                    )
+                    added += 1
+            self._conn.commit()
+        return added
+
+    # --- Consulta ---
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        *,
+        signature: Optional[Sequence[int]] = None,
+        threshold: Optional[float] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Documentos indexados com similaridade estimada >= threshold
+
+        Returns:
+            Lista de {'doc_id', 'similarity'}, da mais similar para a menos
+        """
+        if signature is None:
+            signature = self.signature(text or "")
+        threshold = self.threshold if threshold is None else threshold
+        buckets = self._buckets(signature)
+
+        with self._lock:
+            placeholders = ",".join("?" * len(buckets))
+            rows = self._conn.execute(
+                f"""
+                SELECT d.doc_id, d.signature FROM documents d
+                WHERE d.id IN (SELECT document FROM buckets WHERE bucket IN ({placeholders}))
+                """,
+                buckets
+            ).fetchall()
+        matches = []
+        for doc_id, stored in rows:
+            similarity = MinHasher.similarity(signature, array("I", stored))
+            if similarity >= threshold:
+                matches.append({'doc_id': doc_id, 'similarity': round(similarity, 4)})
+
+        matches.sort(key=lambda m: m['similarity'], reverse=True)
+        return matches[:limit]
+
+    def find_analysis(self, text: str, signature: Optional[Sequence[int]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Análise reaproveitável para o texto: mesmo documento ou o mais
+        similar acima do limiar que tenha análise guardada
+
+        Returns:
+            {'doc_id', 'similarity', 'exact', 'result', 'changed': [trechos
+            novos ou alterados], 'removed': [trechos da versão indexada que
+            saíram], 'changed_ratio'} ou None
+        """
+        doc_id = document_id(text)
+        exact = self._analysis(doc_id)
+        if exact is not None:
+            return {'doc_id': doc_id, 'similarity': 1.0, 'exact': True,
+                    'result': exact[1], 'changed': [], 'removed': [], 'changed_ratio': 0.0}
+
+        for match in self.query(signature=signature if signature is not None else self.signature(text)):
+            stored = self._analysis(match['doc_id'])
+            if stored is None:
+                continue
+            changed, removed, ratio = self._changed_sections(text, stored[0], stored[2])
+            return {**match, 'exact': False, 'result': stored[1],
+                    'changed': changed, 'removed': removed, 'changed_ratio': ratio}
+        return None
+
+    def _analysis(self, doc_id: str) -> Optional[Tuple[List[int], Dict[str, Any], Optional[List[str]]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sentences, result, passages FROM analyses WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        passages = json.loads(zlib.decompress(row[2]).decode("utf-8")) if row[2] else None
+        return list(array("I", row[0])), json.loads(row[1]), passages
+
+    @staticmethod
+    def _changed_sections(
+        text: str,
+        known: Sequence[int],
+        previous: Optional[List[str]] = None
+    ) -> Tuple[List[str], List[str], float]:
+        """
+        Trechos contíguos de frases novas no texto e de frases da versão
+        indexada (hashes `known`, frases `previous`) que não estão mais nele
+
+        Análises gravadas antes das frases serem guardadas não têm `previous`:
+        cada trecho removido vira um aviso com o número de frases e o
+        tamanho removido é estimado pelo tamanho médio das frases.
+
+        Returns:
+            (novos, removidos, fração alterada: caracteres novos e removidos
+            sobre o total das duas versões)
+        """
+        sentences = split_sentences(text)
+        known_set = set(known)
+        current_hashes = set()
+        sections: List[str] = []
+        current: List[str] = []
+        changed_chars = 0
+        for sentence in sentences:
+            h = sentence_hash(sentence)
+            current_hashes.add(h)
+            if h in known_set:
+                if current:
+                    sections.append(" ".join(current))
+                    current = []
+                continue
+            current.append(sentence.strip())
+            changed_chars += len(sentence)
+        if current:
+            sections.append(" ".join(current))
+        total = sum(len(s) for s in sentences)
+
+        removed: List[str] = []
+        run: List[int] = []
+        removed_chars = 0
+        average = total / len(sentences) if sentences else 0.0
+        for position, h in enumerate([*known, None]):
+            if h is not None and h not in current_hashes:
+                run.append(position)
+                continue
+            if run:
+                if previous is not None and len(previous) == len(known):
+                    passage = " ".join(previous[i] for i in run)
+                    removed_chars += len(passage)
+                else:
+                    passage = f"[{len(run)} frase(s) removida(s); texto da versão anterior não guardado]"
+                    removed_chars += int(average * len(run))
+                removed.append(passage)
+                run = []
+
+        total += removed_chars
+        return sections, removed, round((changed_chars + removed_chars) / total, 4) if total else 0.0
+
+    # --- Métricas ---
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            analyses = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        size = page_size * pages
+        return {
+            'documents': documents,
+            'analyses': analyses,
+            'bytes': size,
+            'bytes_per_document': round(size / documents, 1) if documents else 0.0,
+            'num_perm': self.hasher.num_perm,
+            'bands': self.bands,
+            'threshold': self.threshold,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_index: Optional[ReportIndex] = None
+
+
+def get_report_index() -> ReportIndex:
+    """
+    Índice de relatórios do processo (data/report_index.db)
+
+    Variáveis de ambiente:
+        QIVO_DEDUP_THRESHOLD: similaridade mínima para reaproveitar (padrão 0.8)
+    """
+    global _index
+    if _index is None:
+        _index = ReportIndex(
+            data_path("report_index.db"),
+            threshold=float(os.getenv("QIVO_DEDUP_THRESHOLD", "0.8")),
+        )
+    return _index
+
+
+def set_report_index(index: Optional[ReportIndex]) -> None:
+    """Substitui o índice do processo (testes; None recria o padrão)"""
+    global _index
+    _index = index
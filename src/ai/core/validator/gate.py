@@ -0,0 +1,269 @@
+"""
+QIVO Intelligence Layer - Validator Pre-scoring Gate
+Pré-avaliação local do documento extraído, antes da análise GPT
+
+O ComplianceScorer e verificações estruturais (norma citada, pessoa
+competente, classificação de recursos, quantidades, QA/QC, tamanho) rodam
+direto sobre o texto extraído dos documentos enviados a ValidatorAI.process
+(validate_text, que recebe trechos curtos, segue sempre para o GPT). Documentos claramente fora de escopo
+(pré-score abaixo de QIVO_VALIDATOR_GATE_LOW, padrão 20) ou claramente
+completos (a partir de QIVO_VALIDATOR_GATE_HIGH, padrão 90) recebem na hora
+um resultado provisório. Conforme QIVO_VALIDATOR_GATE:
+
+    async   a análise GPT roda em segundo plano e o resultado definitivo vai
+            para o índice de relatórios (padrão)
+    skip    sem análise GPT para os documentos decididos pelo gate
+    off     todo documento vai ao GPT
+
+A concordância do gate com o caminho GPT é contada em
+qivo_validator_gate_agreement (modo async) e medida offline num conjunto
+rotulado com o score do caminho GPT:
+
+    python -m src.ai.core.validator.gate rotulados.jsonl   # {"text", "gpt_score"} por linha
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Awaitable, Dict, List, Optional, Sequence, Set, Tuple
+
+from src.ai.core.telemetry import counter
+from src.ai.core.tracing import set_attribute
+from .scoring import ComplianceScorer
+
+
+GATE_MODES = ("async", "skip", "off")
+
+# Decisões: 'reject' (fora de escopo), 'accept' (claramente completo), 'gpt' (incerto)
+GATE_DECISIONS = counter(
+    "qivo_validator_gate_decisions",
+    "Documentos por decisão do gate de pré-avaliação local",
+    ("decision",)
+)
+GATE_AGREEMENT = counter(
+    "qivo_validator_gate_agreement",
+    "Decisões do gate conferidas com a análise GPT em segundo plano",
+    ("decision", "agreed")
+)
+
+# Verificações estruturais (o texto chega do preprocessor sem quebras de
+# linha nem '/', '%'); termos em português cobrem relatórios ANM e traduções,
+# e os russos, relatórios GKZ/PERC
+STRUCTURE_CHECKS: Dict[str, re.Pattern] = {
+    'standard': re.compile(r"\b(?:jorc|ni ?43-101|43-101|prms|samrec|perc|cim|anm|pae|cfem|gkz|гкз)\b"),
+    'responsible_person': re.compile(
+        r"\b(?:competent person|qualified person|pessoa competente|pessoa qualificada|responsável técnico)\b"
+    ),
+    'classification': re.compile(
+        r"\b(?:measured|indicated|inferred|proven|probable|medid[oa]s?|indicad[oa]s?|inferid[oa]s?|provad[oa]s?|prováve(?:l|is)|(?:category|categoria|категори\w*) (?:ab|c1|c2|p1)|запас\w*|ресурс\w*)\b"
+    ),
+    'quantities': re.compile(r"\d[\d.,]*\s*(?:mt|kt|t|toneladas|tonnes|tons?|g ?/? ?t|oz|ppm|млн т|тыс т)\b"),
+    'qa_qc': re.compile(
+        r"\b(?:qa ?/? ?qc|quality (?:assurance|control)|controle de qualidade|duplicat\w*|certified reference|assay)\b"
+    ),
+}
+
+
+def gpt_bucket(score: float, low: float = 40, high: float = 80) -> str:
+    """Decisão equivalente do caminho GPT: risco crítico, baixo ou intermediário"""
+    if score < low:
+        return 'reject'
+    if score >= high:
+        return 'accept'
+    return 'gpt'
+
+
+class PreScoringGate:
+    """
+    Pré-score local (0-100) e decisão de enviar ou não o documento ao GPT
+
+    Args:
+        scorer: ComplianceScorer aplicado ao texto do documento
+        low: pré-score abaixo do qual o documento é rejeitado sem GPT
+        high: pré-score a partir do qual o documento é aceito sem GPT
+        mode: 'async', 'skip' ou 'off'
+        min_words: tamanho mínimo de um relatório técnico
+    """
+
+    def __init__(
+        self,
+        scorer: Optional[ComplianceScorer] = None,
+        low: float = 20,
+        high: float = 90,
+        mode: str = "async",
+        min_words: int = 300
+    ):
+        if mode not in GATE_MODES:
+            raise ValueError(f"Modo do gate inválido: {mode}. Use {', '.join(GATE_MODES)}")
+        self.scorer = scorer or ComplianceScorer()
+        self.low = low
+        self.high = high
+        self.mode = mode
+        self.min_words = min_words
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def assess(self, text: str) -> Dict[str, Any]:
+        """
+        Pré-avaliação do documento
+
+        Returns:
+            Dict com pre_score, decision, keyword_score, structure (verificação
+            -> bool) e compliance (avaliação do scorer sobre o documento)
+        """
+        text_lower = text.lower()
+        compliance = self.scorer.evaluate(text)
+        structure = {name: bool(pattern.search(text_lower)) for name, pattern in STRUCTURE_CHECKS.items()}
+        structure['length'] = len(text.split()) >= self.min_words
+        structure_score = 100 * sum(structure.values()) / len(structure)
+        pre_score = round(0.5 * compliance['compliance_score'] + 0.5 * structure_score)
+
+        if pre_score < self.low:
+            decision = 'reject'
+        elif pre_score >= self.high:
+            decision = 'accept'
+        else:
+            decision = 'gpt'
+        return {
+            'pre_score': pre_score,
+            'decision': decision,
+            'keyword_score': compliance['compliance_score'],
+            'structure': structure,
+            'compliance': compliance,
+        }
+
+    def check(self, text: str) -> Dict[str, Any]:
+        """assess() contado em qivo_validator_gate_decisions e no span atual"""
+        assessment = self.assess(text)
+        GATE_DECISIONS.inc(decision=assessment['decision'])
+        set_attribute('validator.gate.decision', assessment['decision'])
+        set_attribute('validator.gate.pre_score', assessment['pre_score'])
+        return assessment
+
+    def provisional_compliance(self, assessment: Dict[str, Any]) -> Dict[str, Any]:
+        """Resultado de compliance provisório, no formato de ComplianceScorer.evaluate"""
+        compliance = dict(assessment['compliance'])
+        compliance['compliance_score'] = assessment['pre_score']
+        compliance['risk_level'] = self.scorer._determine_risk(assessment['pre_score']).value
+        missing = [name for name, ok in assessment['structure'].items() if not ok]
+        if assessment['decision'] == 'reject':
+            compliance['recommendations'] = [
+                "Documento sem conteúdo técnico JORC/NI 43-101/PRMS reconhecível; "
+                "verifique se o arquivo enviado é o relatório técnico"
+            ] + compliance['recommendations']
+        compliance['missing_structure'] = missing
+        return compliance
+
+    def summary(self, assessment: Dict[str, Any]) -> str:
+        """Texto curto da análise provisória"""
+        found = [name for name, ok in assessment['structure'].items() if ok]
+        verdict = {
+            'reject': "Documento sem indícios de relatório técnico de recursos minerais",
+            'accept': "Documento com todos os elementos estruturais de um relatório técnico",
+        }[assessment['decision']]
+        return (
+            f"[Pré-avaliação local - pré-score {assessment['pre_score']}/100] {verdict}. "
+            f"Elementos encontrados: {', '.join(found) if found else 'nenhum'}."
+        )
+
+    def record_agreement(self, assessment: Dict[str, Any], gpt_score: float) -> bool:
+        """Confere a decisão do gate com o score do caminho GPT"""
+        agreed = gpt_bucket(gpt_score) == assessment['decision']
+        GATE_AGREEMENT.inc(decision=assessment['decision'], agreed=str(agreed).lower())
+        return agreed
+
+    def evaluate(self, samples: Sequence[Tuple[str, float]]) -> Dict[str, Any]:
+        """
+        Concordância com o caminho GPT num conjunto rotulado (texto, score GPT)
+
+        Returns:
+            coverage (fração decidida sem GPT), agreement (acerto entre os
+            decididos), confusão decisão do gate -> decisão do caminho GPT
+        """
+        confusion: Dict[str, Counter] = {d: Counter() for d in ('reject', 'accept', 'gpt')}
+        for text, gpt_score in samples:
+            confusion[self.assess(text)['decision']][gpt_bucket(gpt_score)] += 1
+
+        gated = {d: confusion[d] for d in ('reject', 'accept')}
+        decided = sum(sum(c.values()) for c in gated.values())
+        agreed = sum(gated[d][d] for d in gated)
+        total = len(samples)
+        return {
+            'samples': total,
+            'coverage': round(decided / total, 4) if total else 0.0,
+            'agreement': round(agreed / decided, 4) if decided else None,
+            'by_decision': {
+                d: {'documents': sum(c.values()), 'agreement': round(c[d] / sum(c.values()), 4)}
+                for d, c in gated.items() if c
+            },
+            'confusion': {d: dict(c) for d, c in confusion.items() if c},
+            'thresholds': {'low': self.low, 'high': self.high},
+        }
+
+
+def get_gate() -> PreScoringGate:
+    """
+    Gate a partir do ambiente
+
+    Variáveis de ambiente:
+        QIVO_VALIDATOR_GATE: 'async' (padrão), 'skip' ou 'off'
+        QIVO_VALIDATOR_GATE_LOW: pré-score de rejeição sem GPT (padrão 20)
+        QIVO_VALIDATOR_GATE_HIGH: pré-score de aceite sem GPT (padrão 90)
+    """
+    return PreScoringGate(
+        low=float(os.getenv("QIVO_VALIDATOR_GATE_LOW", "20")),
+        high=float(os.getenv("QIVO_VALIDATOR_GATE_HIGH", "90")),
+        mode=os.getenv("QIVO_VALIDATOR_GATE", "async").strip().lower() or "async",
+    )
+
+
+# Análises GPT em segundo plano (referência forte até terminarem)
+_background: Set[asyncio.Task] = set()
+
+
+def schedule(coro: Awaitable[Any]) -> asyncio.Task:
+    """Agenda a análise definitiva de um documento decidido pelo gate"""
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def drain_background() -> None:
+    """Aguarda as análises em segundo plano (testes e desligamento)"""
+    while _background:
+        await asyncio.gather(*list(_background), return_exceptions=True)
+
+
+def load_labeled(path: str) -> List[Tuple[str, float]]:
+    """Lê exemplos rotulados de um JSONL com {"text", "gpt_score"} por linha"""
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                samples.append((item["text"], float(item["gpt_score"])))
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concordância do gate local com o caminho GPT")
+    parser.add_argument("path", help='JSONL com {"text", "gpt_score"} por linha')
+    parser.add_argument("--low", type=float, default=None)
+    parser.add_argument("--high", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    gate = get_gate()
+    gate.low = args.low if args.low is not None else gate.low
+    gate.high = args.high if args.high is not None else gate.high
+    print(json.dumps(gate.evaluate(load_labeled(args.path)), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
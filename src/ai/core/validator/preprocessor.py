@@ -7,9 +7,11 @@ import os
 import re
 from typing import Optional, Dict, Any
 from pathlib import Path
-import PyPDF2
-from docx import Document
-import aiofiles
+
+from src.ai.core.telemetry import stage
+
+# PyPDF2, python-docx e aiofiles são importados dentro dos extratores:
+# só quem processa um arquivo daquele formato paga o custo do import.
 
 
 class DocumentPreprocessor:
@@ -41,17 +43,19 @@ class DocumentPreprocessor:
             raise ValueError(f"Formato não suportado: {extension}")
         
         # Detectar tipo e extrair
-        if extension == '.pdf':
-            text = await self._extract_pdf(file_path)
-        elif extension in {'.docx', '.doc'}:
-            text = await self._extract_docx(file_path)
-        elif extension == '.txt':
-            text = await self._extract_txt(file_path)
-        else:
-            text = ""
+        with stage('validator', 'extract'):
+            if extension == '.pdf':
+                text = await self._extract_pdf(file_path)
+            elif extension in {'.docx', '.doc'}:
+                text = await self._extract_docx(file_path)
+            elif extension == '.txt':
+                text = await self._extract_txt(file_path)
+            else:
+                text = ""
         
         # Limpar e normalizar
-        cleaned_text = self._clean_text(text)
+        with stage('validator', 'clean'):
+            cleaned_text = self._clean_text(text)
         
         # Atualizar metadata
         self.metadata = {
@@ -66,6 +70,8 @@ class DocumentPreprocessor:
     
     async def _extract_pdf(self, file_path: str) -> str:
         """Extrai texto de PDF"""
+        import PyPDF2
+        
         text = []
         
         try:
@@ -83,6 +89,8 @@ class DocumentPreprocessor:
     
     async def _extract_docx(self, file_path: str) -> str:
         """Extrai texto de DOCX"""
+        from docx import Document
+        
         text = []
         
         try:
@@ -105,6 +113,8 @@ class DocumentPreprocessor:
     
     async def _extract_txt(self, file_path: str) -> str:
         """Extrai texto de TXT"""
+        import aiofiles
+        
         try:
             async with aiofiles.open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
                 text = await file.read()
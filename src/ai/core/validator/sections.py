@@ -0,0 +1,107 @@
+"""
+QIVO Intelligence Layer - Report Sections
+Divisão de relatórios em seções com impressão digital, para revalidar só o
+que mudou entre versões
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+from src.ai.core.bridge.chunking import is_heading
+
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+def section_fingerprint(text: str) -> str:
+    """Impressão digital do conteúdo (ignora caixa e espaçamento)"""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def split_sections(text: str, max_chars: int = 4000) -> List[Dict[str, Any]]:
+    """
+    Divide o relatório em seções pelos títulos (ver chunking.is_heading)
+
+    Seções acima de `max_chars` são subdivididas por parágrafos, para que
+    uma edição pequena numa seção longa não invalide a seção inteira.
+
+    Returns:
+        Lista de {'index', 'title', 'text', 'fingerprint'} na ordem do texto
+    """
+    blocks: List[Dict[str, Any]] = []
+    title: Optional[str] = None
+    lines: List[str] = []
+
+    def flush() -> None:
+        body = "\n".join(lines).strip()
+        if body:
+            blocks.append({'title': title, 'text': body})
+
+    for line in text.splitlines():
+        if is_heading(line):
+            flush()
+            title, lines = line.strip(), [line]
+        else:
+            lines.append(line)
+    flush()
+
+    sections: List[Dict[str, Any]] = []
+    for block in blocks:
+        for part in _split_long(block['text'], max_chars):
+            sections.append({
+                'index': len(sections),
+                'title': block['title'],
+                'text': part,
+                'fingerprint': section_fingerprint(part),
+            })
+    return sections
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    parts: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            parts.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def diff_sections(
+    sections: List[Dict[str, Any]],
+    previous: Optional[List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Compara as seções atuais com as da versão validada anterior
+
+    Args:
+        sections: Saída de split_sections
+        previous: Seções guardadas da versão anterior (com 'fingerprint' e
+            'analysis')
+
+    Returns:
+        {'cached': {fingerprint: análise}, 'changed': [seções sem análise
+         reaproveitável], 'removed': nº de seções anteriores que sumiram}
+    """
+    cached = {
+        s['fingerprint']: s['analysis']
+        for s in previous or []
+        if s.get('fingerprint') and s.get('analysis') and s.get('source') != 'local'
+    }
+    current = {s['fingerprint'] for s in sections}
+    return {
+        'cached': cached,
+        'changed': [s for s in sections if s['fingerprint'] not in cached],
+        'removed': sum(1 for fingerprint in cached if fingerprint not in current),
+    }
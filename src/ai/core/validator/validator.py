@@ -4,49 +4,118 @@ Análise de conformidade regulatória com OpenAI GPT
 """
 
 import os
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+from src.ai.core.llm import (
+    LLMUnavailable,
+    Priority,
+    PromptBudget,
+    delta_events,
+    get_llm_client,
+    count_tokens,
+    get_model,
+    ledger_context,
+    llm_priority,
+    stream_chat_completion,
+    track_usage,
+)
+from src.ai.core.llm.prompts import PromptPrefix, register_prefix
+from src.ai.core.llm.routing import routed_completion, track_routes
+from src.ai.core.telemetry import cache_lookup, stage, track_stages
+from .context import select_context
+from .dedup import document_id, get_report_index
+from .gate import get_gate, schedule
 from .preprocessor import DocumentPreprocessor
 from .scoring import ComplianceScorer
 
 
+# Prompt de sistema das análises (documento novo e revisão), sem nada do
+# documento. Fica abaixo do mínimo do cache de prompt do provedor (ver
+# src.ai.core.llm.prompts): aumentá-lo mudaria a análise e, com ela, a
+# pontuação do ComplianceScorer, que conta termos na resposta
+SYSTEM_PROMPT = """Você é um especialista em conformidade regulatória de mineração.
+Analise o documento técnico fornecido e avalie sua conformidade com os seguintes códigos:
+
+- JORC Code (Joint Ore Reserves Committee)
+- NI 43-101 (Canadian National Instrument)
+- PRMS (Petroleum Resources Management System)
+
+Identifique:
+1. Padrões regulatórios mencionados
+2. Classificações de recursos/reservas
+3. Procedimentos de QA/QC descritos
+4. Qualificação de pessoas competentes
+5. Gaps de conformidade
+
+Seja objetivo e técnico."""
+
+ANALYSIS_PREFIX = register_prefix(PromptPrefix('validator.analyze', 3, SYSTEM_PROMPT))
+
+
 class ValidatorAI:
     """
     Validador de conformidade regulatória para documentos técnicos de mineração
     Suporta: JORC, NI 43-101, PRMS
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client: Optional[Any] = None):
         """
         Inicializa Validator AI
         
         Args:
             api_key: OpenAI API key (usa variável de ambiente se não fornecida)
+            client: cliente compatível com AsyncOpenAI (padrão: cliente
+                compartilhado do processo, ver src.ai.core.llm)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY não configurada")
+        if client is None:
+            # Sem API key, só há cliente injetado ou de replay (QIVO_LLM_REPLAY)
+            client = get_llm_client(self.api_key)
+            if client is None:
+                raise ValueError("OPENAI_API_KEY não configurada")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = client
         self.preprocessor = DocumentPreprocessor()
         self.scorer = ComplianceScorer()
+        # Pré-avaliação local: documentos claramente decididos não esperam o GPT
+        self.gate = get_gate()
         
-        # Configurações do modelo
-        self.model = "gpt-4o"  # Ou gpt-4-turbo se disponível
+        # Configurações do modelo (sobrescrevível por QIVO_MODEL_VALIDATOR_ANALYZE)
+        self.model = get_model('validator.analyze', "gpt-4o")  # Ou gpt-4-turbo se disponível
         self.max_tokens = 2000
         self.temperature = 0.3  # Baixa para respostas mais consistentes
+        # Orçamento de tokens do documento no prompt (ver context.select_context)
+        self.context_tokens = int(os.getenv('QIVO_VALIDATOR_CONTEXT_TOKENS', '3000'))
+        # Revisões com até esta fração do texto alterada reaproveitam a análise anterior
+        self.revision_max_change = float(os.getenv('QIVO_VALIDATOR_REVISION_MAX_CHANGE', '0.3'))
+        # Análise do modelo barato mais curta que isto escala para self.model
+        self.min_cheap_analysis_chars = int(os.getenv('QIVO_VALIDATOR_MIN_CHEAP_CHARS', '300'))
     
-    async def process(self, file_path: str) -> Dict[str, Any]:
+    async def process(self, file_path: str, reuse: bool = True) -> Dict[str, Any]:
         """
         Processa documento completo: extração → análise → scoring
         
+        Relatórios já validados (mesmo texto) devolvem a análise anterior;
+        revisões quase idênticas (ver dedup.ReportIndex) mandam ao GPT só a
+        análise anterior e os trechos alterados.
+        
         Args:
             file_path: Caminho do arquivo a analisar
+            reuse: Se False, ignora o índice de relatórios e reanalisa tudo
             
         Returns:
-            Dict com análise completa
+            Dict com análise completa; `reused` indica o relatório de origem
+            quando a análise foi reaproveitada e `timings` traz a duração de
+            cada etapa (extract, clean, dedup, gate, llm, scoring, index) em
+            segundos. Documentos decididos pelo gate local (ver gate.py) vêm
+            com `provisional` e `gate`, sem esperar o GPT.
         """
+        with track_stages('validator') as timings:
+            result = await self._process(file_path, reuse)
+        result['timings'] = timings
+        return result
+    
+    async def _process(self, file_path: str, reuse: bool) -> Dict[str, Any]:
         try:
             # 1. Preprocessar documento
             text = await self.preprocessor.preprocess_text(file_path)
@@ -59,13 +128,48 @@ class ValidatorAI:
                     'metadata': metadata
                 }
             
-            # 2. Analisar com GPT
-            analysis = await self._analyze_with_gpt(text)
+            # 2. Relatório já validado ou revisão de um deles
+            index = get_report_index() if reuse else None
+            with stage('validator', 'dedup'):
+                prior = index.find_analysis(text) if index else None
+            if index is not None:
+                cache_lookup(
+                    'report_index',
+                    'miss' if prior is None else ('exact_hit' if prior['exact'] else 'near_hit')
+                )
+            if prior is not None and prior['exact']:
+                return {
+                    'status': 'success',
+                    'metadata': metadata,
+                    **prior['result'],
+                    'reused': self._reuse_info(prior),
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'calls': 0},
+                    'timestamp': self._get_timestamp()
+                }
+            if prior is not None and prior['changed_ratio'] > self.revision_max_change:
+                prior = None
+            
+            # 3. Pré-avaliação local de documentos novos
+            if prior is None and self.gate.enabled:
+                with stage('validator', 'gate'):
+                    assessment = self.gate.check(text)
+                if assessment['decision'] != 'gpt':
+                    return {'metadata': metadata, **self._gated_result(text, assessment, index)}
             
-            # 3. Calcular compliance score
-            scoring_result = self.scorer.evaluate(analysis)
+            # 4. Analisar com GPT (ou fallback local se a IA estiver indisponível)
+            with track_usage() as usage, track_routes() as routes, stage('validator', 'llm'):
+                if prior is not None:
+                    analysis, degraded = await self._run_revision(
+                        prior['result']['analysis']['full_text'], prior['changed'], prior['removed']
+                    )
+                else:
+                    analysis, degraded = await self._run_analysis(text)
             
-            # 4. Compilar resultado
+            # 5. Calcular compliance score
+            with stage('validator', 'scoring'):
+                scoring_result = self.scorer.evaluate(analysis)
+            
+            # 6. Compilar resultado
             result = {
                 'status': 'success',
                 'metadata': metadata,
@@ -74,8 +178,21 @@ class ValidatorAI:
                     'full_text': analysis
                 },
                 'compliance': scoring_result,
+                'usage': usage.as_dict(),
                 'timestamp': self._get_timestamp()
             }
+            if routes:
+                result['route'] = routes[-1]
+            if prior is not None:
+                result['reused'] = self._reuse_info(prior)
+            if degraded:
+                result['degraded'] = True
+            elif index is not None:
+                with stage('validator', 'index'):
+                    index.add(document_id(text), text, result={
+                        'analysis': result['analysis'],
+                        'compliance': result['compliance']
+                    })
             
             return result
         
@@ -86,57 +203,256 @@ class ValidatorAI:
                 'timestamp': self._get_timestamp()
             }
     
-    async def _analyze_with_gpt(self, text: str) -> str:
+    def _gated_result(self, text: str, assessment: Dict[str, Any], index: Any = None) -> Dict[str, Any]:
+        """
+        Resultado provisório de um documento decidido pelo gate; no modo
+        async, agenda a análise GPT definitiva em segundo plano
+        """
+        background = self.gate.mode == 'async'
+        if background:
+            schedule(self._complete_gated(text, assessment, index))
+        summary = self.gate.summary(assessment)
+        return {
+            'status': 'success',
+            'analysis': {'summary': summary, 'full_text': summary},
+            'compliance': self.gate.provisional_compliance(assessment),
+            'provisional': True,
+            'gate': {
+                'decision': assessment['decision'],
+                'pre_score': assessment['pre_score'],
+                'keyword_score': assessment['keyword_score'],
+                'structure': assessment['structure'],
+                'gpt_analysis': 'scheduled' if background else 'skipped'
+            },
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'calls': 0},
+            'timestamp': self._get_timestamp()
+        }
+    
+    async def _complete_gated(self, text: str, assessment: Dict[str, Any], index: Any = None) -> None:
+        """
+        Análise GPT de um documento decidido pelo gate: confere a decisão
+        (qivo_validator_gate_agreement) e grava o resultado definitivo no
+        índice, que atende os reenvios do mesmo documento
+        """
+        with track_stages('validator.gate_followup'), track_usage(), track_routes(), \
+                llm_priority(Priority.BATCH), ledger_context(job='validator.gate_followup'):
+            try:
+                analysis, degraded = await self._run_analysis(text)
+            except Exception:
+                return
+        if degraded:
+            return
+        compliance = self.scorer.evaluate(analysis)
+        self.gate.record_agreement(assessment, compliance['compliance_score'])
+        if index is not None:
+            index.add(document_id(text), text, result={
+                'analysis': {
+                    'summary': analysis[:500] + '...' if len(analysis) > 500 else analysis,
+                    'full_text': analysis
+                },
+                'compliance': compliance
+            })
+    
+    async def _run_analysis(
+        self,
+        text: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Tuple[str, bool]:
+        """
+        Executa a análise GPT; se os modelos estiverem indisponíveis (retries
+        esgotados ou circuit breaker aberto), usa a análise local
+
+        Returns:
+            (análise, degraded)
+        """
+        try:
+            return await self._analyze_with_gpt(text, on_delta), False
+        except LLMUnavailable:
+            analysis = self._analyze_locally(text)
+            if on_delta is not None:
+                on_delta(analysis)
+            return analysis, True
+    
+    async def _run_revision(
+        self,
+        prior_analysis: str,
+        changes: List[str],
+        removed: Optional[List[str]] = None
+    ) -> Tuple[str, bool]:
+        """
+        Atualiza a análise de uma versão anterior com os trechos novos e os
+        removidos; sem nenhum dos dois, ou com a IA indisponível, mantém a
+        anterior
+        
+        Returns:
+            (análise, degraded)
+        """
+        if not changes and not removed:
+            return prior_analysis, False
+        try:
+            return await self._revise_with_gpt(prior_analysis, changes, removed or []), False
+        except LLMUnavailable:
+            return prior_analysis, True
+    
+    async def _revise_with_gpt(self, prior_analysis: str, changes: List[str], removed: List[str]) -> str:
+        """
+        Análise de uma revisão: análise anterior + só os trechos novos/alterados
+        e os removidos (uma divulgação obrigatória retirada muda a análise)
+        """
+        def build_messages(changed: str, dropped: str):
+            user_prompt = f"""Este documento é uma revisão de um relatório já analisado.
+
+ANÁLISE DA VERSÃO ANTERIOR:
+{prior_analysis}
+
+TRECHOS NOVOS OU ALTERADOS NESTA REVISÃO:
+{changed or '(nenhum)'}
+
+TRECHOS REMOVIDOS NESTA REVISÃO (não constam mais do documento):
+{dropped or '(nenhum)'}
+
+Reescreva a análise completa de conformidade com JORC, NI 43-101 e PRMS, mantendo o que não foi afetado pelas alterações e tratando como ausente o que foi removido."""
+            return ANALYSIS_PREFIX.messages(user_prompt)
+        
+        budget = PromptBudget(self.model, self.max_tokens)
+        available = min(self.context_tokens, budget.available(build_messages('', '')))
+        # Os trechos removidos costumam ser curtos; ficam com até metade do espaço
+        dropped = select_context("\n\n".join(removed), available // 2, self.model)['text'] if removed else ''
+        remaining = available - count_tokens(dropped, self.model)
+        changed = select_context("\n\n".join(changes), remaining, self.model)['text'] if changes else ''
+        messages = build_messages(changed, dropped)
+        
+        try:
+            response, _ = await routed_completion(
+                self.client,
+                site='validator.revision',
+                model=self.model,
+                messages=messages,
+                accept=self._check_cheap_analysis,
+                max_tokens=budget.completion_tokens(messages),
+                temperature=self.temperature
+            )
+            return response.choices[0].message.content or prior_analysis
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            raise ValueError(f"Erro na análise GPT: {str(e)}")
+    
+    @staticmethod
+    def _reuse_info(prior: Dict[str, Any]) -> Dict[str, Any]:
+        """Origem da análise reaproveitada"""
+        return {
+            'doc_id': prior['doc_id'],
+            'match': 'exact' if prior['exact'] else 'revision',
+            'similarity': prior['similarity'],
+            'changed_sections': len(prior['changed']),
+            'removed_sections': len(prior['removed']),
+            'changed_ratio': prior['changed_ratio']
+        }
+    
+    def _analyze_locally(self, text: str) -> str:
+        """
+        Análise determinística por palavras-chave, sem LLM
+        
+        Lista as referências encontradas no documento para cada categoria do
+        ComplianceScorer, que pontua o resultado como faria com a análise GPT.
+        """
+        text_lower = text.lower()
+        lines = ["[Análise local - modelo de IA indisponível no momento]", ""]
+        for label, keywords in self._keyword_categories():
+            found = [kw for kw in keywords if kw in text_lower]
+            lines.append(f"- {label}: {', '.join(found) if found else 'sem referências no texto'}")
+        lines.append("")
+        lines.append("Resultado preliminar baseado em palavras-chave; reenvie para análise completa.")
+        
+        return "\n".join(lines)
+    
+    def _keyword_categories(self) -> List[Tuple[str, List[str]]]:
+        """Categorias de palavras-chave do ComplianceScorer"""
+        return [
+            ('JORC', self.scorer.JORC_KEYWORDS),
+            ('NI 43-101', self.scorer.NI_43_101_KEYWORDS),
+            ('PRMS', self.scorer.PRMS_KEYWORDS),
+            ('QA/QC', self.scorer.QA_QC_KEYWORDS),
+            ('Conformidade', self.scorer.COMPLIANCE_KEYWORDS)
+        ]
+    
+    def _local_confidence(self, text: str) -> float:
+        """Fração das categorias do scorer com referências no texto (0-1)"""
+        text_lower = text.lower()
+        categories = self._keyword_categories()
+        found = sum(1 for _, keywords in categories if any(kw in text_lower for kw in keywords))
+        return found / len(categories)
+    
+    def _check_cheap_analysis(self, response: Any) -> Optional[str]:
+        """Validação da análise do modelo barato; motivo da escalada ou None"""
+        analysis = (response.choices[0].message.content or '').strip()
+        if len(analysis) < self.min_cheap_analysis_chars:
+            return 'short_analysis'
+        compact = analysis.lower().replace(' ', '')
+        if any(framework not in compact for framework in ('jorc', 'ni43-101', 'prms')):
+            return 'missing_frameworks'
+        return None
+    
+    async def _analyze_with_gpt(
+        self,
+        text: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Analisa texto com GPT-4 para compliance
         
         Args:
             text: Texto preprocessado
+            on_delta: Se fornecido, a resposta vem em streaming e cada trecho
+                é entregue à medida que é gerado
             
         Returns:
             Análise textual do GPT
         """
-        # Limitar texto para não exceder token limit
-        max_chars = 12000  # ~3000 tokens
-        if len(text) > max_chars:
-            text = text[:max_chars] + "\n\n[... documento truncado ...]"
-        
-        system_prompt = """Você é um especialista em conformidade regulatória de mineração.
-Analise o documento técnico fornecido e avalie sua conformidade com os seguintes códigos:
+        def build_messages(document: str):
+            user_prompt = f"""Analise este documento técnico de mineração para conformidade regulatória:
 
-- JORC Code (Joint Ore Reserves Committee)
-- NI 43-101 (Canadian National Instrument)
-- PRMS (Petroleum Resources Management System)
-
-Identifique:
-1. Padrões regulatórios mencionados
-2. Classificações de recursos/reservas
-3. Procedimentos de QA/QC descritos
-4. Qualificação de pessoas competentes
-5. Gaps de conformidade
-
-Seja objetivo e técnico."""
-
-        user_prompt = f"""Analise este documento técnico de mineração para conformidade regulatória:
-
-{text}
+{document}
 
 Forneça uma análise detalhada focando em conformidade com JORC, NI 43-101 e PRMS."""
+            return ANALYSIS_PREFIX.messages(user_prompt)
+        
+        # Documentos acima do orçamento: envia os trechos mais relevantes
+        # para compliance em vez do início do documento
+        budget = PromptBudget(self.model, self.max_tokens)
+        available = min(self.context_tokens, budget.available(build_messages('')))
+        messages = build_messages(select_context(text, available, self.model)['text'])
+        
+        params = dict(
+            site='validator.analyze',
+            model=self.model,
+            messages=messages,
+            max_tokens=budget.completion_tokens(messages),
+            temperature=self.temperature
+        )
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            if on_delta is not None:
+                parts = []
+                async for delta in stream_chat_completion(self.client, **params):
+                    parts.append(delta)
+                    on_delta(delta)
+                return ''.join(parts) or "Análise não gerada"
+            
+            # Modelo barato primeiro; escala se a análise vier incompleta
+            response, _ = await routed_completion(
+                self.client,
+                accept=self._check_cheap_analysis,
+                local_confidence=self._local_confidence(text),
+                **params
             )
             
             analysis = response.choices[0].message.content
             return analysis or "Análise não gerada"
         
+        except LLMUnavailable:
+            raise
         except Exception as e:
             raise ValueError(f"Erro na análise GPT: {str(e)}")
     
@@ -145,29 +461,53 @@ Forneça uma análise detalhada focando em conformidade com JORC, NI 43-101 e PR
         from datetime import datetime, timezone
         return datetime.now(timezone.utc).isoformat()
     
-    async def validate_text(self, text: str) -> Dict[str, Any]:
+    async def validate_text(
+        self,
+        text: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Valida texto diretamente (sem arquivo)
         
         Args:
             text: Texto a analisar
+            on_delta: Recebe os trechos da análise durante a geração
             
         Returns:
-            Dict com análise
+            Dict com análise e `timings` (segundos por etapa)
         """
+        with track_stages('validator') as timings:
+            result = await self._validate_text(text, on_delta)
+        result['timings'] = timings
+        return result
+    
+    async def _validate_text(
+        self,
+        text: str,
+        on_delta: Optional[Callable[[str], None]]
+    ) -> Dict[str, Any]:
         try:
-            analysis = await self._analyze_with_gpt(text)
-            scoring_result = self.scorer.evaluate(analysis)
+            with track_usage() as usage, track_routes() as routes, stage('validator', 'llm'):
+                analysis, degraded = await self._run_analysis(text, on_delta)
+            with stage('validator', 'scoring'):
+                scoring_result = self.scorer.evaluate(analysis)
             
-            return {
+            result = {
                 'status': 'success',
                 'analysis': {
                     'summary': analysis[:500] + '...' if len(analysis) > 500 else analysis,
                     'full_text': analysis
                 },
                 'compliance': scoring_result,
+                'usage': usage.as_dict(),
                 'timestamp': self._get_timestamp()
             }
+            if routes:
+                result['route'] = routes[-1]
+            if degraded:
+                result['degraded'] = True
+            
+            return result
         
         except Exception as e:
             return {
@@ -175,3 +515,14 @@ Forneça uma análise detalhada focando em conformidade com JORC, NI 43-101 e PR
                 'message': str(e),
                 'timestamp': self._get_timestamp()
             }
+    
+    async def validate_text_stream(self, text: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão em streaming de validate_text
+        
+        Produz {'event': 'delta', 'text': ...} com a análise à medida que o
+        GPT a gera e, ao final, {'event': 'result', ...} com o score de
+        compliance (mesmo dicionário de validate_text).
+        """
+        async for event in delta_events(lambda on_delta: self.validate_text(text, on_delta)):
+            yield event
@@ -3,14 +3,16 @@ QIVO Intelligence Layer - API Routes
 Endpoints para análise de documentos com AI
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 import os
 import tempfile
 from pathlib import Path
 
+from src.ai.core.llm import STREAM_MEDIA_TYPES, encode_event
+from src.ai.core.telemetry import stage
 from src.ai.core.validator import ValidatorAI
 
 router = APIRouter(prefix="/ai", tags=["AI Intelligence"])
@@ -40,13 +42,16 @@ class AnalysisResponse(BaseModel):
     metadata: Optional[dict] = None
     analysis: Optional[dict] = None
     compliance: Optional[dict] = None
+    degraded: Optional[bool] = None
+    usage: Optional[dict] = None
+    reused: Optional[dict] = None
+    timings: Optional[dict] = None
     timestamp: str
 
 
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_document(
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None
+    file: UploadFile = File(...)
 ):
     """
     Analisa documento técnico para conformidade regulatória
@@ -70,22 +75,17 @@ async def analyze_document(
             )
         
         # Salvar temporariamente
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        with stage('validator', 'upload'):
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
+                content = await file.read()
+                tmp_file.write(content)
+                tmp_path = tmp_file.name
         
         try:
             # Processar com Validator AI
             ai = get_validator()
             result = await ai.process(tmp_path)
-            
-            # Agendar cleanup do arquivo temporário
-            if background_tasks:
-                background_tasks.add_task(os.unlink, tmp_path)
-            else:
-                os.unlink(tmp_path)
-            
+
             return JSONResponse(
                 status_code=200 if result['status'] == 'success' else 500,
                 content=result
@@ -103,13 +103,20 @@ async def analyze_document(
 
 
 @router.post("/analyze/text", response_model=AnalysisResponse)
-async def analyze_text(request: TextAnalysisRequest):
+async def analyze_text(
+    request: TextAnalysisRequest,
+    stream: Optional[Literal['sse', 'ndjson']] = None
+):
     """
     Analisa texto direto (sem upload de arquivo)
     
     Body:
     - text: texto a analisar
     - document_type: tipo do documento (opcional)
+    
+    Query:
+    - stream: 'sse' ou 'ndjson' para receber a análise à medida que é gerada
+      (eventos "delta"; o evento final "result" traz o score de compliance)
     """
     try:
         if not request.text or len(request.text) < 100:
@@ -119,6 +126,14 @@ async def analyze_text(request: TextAnalysisRequest):
             )
         
         ai = get_validator()
+        
+        if stream:
+            events = ai.validate_text_stream(request.text)
+            return StreamingResponse(
+                (encode_event(event, stream) async for event in events),
+                media_type=STREAM_MEDIA_TYPES[stream]
+            )
+        
         result = await ai.validate_text(request.text)
         
         return JSONResponse(
@@ -136,6 +151,8 @@ async def analyze_text(request: TextAnalysisRequest):
 async def health_check():
     """Health check do módulo AI"""
     try:
+        # Não instancia o ValidatorAI: health check não deve carregar o cliente OpenAI
+        from datetime import datetime, timezone
         api_key = os.getenv('OPENAI_API_KEY')
         
         return {
@@ -143,7 +160,7 @@ async def health_check():
             'module': 'QIVO Intelligence Layer',
             'validator': 'active',
             'openai_configured': bool(api_key),
-            'timestamp': ValidatorAI()._get_timestamp() if api_key else None
+            'timestamp': datetime.now(timezone.utc).isoformat() if api_key else None
         }
     except Exception as e:
         return {
@@ -152,6 +169,25 @@ async def health_check():
         }
 
 
+@router.get("/llm/status")
+async def llm_status():
+    """
+    Estado da camada de chamadas LLM
+    
+    Retorna fila, vagas e orçamento RPM/TPM do governor, além do tempo de
+    espera por classe de prioridade (interactive/batch), e o estado dos
+    circuit breakers, latências e taxa de vitória dos hedges por modelo.
+    """
+    from datetime import datetime, timezone
+    from src.ai.core.llm import get_governor, get_resilience
+    
+    return {
+        'governor': get_governor().stats(),
+        'resilience': get_resilience().stats(),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+
 @router.get("/capabilities")
 async def get_capabilities():
     """Retorna capacidades do módulo AI"""
@@ -180,6 +216,7 @@ async def get_capabilities():
             '/ai/analyze': 'POST - Analisa arquivo',
             '/ai/analyze/text': 'POST - Analisa texto direto',
             '/ai/health': 'GET - Status do sistema',
+            '/ai/llm/status': 'GET - Fila, limites e circuit breakers das chamadas LLM',
             '/ai/capabilities': 'GET - Capacidades disponíveis'
         }
     }
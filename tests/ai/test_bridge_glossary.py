@@ -0,0 +1,167 @@
+"""
+Testes do glossário terminológico do Bridge AI (fast path determinístico)
+"""
+
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.engine import TRANSLATE_PREFIX
+from src.ai.core.bridge.glossary import TerminologyGraph, get_glossary
+
+
+def fake_client(payload):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=json.dumps(payload)))]
+    response.usage = None
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+class TestTerminologyGraph:
+
+    def test_covers_norm_metadata_keywords(self):
+        glossary = get_glossary()
+        for norm, meta in BridgeAI.NORMS_METADATA.items():
+            for keyword in meta['keywords']:
+                assert glossary.concept_of(keyword, norm), f"{norm}: {keyword}"
+
+    def test_translates_terminology(self):
+        result = get_glossary().translate(
+            "recursos medidos e pessoa qualificada", "ANM", "JORC"
+        )
+        assert result['semantic_mapping'] == {
+            'recursos medidos': 'Measured Mineral Resources',
+            'pessoa qualificada': 'Competent Person'
+        }
+        assert result['coverage'] == 1.0
+
+    def test_terms_only_segment_is_complete(self):
+        result = get_glossary().translate(
+            "Measured Mineral Resources: 12 Mt @ 2.1 g/t Au; Competent Person",
+            "JORC", "NI43-101"
+        )
+        assert result['complete'] is True
+        assert result['translated_text'] == (
+            "Measured Mineral Resource: 12 Mt @ 2.1 g/t Au; Qualified Person"
+        )
+
+    def test_same_language_prose_is_not_complete(self):
+        result = get_glossary().translate(
+            "Measured Mineral Resources of 12 Mt, reported by the Competent Person.",
+            "JORC", "NI43-101"
+        )
+        assert result['complete'] is False
+        assert result['residual_words'] == ['of', 'reported', 'by', 'the']
+
+    def test_bare_qualifier_is_not_a_term(self):
+        glossary = get_glossary()
+        result = glossary.translate("The measured density was 2.7 t/m3.", "JORC", "NI43-101")
+
+        assert result['translated_text'] == "The measured density was 2.7 t/m3."
+        assert result['semantic_mapping'] == {}
+        assert result['complete'] is False
+        # Continua identificando o conceito (NORMS_METADATA)
+        assert glossary.concept_of('measured', 'JORC') == 'measured_resource'
+
+    def test_keeps_source_capitalisation(self):
+        glossary = get_glossary()
+
+        assert glossary.translate("competent person", "JORC", "NI43-101")['translated_text'] == "qualified person"
+        assert glossary.translate("COMPETENT PERSON", "JORC", "NI43-101")['translated_text'] == "QUALIFIED PERSON"
+        assert glossary.translate("Jazida", "ANM", "JORC")['translated_text'] == "Deposit"
+
+    def test_untranslated_words_prevent_fast_path(self):
+        result = get_glossary().translate(
+            "A jazida apresenta recursos medidos de 10Mt", "ANM", "JORC"
+        )
+        assert result['complete'] is False
+        assert result['residual_words'] == ['A', 'apresenta', 'de']
+        assert result['semantic_mapping']['jazida'] == 'deposit'
+
+    def test_longest_term_wins(self):
+        result = get_glossary().translate("Indicated Mineral Resources", "SAMREC", "ANM")
+        assert result['translated_text'] == "recursos indicados"
+
+    def test_broader_concept_is_approximate(self):
+        result = get_glossary().translate("RAL; CFEM", "ANM", "JORC")
+        assert result['approximate_mapping'] == {'RAL': 'Public Report'}
+        assert result['complete'] is False
+        assert result['coverage'] == 0.5
+
+    def test_ambiguous_term_rejected(self):
+        with pytest.raises(ValueError):
+            TerminologyGraph({
+                'a': {'terms': {'JORC': ['deposit']}},
+                'b': {'terms': {'JORC': ['Deposit']}}
+            })
+
+
+@pytest.mark.asyncio
+class TestBridgeFastPath:
+
+    async def test_complete_coverage_skips_gpt(self):
+        client = fake_client({})
+        bridge = BridgeAI(client=client)
+
+        result = await bridge.translate_normative(
+            text="Proved Ore Reserves; Probable Ore Reserves; Competent Person",
+            source_norm="JORC",
+            target_norm="SAMREC",
+            explain=True
+        )
+
+        assert result['status'] == 'success'
+        assert result['method'] == 'glossary'
+        assert result['translated_text'] == (
+            "Proved Mineral Reserves; Probable Mineral Reserves; Competent Person"
+        )
+        assert result['semantic_mapping']['Proved Ore Reserves'] == 'Proved Mineral Reserves'
+        client.chat.completions.create.assert_not_awaited()
+
+    async def test_english_prose_goes_to_gpt(self):
+        client = fake_client({
+            'translated_text': 'The measured density of the core samples was 2.7 t/m3.',
+            'confidence': 90,
+            'semantic_mapping': {}
+        })
+        bridge = BridgeAI(client=client)
+
+        result = await bridge.translate_normative(
+            text="The measured density of the core samples was 2.7 t/m3.",
+            source_norm="JORC",
+            target_norm="NI43-101"
+        )
+
+        assert result['method'] == 'gpt'
+        assert result['translated_text'] == "The measured density of the core samples was 2.7 t/m3."
+        client.chat.completions.create.assert_awaited_once()
+
+    async def test_partial_coverage_sends_hints(self):
+        client = fake_client({
+            'translated_text': 'The deposit has Measured Mineral Resources of 10 Mt',
+            'confidence': 90,
+            'semantic_mapping': {'apresenta': 'has'}
+        })
+        bridge = BridgeAI(client=client)
+
+        result = await bridge.translate_normative(
+            text="A jazida apresenta recursos medidos de 10Mt",
+            source_norm="ANM",
+            target_norm="JORC",
+            explain=True
+        )
+
+        assert result['method'] == 'gpt'
+        assert result['semantic_mapping'] == {
+            'jazida': 'deposit',
+            'recursos medidos': 'Measured Mineral Resources',
+            'apresenta': 'has'
+        }
+        system_prompt, user_prompt = [m['content'] for m in client.chat.completions.create.call_args.kwargs['messages']]
+        assert '"recursos medidos" → "Measured Mineral Resources"' in user_prompt
+        # Equivalências da requisição ficam fora do prefixo estático (cache de prompt)
+        assert system_prompt == TRANSLATE_PREFIX.text
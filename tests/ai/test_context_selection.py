@@ -0,0 +1,167 @@
+"""
+Testes e benchmark da seleção de contexto do Validator AI
+
+O benchmark compara, no mesmo orçamento de tokens, o corte pelo início do
+documento (comportamento anterior) com a seleção por relevância: quanto das
+evidências de conformidade chega ao prompt e quantos tokens cada estratégia
+precisa para cobrir todas elas.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.llm import count_tokens
+from src.ai.core.validator import ComplianceScorer, ValidatorAI, select_context
+from src.ai.core.validator.context import GAP_MARKER, PassageRanker, compliance_query, split_passages
+
+
+# Trechos que um revisor de conformidade precisa ver
+EVIDENCE = [
+    "The Mineral Resource is classified as Measured, Indicated and Inferred in accordance with the JORC Code 2012.",
+    "QA/QC included certified reference material (CRM), blanks and field duplicates inserted every 20 samples; assay results were audited.",
+    "The Competent Person, a member of the AusIMM, consents to the inclusion of this Mineral Resource statement.",
+    "Ore Reserve estimates comprise Proven and Probable categories derived from the Measured and Indicated resources.",
+    "Sampling followed the company guideline; check sample programs met the quality control requirement.",
+]
+
+FILLER = (
+    "The project area lies in a region of gentle hills with seasonal rainfall, "
+    "served by a paved road and a regional airport. Local communities practise "
+    "agriculture and the climate allows year-round access to the site. "
+)
+
+
+def build_report(sections: int = 60) -> str:
+    """Relatório longo: capa, sumário e as evidências no meio do documento"""
+    cover = "ACME GOLD PROJECT\nTechnical Report\nPrepared for ACME Mining Ltd."
+    toc = "\n".join(
+        f"{i}. Section {i} title {'.' * 20} {i * 3}" for i in range(1, 25)
+    )
+    body = []
+    evidence_at = {sections // 2 + 3 * i: sentence for i, sentence in enumerate(EVIDENCE)}
+    for i in range(sections):
+        paragraph = f"Section {i}. " + FILLER * 3
+        if i in evidence_at:
+            paragraph = f"Section {i}. {evidence_at[i]} " + FILLER
+        body.append(paragraph)
+    return "\n\n".join([cover, toc] + body)
+
+
+def evidence_recall(context: str) -> float:
+    return sum(sentence in context for sentence in EVIDENCE) / len(EVIDENCE)
+
+
+def head_truncate(text: str, budget_tokens: int) -> str:
+    """Estratégia anterior: mantém o início do documento"""
+    return text[:budget_tokens * 4]
+
+
+class TestPassages:
+
+    def test_split_is_lossless_and_ordered(self):
+        text = build_report(20)
+        passages = split_passages(text, target_chars=500)
+
+        assert all(text[p['start']:p['end']] == p['text'] for p in passages)
+        assert [p['start'] for p in passages] == sorted(p['start'] for p in passages)
+        gaps = [text[a['end']:b['start']] for a, b in zip(passages, passages[1:])]
+        assert all(not gap.strip() for gap in gaps)
+
+    def test_split_without_line_breaks_uses_sentences(self):
+        text = " ".join(EVIDENCE * 10)
+        passages = split_passages(text, target_chars=300)
+
+        assert len(passages) > 5
+        assert all(len(p['text']) <= 300 for p in passages)
+
+    def test_ranker_prefers_evidence_over_toc(self):
+        passages = [
+            {'text': "\n".join(f"{i}. Mineral Resource {'.' * 10} {i}" for i in range(1, 8))},
+            {'text': EVIDENCE[0]},
+            {'text': FILLER},
+        ]
+        scores = PassageRanker(compliance_query()).score(passages)
+
+        assert scores[1] > scores[0] > scores[2] == 0
+
+    def test_query_uses_scorer_weights(self):
+        query = compliance_query()
+        scorer = ComplianceScorer()
+
+        assert query['jorc'] == scorer.scoring_weights['jorc']
+        assert query['qualified person'] == max(
+            scorer.scoring_weights['ni_43_101'], scorer.scoring_weights['compliance']
+        )
+
+
+class TestSelectContext:
+
+    def test_short_document_is_unchanged(self):
+        result = select_context("JORC Code report.", budget_tokens=100)
+
+        assert result['strategy'] == 'full'
+        assert result['text'] == "JORC Code report."
+
+    def test_respects_budget_and_keeps_order(self):
+        text = build_report()
+        result = select_context(text, budget_tokens=600)
+
+        assert result['strategy'] == 'ranked'
+        assert result['tokens'] <= 600
+        assert GAP_MARKER.strip() in result['text']
+        positions = [text.find(s) for s in EVIDENCE if s in result['text']]
+        assert positions == sorted(positions)
+
+    def test_keeps_short_lead_passage(self):
+        text = "ACME GOLD PROJECT - Technical Report\n\n" + "\n\n".join(
+            [FILLER * 4] * 30 + [EVIDENCE[0]]
+        )
+        result = select_context(text, budget_tokens=400)
+
+        assert result['text'].startswith("ACME GOLD PROJECT")
+        assert EVIDENCE[0] in result['text']
+
+    @pytest.mark.asyncio
+    async def test_validator_sends_selected_context(self):
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=Mock(
+            choices=[Mock(message=Mock(content="JORC compliant."))]
+        ))
+        ai = ValidatorAI(client=client)
+        ai.context_tokens = 800
+
+        await ai.validate_text(build_report())
+
+        prompt = client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        assert evidence_recall(prompt) == 1.0
+        assert count_tokens(prompt) < 800 + 100
+
+
+class TestContextBenchmark:
+    """Seleção por relevância x corte pelo início, no mesmo orçamento"""
+
+    BUDGET = 1000
+
+    def test_same_budget_better_coverage(self):
+        text = build_report()
+        scorer = ComplianceScorer()
+
+        head = head_truncate(text, self.BUDGET)
+        ranked = select_context(text, self.BUDGET)['text']
+
+        assert evidence_recall(ranked) == 1.0
+        assert evidence_recall(head) == 0.0
+        assert scorer.evaluate(ranked)['compliance_score'] > scorer.evaluate(head)['compliance_score']
+
+    def test_same_coverage_fewer_tokens(self):
+        text = build_report()
+
+        # Menor orçamento com todas as evidências no prompt
+        head_tokens = count_tokens(text[:max(text.find(s) + len(s) for s in EVIDENCE)])
+        ranked_tokens = next(
+            budget for budget in range(100, head_tokens + 100, 100)
+            if evidence_recall(select_context(text, budget)['text']) == 1.0
+        )
+
+        assert ranked_tokens * 5 <= head_tokens, (ranked_tokens, head_tokens)
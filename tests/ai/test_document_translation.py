@@ -0,0 +1,192 @@
+"""
+Testes da tradução de documentos longos em blocos do Bridge AI
+"""
+
+import asyncio
+import io
+import json
+import re
+from unittest.mock import Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.chunking import is_heading, iter_chunks
+
+
+PARAGRAPH = (
+    "A lavra do minério de ferro ocorre a céu aberto, com bancadas de dez metros. "
+    "O teor médio reportado considera diluição operacional e perdas de lavra.\n\n"
+)
+
+
+def build_report(sections: int = 12, paragraphs: int = 8) -> str:
+    return "".join(
+        f"{n}. SEÇÃO {n}\n\n" + PARAGRAPH * paragraphs
+        for n in range(1, sections + 1)
+    )
+
+
+class EchoClient:
+    """Cliente falso: devolve o texto do prompt em maiúsculas"""
+
+    def __init__(self, confidence=None, mapping=None, fail_when=None, delay=0.0):
+        self.confidence = confidence or (lambda text: 90)
+        self.mapping = mapping or {}
+        self.fail_when = fail_when
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.chat = Mock()
+        self.chat.completions.create = self.create
+
+    async def create(self, **params):
+        self.calls.append(params)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            text = re.search(r"---\n(.*)\n---", params["messages"][1]["content"], re.S).group(1)
+            if self.fail_when and self.fail_when in text:
+                raise ValueError("resposta inválida")
+            payload = {
+                "translated_text": text.upper(),
+                "confidence": self.confidence(text),
+                "semantic_mapping": self.mapping,
+            }
+            response = Mock()
+            response.choices = [Mock(message=Mock(content=json.dumps(payload)))]
+            response.usage = None
+            return response
+        finally:
+            self.active -= 1
+
+
+class TestChunking:
+
+    def test_reassembles_exactly_within_limit(self):
+        report = build_report()
+        chunks = list(iter_chunks(io.StringIO(report, newline=""), max_chars=2000))
+
+        assert "".join(chunks) == report
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 2000 for chunk in chunks)
+
+    def test_cuts_before_section_headings(self):
+        chunks = list(iter_chunks(io.StringIO(build_report(sections=6, paragraphs=3)), max_chars=1200))
+
+        assert all(chunk.startswith(tuple(f"{n}. SEÇÃO" for n in range(1, 7))) for chunk in chunks)
+
+    def test_splits_long_lines(self):
+        line = "Frase de teste com alguns termos técnicos. " * 500
+        chunks = list(iter_chunks([line], max_chars=1000))
+
+        assert "".join(chunks) == line
+        assert all(len(chunk) <= 1000 for chunk in chunks)
+
+    def test_heading_detection(self):
+        assert is_heading("## Estimativa de Recursos")
+        assert is_heading("3.2 Estimativa de Recursos")
+        assert is_heading("CAPÍTULO 4 - GEOLOGIA")
+        assert is_heading("PESSOA COMPETENTE")
+        assert not is_heading("3.2 Mt de minério foram lavrados no período.")
+        assert not is_heading(PARAGRAPH)
+
+
+class TestTranslateDocument:
+
+    @pytest.mark.asyncio
+    async def test_translates_beyond_character_cap(self):
+        report = build_report()
+        assert len(report) > 8000
+        client = EchoClient()
+        events = []
+
+        result = await BridgeAI(client=client).translate_document(
+            report, "ANM", "JORC", chunk_chars=3000, use_memory=False, on_progress=events.append
+        )
+
+        assert result["status"] == "success"
+        assert result["translated_text"] == report.upper()
+        assert "truncado" not in result["translated_text"]
+        assert len(result["chunks"]) == len(client.calls) > 2
+        assert events[-1]["chunks_done"] == len(result["chunks"])
+        assert events[-1]["percent"] == 100.0
+        assert [e["chars_done"] for e in events] == sorted(e["chars_done"] for e in events)
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_keeps_order(self):
+        client = EchoClient(delay=0.01)
+
+        result = await BridgeAI(client=client).translate_document(
+            build_report(sections=20), "ANM", "JORC",
+            chunk_chars=1500, concurrency=3, use_memory=False
+        )
+
+        assert client.max_active == 3
+        assert [c["index"] for c in result["chunks"]] == list(range(len(result["chunks"])))
+        assert result["translated_text"] == build_report(sections=20).upper()
+
+    @pytest.mark.asyncio
+    async def test_document_glossary_shared_between_chunks(self):
+        client = EchoClient(mapping={"bancadas": "benches"})
+
+        result = await BridgeAI(client=client).translate_document(
+            build_report(sections=4), "ANM", "JORC",
+            chunk_chars=1500, concurrency=1, use_memory=False
+        )
+
+        assert result["semantic_mapping"]["bancadas"] == "benches"
+        assert result["mapping_conflicts"] == []
+        user_prompts = [call["messages"][1]["content"] for call in client.calls]
+        assert '"bancadas" → "benches"' not in user_prompts[0]
+        assert all('"bancadas" → "benches"' in prompt for prompt in user_prompts[1:])
+
+    @pytest.mark.asyncio
+    async def test_confidence_weighted_by_chunk_length(self):
+        text = "1. CURTA\n\n" + PARAGRAPH + "2. LONGA\n\n" + PARAGRAPH * 5
+        client = EchoClient(confidence=lambda chunk: 60 if "CURTA" in chunk else 90)
+
+        result = await BridgeAI(client=client).translate_document(
+            text, "ANM", "JORC", chunk_chars=len(PARAGRAPH) * 5 + 20, use_memory=False
+        )
+
+        short, long_ = result["chunks"]
+        expected = round((short["chars"] * 60 + long_["chars"] * 90) / (short["chars"] + long_["chars"]))
+        assert result["confidence"] == expected
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_keeps_source(self):
+        text = "1. SEÇÃO OK\n\n" + PARAGRAPH + "2. SEÇÃO RUIM\n\n" + PARAGRAPH
+        client = EchoClient(fail_when="RUIM")
+
+        result = await BridgeAI(client=client).translate_document(
+            text, "ANM", "JORC", chunk_chars=len(PARAGRAPH) + 40, use_memory=False
+        )
+
+        assert result["status"] == "partial"
+        assert [c["status"] for c in result["chunks"]] == ["success", "error"]
+        assert result["translated_text"] == ("1. SEÇÃO OK\n\n" + PARAGRAPH).upper() + "2. SEÇÃO RUIM\n\n" + PARAGRAPH
+
+    @pytest.mark.asyncio
+    async def test_streams_file_to_output(self, tmp_path):
+        path = tmp_path / "relatorio.txt"
+        path.write_text(build_report(), encoding="utf-8")
+        output = io.StringIO()
+
+        result = await BridgeAI(client=EchoClient()).translate_document(
+            path, "ANM", "JORC", chunk_chars=3000, use_memory=False, output=output
+        )
+
+        assert result["status"] == "success"
+        assert "translated_text" not in result
+        assert output.getvalue() == build_report().upper()
+        assert result["chars"] == len(build_report())
+
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_input(self):
+        ai = BridgeAI(client=EchoClient())
+
+        assert (await ai.translate_document("texto", "ANM", "ANM"))["status"] == "error"
+        assert (await ai.translate_document("\n\n  \n", "ANM", "JORC"))["message"] == "Texto vazio"
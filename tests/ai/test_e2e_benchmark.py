@@ -0,0 +1,136 @@
+"""
+Testes do servidor OpenAI fake e do benchmark de ponta a ponta (main_ai:app)
+"""
+
+import copy
+import json
+
+import pytest
+
+from src.ai.benchmarks.e2e import (
+    SCENARIOS,
+    build_result,
+    compare_to_baseline,
+    load_baseline,
+    local_stack,
+    percentile,
+    run_benchmark,
+)
+from src.ai.core.llm.fake_server import FakeLLMConfig, ServerThread, create_app, parse_latency
+
+
+@pytest.fixture
+def fake_llm():
+    def start(**config):
+        return ServerThread(create_app(FakeLLMConfig(seed=1, **config)))
+    return start
+
+
+def openai_client(server):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(base_url=f"{server.url}/v1", api_key="fake", max_retries=0)
+
+
+class TestFakeServer:
+
+    def test_latency_specs(self):
+        assert parse_latency("fixed:0.2")() == 0.2
+        assert 0.1 <= parse_latency("uniform:0.1,0.3")() <= 0.3
+        assert parse_latency("lognormal:0.05,0.5")() > 0
+        assert parse_latency("exponential:0.1")() >= 0
+        with pytest.raises(ValueError):
+            parse_latency("gamma:1")
+
+    @pytest.mark.asyncio
+    async def test_completion_echoes_json_translation(self, fake_llm):
+        with fake_llm() as server:
+            response = await openai_client(server).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": "Traduza:\n---\n[0] Mineral Resource\n[1] Ore Reserve\n---\n"}],
+                response_format={"type": "json_object"},
+            )
+
+        body = json.loads(response.choices[0].message.content)
+        assert body["segments"] == ["Mineral Resource", "Ore Reserve"]
+        assert response.usage.prompt_tokens > 0
+        assert response.usage.completion_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_stream_with_usage(self, fake_llm):
+        with fake_llm(tokens_per_second=10000) as server:
+            stream = await openai_client(server).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": "Analise o relatório"}],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            pieces, usage = [], None
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                usage = chunk.usage or usage
+
+        assert "JORC" in "".join(pieces)
+        assert len(pieces) > 1
+        assert usage.completion_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_and_errors(self, fake_llm):
+        from openai import InternalServerError, RateLimitError
+
+        with fake_llm(rate_limit_rate=1.0, retry_after=2) as server:
+            with pytest.raises(RateLimitError) as excinfo:
+                await openai_client(server).chat.completions.create(
+                    model="gpt-4o", messages=[{"role": "user", "content": "x"}]
+                )
+        assert excinfo.value.response.headers["retry-after"] == "2"
+
+        with fake_llm(error_rate=1.0) as server:
+            with pytest.raises(InternalServerError):
+                await openai_client(server).chat.completions.create(
+                    model="gpt-4o", messages=[{"role": "user", "content": "x"}]
+                )
+
+
+class TestEndToEndBenchmark:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7.0], 95) == 7.0
+        assert percentile([], 50) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_small_run_through_every_endpoint(self):
+        with local_stack(FakeLLMConfig(seed=1)) as urls:
+            scenarios = await run_benchmark(urls["api"], requests=6, concurrency=3, warmup=1, llm_url=urls["llm"])
+
+        assert set(scenarios) == set(SCENARIOS)
+        for name, data in scenarios.items():
+            assert data["errors"] == 0, (name, data["status_codes"])
+            assert data["p50_ms"] <= data["p95_ms"] <= data["p99_ms"]
+            assert data["rps"] > 0
+        assert scenarios["validator"]["llm_calls"] >= 7
+        assert scenarios["bridge"]["llm_calls"] > 0
+
+    def test_regressions_against_baseline(self):
+        baseline = load_baseline()
+        assert baseline is not None
+        assert set(baseline["scenarios"]) == set(SCENARIOS)
+        assert compare_to_baseline(baseline, baseline) == []
+
+        slower = copy.deepcopy(baseline)
+        slower["scenarios"]["bridge"]["p95_ms"] *= 2
+        slower["scenarios"]["radar"]["rps"] /= 2
+        slower["scenarios"]["validator"]["error_rate"] = 0.1
+
+        regressions = compare_to_baseline(slower, baseline)
+        assert len(regressions) == 3
+        assert any(r.startswith("bridge: p95_ms") for r in regressions)
+        assert any(r.startswith("radar: rps") for r in regressions)
+
+    def test_result_version_mismatch(self):
+        result = build_result({}, {})
+        assert compare_to_baseline(result, {**result, "version": 0}) != []
@@ -0,0 +1,84 @@
+"""
+Testes do provedor de cliente LLM compartilhado
+"""
+
+import pytest
+
+from src.ai.core.llm import (
+    get_llm_client,
+    set_llm_client,
+    get_model,
+    get_pool_settings,
+)
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.validator import ValidatorAI
+from src.ai.core.radar.engine import RadarEngine
+
+
+@pytest.fixture(autouse=True)
+def clean_provider(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test-key-12345')
+
+
+class FakeClient:
+    """Cliente local injetável (sem rede)"""
+    chat = None
+
+
+def test_engines_share_one_client():
+    """Validator, Bridge e Radar usam a mesma instância (mesmo pool HTTP)"""
+    bridge = BridgeAI()
+    validator = ValidatorAI()
+    radar = RadarEngine()
+
+    assert bridge.client is validator.client is radar.client
+    assert bridge.client is get_llm_client()
+
+
+def test_distinct_api_keys_get_distinct_clients():
+    assert get_llm_client('sk-a') is not get_llm_client('sk-b')
+    assert get_llm_client('sk-a') is get_llm_client('sk-a')
+
+
+def test_no_api_key_returns_none(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY')
+    assert get_llm_client() is None
+    assert RadarEngine().client is None
+    with pytest.raises(ValueError):
+        BridgeAI()
+
+
+def test_injected_client_reaches_engines():
+    fake = FakeClient()
+    set_llm_client(fake)
+
+    assert BridgeAI().client is fake
+    assert RadarEngine().client is fake
+
+
+def test_constructor_injection_without_api_key(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY')
+    fake = FakeClient()
+
+    assert BridgeAI(client=fake).client is fake
+    assert ValidatorAI(client=fake).client is fake
+
+
+def test_model_per_call_site(monkeypatch):
+    assert get_model('bridge.translate') == 'gpt-4o'
+
+    monkeypatch.setenv('QIVO_MODEL_DEFAULT', 'gpt-4o-mini')
+    assert get_model('bridge.translate') == 'gpt-4o-mini'
+
+    monkeypatch.setenv('QIVO_MODEL_RADAR_SUMMARY', 'gpt-4.1')
+    assert get_model('radar.summary') == 'gpt-4.1'
+    assert RadarEngine().summary_model == 'gpt-4.1'
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv('QIVO_LLM_MAX_CONNECTIONS', '42')
+    monkeypatch.setenv('QIVO_LLM_HTTP2', '0')
+
+    settings = get_pool_settings()
+    assert settings['max_connections'] == 42
+    assert settings['http2'] is False
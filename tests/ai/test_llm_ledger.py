@@ -0,0 +1,157 @@
+"""
+Testes do ledger de uso LLM (atribuição, lotes e agregações)
+"""
+
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.llm import (
+    UsageLedger,
+    create_chat_completion,
+    ledger_context,
+    set_ledger,
+)
+from src.ai.core.llm.ledger import estimate_cost, norm_pair
+
+
+MESSAGES = [{"role": "user", "content": "Traduza a seção de recursos medidos."}]
+
+
+def json_client(payload, prompt=800, completion=200):
+    response = Mock(
+        choices=[Mock(message=Mock(content=json.dumps(payload)))],
+        usage=Mock(prompt_tokens=prompt, completion_tokens=completion)
+    )
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+@pytest.fixture
+def ledger():
+    ledger = UsageLedger(batch_size=100, flush_interval=3600)
+    set_ledger(ledger)
+    yield ledger
+    set_ledger(None)
+
+
+class TestCosts:
+
+    def test_estimate_uses_longest_prefix(self):
+        assert estimate_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+        assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.75)
+        assert estimate_cost("modelo-desconhecido", 1000, 1000) == 0.0
+
+    def test_prices_from_environment(self, monkeypatch):
+        monkeypatch.setenv("QIVO_LLM_PRICES", json.dumps({"gpt-4o": [1.0, 2.0]}))
+        assert UsageLedger().record("demo", "gpt-4o", 1_000_000, 1_000_000)["cost_usd"] == pytest.approx(3.0)
+
+
+class TestAttribution:
+
+    def test_nested_contexts_merge(self, ledger):
+        with ledger_context(request_id="r1", customer="acme", endpoint="POST /api/bridge/translate"):
+            with ledger_context(norm_pair=norm_pair("ANM", "JORC")):
+                entry = ledger.record("bridge.translate", "gpt-4o", 100, 50)
+            outer = ledger.record("validator.analysis", "gpt-4o", 10, 5)
+
+        assert entry["customer"] == "acme" and entry["norm_pair"] == "ANM->JORC"
+        assert outer["norm_pair"] is None and outer["request_id"] == "r1"
+        assert ledger.record("demo", "gpt-4o", 1, 1)["customer"] is None
+
+    def test_entries_are_batched(self):
+        ledger = UsageLedger(batch_size=3, flush_interval=3600)
+        for _ in range(2):
+            ledger.record("demo", "gpt-4o", 10, 10)
+        assert ledger._conn.execute("SELECT COUNT(*) FROM llm_usage").fetchone()[0] == 0
+
+        ledger.record("demo", "gpt-4o", 10, 10)
+        ledger.record("demo", "gpt-4o", 10, 10)
+        assert ledger._conn.execute("SELECT COUNT(*), MAX(batch) FROM llm_usage").fetchone() == (3, 1)
+        assert ledger.flush() == 1
+        assert ledger.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_completion_is_recorded_with_context(self, ledger):
+        with ledger_context(job="bridge.batch_translate", norm_pair="ANM->JORC"):
+            await create_chat_completion(json_client({"ok": True}), site="bridge.translate", model="gpt-4o", messages=MESSAGES)
+
+        row, = ledger.rollup(group_by=("job", "norm_pair", "site", "model"))
+        assert row["job"] == "bridge.batch_translate" and row["site"] == "bridge.translate"
+        assert (row["prompt_tokens"], row["completion_tokens"], row["total_tokens"]) == (800, 200, 1000)
+        assert row["cost_usd"] == pytest.approx(0.004)
+
+
+class TestRollup:
+
+    def test_group_and_filter(self, ledger):
+        with ledger_context(request_id="r1", customer="acme"):
+            ledger.record("bridge.translate", "gpt-4o", 1000, 100)
+            ledger.record("validator.analysis", "gpt-4o-mini", 1000, 100)
+        with ledger_context(request_id="r2", customer="globex"):
+            ledger.record("bridge.translate", "gpt-4o", 500, 50)
+
+        by_customer = {row["customer"]: row for row in ledger.rollup(group_by=["customer"])}
+        assert by_customer["acme"]["calls"] == 2 and by_customer["globex"]["calls"] == 1
+        assert by_customer["acme"]["requests"] == 1
+
+        rows = ledger.rollup(group_by=["model"], customer="acme")
+        assert [row["model"] for row in rows] == ["gpt-4o", "gpt-4o-mini"]
+
+        total, = ledger.rollup(group_by=())
+        assert total["calls"] == 3 and total["total_tokens"] == 2750
+        assert ledger.rollup(group_by=["day"], since="2999-01-01") == []
+
+    def test_invalid_column(self, ledger):
+        with pytest.raises(ValueError, match="prompt"):
+            ledger.rollup(group_by=["prompt"])
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        first = UsageLedger(path)
+        first.record("demo", "gpt-4o", 10, 10)
+        first.close()
+
+        second = UsageLedger(path)
+        second.record("demo", "gpt-4o", 10, 10)
+        second.flush()
+        assert second._conn.execute("SELECT COUNT(*), MAX(batch) FROM llm_usage").fetchone() == (2, 2)
+
+
+class TestHttpAttribution:
+
+    def test_fastapi_request_is_attributed(self, ledger, monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from app.modules.bridge import routes
+        from main_ai import app
+        from src.ai.core.bridge import BridgeAI
+
+        client = json_client({"translated_text": "Measured resources.", "confidence": 90, "semantic_mapping": {}})
+        monkeypatch.setattr(routes, "bridge", BridgeAI(client=client))
+        response = TestClient(app).post(
+            "/api/bridge/translate",
+            json={"text": "Recursos medidos de 10 milhões de toneladas conforme ANM.", "source_norm": "ANM", "target_norm": "JORC"},
+            headers={"X-Customer-ID": "acme", "X-Request-ID": "req-1"}
+        )
+
+        assert response.status_code == 200
+        row, = ledger.rollup(group_by=("endpoint", "customer", "norm_pair"))
+        assert row["endpoint"] == "POST /api/bridge/translate"
+        assert (row["customer"], row["norm_pair"], row["requests"]) == ("acme", "ANM->JORC", 1)
+
+    def test_flask_admin_usage(self, ledger):
+        from app import create_app
+
+        with ledger_context(customer="acme", endpoint="POST /reports/<id>/validate"):
+            ledger.record("report.section", "gpt-4o-mini", 1000, 100)
+        client = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}).test_client()
+
+        body = client.get("/admin/llm/usage?group_by=customer,endpoint").get_json()
+        assert body["rows"][0]["customer"] == "acme"
+        assert body["totals"]["calls"] == 1
+
+        assert client.get("/admin/llm/usage?group_by=customer&customer=outro").get_json()["totals"]["calls"] == 0
+        assert client.get("/admin/llm/usage?group_by=senha").status_code == 400
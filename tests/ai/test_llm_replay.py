@@ -0,0 +1,132 @@
+"""
+Testes da gravação e reprodução de chamadas LLM (replay)
+"""
+
+import time
+
+import pytest
+
+from src.ai.core.llm import (
+    RecordingClient,
+    ReplayArchive,
+    ReplayClient,
+    ReplayMiss,
+    close_llm_clients,
+    create_chat_completion,
+    get_llm_client,
+    stream_chat_completion,
+)
+from src.ai.core.llm.fake_server import FakeLLMConfig, ServerThread, create_app
+from src.ai.core.llm.replay import replay_latency_scale, request_key
+from src.ai.core.validator import ValidatorAI
+
+
+MESSAGES = [{"role": "user", "content": "Analise o relatório JORC com QA/QC e pessoa competente."}]
+
+
+@pytest.fixture
+def fake_llm():
+    with ServerThread(create_app(FakeLLMConfig(latency="fixed:0.05", tokens_per_second=2000, seed=3))) as server:
+        yield server
+
+
+def openai_client(server):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(base_url=f"{server.url}/v1", api_key="fake", max_retries=0)
+
+
+async def record_session(server, path):
+    recorder = RecordingClient(openai_client(server), path)
+    response = await create_chat_completion(recorder, site="demo", model="gpt-4o", messages=MESSAGES)
+    streamed = "".join([
+        piece async for piece in stream_chat_completion(recorder, site="demo", model="gpt-4o", messages=MESSAGES)
+    ])
+    await recorder.close()
+    return response, streamed
+
+
+class TestArchive:
+
+    def test_key_ignores_transport_params(self):
+        params = {"model": "gpt-4o", "messages": MESSAGES}
+        assert request_key(params) == request_key({**params, "timeout": 5, "stream_options": {"include_usage": True}})
+        assert request_key(params) != request_key({**params, "model": "gpt-4o-mini"})
+        assert request_key(params) != request_key({**params, "stream": True})
+
+    def test_identical_requests_replay_in_order(self):
+        archive = ReplayArchive()
+        archive.add({"key": "k", "seq": 1, "response": "a"})
+        archive.add({"key": "k", "seq": 2, "response": "b"})
+
+        assert [archive.next("k")["response"] for _ in range(3)] == ["a", "b", "a"]
+        assert archive.next("outra") is None
+        assert (archive.hits, archive.misses) == (3, 1)
+
+    def test_latency_setting(self):
+        assert replay_latency_scale("recorded") == 1.0
+        assert replay_latency_scale("zero") == 0.0
+        assert replay_latency_scale("0.5") == 0.5
+        assert replay_latency_scale("lixo") == 1.0
+
+
+@pytest.mark.asyncio
+class TestRecordReplay:
+
+    async def test_replay_matches_recording(self, fake_llm, tmp_path):
+        path = tmp_path / "run.jsonl.gz"
+        response, streamed = await record_session(fake_llm, path)
+
+        archive = ReplayArchive.load(path)
+        assert archive.summary()["interactions"] == 2
+        assert archive.summary()["models"]["gpt-4o"]["streams"] == 1
+
+        replay = ReplayClient(archive, latency_scale=0)
+        replayed = await create_chat_completion(replay, site="demo", model="gpt-4o", messages=MESSAGES)
+        replayed_stream = "".join([
+            piece async for piece in stream_chat_completion(replay, site="demo", model="gpt-4o", messages=MESSAGES)
+        ])
+
+        assert replayed.choices[0].message.content == response.choices[0].message.content
+        assert replayed.usage.prompt_tokens == response.usage.prompt_tokens
+        assert replayed_stream == streamed
+
+    async def test_recorded_latency_is_reproduced(self, fake_llm, tmp_path):
+        path = tmp_path / "run.jsonl.gz"
+        await record_session(fake_llm, path)
+        params = {"model": "gpt-4o", "messages": MESSAGES}
+
+        started = time.monotonic()
+        await ReplayClient(path).chat.completions.create(**params)
+        assert time.monotonic() - started >= 0.04
+
+        started = time.monotonic()
+        await ReplayClient(path, latency_scale=0).chat.completions.create(**params)
+        assert time.monotonic() - started < 0.04
+
+    async def test_unknown_request_is_a_miss(self, tmp_path):
+        replay = ReplayClient(ReplayArchive(), latency_scale=0)
+        with pytest.raises(ReplayMiss):
+            await replay.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+
+    async def test_pipeline_replays_from_environment(self, fake_llm, tmp_path, monkeypatch):
+        path = tmp_path / "validator.jsonl.gz"
+        text = MESSAGES[0]["content"] * 20
+
+        monkeypatch.setenv("OPENAI_API_KEY", "fake")
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{fake_llm.url}/v1")
+        monkeypatch.setenv("QIVO_LLM_RECORD", str(path))
+        assert isinstance(get_llm_client(), RecordingClient)
+        recorded = await ValidatorAI().validate_text(text)
+        await close_llm_clients()
+
+        monkeypatch.delenv("OPENAI_API_KEY")
+        monkeypatch.delenv("QIVO_LLM_RECORD")
+        monkeypatch.setenv("QIVO_LLM_REPLAY", str(path))
+        monkeypatch.setenv("QIVO_LLM_REPLAY_LATENCY", "zero")
+        assert isinstance(get_llm_client(), ReplayClient)
+        replayed = await ValidatorAI().validate_text(text)
+
+        assert replayed["analysis"] == recorded["analysis"]
+        assert replayed["compliance"] == recorded["compliance"]
+        assert get_llm_client().archive.misses == 0
@@ -0,0 +1,179 @@
+"""
+Testes do streaming de respostas LLM (parser incremental, stream_chat_completion
+e endpoints em streaming do Bridge e do Validator)
+"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.llm import (
+    JSONFieldStream,
+    LLMGovernor,
+    ResilientCaller,
+    encode_event,
+    get_governor,
+    set_governor,
+    set_resilience,
+    stream_chat_completion,
+)
+from src.ai.core.validator import ValidatorAI
+
+
+def chunk(content=None, usage=None):
+    return Mock(
+        choices=[Mock(delta=Mock(content=content))] if content is not None else [],
+        usage=usage
+    )
+
+
+class FakeStream:
+    def __init__(self, pieces, fail_after=None):
+        self.pieces = list(pieces)
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, piece in enumerate(self.pieces):
+            if self.fail_after is not None and i == self.fail_after:
+                raise ConnectionError("stream interrompido")
+            yield chunk(piece)
+        yield chunk(usage=Mock(total_tokens=42))
+
+    async def close(self):
+        self.closed = True
+
+
+def streaming_client(*streams):
+    client = Mock()
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        return streams[len(calls) - 1]
+
+    client.chat.completions.create = create
+    client.calls = calls
+    return client
+
+
+def split(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.fixture(autouse=True)
+def fast_retries():
+    set_resilience(ResilientCaller(max_retries=1, sleep=lambda _: _noop()))
+
+
+async def _noop():
+    return None
+
+
+class TestJSONFieldStream:
+
+    def test_extracts_field_progressively(self):
+        payload = {
+            "translated_text": 'Recursos "medidos"\nde 2,1 g/t — ok \U0001F600',
+            "confidence": 88,
+            "semantic_mapping": {"translated_text": "não é o campo"},
+        }
+        raw = json.dumps(payload)  # ensure_ascii: escapes \uXXXX e pares substitutos
+        parser = JSONFieldStream("translated_text")
+
+        deltas = [parser.feed(c) for c in raw]
+
+        assert "".join(deltas) == payload["translated_text"]
+        assert parser.finish() == payload
+
+    def test_ignores_nested_keys_with_same_name(self):
+        raw = '{"confidence": 90, "meta": {"translated_text": "x"}, "translated_text": "final"}'
+        parser = JSONFieldStream("translated_text")
+
+        assert "".join(parser.feed(piece) for piece in split(raw, 5)) == "final"
+
+    def test_encode_event_formats(self):
+        event = {"event": "delta", "text": "ção"}
+        assert encode_event(event) == '{"event": "delta", "text": "ção"}\n'
+        assert encode_event(event, "sse") == 'event: delta\ndata: {"event": "delta", "text": "ção"}\n\n'
+
+
+class TestStreamChatCompletion:
+
+    @pytest.mark.asyncio
+    async def test_yields_deltas_and_releases_slot(self):
+        governor = LLMGovernor(max_concurrency=1)
+        set_governor(governor)
+        stream = FakeStream(["Olá", ", ", "mundo"])
+        client = streaming_client(stream)
+
+        pieces = [p async for p in stream_chat_completion(
+            client, site="test", model="gpt-4o", messages=[{"role": "user", "content": "oi"}]
+        )]
+
+        assert pieces == ["Olá", ", ", "mundo"]
+        assert client.calls[0]["stream"] is True
+        assert governor.stats()["in_flight"] == 0
+        assert stream.closed
+
+    @pytest.mark.asyncio
+    async def test_retries_before_first_token_only(self):
+        client = streaming_client(FakeStream(["x"], fail_after=0), FakeStream(["ok"]))
+
+        pieces = [p async for p in stream_chat_completion(client, site="test", model="gpt-4o", messages=[])]
+        assert pieces == ["ok"]
+
+        client = streaming_client(FakeStream(["a", "b"], fail_after=1), FakeStream(["nunca"]))
+        received = []
+        with pytest.raises(ConnectionError):
+            async for piece in stream_chat_completion(client, site="test", model="gpt-4o", messages=[]):
+                received.append(piece)
+        assert received == ["a"]
+        assert len(client.calls) == 1
+        assert get_governor().stats()["in_flight"] == 0
+
+
+class TestStreamingEngines:
+
+    @pytest.mark.asyncio
+    async def test_bridge_streams_translated_text(self):
+        payload = {
+            "translated_text": "Measured Mineral Resources of 10 Mt at 2.1 g/t Au were reported.",
+            "confidence": 87,
+            "semantic_mapping": {},
+        }
+        client = streaming_client(FakeStream(split(json.dumps(payload), 4)))
+        ai = BridgeAI(client=client)
+
+        events = [e async for e in ai.translate_normative_stream(
+            "Foram reportados recursos medidos de 10 Mt com teor de 2,1 g/t Au na jazida.",
+            "ANM", "JORC"
+        )]
+
+        deltas = [e["text"] for e in events if e["event"] == "delta"]
+        result = events[-1]
+        assert len(deltas) > 5
+        assert "".join(deltas) == payload["translated_text"]
+        assert result["event"] == "result"
+        assert result["status"] == "success"
+        assert result["translated_text"] == payload["translated_text"]
+        assert result["confidence"] == 87
+        assert "semantic_mapping" not in result
+
+    @pytest.mark.asyncio
+    async def test_validator_streams_analysis(self):
+        analysis = "O documento cita JORC e competent person; QA/QC descrito."
+        client = streaming_client(FakeStream(split(analysis, 6)))
+        ai = ValidatorAI(client=client)
+
+        events = [e async for e in ai.validate_text_stream("Relatório técnico " * 10)]
+
+        assert "".join(e["text"] for e in events if e["event"] == "delta") == analysis
+        assert events[-1]["status"] == "success"
+        assert events[-1]["analysis"]["full_text"] == analysis
+        assert "compliance" in events[-1]
@@ -0,0 +1,152 @@
+"""
+Testes do roteamento de modelos (barato primeiro, escalada sob demanda)
+"""
+
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.llm import ModelRouter, routed_completion, track_routes
+from src.ai.core.llm.routing import LLM_ROUTES
+
+
+MESSAGES = [{"role": "user", "content": "Classifique a mudança regulatória."}]
+
+ANALYSIS = (
+    "A seção atende parcialmente ao JORC: a pessoa competente está identificada. "
+    "Para o NI 43-101 faltam detalhes de QA/QC e amostragem. "
+    "O PRMS não se aplica diretamente a minerais sólidos, mas os critérios de "
+    "classificação de recursos foram descritos de forma consistente com as normas. "
+) * 2
+
+
+def reply(content):
+    return Mock(
+        choices=[Mock(message=Mock(content=content if isinstance(content, str) else json.dumps(content)))],
+        usage=Mock(prompt_tokens=50, completion_tokens=10)
+    )
+
+
+def client_by_model(**contents):
+    """Cliente que responde conforme o modelo ('gpt_4o_mini' = gpt-4o-mini)"""
+    async def create(**params):
+        content = contents[params["model"].replace("-", "_").replace(".", "_")]
+        if isinstance(content, Exception):
+            raise content
+        return reply(content)
+
+    client = Mock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    return client
+
+
+def models_called(client):
+    return [call.kwargs["model"] for call in client.chat.completions.create.await_args_list]
+
+
+class TestChoice:
+
+    def test_rules(self):
+        router = ModelRouter(max_cheap_tokens=100, min_local_confidence=0.5)
+        assert router.choose("demo", "gpt-4o", 50)["model"] == "gpt-4o-mini"
+        assert router.choose("demo", "gpt-4o", 500)["reason"] == "input_size"
+        assert router.choose("demo", "gpt-4o", 50, local_confidence=0.2)["reason"] == "low_local_confidence"
+        assert router.choose("demo", "gpt-4o", 50, critical=True)["reason"] == "critical_input"
+        assert router.choose("demo", "gpt-4o-mini", 50)["reason"] == "single_tier"
+        assert ModelRouter(enabled=False).choose("demo", "gpt-4o", 50)["tier"] == "large"
+
+    def test_cheap_model_per_site(self, monkeypatch):
+        monkeypatch.setenv("QIVO_MODEL_BRIDGE_TRANSLATE_CHEAP", "gpt-3.5-turbo")
+        assert ModelRouter().choose("bridge.translate", "gpt-4o", 10)["model"] == "gpt-3.5-turbo"
+
+
+@pytest.mark.asyncio
+class TestRoutedCompletion:
+
+    async def test_accepted_cheap_answer(self):
+        client = client_by_model(gpt_4o_mini="ok", gpt_4o="caro")
+        before = LLM_ROUTES.value(site="demo", tier="cheap", escalated="false")
+
+        with track_routes() as routes:
+            response, route = await routed_completion(
+                client, site="demo", model="gpt-4o", messages=MESSAGES, accept=lambda r: None
+            )
+
+        assert response.choices[0].message.content == "ok"
+        assert route == {"model": "gpt-4o-mini", "tier": "cheap", "reason": "cheap_first", "escalated": False}
+        assert routes == [route]
+        assert LLM_ROUTES.value(site="demo", tier="cheap", escalated="false") == before + 1
+
+    async def test_escalates_on_rejection_or_error(self):
+        client = client_by_model(gpt_4o_mini="ruim", gpt_4o="bom")
+        accept = lambda r: None if r.choices[0].message.content == "bom" else "low_confidence"
+
+        response, route = await routed_completion(client, site="demo", model="gpt-4o", messages=MESSAGES, accept=accept)
+        assert response.choices[0].message.content == "bom"
+        assert route["escalated"] and route["escalation_reason"] == "low_confidence"
+        assert models_called(client) == ["gpt-4o-mini", "gpt-4o"]
+
+        client = client_by_model(gpt_4o_mini=ValueError("json"), gpt_4o="bom")
+        _, route = await routed_completion(client, site="demo", model="gpt-4o", messages=MESSAGES, accept=accept)
+        assert route["escalation_reason"] == "cheap_error: ValueError"
+
+
+@pytest.mark.asyncio
+class TestEngines:
+
+    async def test_bridge_escalates_low_confidence_translation(self):
+        from src.ai.core.bridge import BridgeAI
+
+        client = client_by_model(
+            gpt_4o_mini={"translated_text": "Measured resources.", "confidence": 40},
+            gpt_4o={"translated_text": "Measured Mineral Resources.", "confidence": 92}
+        )
+        result = await BridgeAI(client=client).translate_normative(
+            "Recursos medidos de 10 milhões de toneladas.", "ANM", "JORC", use_memory=False
+        )
+
+        assert result["translated_text"] == "Measured Mineral Resources."
+        assert result["route"]["escalated"] and result["route"]["escalation_reason"] == "low_confidence"
+        assert models_called(client) == ["gpt-4o-mini", "gpt-4o"]
+
+    async def test_bridge_keeps_confident_cheap_translation(self):
+        from src.ai.core.bridge import BridgeAI
+
+        client = client_by_model(gpt_4o_mini={"translated_text": "Measured Mineral Resources.", "confidence": 90})
+        result = await BridgeAI(client=client).translate_normative(
+            "Recursos medidos de 10 milhões de toneladas.", "ANM", "JORC", use_memory=False
+        )
+
+        assert result["route"]["tier"] == "cheap"
+        assert models_called(client) == ["gpt-4o-mini"]
+
+    async def test_validator_routes_by_local_confidence(self):
+        from src.ai.core.validator import ValidatorAI
+
+        client = client_by_model(gpt_4o_mini=ANALYSIS, gpt_4o=ANALYSIS)
+        ai = ValidatorAI(client=client)
+
+        covered = await ai.validate_text(
+            "Relatório JORC e NI 43-101 com recursos medidos, pessoa competente, "
+            "QA/QC, reservas PRMS e conformidade com a norma. " * 3
+        )
+        assert covered["route"]["tier"] == "cheap"
+
+        sparse = await ai.validate_text("Texto genérico sobre a empresa e seus escritórios. " * 5)
+        assert sparse["route"]["reason"] == "low_local_confidence"
+        assert models_called(client) == ["gpt-4o-mini", "gpt-4o"]
+
+    async def test_radar_high_impact_changes_skip_cheap_model(self):
+        from src.ai.core.radar.engine import RadarEngine
+
+        analysis = {"analysis": [{"impact_score": 80, "severity": "High", "recommendations": []}]}
+        client = client_by_model(gpt_4o_mini=analysis, gpt_4o=analysis)
+        radar = RadarEngine(client=client)
+
+        low, = await radar._deep_analyze_changes([{"source": "ANM", "title": "Ajuste", "impact_level": "low"}])
+        high, = await radar._deep_analyze_changes([{"source": "ANM", "title": "Barragens", "impact_level": "high"}])
+
+        assert low["gpt_route"]["tier"] == "cheap"
+        assert high["gpt_route"]["reason"] == "critical_input"
+        assert models_called(client) == ["gpt-4o-mini", "gpt-4o"]
@@ -0,0 +1,118 @@
+"""
+Testes e benchmark do classificador local de normas do Bridge AI
+
+Os relatórios rotulados ficam em tests/fixtures/norm_reports
+(`<NORMA>_<nome>.txt`). O mesmo relatório pode ser gerado com:
+
+    python -m src.ai.core.bridge.classifier tests/fixtures/norm_reports
+"""
+
+import os
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ai.core.bridge.classifier import (
+    NORMS,
+    SEED_SAMPLES,
+    NormClassifier,
+    get_norm_classifier,
+    load_labeled_samples,
+)
+from app.services.integrations.bridge_connector import BridgeConnector
+
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "norm_reports"
+
+# Orçamento de latência por página (3000 caracteres)
+PAGE_BUDGET_MS = float(os.getenv("QIVO_CLASSIFIER_PAGE_BUDGET_MS", "1.0"))
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return load_labeled_samples(FIXTURES)
+
+
+class TestNormClassifier:
+
+    def test_fixtures_cover_all_norms(self, samples):
+        assert {norm for norm, _ in samples} == set(NORMS)
+
+    def test_accuracy_report(self, samples):
+        report = get_norm_classifier().evaluate(samples)
+
+        assert report["accuracy"] >= 0.95
+        assert min(report["recall"].values()) >= 0.75
+        assert report["ece"] <= 0.1
+
+    def test_mixed_language_reports(self):
+        classifier = get_norm_classifier()
+
+        jorc_pt = "Os Recursos Indicados foram estimados conforme o Código JORC pela Pessoa Competente."
+        anm_en = "Annual mining report (RAL) filed with ANM; CFEM royalties were paid on the concession."
+        assert classifier.classify(jorc_pt)["norm"] == "JORC"
+        assert classifier.classify(anm_en)["norm"] == "ANM"
+
+    def test_probabilities_are_normalized(self):
+        result = get_norm_classifier().classify("Qualified Person statement under NI 43-101.")
+
+        assert result["norm"] == "NI43-101"
+        assert sum(result["probabilities"].values()) == pytest.approx(1.0, abs=1e-3)
+        assert result["confidence"] == max(result["probabilities"].values())
+
+    def test_unknown_text_abstains(self):
+        result = get_norm_classifier().classify("Lorem ipsum dolor sit amet.")
+
+        assert result["norm"] is None
+        assert result["matched_terms"] == 0
+
+    def test_ambiguous_text_is_less_confident(self):
+        classifier = get_norm_classifier()
+
+        generic = classifier.classify("Measured Mineral Resources and a Competent Person.")
+        specific = classifier.classify("SAMREC Code statement, JSE listed, SACNASP registered.")
+        assert generic["confidence"] < specific["confidence"]
+
+    def test_batch_matches_single(self, samples):
+        classifier = get_norm_classifier()
+        texts = [text for _, text in samples]
+
+        assert classifier.classify_many(texts) == [classifier.classify(t) for t in texts]
+
+    def test_fit_rejects_unknown_norm(self):
+        with pytest.raises(ValueError):
+            NormClassifier().fit([("CRIRSCO", "texto")])
+
+    def test_calibration_keeps_probabilities_below_one(self):
+        classifier = NormClassifier().fit(SEED_SAMPLES)
+        assert classifier.temperature > 0.05
+        assert classifier.classify("JORC Code")["confidence"] < 0.999
+
+    def test_latency_per_page(self, samples):
+        classifier = get_norm_classifier()
+        page = "".join(text for _, text in samples)[:3000]
+        runs = 200
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            classifier.classify(page)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+
+        assert elapsed_ms < PAGE_BUDGET_MS, f"{elapsed_ms:.3f} ms por página"
+
+
+class TestConnectorDetection:
+
+    @pytest.mark.asyncio
+    async def test_detect_source_norm_uses_classifier(self):
+        connector = BridgeConnector(client=Mock())
+
+        norm, confidence = await connector._detect_source_norm(
+            "Reservas C1 e C2 aprovadas pelo GKZ segundo a Russian Classification."
+        )
+        assert norm == "PERC"
+        assert confidence > 0.5
+
+        assert (await connector._detect_source_norm("sem termos conhecidos"))[0] == "JORC"
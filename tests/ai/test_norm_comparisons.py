@@ -0,0 +1,147 @@
+"""
+Testes da matriz pré-computada de comparações entre normas
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.comparisons import ComparisonMatrix, comparison_fingerprint
+from src.ai.core.radar.engine import RadarEngine
+
+
+def fake_client(content):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=content))]
+    response.usage = None
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+@pytest.mark.asyncio
+class TestComparisonMatrix:
+
+    async def test_miss_then_hit(self, tmp_path):
+        matrix = ComparisonMatrix(tmp_path / "matrix.json")
+        compute = AsyncMock(return_value={"main_differences": ["a"]})
+
+        result, info = await matrix.get_or_compute("bridge", "JORC", "ANM", "v1", compute)
+        assert info["cached"] is False
+        result, info = await matrix.get_or_compute("bridge", "JORC", "ANM", "v1", compute)
+        assert info["cached"] is True
+        assert result == {"main_differences": ["a"]}
+        assert compute.await_count == 1
+
+    async def test_persisted_across_instances(self, tmp_path):
+        path = tmp_path / "matrix.json"
+        await ComparisonMatrix(path).get_or_compute(
+            "bridge", "JORC", "ANM", "v1", AsyncMock(return_value={"x": 1})
+        )
+
+        reloaded = ComparisonMatrix(path)
+        compute = AsyncMock()
+        result, info = await reloaded.get_or_compute("bridge", "JORC", "ANM", "v1", compute)
+
+        assert result == {"x": 1} and info["cached"] is True
+        compute.assert_not_awaited()
+        assert json.loads(path.read_text())["format"] == 1
+
+    async def test_stale_entry_served_and_refreshed(self, tmp_path):
+        matrix = ComparisonMatrix(tmp_path / "matrix.json")
+        matrix.put("bridge", "JORC", "ANM", "old", {"version": "old"})
+
+        compute = AsyncMock(return_value={"version": "new"})
+        result, info = await matrix.get_or_compute("bridge", "JORC", "ANM", "new", compute)
+        assert result == {"version": "old"}
+        assert info["stale"] is True
+
+        await asyncio.sleep(0)  # deixa o refresh em segundo plano rodar
+        await asyncio.sleep(0)
+        entry = matrix.lookup("bridge", "JORC", "ANM", "new")
+        assert entry["fresh"] and entry["result"] == {"version": "new"}
+        assert matrix.stats()["background_refreshes"] == 1
+
+    async def test_concurrent_misses_share_computation(self):
+        matrix = ComparisonMatrix()
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        compute = AsyncMock(side_effect=slow)
+        await asyncio.gather(*(
+            matrix.get_or_compute("bridge", "JORC", "ANM", "v1", compute) for _ in range(5)
+        ))
+        assert compute.await_count == 1
+
+    async def test_errors_are_not_cached(self):
+        matrix = ComparisonMatrix()
+        with pytest.raises(RuntimeError):
+            await matrix.get_or_compute(
+                "bridge", "JORC", "ANM", "v1", AsyncMock(side_effect=RuntimeError("falhou"))
+            )
+        assert matrix.lookup("bridge", "JORC", "ANM", "v1") is None
+
+    async def test_hit_latency(self):
+        matrix = ComparisonMatrix()
+        await matrix.get_or_compute("bridge", "JORC", "ANM", "v1", AsyncMock(return_value={}))
+
+        compute = AsyncMock()
+        runs = 2000
+        started = time.perf_counter()
+        for _ in range(runs):
+            await matrix.get_or_compute("bridge", "JORC", "ANM", "v1", compute)
+        per_call = (time.perf_counter() - started) / runs
+
+        assert per_call < 0.001
+
+
+def test_fingerprint_tracks_metadata():
+    meta = {"country": "Austrália", "keywords": ["measured"]}
+    changed = {**meta, "keywords": ["measured", "indicated"]}
+    assert comparison_fingerprint(meta, meta) == comparison_fingerprint(dict(meta), dict(meta))
+    assert comparison_fingerprint(meta, meta) != comparison_fingerprint(meta, changed)
+    assert comparison_fingerprint(meta, meta, "v1") != comparison_fingerprint(meta, meta, "v2")
+
+
+@pytest.mark.asyncio
+class TestEnginesUseMatrix:
+
+    async def test_bridge_compare_reads_from_matrix(self):
+        client = fake_client(json.dumps({"main_differences": ["Classificação"]}))
+        bridge = BridgeAI(client=client)
+
+        first = await bridge.explain_norm_difference("JORC", "ANM")
+        second = await bridge.explain_norm_difference("JORC", "ANM")
+
+        assert first["status"] == second["status"] == "success"
+        assert first["cached"] is False and second["cached"] is True
+        assert second["main_differences"] == ["Classificação"]
+        assert client.chat.completions.create.await_count == 1
+
+    async def test_bridge_warm_builds_all_pairs(self):
+        client = fake_client(json.dumps({"main_differences": []}))
+        bridge = BridgeAI(client=client)
+
+        summary = await bridge.warm_comparisons()
+        assert summary == {"computed": 20, "up_to_date": 0, "errors": 0}
+
+        summary = await bridge.warm_comparisons()
+        assert summary["up_to_date"] == 20
+        assert client.chat.completions.create.await_count == 20
+
+    async def test_radar_deep_compare_reads_from_matrix(self):
+        client = fake_client("Análise comparativa")
+        radar = RadarEngine(client=client)
+
+        await radar.explain_source_difference("ANM", "JORC")
+        comparison = await radar.explain_source_difference("ANM", "JORC")
+
+        assert comparison["analysis"] == "Análise comparativa"
+        assert comparison["cached"] is True
+        assert client.chat.completions.create.await_count == 1
@@ -0,0 +1,115 @@
+"""
+Testes do profiler de amostragem sob demanda
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.ai.core.profiling import (
+    Profiler,
+    ProfileStore,
+    StackSampler,
+    get_profiler,
+    set_profiler,
+    to_folded,
+)
+
+
+def busy_section(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+@pytest.fixture
+def profiler():
+    profiler = Profiler(token="segredo", interval=0.002)
+    set_profiler(profiler)
+    yield profiler
+    set_profiler(None)
+
+
+class TestSampler:
+
+    def test_samples_the_target_thread(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.002).start()
+        busy_section(0.1)
+        stacks = sampler.stop()
+
+        assert sampler.samples > 5
+        hot = [stack for stack in stacks if "busy_section" in stack]
+        assert hot and all(stack.split(";")[-1].endswith("busy_section") for stack in hot)
+        # Pesos em ms de parede: cobrem a maior parte da seção amostrada
+        assert sum(stacks[stack] for stack in hot) >= 50
+
+    def test_store_is_bounded(self):
+        store = ProfileStore(capacity=2)
+        for i in range(3):
+            store.add({"id": str(i), "stacks": {"a;b": 1}})
+
+        assert [p["id"] for p in store.list()] == ["2", "1"]
+        assert store.get("0") is None
+        assert "stacks" not in store.list()[0]
+        assert to_folded({"stacks": {"a;b": 1, "a;c": 5}}) == "a;c 5\na;b 1\n"
+
+
+class TestSelection:
+
+    def test_header_token_and_rate(self):
+        assert Profiler().trigger(None) is None
+        # Sem token configurado o cabeçalho não perfila
+        assert Profiler().trigger("1") is None
+        assert Profiler().settings()["header_enabled"] is False
+        assert Profiler(token="segredo").trigger("1") is None
+        assert Profiler(token="segredo").trigger("segredo") == "header"
+        assert Profiler(rate=1.0).trigger(None) == "sample"
+
+        with pytest.raises(ValueError):
+            Profiler().set_rate(2)
+
+    def test_active_profiles_are_capped(self):
+        profiler = Profiler(max_active=1)
+        first = profiler.start("a", "header")
+        assert profiler.start("b", "header") is None
+        profiler.finish(first)
+        assert profiler.start("c", "header") is not None
+
+
+class TestHttp:
+
+    def test_fastapi_profile_by_header(self, profiler):
+        from fastapi.testclient import TestClient
+        from main_ai import app
+
+        client = TestClient(app)
+        assert "x-profile-id" not in client.get("/health").headers
+        assert len(profiler.store) == 0
+
+        profile_id = client.get("/health", headers={"X-Profile": "segredo"}).headers["x-profile-id"]
+        summary, = client.get("/admin/profiles").json()["profiles"]
+        assert summary["id"] == profile_id
+        assert (summary["name"], summary["trigger"], summary["status_code"]) == ("GET /health", "header", 200)
+        assert client.get(f"/admin/profiles/{profile_id}").status_code == 200
+        assert client.get("/admin/profiles/outro").status_code == 404
+
+        assert client.post("/admin/profiling", json={"rate": 1}).json()["rate"] == 1.0
+        assert "x-profile-id" in client.get("/health").headers
+        assert client.post("/admin/profiling", json={"rate": 5}).status_code == 400
+
+    def test_flask_profile_by_header(self, profiler):
+        from app import create_app
+
+        client = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}).test_client()
+        assert "X-Profile-ID" not in client.get("/health").headers
+
+        profile_id = client.get("/health", headers={"X-Profile": "segredo"}).headers["X-Profile-ID"]
+        profile = get_profiler().store.get(profile_id)
+        assert (profile["name"], profile["status_code"]) == ("GET /health", 200)
+        assert client.get(f"/admin/profiles/{profile_id}").mimetype == "text/plain"
+
+        assert client.post("/admin/profiling", json={"rate": 0.5}).get_json()["rate"] == 0.5
+        assert client.post("/admin/profiling", json={"rate": "lixo"}).status_code == 400
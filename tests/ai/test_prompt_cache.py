@@ -0,0 +1,164 @@
+"""
+Testes dos prefixos estáticos de prompt e da contagem de tokens em cache
+"""
+
+import json
+import sqlite3
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.benchmarks.prompt_cache import ProviderPromptCache, main, run_benchmark
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.engine import TRANSLATE_PREFIX
+from src.ai.core.llm import (
+    UsageLedger,
+    create_chat_completion,
+    prefix_for,
+    set_ledger,
+    track_usage,
+)
+from src.ai.core.llm.ledger import SCHEMA
+from src.ai.core.llm.routing import _input_tokens
+from src.ai.core.radar.engine import DEEP_ANALYSIS_PREFIX
+from src.ai.core.validator.validator import ANALYSIS_PREFIX
+
+
+def cached_client(prompt=2000, completion=100, cached=1536):
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=Mock(
+        choices=[Mock(message=Mock(content="ok"))],
+        usage=Mock(prompt_tokens=prompt, completion_tokens=completion,
+                   prompt_tokens_details={"cached_tokens": cached})
+    ))
+    return client
+
+
+class TestPrefixes:
+
+    def test_bridge_prefix_does_not_depend_on_request(self):
+        bridge = BridgeAI(client=Mock())
+        first = bridge._build_user_prompt("Measured resources.", "JORC", "NI43-101", False)
+        second = bridge._build_user_prompt("Recursos medidos.", "ANM", "PERC", True)
+
+        assert "NI43-101" in first and "PERC" in second
+        assert TRANSLATE_PREFIX.messages(first)[0] == TRANSLATE_PREFIX.messages(second)[0]
+        assert BridgeAI._build_system_prompt() == TRANSLATE_PREFIX.text
+
+    def test_engine_prefixes_are_registered(self):
+        for prefix in (TRANSLATE_PREFIX, ANALYSIS_PREFIX, DEEP_ANALYSIS_PREFIX):
+            assert prefix_for(prefix.messages("qualquer texto")) is prefix
+        with pytest.raises(KeyError):
+            prefix_for([{"role": "system", "content": "outro prompt"}])
+
+    def test_only_bridge_prefix_reaches_cache_minimum(self):
+        assert TRANSLATE_PREFIX.cacheable()
+        # Validator e Radar mantêm os prompts curtos (abaixo do mínimo)
+        assert not ANALYSIS_PREFIX.cacheable()
+        assert not DEEP_ANALYSIS_PREFIX.cacheable()
+        assert TRANSLATE_PREFIX.describe()["label"] == "bridge.translate@v2"
+
+    def test_routing_ignores_static_prefix(self):
+        messages = TRANSLATE_PREFIX.messages("Relatório curto.")
+
+        assert _input_tokens(messages, "gpt-4o") < 50
+        assert _input_tokens([{"role": "user", "content": TRANSLATE_PREFIX.text}], "gpt-4o") > 1000
+
+
+class TestProviderCache:
+
+    def test_hits_need_minimum_prefix_and_round_to_blocks(self):
+        cache = ProviderPromptCache()
+        long_prefix = TRANSLATE_PREFIX.messages
+
+        assert cache.lookup("gpt-4o", long_prefix("texto A")) == 0
+        cached = cache.lookup("gpt-4o", long_prefix("texto B"))
+        assert cached >= 1024 and cached % 128 == 0
+        # Cache por modelo
+        assert cache.lookup("gpt-4o-mini", long_prefix("texto C")) == 0
+
+    def test_short_prefix_is_not_cached(self):
+        cache = ProviderPromptCache()
+
+        cache.lookup("gpt-4o", DEEP_ANALYSIS_PREFIX.messages("[1]"))
+        assert cache.lookup("gpt-4o", DEEP_ANALYSIS_PREFIX.messages("[2]")) == 0
+
+
+@pytest.mark.asyncio
+class TestCachedTokenReporting:
+
+    async def test_cached_tokens_reach_usage_and_ledger(self):
+        ledger = UsageLedger()
+        set_ledger(ledger)
+        try:
+            with track_usage() as usage:
+                await create_chat_completion(cached_client(), site="bridge.translate", model="gpt-4o",
+                                             messages=[{"role": "user", "content": "x"}])
+            row = ledger.rollup(group_by=())[0]
+        finally:
+            set_ledger(None)
+
+        assert usage.as_dict()["cached_tokens"] == 1536
+        assert row["cached_tokens"] == 1536
+        # 464 tokens a preço cheio + 1536 pela metade + 100 de resposta
+        assert row["cost_usd"] == pytest.approx((464 + 768) * 2.5e-6 + 100 * 10e-6)
+
+    async def test_usage_without_details_reports_no_cache(self):
+        client = cached_client()
+        client.chat.completions.create.return_value.usage = Mock(prompt_tokens=10, completion_tokens=5, spec=["prompt_tokens", "completion_tokens"])
+
+        with track_usage() as usage:
+            await create_chat_completion(client, site="bridge.translate", model="gpt-4o", messages=[{"role": "user", "content": "x"}])
+
+        assert "cached_tokens" not in usage.as_dict()
+
+
+class TestLedgerMigration:
+
+    def test_existing_ledger_gains_cached_column(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA.replace("    cached_tokens INTEGER NOT NULL DEFAULT 0,\n", ""))
+        conn.close()
+
+        ledger = UsageLedger(path)
+        ledger.record("demo", "gpt-4o", 100, 10, cached_tokens=64)
+        rows = ledger.rollup(group_by=())
+        ledger.close()
+
+        assert rows[0]["cached_tokens"] == 64
+
+
+@pytest.mark.asyncio
+class TestBenchmark:
+
+    async def test_recorded_workload_is_cheaper_and_faster_with_cache(self, tmp_path):
+        archive = tmp_path / "cache.jsonl.gz"
+
+        result = await run_benchmark(rounds=2, archive=archive)
+
+        before, after = result["scenarios"]["no_cache"], result["scenarios"]["prompt_cache"]
+        assert archive.exists()
+        assert before["cached_tokens"] == 0
+        assert after["calls"] == before["calls"] and after["prompt_tokens"] == before["prompt_tokens"]
+        assert after["prefixes"]["bridge.translate@v2"]["cached_tokens"] > 0
+        assert after["prefixes"]["validator.analyze@v3"]["cached_tokens"] == 0
+        assert result["reduction"]["cost"] > 0
+        assert result["reduction"]["latency_total"] > 0
+
+        # Mesma gravação, mesmo resultado
+        again = await run_benchmark(rounds=2, archive=archive)
+        assert again["scenarios"]["prompt_cache"]["cached_tokens"] == after["cached_tokens"]
+
+
+class TestBenchmarkCLI:
+
+    def test_cli_writes_result(self, tmp_path, capsys):
+        output = tmp_path / "result.json"
+
+        assert main(["--rounds", "1", "--output", str(output)]) == 0
+
+        assert "prompt_cache" in capsys.readouterr().out
+        result = json.loads(output.read_text(encoding="utf-8"))
+        assert set(result["scenarios"]) == {"no_cache", "prompt_cache"}
+        assert {p["label"] for p in result["prefixes"]} >= {"bridge.translate@v2", "validator.analyze@v3"}
@@ -0,0 +1,249 @@
+"""
+Testes e benchmark do índice de relatórios quase duplicados (MinHash/LSH)
+
+O benchmark indexa QIVO_DEDUP_BENCH_DOCS assinaturas (padrão 20000) e mede
+tamanho do índice e latência de consulta; para a medição em 1M documentos:
+
+    QIVO_DEDUP_BENCH_DOCS=1000000 pytest tests/ai/test_report_dedup.py -k benchmark -s
+"""
+
+import os
+import random
+import time
+from array import array
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.validator import ValidatorAI
+from src.ai.core.validator.dedup import MinHasher, ReportIndex, document_id, get_report_index
+
+
+BENCH_DOCS = int(os.getenv("QIVO_DEDUP_BENCH_DOCS", "20000"))
+QUERY_BUDGET_MS = float(os.getenv("QIVO_DEDUP_QUERY_BUDGET_MS", "10"))
+
+VOCABULARY = (
+    "resource reserve measured indicated inferred drilling assay sampling grade tonnage "
+    "deposit ore gold copper competent person jorc code estimate cut-off density "
+    "metallurgical recovery mining method pit underground geology structure vein "
+    "alteration mineralisation core hole metre interval composite variogram block model"
+).split()
+
+
+def make_report(seed: int, sentences: int = 120) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def revise(text: str, changes: int = 3) -> str:
+    """Revisão: nova data no início e algumas frases reescritas"""
+    sentences = text.split(". ")
+    for i in range(changes):
+        sentences[10 + i * 30] = f"Table {i} was updated with new assay results of {i + 2}.4 g/t gold"
+    return "Report date 2026-03-01. " + ". ".join(sentences)
+
+
+DISCLOSURES = (
+    "QA/QC included certified reference materials, blanks and field duplicates.",
+    "The Competent Person is a Member of the AusIMM with relevant experience.",
+)
+
+
+def with_disclosures(text: str) -> str:
+    sentences = text.split(". ")
+    sentences[40] += ". " + DISCLOSURES[0].rstrip(".")
+    sentences[80] += ". " + DISCLOSURES[1].rstrip(".")
+    return ". ".join(sentences)
+
+
+def analysis_client(content="Análise: JORC, competent person, QA/QC e sampling descritos."):
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=Mock(
+        choices=[Mock(message=Mock(content=content))],
+        usage=Mock(prompt_tokens=100, completion_tokens=20)
+    ))
+    return client
+
+
+class TestMinHash:
+
+    def test_similarity_tracks_jaccard(self):
+        hasher = MinHasher()
+        original = make_report(1)
+
+        same = hasher.similarity(hasher.signature(original), hasher.signature(revise(original)))
+        other = hasher.similarity(hasher.signature(original), hasher.signature(make_report(2)))
+
+        assert same >= 0.8
+        assert other < 0.2
+
+    def test_signature_is_stable(self):
+        assert MinHasher().signature("Mineral Resource estimate") == MinHasher().signature("mineral resource  ESTIMATE")
+
+    def test_short_texts(self):
+        hasher = MinHasher()
+        assert len(hasher.signature("JORC")) == 128
+        assert hasher.similarity(hasher.signature(""), hasher.signature("JORC")) == 0.0
+
+
+class TestReportIndex:
+
+    def test_finds_revision_not_unrelated(self):
+        index = ReportIndex()
+        original = make_report(1)
+        index.add("original", original)
+        index.add("other", make_report(2))
+
+        matches = index.query(revise(original))
+
+        assert [m['doc_id'] for m in matches] == ["original"]
+
+    def test_changed_sections(self):
+        index = ReportIndex()
+        original = make_report(3)
+        index.add(document_id(original), original, result={'analysis': {'full_text': 'x'}})
+        revised = revise(original)
+
+        prior = index.find_analysis(revised)
+
+        assert prior['exact'] is False
+        assert len(prior['changed']) == 4
+        assert "Report date 2026-03-01." in prior['changed'][0]
+        assert 0 < prior['changed_ratio'] < 0.1
+
+    def test_deletion_only_revision(self):
+        index = ReportIndex()
+        original = with_disclosures(make_report(10))
+        index.add(document_id(original), original, result={'analysis': {'full_text': 'x'}})
+        stripped = make_report(10)
+
+        prior = index.find_analysis(stripped)
+
+        assert prior['exact'] is False
+        assert prior['changed'] == []
+        assert prior['removed'] == [d.rstrip(".") + "." for d in DISCLOSURES]
+        assert prior['changed_ratio'] > 0
+
+    def test_removed_sentences_without_stored_text(self):
+        index = ReportIndex()
+        original = with_disclosures(make_report(11))
+        index.add(document_id(original), original, result={'analysis': {'full_text': 'x'}})
+        index._conn.execute("UPDATE analyses SET passages = NULL")
+
+        prior = index.find_analysis(make_report(11))
+
+        assert len(prior['removed']) == 2
+        assert "frase(s) removida(s)" in prior['removed'][0]
+        assert prior['changed_ratio'] > 0
+
+    def test_exact_match_and_persistence(self, tmp_path):
+        path = tmp_path / "index.db"
+        text = make_report(4)
+        ReportIndex(path).add(document_id(text), text, result={'analysis': {'full_text': 'ok'}})
+
+        prior = ReportIndex(path).find_analysis(text)
+
+        assert prior['exact'] is True
+        assert prior['result'] == {'analysis': {'full_text': 'ok'}}
+
+
+class TestValidatorReuse:
+
+    async def _process(self, ai, tmp_path, name, text):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return await ai.process(str(path))
+
+    @pytest.mark.asyncio
+    async def test_exact_resubmission_skips_gpt(self, tmp_path):
+        client = analysis_client()
+        ai = ValidatorAI(client=client)
+        text = make_report(5)
+
+        first = await self._process(ai, tmp_path, "a.txt", text)
+        second = await self._process(ai, tmp_path, "b.txt", text)
+
+        assert client.chat.completions.create.await_count == 1
+        assert 'reused' not in first
+        assert second['reused']['match'] == 'exact'
+        assert second['analysis'] == first['analysis']
+        assert second['usage']['calls'] == 0
+
+    @pytest.mark.asyncio
+    async def test_revision_sends_only_changes(self, tmp_path):
+        client = analysis_client()
+        ai = ValidatorAI(client=client)
+        original = make_report(6)
+        await self._process(ai, tmp_path, "v1.txt", original)
+
+        result = await self._process(ai, tmp_path, "v2.txt", revise(original))
+
+        assert result['reused']['match'] == 'revision'
+        prompt = client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        assert "Table 1 was updated" in prompt
+        assert original.split(". ")[50] not in prompt
+        assert len(prompt) < len(original) / 3
+        assert get_report_index().stats()['analyses'] == 2
+
+    @pytest.mark.asyncio
+    async def test_deletion_only_revision_is_reanalyzed(self, tmp_path):
+        client = analysis_client()
+        ai = ValidatorAI(client=client)
+        await self._process(ai, tmp_path, "v1.txt", with_disclosures(make_report(12)))
+        calls = client.chat.completions.create.await_count
+
+        result = await self._process(ai, tmp_path, "v2.txt", make_report(12))
+
+        assert client.chat.completions.create.await_count > calls
+        assert result['reused']['match'] == 'revision'
+        assert result['reused']['removed_sections'] == 2
+        prompt = client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        assert "TRECHOS REMOVIDOS" in prompt
+        assert "Competent Person is a Member" in prompt and "field duplicates" in prompt
+
+    @pytest.mark.asyncio
+    async def test_large_change_is_reanalyzed(self, tmp_path):
+        client = analysis_client()
+        ai = ValidatorAI(client=client)
+        original = make_report(7)
+        await self._process(ai, tmp_path, "v1.txt", original)
+
+        result = await self._process(ai, tmp_path, "v2.txt", revise(original, changes=4) + " " + make_report(8, 200))
+
+        assert 'reused' not in result
+        prompt = client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        assert "ANÁLISE DA VERSÃO ANTERIOR" not in prompt
+
+
+class TestDedupBenchmark:
+
+    def test_benchmark_index_size_and_latency(self, tmp_path):
+        index = ReportIndex(tmp_path / "bench.db")
+        batch = 10000
+        for start in range(0, BENCH_DOCS, batch):
+            index.add_many(
+                (f"doc-{i}", array("I", os.urandom(4 * 128)))
+                for i in range(start, min(start + batch, BENCH_DOCS))
+            )
+        target = make_report(9)
+        index.add("target", target)
+        revised = revise(target)
+
+        runs = 50
+        started = time.perf_counter()
+        for _ in range(runs):
+            matches = index.query(signature=index.signature(revised))
+        elapsed_ms = (time.perf_counter() - started) * 1000 / runs
+
+        stats = index.stats()
+        print(
+            f"\n{stats['documents']} documentos: {stats['bytes'] / 2 ** 20:.1f} MiB "
+            f"({stats['bytes_per_document']:.0f} B/doc, ~{stats['bytes_per_document'] * 1e6 / 2 ** 30:.2f} GiB em 1M); "
+            f"consulta {elapsed_ms:.2f} ms"
+        )
+        assert matches[0]['doc_id'] == "target"
+        assert elapsed_ms < QUERY_BUDGET_MS
+        assert stats['bytes_per_document'] < 2048
@@ -0,0 +1,145 @@
+"""
+Testes do single-flight (chamadas idênticas simultâneas numa só execução)
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.singleflight import SINGLEFLIGHT_CALLS, SingleFlight
+
+
+TEXT = "Os recursos medidos foram estimados por pessoa competente com QA/QC completo."
+
+
+def slow_client(payload, delay=0.05):
+    response = Mock(
+        choices=[Mock(message=Mock(content=json.dumps(payload)))],
+        usage=Mock(prompt_tokens=80, completion_tokens=20)
+    )
+
+    async def create(**_params):
+        await asyncio.sleep(delay)
+        return response
+
+    client = Mock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    return client
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+
+    async def test_identical_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"value": [1, 2]}
+
+        before = SINGLEFLIGHT_CALLS.value(operation="demo", role="coalesced")
+        results = await asyncio.gather(*(flights.do("demo", "k", run) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(r == {"value": [1, 2]} for r in results)
+        assert results[0] is not results[1]
+        assert SINGLEFLIGHT_CALLS.value(operation="demo", role="coalesced") == before + 4
+        assert len(flights) == 0
+
+        # Terminada a execução, a próxima chamada executa de novo
+        await flights.do("demo", "k", run)
+        assert len(calls) == 2
+
+    async def test_cancelling_a_waiter_keeps_shared_call(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def run():
+            await release.wait()
+            return "ok"
+
+        first = asyncio.create_task(flights.do("demo", "k", run))
+        second = asyncio.create_task(flights.do("demo", "k", run))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_errors_are_shared_not_cached(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("falhou")
+
+        results = await asyncio.gather(*(flights.do("demo", "k", run) for _ in range(3)), return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        with pytest.raises(RuntimeError):
+            await flights.do("demo", "k", run)
+        assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+class TestBridgeCoalescing:
+
+    async def test_thundering_herd_costs_one_llm_call(self):
+        from src.ai.core.bridge import BridgeAI
+
+        client = slow_client({"translated_text": "Measured resources were estimated.", "confidence": 90, "semantic_mapping": {}})
+        bridge = BridgeAI(client=client)
+
+        results = await asyncio.gather(*(
+            bridge.translate_normative(TEXT, "ANM", "JORC", use_memory=False) for _ in range(8)
+        ))
+
+        assert client.chat.completions.create.await_count == 1
+        assert {r["translated_text"] for r in results} == {"Measured resources were estimated."}
+        # Só o primeiro chamador reporta o consumo: a soma bate com a chamada única
+        waiters = [r for r in results if r.get("coalesced")]
+        assert len(waiters) == 7
+        assert all(r["usage"]["total_tokens"] == 0 for r in waiters)
+        assert sum(r["usage"]["total_tokens"] for r in results) == 100
+
+        other = await bridge.translate_normative(TEXT, "ANM", "NI43-101", use_memory=False)
+        assert other["status"] == "success"
+        assert client.chat.completions.create.await_count == 2
+
+    async def test_engine_settings_are_part_of_the_key(self):
+        from src.ai.core.bridge import BridgeAI
+
+        client = slow_client({"translated_text": "Measured resources were estimated.", "confidence": 90, "semantic_mapping": {}})
+        default, small = BridgeAI(client=client), BridgeAI(client=client)
+        small.max_input_tokens = 10
+
+        results = await asyncio.gather(
+            default.translate_normative(TEXT, "ANM", "JORC", use_memory=False),
+            small.translate_normative(TEXT, "ANM", "JORC", use_memory=False)
+        )
+
+        assert client.chat.completions.create.await_count == 2
+        assert not any(r.get("coalesced") for r in results)
+
+    async def test_uncached_comparisons_are_coalesced(self):
+        from src.ai.core.bridge import BridgeAI
+
+        client = slow_client({"main_differences": ["a"], "key_equivalences": {}})
+        bridge = BridgeAI(client=client)
+
+        results = await asyncio.gather(*(
+            bridge.explain_norm_difference("ANM", "JORC", use_cache=False) for _ in range(4)
+        ))
+
+        assert client.chat.completions.create.await_count == 1
+        assert all(r["status"] == "success" for r in results)
+        assert sum(1 for r in results if r.get("coalesced")) == 3
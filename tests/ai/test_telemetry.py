@@ -0,0 +1,180 @@
+"""
+Testes das métricas do processo (/metrics) e dos cronômetros por etapa
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core import telemetry
+from src.ai.core.llm import ResilientCaller, create_chat_completion, get_governor, set_resilience
+from src.ai.core.radar.engine import RadarEngine
+from src.ai.core.telemetry import (
+    CACHE_LOOKUPS,
+    LLM_QUEUE_WAIT_SECONDS,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+    stage,
+    track_stages,
+)
+from src.ai.core.validator import ValidatorAI
+
+
+REPORT = (
+    "Technical Report. The Mineral Resource was estimated under the JORC Code by a Competent Person. "
+    "Sampling and assay QA/QC used certified reference material and blanks. "
+) * 5
+
+
+async def no_sleep(_seconds):
+    return None
+
+
+def completion_client(content="Análise: JORC, competent person e QA/QC descritos."):
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=Mock(
+        choices=[Mock(message=Mock(content=content))],
+        usage=Mock(prompt_tokens=120, completion_tokens=30)
+    ))
+    return client
+
+
+class TestRegistry:
+
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("demo_requests", "Requisições", ("route",))
+        latency = registry.histogram("demo_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+        requests.inc(route='/a"b')
+        requests.inc(2, route='/a"b')
+        latency.observe(0.05, route="/x")
+        latency.observe(0.5, route="/x")
+        latency.observe(5, route="/x")
+
+        text = registry.render()
+
+        assert "# TYPE demo_requests_total counter" in text
+        assert 'demo_requests_total{route="/a\\"b"} 3' in text
+        assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{route="/x",le="1.0"} 2' in text
+        assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in text
+        assert 'demo_seconds_count{route="/x"} 3' in text
+
+    def test_same_name_returns_same_metric(self):
+        registry = MetricsRegistry()
+        assert registry.counter("x", "x", ("a",)) is registry.counter("x", "x", ("a",))
+        with pytest.raises(ValueError):
+            registry.histogram("x", "x", ("a",))
+        with pytest.raises(ValueError):
+            registry.counter("x", "x", ("a",)).inc(b=1)
+
+    def test_collectors_run_on_render(self):
+        registry = MetricsRegistry()
+        registry.add_collector(lambda: [("demo_queue", "gauge", "Fila", [({}, 4)])])
+        assert "demo_queue 4" in registry.render()
+
+
+class TestStages:
+
+    @pytest.mark.asyncio
+    async def test_stage_timings_include_child_tasks(self):
+        before = STAGE_SECONDS.snapshot(pipeline="demo", stage="work")["count"]
+
+        async def work():
+            with stage("demo", "work"):
+                await asyncio.sleep(0.01)
+
+        with track_stages("demo") as timings:
+            await asyncio.gather(work(), work())
+
+        assert timings["work"] >= 0.02
+        assert timings["total"] >= 0.01
+        assert STAGE_SECONDS.snapshot(pipeline="demo", stage="work")["count"] == before + 2
+
+    def test_stage_outside_tracker_only_feeds_histogram(self):
+        with stage("demo", "alone"):
+            pass
+        assert STAGE_SECONDS.snapshot(pipeline="demo", stage="alone")["count"] >= 1
+
+
+@pytest.mark.asyncio
+class TestInstrumentation:
+
+    async def test_validator_process_reports_stages(self, tmp_path):
+        path = tmp_path / "report.txt"
+        path.write_text(REPORT, encoding="utf-8")
+        ai = ValidatorAI(client=completion_client())
+        tokens_before = LLM_TOKENS.value(site="validator.analyze", model=ai.model, kind="prompt")
+        misses_before = CACHE_LOOKUPS.value(cache="report_index", result="miss")
+
+        result = await ai.process(str(path))
+
+        assert {"extract", "clean", "dedup", "llm", "scoring", "index", "total"} <= set(result["timings"])
+        assert result["timings"]["total"] >= result["timings"]["llm"]
+        assert LLM_TOKENS.value(site="validator.analyze", model=ai.model, kind="prompt") == tokens_before + 120
+        assert CACHE_LOOKUPS.value(cache="report_index", result="miss") == misses_before + 1
+
+        again = await ai.process(str(path))
+        assert again["reused"]["match"] == "exact"
+        assert "llm" not in again["timings"]
+
+    async def test_retries_and_queue_wait_are_counted(self):
+        set_resilience(ResilientCaller(max_retries=2, sleep=no_sleep))
+        client = completion_client()
+        ok = client.chat.completions.create.return_value
+        client.chat.completions.create = AsyncMock(side_effect=[asyncio.TimeoutError(), ok])
+        retries_before = LLM_RETRIES.value(model="gpt-4o")
+        waits_before = LLM_QUEUE_WAIT_SECONDS.snapshot(priority="interactive")["count"]
+
+        await create_chat_completion(client, site="demo", model="gpt-4o", messages=[{"role": "user", "content": "x"}])
+
+        assert LLM_RETRIES.value(model="gpt-4o") == retries_before + 1
+        assert LLM_QUEUE_WAIT_SECONDS.snapshot(priority="interactive")["count"] == waits_before + 2
+        assert telemetry.LLM_REQUEST_SECONDS.snapshot(site="demo", model="gpt-4o", outcome="error")["count"] >= 1
+
+    async def test_radar_cycle_timings(self):
+        radar = RadarEngine(client=Mock())
+
+        result = await radar.run_cycle(sources=["JORC"])
+
+        assert {"fetch", "analyze", "alerts", "total"} <= set(result["timings"])
+
+
+class TestMetricsEndpoints:
+
+    def test_fastapi_metrics(self):
+        from fastapi.testclient import TestClient
+        from main_ai import app
+
+        get_governor()
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE qivo_stage_duration_seconds histogram" in response.text
+        assert "qivo_llm_in_flight" in response.text
+
+    def test_flask_metrics(self):
+        from app import create_app
+
+        client = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "TESTING": True}).test_client()
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "# TYPE qivo_llm_tokens_total counter" in response.get_data(as_text=True)
+
+    def test_radar_processing_time_comes_from_timings(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        from app.modules.radar import routes
+        from main_ai import app
+
+        radar = RadarEngine(client=Mock())
+        monkeypatch.setattr(routes, "_radar_engine", radar)
+
+        body = TestClient(app).post("/api/radar/analyze", json={"sources": ["JORC"]}).json()
+
+        assert body["timings"]["total"] > 0
+        assert body["processing_time"] == round(body["timings"]["total"], 2)
@@ -0,0 +1,194 @@
+"""
+Testes do orçamento de tokens dos prompts e do uso reportado nas respostas
+"""
+
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.llm import (
+    PromptBudget,
+    batch_by_tokens,
+    context_window,
+    count_tokens,
+    create_chat_completion,
+    split_tokens,
+    track_usage,
+    truncate_tokens,
+)
+from src.ai.core.llm import budget as budget_module
+from src.ai.core.llm import tokens as tokens_module
+from src.ai.core.radar.engine import RadarEngine
+from src.ai.core.validator import ValidatorAI
+
+
+class CharEncoding:
+    """Encoder de teste: um token por caractere, dois para cirílico"""
+
+    def encode(self, text, disallowed_special=()):
+        tokens = []
+        for char in text:
+            tokens.extend([ord(char)] * (2 if 'Ѐ' <= char <= 'ӿ' else 1))
+        return tokens
+
+    def decode_with_offsets(self, tokens):
+        text, offsets, i = '', [], 0
+        while i < len(tokens):
+            char = chr(tokens[i])
+            offsets.append(len(text))
+            width = 2 if 'Ѐ' <= char <= 'ӿ' else 1
+            if width == 2 and i + 1 < len(tokens):
+                offsets.append(len(text))
+            text += char
+            i += width
+        return text, offsets
+
+
+@pytest.fixture
+def char_encoding(monkeypatch):
+    encoding = CharEncoding()
+    monkeypatch.setattr(tokens_module, 'get_encoding', lambda model: encoding)
+    monkeypatch.setattr(budget_module, 'get_encoding', lambda model: encoding)
+    return encoding
+
+
+def completion_client(content, usage=None):
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=Mock(
+        choices=[Mock(message=Mock(content=content))],
+        usage=usage
+    ))
+    return client
+
+
+class TestTrimAndChunk:
+
+    def test_truncate_is_exact(self, char_encoding):
+        text = "Запасы категории C1 " * 10
+
+        head = truncate_tokens(text, 25)
+
+        assert count_tokens(head) <= 25
+        assert count_tokens(text[:len(head) + 1]) > 25
+        assert text.startswith(head)
+
+    def test_split_is_lossless(self, char_encoding):
+        text = "Reservas C1 e C2; запасы руды. " * 20
+
+        pieces = split_tokens(text, 37)
+
+        assert "".join(pieces) == text
+        assert all(count_tokens(piece) <= 37 for piece in pieces)
+
+    def test_fallback_without_tiktoken(self, monkeypatch):
+        monkeypatch.setattr(tokens_module, 'get_encoding', lambda model: None)
+        monkeypatch.setattr(budget_module, 'get_encoding', lambda model: None)
+        text = "x" * 1000
+
+        assert count_tokens(truncate_tokens(text, 10)) == 10
+        assert "".join(split_tokens(text, 30)) == text
+
+    def test_batch_by_tokens(self):
+        items = [{"id": i, "text": "y" * 80} for i in range(10)]
+
+        batches = list(batch_by_tokens(items, 70))
+
+        assert [item for batch in batches for item in batch] == items
+        assert len(batches) > 1
+        assert all(len(batch) >= 1 for batch in batches)
+
+
+class TestPromptBudget:
+
+    def test_context_window_by_prefix(self):
+        assert context_window("gpt-4o-mini-2024-07-18") == 128000
+        assert context_window("gpt-4-0613") == 8192
+
+    def test_completion_clamped_to_window(self):
+        budget = PromptBudget("gpt-4", max_completion_tokens=4000)
+        messages = [{"role": "user", "content": "a" * 4 * 6000}]
+
+        assert budget.max_prompt_tokens == 8192 - 4000
+        assert budget.completion_tokens(messages) < 4000
+        assert budget.measure(messages) + budget.completion_tokens(messages) <= 8192
+
+    def test_available_discounts_fixed_prompt(self):
+        budget = PromptBudget("gpt-4o", 1000, max_prompt_tokens=500)
+        fixed = [{"role": "system", "content": "s" * 400}]
+
+        assert budget.available(fixed) == 500 - budget.measure(fixed)
+        assert count_tokens(budget.fit("z" * 10000, fixed)) == budget.available(fixed)
+
+
+class TestUsageTracking:
+
+    @pytest.mark.asyncio
+    async def test_provider_usage_is_accumulated(self):
+        client = completion_client("ok", usage=Mock(prompt_tokens=120, completion_tokens=30))
+
+        with track_usage() as outer:
+            with track_usage() as inner:
+                await create_chat_completion(client, site="test", model="gpt-4o", messages=[])
+            await create_chat_completion(client, site="test", model="gpt-4o", messages=[])
+
+        assert inner.as_dict() == {'prompt_tokens': 120, 'completion_tokens': 30, 'total_tokens': 150, 'calls': 1}
+        assert outer.as_dict()['total_tokens'] == 300
+        assert outer.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_usage_is_estimated(self):
+        client = completion_client("resposta " * 10, usage=None)
+        messages = [{"role": "user", "content": "pergunta " * 20}]
+
+        with track_usage() as usage:
+            await create_chat_completion(client, site="test", model="gpt-4o", messages=messages)
+
+        report = usage.as_dict()
+        assert report['estimated'] is True
+        assert report['prompt_tokens'] > report['completion_tokens'] > 0
+
+
+class TestEngineBudgets:
+
+    @pytest.mark.asyncio
+    async def test_validator_reports_usage(self):
+        client = completion_client("JORC ok", usage=Mock(prompt_tokens=900, completion_tokens=50))
+
+        result = await ValidatorAI(client=client).validate_text("Relatório técnico. " * 20)
+
+        assert result['usage']['total_tokens'] == 950
+        params = client.chat.completions.create.call_args.kwargs
+        assert params['max_tokens'] == 2000
+
+    @pytest.mark.asyncio
+    async def test_bridge_trims_by_tokens(self):
+        reply = {"translated_text": "Reserves.", "confidence": 80, "semantic_mapping": {}}
+        client = completion_client(json.dumps(reply), usage=Mock(prompt_tokens=400, completion_tokens=20))
+        ai = BridgeAI(client=client)
+        ai.max_input_tokens = 100
+        text = "Запасы категории C1 утверждены ГКЗ. " * 40
+
+        result = await ai.translate_normative(text, "PERC", "JORC", use_memory=False)
+
+        prompt = client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        sent = next(line for line in prompt.splitlines() if "Запасы" in line)
+        assert count_tokens(sent) <= 100
+        assert sent.rstrip().endswith(".")
+        assert result['translated_text'].endswith("[... texto truncado ...]")
+        assert result['usage']['prompt_tokens'] == 400
+
+    @pytest.mark.asyncio
+    async def test_radar_deep_analysis_batches(self):
+        client = completion_client(json.dumps({"analysis": []}), usage=Mock(prompt_tokens=10, completion_tokens=5))
+        radar = RadarEngine(client=client)
+        radar.deep_prompt_tokens = 700
+        changes = [{"source": "ANM", "title": f"Resolução {i}", "summary": "s" * 300} for i in range(8)]
+
+        await radar._deep_analyze_changes(changes)
+
+        assert client.chat.completions.create.await_count > 1
+        for call in client.chat.completions.create.call_args_list:
+            messages = call.kwargs['messages']
+            assert PromptBudget(radar.deep_model, 2000).measure(messages) <= 700
@@ -0,0 +1,179 @@
+"""
+Testes dos spans de tracing (conectores -> engines -> LLM) e da análise offline
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core import tracing
+from src.ai.core.llm import ResilientCaller, create_chat_completion, set_resilience
+from src.ai.core.telemetry import stage, track_stages
+from src.ai.core.tracing import (
+    FileExporter,
+    InMemoryExporter,
+    Tracer,
+    critical_path,
+    format_trace,
+    load_spans,
+    parse_traceparent,
+    set_tracer,
+    span,
+)
+
+
+async def no_sleep(_seconds):
+    return None
+
+
+def json_client(payload):
+    response = Mock(
+        choices=[Mock(message=Mock(content=json.dumps(payload)))],
+        usage=Mock(prompt_tokens=80, completion_tokens=20)
+    )
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    set_tracer(Tracer([exporter]))
+    yield exporter
+    set_tracer(None)
+
+
+def children(exporter, parent):
+    return [s for s in exporter.spans if s.parent_id == parent.span_id]
+
+
+class TestSpans:
+
+    @pytest.mark.asyncio
+    async def test_context_propagates_to_child_tasks(self, exporter):
+        async def hop(name):
+            with span(name):
+                await asyncio.sleep(0)
+
+        with span("root") as root:
+            await asyncio.gather(hop("a"), hop("b"))
+
+        assert {s.name for s in children(exporter, root)} == {"a", "b"}
+        assert {s.trace_id for s in exporter.spans} == {root.trace_id}
+        assert tracing.current_span() is None
+
+    def test_error_status_and_stage_spans(self, exporter):
+        with pytest.raises(ValueError):
+            with track_stages("demo", **{"norm.source": "JORC"}):
+                with stage("demo", "work"):
+                    raise ValueError("falhou")
+
+        work, = exporter.by_name("demo.work")
+        root, = exporter.by_name("demo")
+        assert work.parent_id == root.span_id
+        assert work.status == "error" and "falhou" in work.error
+        assert root.attributes["norm.source"] == "JORC"
+
+    def test_traceparent(self, exporter):
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        assert parse_traceparent(header) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+        assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+        assert parse_traceparent("lixo") is None
+
+        with span("remote", traceparent=header) as current:
+            pass
+        assert current.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert current.parent_id == "00f067aa0ba902b7"
+
+    def test_http_middleware_continues_trace(self, exporter):
+        from fastapi.testclient import TestClient
+        from main_ai import app
+
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        response = TestClient(app).get("/health", headers={"traceparent": header})
+
+        request_span, = exporter.by_name("GET /health")
+        assert request_span.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert request_span.attributes["http.status_code"] == 200
+        assert response.headers["traceparent"] == request_span.traceparent
+
+
+@pytest.mark.asyncio
+class TestInstrumentation:
+
+    async def test_llm_span_records_tokens_and_retries(self, exporter):
+        set_resilience(ResilientCaller(max_retries=2, sleep=no_sleep))
+        client = json_client({"ok": True})
+        ok = client.chat.completions.create.return_value
+        client.chat.completions.create = AsyncMock(side_effect=[asyncio.TimeoutError(), ok])
+
+        await create_chat_completion(client, site="demo", model="gpt-4o", messages=[{"role": "user", "content": "x"}])
+
+        chat, = exporter.by_name("llm.chat")
+        attempts = exporter.by_name("llm.attempt")
+        assert chat.attributes["llm.site"] == "demo"
+        assert chat.attributes["llm.retries"] == 1
+        assert chat.attributes["llm.tokens.prompt"] == 80
+        assert chat.attributes["llm.tokens.completion"] == 20
+        assert [a.status for a in attempts] == ["error", "ok"]
+        assert all(a.parent_id == chat.span_id for a in attempts)
+        assert "llm.queue_wait_ms" in attempts[-1].attributes
+
+    async def test_cross_module_report_trace(self, exporter):
+        from app.services.integrations.radar_connector import RadarConnector
+
+        client = json_client({"translated_text": "Traduzido.", "confidence": 88, "semantic_mapping": {}})
+        connector = RadarConnector(client=client)
+        alert = {"source": "ANM", "severity": "High", "summary": "Nova exigência de auditoria de barragens."}
+
+        await connector.generate_cross_module_report([alert])
+        await connector.generate_cross_module_report([alert])
+
+        first, second = exporter.by_name("connector.radar.cross_module_report")
+        assert first.trace_id != second.trace_id
+
+        translate = [s for s in exporter.by_name("connector.radar.translate") if s.trace_id == first.trace_id]
+        assert {(s.attributes["norm.source"], s.attributes["norm.target"]) for s in translate} == {
+            ("ANM", "JORC"), ("ANM", "NI43-101")
+        }
+        bridge = [s for s in exporter.by_name("bridge") if s.trace_id == first.trace_id]
+        assert {s.parent_id for s in bridge} == {s.span_id for s in translate}
+
+        chats = [s for s in exporter.by_name("llm.chat") if s.trace_id == first.trace_id]
+        assert len(chats) == 2
+        assert all(s.attributes["llm.tokens.prompt"] == 80 for s in chats)
+
+        # Segunda execução: segmentos saem da memória de tradução, sem LLM
+        resolve = [s for s in exporter.by_name("bridge.resolve") if s.trace_id == second.trace_id]
+        assert all(s.attributes.get("cache.translation_memory.exact_hit") == 1 for s in resolve)
+        assert not [s for s in exporter.by_name("llm.chat") if s.trace_id == second.trace_id]
+
+
+class TestOfflineAnalysis:
+
+    def test_file_export_and_critical_path(self, tmp_path, capsys):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer([FileExporter(path)])
+
+        async def flow():
+            with tracer.start_span("report"):
+                async def hop(name, seconds):
+                    with tracer.start_span(name):
+                        await asyncio.sleep(seconds)
+
+                await asyncio.gather(hop("fast", 0.01), hop("slow", 0.05))
+                await hop("tail", 0.01)
+
+        asyncio.run(flow())
+
+        spans = load_spans(path)
+        assert len(spans) == 4
+        assert [item["name"] for item in critical_path(spans)] == ["report", "slow", "tail"]
+        tree = format_trace(spans)
+        assert "* report" in tree and "*   slow" in tree and "    fast" in tree
+
+        assert tracing.main([str(path), "--last"]) == 0
+        assert "caminho crítico:" in capsys.readouterr().out
@@ -0,0 +1,183 @@
+"""
+Testes da memória de tradução por segmento do Bridge AI
+"""
+
+import json
+import sqlite3
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.bridge import BridgeAI
+from src.ai.core.bridge.memory import (
+    SCHEMA,
+    TranslationMemory,
+    get_translation_memory,
+    segment_text,
+)
+
+
+QAQC = "O programa de QA/QC incluiu inserção de brancos, duplicatas e materiais de referência certificados."
+CP = "As estimativas foram revisadas pelo geólogo responsável pela campanha de sondagem."
+
+
+def fake_client(*payloads):
+    responses = []
+    for payload in payloads:
+        response = Mock()
+        response.choices = [Mock(message=Mock(content=json.dumps(payload)))]
+        response.usage = None
+        responses.append(response)
+    client = Mock()
+    client.chat.completions.create = AsyncMock(side_effect=responses)
+    return client
+
+
+class TestSegmentation:
+
+    def test_reassembles_exactly(self):
+        text = "  Primeira frase. Segunda frase!\n\nNovo parágrafo; com 2,5 g/t Au. fim"
+        pieces = segment_text(text)
+        assert "".join(segment + sep for segment, sep in pieces) == text
+        assert [segment for segment, _ in pieces if segment] == [
+            "Primeira frase.", "Segunda frase!", "Novo parágrafo; com 2,5 g/t Au. fim"
+        ]
+
+
+class TestTranslationMemory:
+
+    def test_exact_match_ignores_case_and_spacing(self, tmp_path):
+        memory = TranslationMemory(tmp_path / "tm.db")
+        memory.store(QAQC, "The QA/QC program...", "ANM", "JORC", confidence=90)
+
+        hit = memory.lookup("  " + QAQC.upper().replace(" ", "  "), "ANM", "JORC")
+        assert hit["match"] == "exact"
+        assert memory.lookup(QAQC, "ANM", "NI43-101") is None
+
+    def test_fuzzy_match(self):
+        memory = TranslationMemory()
+        memory.store(QAQC, "The QA/QC program...", "ANM", "JORC", confidence=90)
+
+        hit = memory.lookup(QAQC.replace("incluiu", "inclui"), "ANM", "JORC")
+        assert hit["match"] == "fuzzy"
+        assert hit["similarity"] >= 0.92
+
+    def test_fuzzy_requires_same_numbers(self):
+        memory = TranslationMemory()
+        memory.store("Recursos medidos de 10 Mt com teor médio de 2,1 g/t.", "x", "ANM", "JORC", confidence=90)
+
+        assert memory.lookup("Recursos medidos de 12 Mt com teor médio de 2,1 g/t.", "ANM", "JORC") is None
+
+    def test_low_confidence_not_stored(self):
+        memory = TranslationMemory(min_confidence=70)
+        assert memory.store(QAQC, "ruim", "ANM", "JORC", confidence=40) is False
+        assert memory.stats()["segments"] == 0
+
+    def test_persists_and_reports_hit_rate(self, tmp_path):
+        path = tmp_path / "tm.db"
+        TranslationMemory(path).store(QAQC, "The QA/QC program...", "ANM", "JORC", confidence=90)
+
+        memory = TranslationMemory(path)
+        memory.lookup(QAQC, "ANM", "JORC")
+        memory.lookup(CP, "ANM", "JORC")
+        stats = memory.stats()
+        assert stats["segments"] == 1
+        assert stats["exact_hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_other_version_is_not_served(self):
+        memory = TranslationMemory()
+        memory.store(QAQC, "The QA/QC program...", "ANM", "JORC", confidence=90, version="v1", model="gpt-4o")
+
+        assert memory.lookup(QAQC, "ANM", "JORC", version="v2") is None
+        assert memory.lookup(QAQC.replace("incluiu", "inclui"), "ANM", "JORC", version="v2") is None
+        assert memory.lookup(QAQC, "ANM", "JORC", version="v1")["match"] == "exact"
+
+    def test_existing_memory_gains_version_columns(self, tmp_path):
+        path = tmp_path / "tm.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA.replace("    version TEXT NOT NULL DEFAULT '',\n    model TEXT,\n", ""))
+        conn.execute(
+            "INSERT INTO segments (key, source_norm, target_norm, normalized, source_text, target_text, origin, created_at) "
+            "VALUES ('k', 'ANM', 'JORC', 'x', 'x', 'y', 'gpt', '2025-01-01')"
+        )
+        conn.commit()
+        conn.close()
+
+        memory = TranslationMemory(path)
+        memory.store(QAQC, "The QA/QC program...", "ANM", "JORC", confidence=90, version="v1", model="gpt-4o")
+
+        assert memory.lookup(QAQC, "ANM", "JORC", version="v1")["match"] == "exact"
+        assert memory.stats()["segments"] == 2
+
+
+@pytest.mark.asyncio
+class TestBridgeWithMemory:
+
+    async def test_only_unseen_segments_go_to_gpt(self):
+        client = fake_client(
+            {
+                "translated_text": "The QA/QC program... The estimates...",
+                "confidence": 90,
+                "segments": ["The QA/QC program...", "The estimates..."]
+            },
+            {"translated_text": "New sentence.", "confidence": 80}
+        )
+        bridge = BridgeAI(client=client)
+
+        first = await bridge.translate_normative(f"{QAQC} {CP}", "ANM", "JORC")
+        assert first["method"] == "gpt"
+        assert first["memory"]["misses"] == 2
+        assert first["translated_text"] == "The QA/QC program... The estimates..."
+
+        novel = "Foi identificada uma nova zona mineralizada no setor norte."
+        second = await bridge.translate_normative(f"{QAQC}\n\n{novel} {CP}", "ANM", "JORC")
+
+        assert second["status"] == "success"
+        assert second["translated_text"] == "The QA/QC program...\n\nNew sentence. The estimates..."
+        assert [s["provenance"] for s in second["segments"]] == ["memory_exact", "gpt", "memory_exact"]
+        assert second["memory"]["hit_rate"] == round(2 / 3, 4)
+
+        # Segundo prompt só com o segmento inédito
+        user_prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert novel in user_prompt and QAQC not in user_prompt
+
+    async def test_fully_remembered_text_skips_gpt(self):
+        client = fake_client({"translated_text": "The QA/QC program...", "confidence": 90})
+        bridge = BridgeAI(client=client)
+
+        await bridge.translate_normative(QAQC, "ANM", "JORC")
+        result = await bridge.translate_normative(QAQC, "ANM", "JORC")
+
+        assert result["method"] == "memory"
+        assert result["confidence"] == 90
+        assert client.chat.completions.create.await_count == 1
+
+    async def test_memory_can_be_bypassed(self):
+        client = fake_client(
+            {"translated_text": "A", "confidence": 90},
+            {"translated_text": "B", "confidence": 90}
+        )
+        bridge = BridgeAI(client=client)
+
+        await bridge.translate_normative(QAQC, "ANM", "JORC")
+        result = await bridge.translate_normative(QAQC, "ANM", "JORC", use_memory=False)
+
+        assert result["translated_text"] == "B"
+        assert client.chat.completions.create.await_count == 2
+
+    async def test_prompt_version_change_invalidates_memory(self):
+        client = fake_client(
+            {"translated_text": "A", "confidence": 90},
+            {"translated_text": "B", "confidence": 90}
+        )
+        bridge = BridgeAI(client=client)
+
+        await bridge.translate_normative(QAQC, "ANM", "JORC")
+        bridge.TRANSLATE_PROMPT_VERSION += 1
+        result = await bridge.translate_normative(QAQC, "ANM", "JORC")
+
+        assert result["method"] == "gpt"
+        assert result["translated_text"] == "B"
+        row = get_translation_memory()._conn.execute("SELECT version, model FROM segments").fetchone()
+        assert row == (bridge._memory_version(), result["route"]["model"])
@@ -0,0 +1,186 @@
+"""
+Testes do gate de pré-avaliação local do Validator
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai.core.validator import ValidatorAI
+from src.ai.core.validator.dedup import get_report_index
+from src.ai.core.validator.gate import (
+    GATE_AGREEMENT,
+    GATE_DECISIONS,
+    PreScoringGate,
+    drain_background,
+    get_gate,
+    main,
+)
+from src.ai.core.validator.preprocessor import DocumentPreprocessor
+
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "norm_reports"
+
+REPORT = (
+    "Mineral Resource and Ore Reserve statement prepared under the JORC Code and "
+    "reconciled to NI 43-101 and CIM definitions by the Competent Person and "
+    "Qualified Person. Measured, Indicated and Inferred resources total 42.5 Mt at "
+    "1.8 g/t Au; Proven and Probable reserves total 18 Mt. Sampling, assay, QA/QC, "
+    "quality assurance, quality control, blanks, duplicate samples and certified "
+    "reference material (CRM) checks were audited for compliance with the standard "
+    "and regulation requirements. Gas volumes follow PRMS 1P, 2P and 3P categories "
+    "as proved, probable and possible contingent resource estimates. "
+) * 6
+
+OFF_TOPIC = (
+    "A empresa inaugurou um novo escritório comercial no centro da cidade, com "
+    "salas de reunião, refeitório e estacionamento para os colaboradores. "
+) * 20
+
+ANALYSIS = (
+    "Relatório aderente ao JORC e ao NI 43-101: a pessoa competente e a qualified person "
+    "estão identificadas, recursos measured, indicated e inferred e reservas proven e "
+    "probable classificados. QA/QC com sampling, assay, duplicate e CRM descritos; "
+    "compliance com a regulation e o standard auditada. PRMS 1P, 2P e 3P citados. "
+) * 4
+
+
+def analysis_client(content=ANALYSIS):
+    client = Mock()
+    client.chat.completions.create = AsyncMock(return_value=Mock(
+        choices=[Mock(message=Mock(content=content))],
+        usage=Mock(prompt_tokens=100, completion_tokens=20)
+    ))
+    return client
+
+
+def clean(text):
+    return DocumentPreprocessor()._clean_text(text)
+
+
+class TestAssessment:
+
+    def test_off_topic_document_is_rejected(self):
+        assessment = PreScoringGate().assess(clean(OFF_TOPIC))
+
+        assert assessment['decision'] == 'reject'
+        assert not any(ok for name, ok in assessment['structure'].items() if name != 'length')
+
+    def test_complete_report_is_accepted(self):
+        assessment = PreScoringGate().assess(clean(REPORT))
+
+        assert assessment['decision'] == 'accept'
+        assert all(assessment['structure'].values())
+        assert assessment['pre_score'] >= 90
+
+    def test_norm_reports_are_never_rejected(self):
+        gate = PreScoringGate()
+
+        decisions = {
+            path.name: gate.assess(clean(path.read_text(encoding="utf-8")))['decision']
+            for path in FIXTURES.glob("*.txt")
+        }
+
+        assert decisions
+        assert 'reject' not in decisions.values()
+
+    def test_evaluate_measures_agreement(self):
+        gate = PreScoringGate()
+        samples = [(clean(OFF_TOPIC), 10), (clean(REPORT), 90), (clean(REPORT), 70), (clean("JORC " * 50), 60)]
+
+        report = gate.evaluate(samples)
+
+        assert report['samples'] == 4
+        assert report['coverage'] == 0.75
+        assert report['agreement'] == round(2 / 3, 4)
+        assert report['by_decision']['accept'] == {'documents': 2, 'agreement': 0.5}
+        assert report['confusion']['accept'] == {'accept': 1, 'gpt': 1}
+
+    def test_env_configuration(self, monkeypatch):
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE", "skip")
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE_HIGH", "95")
+
+        gate = get_gate()
+
+        assert (gate.mode, gate.low, gate.high) == ("skip", 20.0, 95.0)
+        with pytest.raises(ValueError):
+            PreScoringGate(mode="sometimes")
+
+    def test_cli_reads_labeled_jsonl(self, tmp_path, capsys):
+        path = tmp_path / "labeled.jsonl"
+        path.write_text("\n".join(json.dumps({"text": clean(t), "gpt_score": s})
+                                  for t, s in [(OFF_TOPIC, 5), (REPORT, 85)]), encoding="utf-8")
+
+        assert main([str(path)]) == 0
+
+        report = json.loads(capsys.readouterr().out)
+        assert (report['coverage'], report['agreement']) == (1.0, 1.0)
+
+
+@pytest.mark.asyncio
+class TestValidatorIntegration:
+
+    async def _process(self, ai, tmp_path, name, text):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return await ai.process(str(path))
+
+    async def test_skip_mode_answers_without_gpt(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE", "skip")
+        client = analysis_client()
+        rejected_before = GATE_DECISIONS.value(decision="reject")
+
+        result = await self._process(ValidatorAI(client=client), tmp_path, "memo.txt", OFF_TOPIC)
+
+        assert result['status'] == 'success'
+        assert result['provisional'] is True
+        assert result['gate']['decision'] == 'reject'
+        assert result['gate']['gpt_analysis'] == 'skipped'
+        assert result['compliance']['risk_level'] == 'crítico'
+        assert result['usage']['calls'] == 0
+        assert 'gate' in result['timings'] and 'llm' not in result['timings']
+        assert GATE_DECISIONS.value(decision="reject") == rejected_before + 1
+        client.chat.completions.create.assert_not_awaited()
+
+    async def test_async_mode_completes_in_background(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE", "async")
+        client = analysis_client()
+        agreed_before = GATE_AGREEMENT.value(decision="accept", agreed="true")
+        ai = ValidatorAI(client=client)
+
+        first = await self._process(ai, tmp_path, "report.txt", REPORT)
+        assert first['provisional'] is True
+        assert first['gate']['gpt_analysis'] == 'scheduled'
+
+        await drain_background()
+
+        client.chat.completions.create.assert_awaited_once()
+        assert GATE_AGREEMENT.value(decision="accept", agreed="true") == agreed_before + 1
+        assert 'llm' not in first['timings']
+
+        # Reenvio do mesmo documento: resultado definitivo do índice
+        again = await self._process(ai, tmp_path, "report-copy.txt", REPORT)
+        assert 'provisional' not in again
+        assert again['analysis']['full_text'] == ANALYSIS
+        assert get_report_index().find_analysis(clean(REPORT))['exact']
+
+    async def test_uncertain_document_goes_to_gpt(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE", "skip")
+        client = analysis_client()
+        text = (FIXTURES / "JORC_gold_asx.txt").read_text(encoding="utf-8")
+
+        result = await self._process(ValidatorAI(client=client), tmp_path, "jorc.txt", text)
+
+        assert 'provisional' not in result
+        assert result['usage']['calls'] == 1
+
+    async def test_off_mode_sends_everything_to_gpt(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("QIVO_VALIDATOR_GATE", "off")
+        client = analysis_client()
+
+        result = await self._process(ValidatorAI(client=client), tmp_path, "memo.txt", OFF_TOPIC)
+
+        assert 'gate' not in result
+        client.chat.completions.create.assert_awaited_once()
@@ -0,0 +1,41 @@
+"""
+Configuração compartilhada dos testes
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    """Dados persistidos pelos engines (QIVO_DATA_DIR) ficam no tmp do teste"""
+    from src.ai.core.bridge.comparisons import set_comparison_matrix
+    from src.ai.core.bridge.memory import set_translation_memory
+    from src.ai.core.llm.ledger import set_ledger
+    from src.ai.core.validator.dedup import set_report_index
+
+    monkeypatch.setenv("QIVO_DATA_DIR", str(tmp_path / "data"))
+    set_comparison_matrix(None)
+    set_translation_memory(None)
+    set_report_index(None)
+    set_ledger(None)
+    yield
+    set_comparison_matrix(None)
+    set_translation_memory(None)
+    set_report_index(None)
+    set_ledger(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_layers():
+    """Governor, resiliência, roteador e clientes LLM do processo recriados a cada teste"""
+    from src.ai.core.llm import reset_llm_client, set_governor, set_resilience, set_router
+
+    def reset():
+        set_governor(None)
+        set_resilience(None)
+        set_router(None)
+        reset_llm_client()
+
+    reset()
+    yield
+    reset()
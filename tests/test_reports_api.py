@@ -0,0 +1,105 @@
+"""
+Testes da listagem de relatórios (paginação por cursor)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.modules.reports.models import Report
+
+
+@pytest.fixture
+def client():
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "TESTING": True
+    })
+    with app.app_context():
+        db.create_all()
+
+        base = datetime(2025, 11, 1, 12, 0, 0)
+        for i in range(25):
+            db.session.add(Report(
+                title=f"Relatório {i}",
+                content="x" * 100,
+                status="Validado" if i % 2 else "Pendente",
+                # Pares de relatórios com o mesmo created_at exercitam o desempate por id
+                created_at=base + timedelta(minutes=i // 2)
+            ))
+        db.session.commit()
+
+        yield app.test_client()
+
+        db.drop_all()
+
+
+def _all_pages(client, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        res = client.get("/reports", query_string=query)
+        assert res.status_code == 200
+        body = res.get_json()
+        items.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return items, pages
+
+
+def test_list_paginates_without_gaps_or_duplicates(client):
+    items, pages = _all_pages(client, limit=7)
+
+    assert pages == 4
+    assert len(items) == 25
+    assert len({item["id"] for item in items}) == 25
+
+    keys = [(item["created_at"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_list_filters_by_status(client):
+    items, _ = _all_pages(client, limit=5, status="Validado")
+
+    assert len(items) == 12
+    assert all(item["status"] == "Validado" for item in items)
+
+
+def test_list_default_projection_omits_heavy_fields(client):
+    body = client.get("/reports?limit=3").get_json()
+
+    assert set(body["items"][0]) == {"id", "title", "status", "created_at"}
+
+
+def test_list_field_projection(client):
+    body = client.get("/reports?limit=3&fields=id,content").get_json()
+
+    assert set(body["items"][0]) == {"id", "content"}
+    assert body["next_cursor"] is not None
+
+
+def test_list_rejects_unknown_field(client):
+    res = client.get("/reports?fields=id,senha")
+    assert res.status_code == 400
+
+
+def test_list_rejects_invalid_cursor(client):
+    res = client.get("/reports?cursor=nao-e-um-cursor")
+    assert res.status_code == 400
+
+
+def test_status_query_uses_composite_index(client):
+    with client.application.app_context():
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT id FROM reports WHERE status = 'Pendente' "
+            "ORDER BY created_at DESC, id DESC LIMIT 50"
+        )).all()
+
+    detail = " ".join(str(row[-1]) for row in plan)
+    assert "ix_reports_status_created_at_id" in detail
+    assert "TEMP B-TREE" not in detail
@@ -0,0 +1,110 @@
+"""
+Benchmark de cold start (python -X importtime)
+
+Garante que subir os apps (FastAPI em main_ai.py e Flask em wsgi.py) e
+responder aos health checks não importa dependências pesadas de IA;
+elas só devem ser carregadas no primeiro uso real de um engine.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que só podem ser carregados sob demanda
+HEAVY_MODULES = ["openai", "PyPDF2", "docx", "langchain"]
+
+# Orçamento de import (ms, soma do tempo próprio de todos os módulos)
+STARTUP_BUDGET_MS = int(os.getenv("QIVO_STARTUP_BUDGET_MS", "3000"))
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _importtime(code):
+    """Executa `code` com -X importtime e retorna (módulos, total_ms, stdout)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(1))
+
+    total_ms = sum(modules.values()) / 1000
+    return modules, total_ms, proc.stdout
+
+
+def _top_level(modules):
+    return {name.split(".")[0] for name in modules}
+
+
+@pytest.mark.parametrize("entrypoint", ["main_ai", "wsgi"])
+def test_startup_does_not_import_heavy_modules(entrypoint):
+    """Importar o entrypoint não pode carregar openai/PyPDF2/docx/langchain"""
+    modules, total_ms, _ = _importtime(f"import {entrypoint}")
+
+    loaded = _top_level(modules) & set(HEAVY_MODULES)
+    assert not loaded, f"{entrypoint} importou módulos pesados: {sorted(loaded)}"
+
+    assert total_ms < STARTUP_BUDGET_MS, (
+        f"{entrypoint}: {len(modules)} módulos, {total_ms:.0f} ms de import "
+        f"(limite {STARTUP_BUDGET_MS} ms)"
+    )
+
+
+def test_fastapi_health_endpoints_stay_light():
+    """Health checks do FastAPI respondem sem inicializar engines"""
+    code = """
+import json, sys
+from fastapi.testclient import TestClient
+import main_ai
+client = TestClient(main_ai.app)
+codes = {p: client.get(p).status_code for p in
+         ["/health", "/ai/health", "/api/bridge/health", "/api/radar/health"]}
+print(json.dumps({"codes": codes, "modules": sorted(sys.modules)}))
+"""
+    _, _, stdout = _importtime(code)
+    result = json.loads(stdout.strip().splitlines()[-1])
+
+    assert all(code == 200 for code in result["codes"].values()), result["codes"]
+    loaded = _top_level(result["modules"]) & set(HEAVY_MODULES)
+    assert not loaded, f"health checks importaram: {sorted(loaded)}"
+
+
+def test_flask_health_endpoints_stay_light():
+    """Health checks do Flask respondem sem inicializar engines"""
+    code = """
+import json, sys
+from wsgi import app
+client = app.test_client()
+codes = {p: client.get(p).status_code for p in ["/health", "/radar/health", "/bridge/status"]}
+print(json.dumps({"codes": codes, "modules": sorted(sys.modules)}))
+"""
+    _, _, stdout = _importtime(code)
+    result = json.loads(stdout.strip().splitlines()[-1])
+
+    assert all(code == 200 for code in result["codes"].values()), result["codes"]
+    loaded = _top_level(result["modules"]) & set(HEAVY_MODULES)
+    assert not loaded, f"health checks importaram: {sorted(loaded)}"
+
+
+def test_engine_loads_openai_on_first_use(monkeypatch):
+    """O engine ainda carrega o cliente OpenAI quando é de fato criado"""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key-12345")
+    from src.ai.core.bridge import BridgeAI
+
+    engine = BridgeAI()
+    assert engine.client is not None
+    assert "openai" in sys.modules
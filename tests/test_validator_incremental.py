@@ -0,0 +1,207 @@
+"""
+Testes da revalidação incremental de relatórios (/validator/report/<id>)
+"""
+
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.modules.reports.models import Report
+from app.services import ai_validator
+from src.ai.core.validator.scoring import ComplianceScorer
+from src.ai.core.validator.sections import diff_sections, split_sections
+
+
+SECTIONS = [
+    ("1. Introduction", "The ACME project is located in Western Australia. " * 20),
+    ("2. Geology", "Gold mineralisation is hosted in quartz veins within basalt. " * 20),
+    ("3. Sampling and QA/QC", "Sampling used certified reference material and blanks every 20 samples. " * 20),
+    ("4. Mineral Resource Estimate", "The Mineral Resource is classified as Indicated and Inferred under JORC. " * 20),
+    ("5. Competent Person", "The Competent Person is a member of the AusIMM. " * 10),
+]
+
+
+def build_report(sections=SECTIONS):
+    return "\n\n".join(f"{title}\n{body}" for title, body in sections)
+
+
+CONSOLIDATED = "Análise GPT consolidada: JORC, competent person, QA/QC e sampling descritos."
+
+
+class FakeResponses:
+    """Responde no formato em blocos: '### [n]' por seção com TEXTO e '### CONSOLIDADO'"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def create(self, model, input):
+        self.inputs.append(input)
+        blocks = [
+            f"### [{n}]\nAnálise GPT da seção {n} ({len(self.inputs)})"
+            for n in re.findall(r"^\[(\d+)\][^\n]* — TEXTO:$", input, re.M)
+        ]
+        if "### CONSOLIDADO" in input:
+            blocks.append(f"### CONSOLIDADO\n{CONSOLIDATED}")
+        text = "\n\n".join(blocks)
+        return SimpleNamespace(output=[SimpleNamespace(content=[SimpleNamespace(text=text)])])
+
+
+@pytest.fixture
+def gpt(monkeypatch):
+    fake = SimpleNamespace(responses=FakeResponses())
+    monkeypatch.setattr(ai_validator, "_get_client", lambda: fake)
+    return fake.responses
+
+
+@pytest.fixture
+def client():
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "TESTING": True
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Report(id=1, title="ACME", content=build_report()))
+        db.session.commit()
+
+        yield app.test_client()
+
+        db.drop_all()
+
+
+def _edit_report(content):
+    report = db.session.get(Report, 1)
+    report.content = content
+    db.session.commit()
+
+
+def test_split_sections_by_heading():
+    sections = split_sections(build_report())
+
+    assert [s["title"] for s in sections] == [title for title, _ in SECTIONS]
+    assert len({s["fingerprint"] for s in sections}) == len(SECTIONS)
+
+
+def test_long_sections_are_subdivided():
+    body = "\n\n".join(f"Paragraph {i}. " + "Drilling results. " * 40 for i in range(10))
+    sections = split_sections(f"1. Drilling\n{body}", max_chars=2000)
+
+    assert len(sections) > 3
+    assert all(len(s["text"]) <= 2000 for s in sections)
+    assert {s["title"] for s in sections} == {"1. Drilling"}
+
+
+def test_diff_ignores_local_fallback_analyses():
+    sections = split_sections(build_report())
+    previous = [
+        {"fingerprint": sections[0]["fingerprint"], "analysis": "ok", "source": "gpt"},
+        {"fingerprint": sections[1]["fingerprint"], "analysis": "offline", "source": "local"},
+        {"fingerprint": "removida", "analysis": "ok", "source": "gpt"},
+    ]
+
+    diff = diff_sections(sections, previous)
+
+    assert len(diff["changed"]) == len(sections) - 1
+    assert diff["removed"] == 1
+
+
+def test_first_validation_analyzes_every_section_in_one_call(client, gpt):
+    res = client.post("/validator/report/1")
+
+    body = res.get_json()
+    assert res.status_code == 200
+    assert len(gpt.inputs) == 1
+    assert all(body_text[:40] in gpt.inputs[0] for _, body_text in SECTIONS)
+    assert body["incremental"]["reanalyzed"] == len(SECTIONS)
+    assert body["incremental"]["llm_calls"] == 1
+    assert {s["source"] for s in body["sections"]} == {"gpt"}
+    assert body["compliance"]["compliance_score"] > 0
+
+
+def test_score_comes_from_consolidated_analysis(client, gpt):
+    body = client.post("/validator/report/1").get_json()
+
+    assert body["consolidated"] == {"analysis": CONSOLIDATED, "source": "gpt"}
+    assert body["compliance"] == ComplianceScorer().evaluate(CONSOLIDATED)
+
+    # Mais seções com o mesmo conteúdo não aumentam a pontuação
+    with client.application.app_context():
+        _edit_report(build_report(SECTIONS + [(f"{i}. Appendix", "Drill hole collar table. " * 20) for i in range(6, 16)]))
+    more = client.post("/validator/report/1?full=1").get_json()
+    assert more["incremental"]["sections"] == len(SECTIONS) + 10
+    assert more["compliance"] == body["compliance"]
+
+
+def test_revalidation_only_sends_changed_sections(client, gpt):
+    client.post("/validator/report/1")
+    edited = list(SECTIONS)
+    edited[3] = (edited[3][0], edited[3][1] + "Measured Resources were added after infill drilling.")
+    edited.append(("6. Conclusions", "The project warrants further drilling."))
+    with client.application.app_context():
+        _edit_report(build_report(edited))
+
+    body = client.post("/validator/report/1").get_json()
+
+    assert len(gpt.inputs) == 2
+    assert "Measured Resources were added" in gpt.inputs[-1]
+    assert "warrants further drilling" in gpt.inputs[-1]
+    # Seções sem alteração vão só com a análise anterior
+    assert "quartz veins within basalt" not in gpt.inputs[-1]
+    assert "ANÁLISE ANTERIOR" in gpt.inputs[-1]
+    assert body["incremental"]["reused"] == len(SECTIONS) - 1
+    assert body["incremental"]["chars_reanalyzed"] < body["incremental"]["chars_total"] / 3
+    assert [s["reused"] for s in body["sections"]] == [True, True, True, False, True, False]
+
+
+def test_unchanged_resubmission_makes_no_calls(client, gpt):
+    first = client.post("/validator/report/1").get_json()
+    second = client.post("/validator/report/1").get_json()
+
+    assert len(gpt.inputs) == 1
+    assert second["incremental"]["reanalyzed"] == 0
+    assert second["incremental"]["llm_calls"] == 0
+    assert second["compliance"] == first["compliance"]
+
+
+def test_full_revalidation_on_request(client, gpt):
+    client.post("/validator/report/1")
+    client.post("/validator/report/1?full=1")
+
+    assert len(gpt.inputs) == 2
+
+
+def test_removed_section_is_reconsolidated(client, gpt):
+    client.post("/validator/report/1")
+    with client.application.app_context():
+        _edit_report(build_report(SECTIONS[:-1]))
+
+    body = client.post("/validator/report/1").get_json()
+
+    assert len(gpt.inputs) == 2
+    assert body["incremental"]["removed"] == 1
+    assert body["incremental"]["reanalyzed"] == 0
+
+
+def test_large_reports_are_batched(client, gpt, monkeypatch):
+    monkeypatch.setattr(ai_validator, "REPORT_BATCH_CHARS", 2500)
+
+    body = client.post("/validator/report/1").get_json()
+
+    # Lotes de seções em paralelo + uma chamada para a consolidada
+    assert len(gpt.inputs) == body["incremental"]["llm_calls"] > 2
+    assert {s["source"] for s in body["sections"]} == {"gpt"}
+    assert "### CONSOLIDADO" in gpt.inputs[-1] and "TEXTO:" not in gpt.inputs[-1]
+    assert body["consolidated"]["source"] == "gpt"
+
+
+def test_offline_falls_back_to_local_analysis(client, monkeypatch):
+    monkeypatch.setattr(ai_validator, "_get_client", lambda: None)
+
+    body = client.post("/validator/report/1").get_json()
+
+    assert body["consolidated"]["source"] == "local"
+    assert {s["source"] for s in body["sections"]} == {"local"}
+    assert body["incremental"]["llm_calls"] == 0